@@ -0,0 +1,38 @@
+"""Agent execution latency breakdown
+
+Revision ID: 3f1c2a7d9e10
+Revises: 9b8265d4ad72
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9e10'
+down_revision: Union[str, Sequence[str], None] = '9b8265d4ad72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('agent_executions', sa.Column(
+        'queue_seconds', sa.Float(), nullable=True,
+        comment='Time LLM calls waited for a scheduler slot in seconds'))
+    op.add_column('agent_executions', sa.Column(
+        'time_to_first_token_seconds', sa.Float(), nullable=True,
+        comment='Time until LLM calls produced their first token in seconds'))
+    op.add_column('agent_executions', sa.Column(
+        'generation_seconds', sa.Float(), nullable=True,
+        comment='Time LLM calls spent generating completions in seconds'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('agent_executions', 'generation_seconds')
+    op.drop_column('agent_executions', 'time_to_first_token_seconds')
+    op.drop_column('agent_executions', 'queue_seconds')
@@ -0,0 +1,83 @@
+"""Workflow checkpoints
+
+Revision ID: 7c4e1b2f8a31
+Revises: 3f1c2a7d9e10
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e1b2f8a31'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a7d9e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'workflow_checkpoints',
+        sa.Column('thread_id', sa.String(length=255), nullable=False, comment='Workflow thread (session) identifier'),
+        sa.Column('checkpoint_ns', sa.String(length=255), nullable=False,
+                  comment='Checkpoint namespace (empty for the root graph)'),
+        sa.Column('checkpoint_id', sa.String(length=64), nullable=False,
+                  comment='Monotonically increasing checkpoint identifier'),
+        sa.Column('parent_checkpoint_id', sa.String(length=64), nullable=True,
+                  comment='Checkpoint this one was created from'),
+        sa.Column('checkpoint_type', sa.String(length=50), nullable=False,
+                  comment='Serialization type of the checkpoint'),
+        sa.Column('checkpoint', sa.LargeBinary(), nullable=False,
+                  comment='Serialized checkpoint without channel values'),
+        sa.Column('metadata_type', sa.String(length=50), nullable=False,
+                  comment='Serialization type of the metadata'),
+        sa.Column('metadata', sa.LargeBinary(), nullable=False, comment='Serialized checkpoint metadata'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False,
+                  comment='When the checkpoint was stored'),
+        sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id', name=op.f('pk_workflow_checkpoints')),
+    )
+    op.create_index('idx_workflow_checkpoints_created_at', 'workflow_checkpoints', ['created_at'], unique=False)
+
+    op.create_table(
+        'workflow_checkpoint_blobs',
+        sa.Column('thread_id', sa.String(length=255), nullable=False, comment='Workflow thread (session) identifier'),
+        sa.Column('checkpoint_ns', sa.String(length=255), nullable=False,
+                  comment='Checkpoint namespace (empty for the root graph)'),
+        sa.Column('channel', sa.String(length=255), nullable=False, comment='State channel name'),
+        sa.Column('version', sa.String(length=64), nullable=False, comment='Channel version'),
+        sa.Column('value_type', sa.String(length=50), nullable=False,
+                  comment="Serialization type of the value ('empty' for a cleared channel)"),
+        sa.Column('value', sa.LargeBinary(), nullable=True, comment='Serialized channel value'),
+        sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'channel', 'version',
+                                name=op.f('pk_workflow_checkpoint_blobs')),
+    )
+
+    op.create_table(
+        'workflow_checkpoint_writes',
+        sa.Column('thread_id', sa.String(length=255), nullable=False, comment='Workflow thread (session) identifier'),
+        sa.Column('checkpoint_ns', sa.String(length=255), nullable=False,
+                  comment='Checkpoint namespace (empty for the root graph)'),
+        sa.Column('checkpoint_id', sa.String(length=64), nullable=False,
+                  comment='Checkpoint the write belongs to'),
+        sa.Column('task_id', sa.String(length=255), nullable=False, comment='Task that produced the write'),
+        sa.Column('idx', sa.Integer(), nullable=False,
+                  comment='Index of the write within the task (negative for special writes)'),
+        sa.Column('channel', sa.String(length=255), nullable=False, comment='Channel written to'),
+        sa.Column('value_type', sa.String(length=50), nullable=False, comment='Serialization type of the value'),
+        sa.Column('value', sa.LargeBinary(), nullable=True, comment='Serialized written value'),
+        sa.Column('task_path', sa.Text(), nullable=False, comment='Path of the task that produced the write'),
+        sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id', 'task_id', 'idx',
+                                name=op.f('pk_workflow_checkpoint_writes')),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('workflow_checkpoint_writes')
+    op.drop_table('workflow_checkpoint_blobs')
+    op.drop_index('idx_workflow_checkpoints_created_at', table_name='workflow_checkpoints')
+    op.drop_table('workflow_checkpoints')
@@ -13,6 +13,7 @@ from typing import Any, Dict, List, Optional
 from loguru import logger
 
 from app.agents.base_agent import BaseAgent
+from app.core.prompt_budget import PromptBuilder
 
 
 class ArchitectureAgent(BaseAgent):
@@ -215,17 +216,22 @@ Be practical, specific, and focus on actionable architecture decisions."""
         domain = input_data.get("domain", "cloud-native")
         session_id = input_data.get("session_id")
         
-        # 1. Build comprehensive architecture design prompt
-        prompt = self._build_architecture_prompt(requirements, constraints, preferences, domain)
+        # 1. Build comprehensive architecture design prompt within the context window
+        system_prompt = self.get_system_prompt()
+        prompt = await self._fit_prompt(
+            self._architecture_prompt_sections(requirements, constraints, preferences, domain),
+            self._architecture_query(requirements, domain),
+            system_prompt
+        )
         
         # 2. Call LLM for architecture design
         from langchain_core.messages import SystemMessage, HumanMessage
         messages = [
-            SystemMessage(content=self.get_system_prompt()),
+            SystemMessage(content=system_prompt),
             HumanMessage(content=prompt)
         ]
         
-        response = await self._call_llm(messages)
+        response = await self._call_llm(messages, validate=self._parse_json_response)
         
         # 3. Parse and validate response
         architecture_data = self._parse_json_response(response)
@@ -244,7 +250,8 @@ Be practical, specific, and focus on actionable architecture decisions."""
             "architecture_timestamp": self.start_time.isoformat() if self.start_time else None,
             "agent_version": self.agent_version,
             "requirements_summary": self._summarize_requirements(requirements),
-            "design_notes": self._generate_design_notes(enhanced_data, requirements)
+            "design_notes": self._generate_design_notes(enhanced_data, requirements),
+            "prompt_budget": self.last_prompt_report
         }
         
         logger.info(
@@ -281,17 +288,22 @@ Be practical, specific, and focus on actionable architecture decisions."""
         # 1. Get existing architecture context from knowledge base
         context = await self._get_brownfield_context(project_id, requirements, existing_architecture)
         
-        # 2. Build enhanced prompt with context
-        prompt = self._build_brownfield_prompt(requirements, constraints, preferences, domain, context)
+        # 2. Build enhanced prompt with context within the context window
+        system_prompt = self.get_brownfield_system_prompt()
+        prompt = await self._fit_prompt(
+            self._brownfield_prompt_sections(requirements, constraints, preferences, domain, context),
+            self._architecture_query(requirements, domain),
+            system_prompt
+        )
         
         # 3. Call LLM with brownfield system prompt
         from langchain_core.messages import SystemMessage, HumanMessage
         messages = [
-            SystemMessage(content=self.get_brownfield_system_prompt()),
+            SystemMessage(content=system_prompt),
             HumanMessage(content=prompt)
         ]
         
-        response = await self._call_llm(messages)
+        response = await self._call_llm(messages, validate=self._parse_json_response)
         
         # 4. Parse and validate response
         architecture_data = self._parse_json_response(response)
@@ -321,7 +333,8 @@ Be practical, specific, and focus on actionable architecture decisions."""
             "design_notes": self._generate_design_notes(enhanced_data, requirements),
             "existing_services_count": len(context.get("existing_services", [])),
             "similar_features_found": len(context.get("similar_features", [])),
-            "context_quality": self._assess_context_quality(context)
+            "context_quality": self._assess_context_quality(context),
+            "prompt_budget": self.last_prompt_report
         }
         
         logger.info(
@@ -486,64 +499,72 @@ Focus on practical integration strategies and minimal disruption to existing sys
             context: Existing architecture context
             
         Returns:
-            Formatted prompt string for brownfield design
+            Formatted prompt string for brownfield design with all context
+        """
+        return self._brownfield_prompt_sections(requirements, constraints, preferences, domain, context).render()
+
+    def _brownfield_prompt_sections(
+        self,
+        requirements: Dict[str, Any],
+        constraints: Dict[str, Any],
+        preferences: List[str],
+        domain: str,
+        context: Dict[str, Any]
+    ) -> PromptBuilder:
         """
-        # Extract key information from requirements
-        business_goals = requirements.get("structured_requirements", {}).get("business_goals", [])
-        functional_reqs = requirements.get("structured_requirements", {}).get("functional_requirements", [])
-        non_functional_reqs = requirements.get("structured_requirements", {}).get("non_functional_requirements", {})
-        constraints_list = requirements.get("structured_requirements", {}).get("constraints", [])
-        stakeholders = requirements.get("structured_requirements", {}).get("stakeholders", [])
+        Build the brownfield architecture design prompt as sections.
+        
+        New requirements and existing architecture context are
+        compressible; design instructions and the output format are always
+        included.
         
+        Args:
+            requirements: New requirements
+            constraints: Organizational constraints
+            preferences: Architecture preferences
+            domain: Project domain
+            context: Existing architecture context
+            
+        Returns:
+            Prompt builder
+        """
         # Extract existing architecture information
         existing_services = context.get("existing_services", [])
         similar_features = context.get("similar_features", [])
         tech_stack = context.get("technology_stack", {})
         integration_points = context.get("integration_points", [])
         
-        # Build prompt in parts to avoid f-string issues with JSON
-        prompt_parts = [
+        builder = PromptBuilder(separator="\n\n")
+        builder.add("header", "\n".join([
             "Design architecture for new feature in EXISTING system.",
             "",
             f"PROJECT DOMAIN: {domain}",
             "",
             "NEW REQUIREMENTS:",
-            "Business Goals:",
-            *[f"- {goal}" for goal in business_goals[:5]],
-            "",
-            "Functional Requirements:",
-            *[f"- {req}" for req in functional_reqs[:10]],
-            "",
-            "Non-Functional Requirements:"
-        ]
-        
-        for category, reqs in non_functional_reqs.items():
-            if reqs:
-                prompt_parts.append(f"\n{category.upper()}:")
-                for req in reqs[:3]:
-                    prompt_parts.append(f"- {req}")
-        
-        prompt_parts.extend([
-            "",
-            "Constraints:",
-            *[f"- {constraint}" for constraint in constraints_list[:5]],
-            "",
-            "Stakeholders:",
-            *[f"- {stakeholder.get('name', 'Unknown')} ({stakeholder.get('role', 'Unknown')}): {', '.join(stakeholder.get('concerns', []))}" for stakeholder in stakeholders[:5]],
-            "",
-            "EXISTING ARCHITECTURE CONTEXT:",
-            f"Existing Services ({len(existing_services)}):",
-            *[f"- {service.get('name', 'Unknown')} ({service.get('type', 'service')}): {service.get('description', 'No description')} - Tech: {service.get('technology', 'Unknown')}" for service in existing_services[:10]],
-            "",
-            "Current Technology Stack:",
-            *[f"- {tech}: {count} services" for tech, count in list(tech_stack.items())[:10]],
-            "",
-            f"Similar Features Found ({len(similar_features)}):",
-            *[f"- {feature.get('description', 'No description')} (Score: {feature.get('score', 0):.2f})" for feature in similar_features[:5]],
-            "",
-            "Integration Points:",
-            *([f"- {point}" for point in integration_points[:5]] if integration_points else ["None identified"]),
-            "",
+        ]), required=True)
+        self._requirements_sections(builder, requirements, {
+            "business_goals": "Business Goals:",
+            "functional": "Functional Requirements:",
+            "non_functional": "Non-Functional Requirements:",
+            "constraints": "Constraints:",
+            "stakeholders": "Stakeholders:",
+        })
+        builder.add("existing_architecture_title", "EXISTING ARCHITECTURE CONTEXT:", required=True)
+        builder.add("existing_services", "\n".join(
+            f"- {service.get('name', 'Unknown')} ({service.get('type', 'service')}): {service.get('description', 'No description')} - Tech: {service.get('technology', 'Unknown')}"
+            for service in existing_services
+        ), title=f"Existing Services ({len(existing_services)}):", weight=1.2)
+        builder.add("technology_stack", "\n".join(
+            f"- {tech}: {count} services" for tech, count in tech_stack.items()
+        ), title="Current Technology Stack:")
+        builder.add("similar_features", "\n".join(
+            f"- {feature.get('description', 'No description')} (Score: {feature.get('score', 0):.2f})"
+            for feature in similar_features
+        ), title=f"Similar Features Found ({len(similar_features)}):")
+        builder.add("integration_points", "\n".join(
+            f"- {point}" for point in integration_points
+        ) if integration_points else "None identified", title="Integration Points:", weight=1.1)
+        builder.add("instructions", "\n".join([
             "ADDITIONAL CONSTRAINTS:",
             *([f"- {key}: {value}" for key, value in constraints.items()] if constraints else ["None specified"]),
             "",
@@ -582,11 +603,8 @@ Focus on practical integration strategies and minimal disruption to existing sys
             "8. Consider operational impact",
             "",
             "Output ONLY the JSON, wrapped in code blocks. Be comprehensive and detailed."
-        ])
-        
-        prompt = "\n".join(prompt_parts)
-
-        return prompt
+        ]), required=True)
+        return builder
 
     async def _generate_integration_strategy(
         self,
@@ -944,49 +962,89 @@ Focus on practical integration strategies and minimal disruption to existing sys
             domain: Project domain
             
         Returns:
-            Formatted prompt string
+            Formatted prompt string with all context
         """
-        # Extract key information from requirements
-        business_goals = requirements.get("structured_requirements", {}).get("business_goals", [])
-        functional_reqs = requirements.get("structured_requirements", {}).get("functional_requirements", [])
-        non_functional_reqs = requirements.get("structured_requirements", {}).get("non_functional_requirements", {})
-        constraints_list = requirements.get("structured_requirements", {}).get("constraints", [])
-        stakeholders = requirements.get("structured_requirements", {}).get("stakeholders", [])
-        
-        prompt = f"""Design a comprehensive system architecture for the following requirements:
-
-PROJECT DOMAIN: {domain}
+        return self._architecture_prompt_sections(requirements, constraints, preferences, domain).render()
 
-BUSINESS GOALS:
-{chr(10).join(f"- {goal}" for goal in business_goals[:5])}
+    def _requirements_sections(self, builder: PromptBuilder, requirements: Dict[str, Any], titles: Dict[str, str]) -> None:
+        """
+        Add the structured requirements as compressible prompt sections.
+        
+        Args:
+            builder: Prompt builder to add to
+            requirements: Structured requirements from RequirementsAgent
+            titles: Section titles keyed by 'business_goals', 'functional',
+                'non_functional', 'constraints' and 'stakeholders'
+        """
+        structured = requirements.get("structured_requirements", {})
+        non_functional_reqs = structured.get("non_functional_requirements", {})
+        
+        builder.add("business_goals", "\n".join(f"- {goal}" for goal in structured.get("business_goals", [])),
+                    title=titles["business_goals"], weight=1.2)
+        builder.add("functional_requirements", "\n".join(f"- {req}" for req in structured.get("functional_requirements", [])),
+                    title=titles["functional"])
+        if isinstance(non_functional_reqs, dict):
+            non_functional_lines = [
+                f"- {category.upper()}: {req}"
+                for category, reqs in non_functional_reqs.items() if reqs
+                for req in reqs
+            ]
+        else:
+            non_functional_lines = [f"- {req}" for req in non_functional_reqs]
+        builder.add("non_functional_requirements", "\n".join(non_functional_lines), title=titles["non_functional"])
+        builder.add("constraints", "\n".join(f"- {constraint}" for constraint in structured.get("constraints", [])),
+                    title=titles["constraints"], weight=1.1)
+        builder.add("stakeholders", "\n".join(
+            f"- {stakeholder.get('name', 'Unknown')} ({stakeholder.get('role', 'Unknown')}): {', '.join(stakeholder.get('concerns', []))}"
+            for stakeholder in structured.get("stakeholders", []) if isinstance(stakeholder, dict)
+        ), title=titles["stakeholders"], weight=0.8)
 
-FUNCTIONAL REQUIREMENTS:
-{chr(10).join(f"- {req}" for req in functional_reqs[:10])}
+    @staticmethod
+    def _architecture_query(requirements: Dict[str, Any], domain: str) -> str:
+        """Task description requirement items and context are ranked against."""
+        structured = requirements.get("structured_requirements", {})
+        goals = "; ".join(str(goal) for goal in structured.get("business_goals", [])[:5])
+        return f"Architecture design for a {domain} system. Goals: {goals}"
 
-NON-FUNCTIONAL REQUIREMENTS:
-"""
+    def _architecture_prompt_sections(
+        self,
+        requirements: Dict[str, Any],
+        constraints: Dict[str, Any],
+        preferences: List[str],
+        domain: str
+    ) -> PromptBuilder:
+        """
+        Build the architecture design prompt as sections.
         
-        for category, reqs in non_functional_reqs.items():
-            if reqs:
-                prompt += f"\n{category.upper()}:"
-                for req in reqs[:3]:  # Limit to first 3 per category
-                    prompt += f"\n- {req}"
+        Requirement lists are compressible; the output schema and
+        instructions are always included.
         
-        prompt += f"""
-
-CONSTRAINTS:
-{chr(10).join(f"- {constraint}" for constraint in constraints_list[:5])}
-
-STAKEHOLDERS:
-{chr(10).join(f"- {stakeholder.get('name', 'Unknown')} ({stakeholder.get('role', 'Unknown')}): {', '.join(stakeholder.get('concerns', []))}" for stakeholder in stakeholders[:5])}
+        Args:
+            requirements: Structured requirements from RequirementsAgent
+            constraints: Organizational constraints
+            preferences: Architecture style preferences
+            domain: Project domain
+            
+        Returns:
+            Prompt builder
+        """
+        builder = PromptBuilder()
+        builder.add("header", f"""Design a comprehensive system architecture for the following requirements:
 
-ADDITIONAL CONSTRAINTS:
+PROJECT DOMAIN: {domain}""", required=True)
+        self._requirements_sections(builder, requirements, {
+            "business_goals": "BUSINESS GOALS:",
+            "functional": "FUNCTIONAL REQUIREMENTS:",
+            "non_functional": "NON-FUNCTIONAL REQUIREMENTS:",
+            "constraints": "CONSTRAINTS:",
+            "stakeholders": "STAKEHOLDERS:",
+        })
+        builder.add("preferences", f"""ADDITIONAL CONSTRAINTS:
 {chr(10).join(f"- {key}: {value}" for key, value in constraints.items()) if constraints else "None specified"}
 
 ARCHITECTURE PREFERENCES:
-{chr(10).join(f"- {pref}" for pref in preferences) if preferences else "No specific preferences"}
-
-Please design a comprehensive architecture and provide the following in JSON format:
+{chr(10).join(f"- {pref}" for pref in preferences) if preferences else "No specific preferences"}""", required=True)
+        builder.add("output_format", f"""Please design a comprehensive architecture and provide the following in JSON format:
 
 {{
   "architecture_overview": {{
@@ -1082,9 +1140,8 @@ INSTRUCTIONS:
 7. Provide clear implementation phases with realistic timelines
 8. Identify and mitigate key risks
 
-Output ONLY the JSON, wrapped in code blocks. Be comprehensive and detailed."""
-
-        return prompt
+Output ONLY the JSON, wrapped in code blocks. Be comprehensive and detailed.""", required=True)
+        return builder
 
     async def _generate_c4_diagram(self, architecture_data: Dict[str, Any]) -> str:
         """
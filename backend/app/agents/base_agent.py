@@ -7,7 +7,6 @@ including LLM initialization, execution tracking, cost calculation, and error ha
 
 import asyncio
 import json
-import re
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
@@ -15,13 +14,22 @@ from uuid import uuid4
 
 import httpx
 from langchain_anthropic import ChatAnthropic
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.deepseek_client import ChatDeepSeek
+from app.core.json_extraction import find_json
+from app.core.llm_cache import get_llm_cache
+from app.core.llm_scheduler import Priority, llm_slot
+from app.core.llm_streaming import current_llm_stream
+from app.core.prompt_budget import PromptBuilder, prompt_token_budget
+from app.core.token_usage import (
+    CallTimer, UsageAccumulator, call_latency, count_tokens, record_llm_usage, track_llm_usage,
+    usage_from_message
+)
 from app.core.error_handling import (
     with_error_handling, RetryConfig, FallbackConfig, 
     LLMError, LLMTimeoutError, LLMProviderError, error_handler
@@ -64,6 +72,10 @@ class BaseAgent(ABC):
         "deepseek-chat": {"prompt": 0.0, "completion": 0.0},
     }
 
+    # Scheduling class of this agent's LLM calls (None uses the current
+    # llm_priority context, which defaults to workflow priority)
+    llm_priority: Optional[Priority] = None
+
     def __init__(
         self,
         agent_type: str,
@@ -99,10 +111,12 @@ class BaseAgent(ABC):
         
         # Initialize LLM
         self.llm = self._initialize_llm()
+        self._routed_llms: Dict[tuple, Union[ChatOpenAI, ChatAnthropic, ChatDeepSeek]] = {}
         
         # Execution tracking
         self.current_execution_id: Optional[str] = None
         self.start_time: Optional[datetime] = None
+        self.last_prompt_report: Optional[Dict[str, Any]] = None
         
         logger.info(
             f"Initialized {agent_type} agent",
@@ -115,22 +129,32 @@ class BaseAgent(ABC):
             }
         )
 
-    def _initialize_llm(self) -> Union[ChatOpenAI, ChatAnthropic, ChatDeepSeek]:
+    def _initialize_llm(
+        self,
+        provider: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Union[ChatOpenAI, ChatAnthropic, ChatDeepSeek]:
         """
         Initialize LLM based on provider.
         
+        Args:
+            provider: Provider to build a client for (defaults to the agent's)
+            model: Model to build a client for (defaults to the agent's)
+        
         Returns:
             Initialized LLM instance
             
         Raises:
             ValueError: If provider is not supported
         """
+        provider = (provider or self.llm_provider).lower()
+        model = model or self.llm_model
         try:
             from app.config import settings
             
             # Prepare common parameters
             llm_params = {
-                "model": self.llm_model,
+                "model": model,
                 "temperature": self.temperature,
                 "timeout": self.timeout_seconds,
             }
@@ -139,40 +163,63 @@ class BaseAgent(ABC):
             if self.max_tokens is not None:
                 llm_params["max_tokens"] = self.max_tokens
             
-            if self.llm_provider == "openai":
+            if provider == "openai":
                 if not settings.openai_api_key:
                     raise ValueError("OpenAI API key not found in environment variables")
                 llm_params["api_key"] = settings.openai_api_key
                 return ChatOpenAI(**llm_params)
-            elif self.llm_provider == "anthropic":
+            elif provider == "anthropic":
                 if not settings.anthropic_api_key:
                     raise ValueError("Anthropic API key not found in environment variables")
                 llm_params["api_key"] = settings.anthropic_api_key
                 return ChatAnthropic(**llm_params)
-            elif self.llm_provider == "deepseek":
-                # Use DeepSeek local client
+            elif provider == "deepseek":
+                # Use DeepSeek local client; the agent's own model is the
+                # configured DeepSeek deployment
                 llm_params["base_url"] = settings.deepseek_base_url
-                llm_params["model"] = settings.deepseek_model
+                llm_params["model"] = settings.deepseek_model if model == self.llm_model else model
                 return ChatDeepSeek(**llm_params)
-            elif self.llm_provider == "ollama":
+            elif provider == "ollama":
                 # Use Ollama for fast local models
                 llm_params["base_url"] = settings.ollama_base_url
-                llm_params["model"] = self.llm_model
+                llm_params["model"] = model
                 return ChatDeepSeek(**llm_params)
             else:
-                raise ValueError(f"Unsupported LLM provider: {self.llm_provider}")
+                raise ValueError(f"Unsupported LLM provider: {provider}")
                 
         except Exception as e:
             logger.error(
                 f"Failed to initialize LLM: {str(e)}",
                 extra={
-                    "provider": self.llm_provider,
-                    "model": self.llm_model,
+                    "provider": provider,
+                    "model": model,
                     "error": str(e),
                 }
             )
             raise
 
+    def _llm_for(self, provider: str, model: str) -> Union[ChatOpenAI, ChatAnthropic, ChatDeepSeek]:
+        """
+        Get the client for a provider and model.
+        
+        The agent's own provider and model use ``self.llm``; fallback and
+        hedge targets chosen by retry_with_fallback get a client built on
+        first use and kept for later calls.
+        
+        Args:
+            provider: Provider name
+            model: Model name
+            
+        Returns:
+            LLM instance
+        """
+        if provider == self.llm_provider and model == self.llm_model:
+            return self.llm
+        key = (provider, model)
+        if key not in self._routed_llms:
+            self._routed_llms[key] = self._initialize_llm(provider, model)
+        return self._routed_llms[key]
+
     @abstractmethod
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -208,7 +255,8 @@ class BaseAgent(ABC):
 
     @with_error_handling(
         retry_config=RetryConfig(max_retries=3, base_delay=1.0, max_delay=30.0),
-        fallback_config=FallbackConfig(enable_provider_fallback=True, enable_model_fallback=True)
+        fallback_config=FallbackConfig(enable_provider_fallback=True, enable_model_fallback=True),
+        hedge=True
     )
     async def _call_llm(
         self,
@@ -218,6 +266,17 @@ class BaseAgent(ABC):
         """
         Call LLM with enhanced error handling, retry logic, and fallback mechanisms.
         
+        The ``llm_provider``, ``llm_model`` and ``timeout_seconds`` routing
+        hints set by retry_with_fallback select the client the call goes
+        to, so fallback and hedged attempts reach the model they name.
+        
+        Inside a ``stream_llm_output`` context the response is streamed and
+        each chunk forwarded as it arrives; the full text is still returned.
+        
+        A ``validate`` callable, when given, is run on a fresh response
+        before it is cached; responses it rejects by raising are returned
+        but not cached, so a malformed answer is not replayed.
+        
         Args:
             messages: List of messages to send to LLM
             **kwargs: Additional arguments for LLM call
@@ -228,34 +287,102 @@ class BaseAgent(ABC):
         Raises:
             Exception: If all retry attempts and fallbacks fail
         """
+        provider = (kwargs.pop("llm_provider", None) or self.llm_provider).lower()
+        model = kwargs.pop("llm_model", None) or self.llm_model
+        timeout_seconds = kwargs.pop("timeout_seconds", None) or self.timeout_seconds
+        validate = kwargs.pop("validate", None)
         try:
             logger.debug(
-                f"LLM call with provider: {self.llm_provider}, model: {self.llm_model}",
+                f"LLM call with provider: {provider}, model: {model}",
                 extra={
                     "agent_type": self.agent_type,
-                    "provider": self.llm_provider,
-                    "model": self.llm_model,
+                    "provider": provider,
+                    "model": model,
                 }
             )
-            
-            # Make the LLM call with timeout
-            response = await asyncio.wait_for(
-                self.llm.ainvoke(messages, **kwargs),
-                timeout=self.timeout_seconds
-            )
+            llm = self._llm_for(provider, model)
+            
+            # Identical requests are answered from the response cache. Calls
+            # with invocation options other than temperature bypass it, since
+            # those options are not part of the cache key.
+            cache = get_llm_cache() if set(kwargs) <= {"temperature"} else None
+            if cache:
+                system_prompt, prompt = self._cache_prompts(messages)
+                temperature = kwargs.get("temperature", self.temperature)
+                cached = await cache.get(provider, model, system_prompt, prompt, temperature)
+                if cached is not None:
+                    logger.debug(
+                        "LLM response served from cache",
+                        extra={"agent_type": self.agent_type, "model": model}
+                    )
+                    return cached
+            
+            # Make the LLM call with timeout once the scheduler grants a slot
+            prompt_tokens = sum(count_tokens(str(message.content)) for message in messages)
+            timer = CallTimer()
+            async with llm_slot(
+                provider,
+                model,
+                priority=self.llm_priority,
+                tokens=prompt_tokens + (self.max_tokens or 0)
+            ):
+                timer.started()
+                open_stream = current_llm_stream()
+                if open_stream is None:
+                    call = llm.ainvoke(messages, **kwargs)
+                else:
+                    on_chunk = open_stream(self.agent_type, provider=provider, model=model)
+                    call = self._stream_llm(llm, messages, on_chunk, **kwargs)
+                response = await asyncio.wait_for(call, timeout=timeout_seconds)
+                timer.stopped()
             
             if hasattr(response, 'content'):
                 content = response.content
             else:
                 content = str(response)
             
+            # Prefer the usage the provider reported over local estimates
+            usage = usage_from_message(response)
+            if usage:
+                prompt_tokens, completion_tokens = usage["prompt_tokens"], usage["completion_tokens"]
+            else:
+                completion_tokens = count_tokens(str(content))
+            record_llm_usage(
+                provider,
+                model,
+                prompt_tokens,
+                completion_tokens,
+                estimated=usage is None,
+                **call_latency(timer, usage)
+            )
+            
+            cacheable = bool(cache) and isinstance(content, str) and bool(content.strip())
+            if cacheable and validate:
+                try:
+                    validate(content)
+                except Exception as e:
+                    logger.debug(
+                        f"LLM response not cached, validation failed: {str(e)[:200]}",
+                        extra={"agent_type": self.agent_type, "model": model}
+                    )
+                    cacheable = False
+            if cacheable:
+                pricing = self.MODEL_PRICING.get(model)
+                cost = (
+                    (prompt_tokens * pricing["prompt"] + completion_tokens * pricing["completion"]) / 1000
+                    if pricing else 0.0
+                )
+                await cache.set(provider, model, system_prompt, prompt, temperature, content, cost=cost)
+            
             logger.debug(
-                f"LLM call successful",
+                "LLM call successful",
                 extra={
                     "agent_type": self.agent_type,
-                    "provider": self.llm_provider,
-                    "model": self.llm_model,
+                    "provider": provider,
+                    "model": model,
                     "response_length": len(content),
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
                 }
             )
             
@@ -266,17 +393,101 @@ class BaseAgent(ABC):
             
         except asyncio.TimeoutError as e:
             error_handler.log_error(
-                LLMTimeoutError(f"LLM call timed out after {self.timeout_seconds}s", self.llm_provider, self.llm_model),
-                {"agent_type": self.agent_type, "timeout": self.timeout_seconds}
+                LLMTimeoutError(f"LLM call timed out after {timeout_seconds}s", provider, model),
+                {"agent_type": self.agent_type, "timeout": timeout_seconds}
             )
-            raise LLMTimeoutError(f"LLM call timed out after {self.timeout_seconds}s", self.llm_provider, self.llm_model)
+            raise LLMTimeoutError(f"LLM call timed out after {timeout_seconds}s", provider, model)
         
         except Exception as e:
             error_handler.log_error(
-                LLMProviderError(f"LLM call failed: {str(e)}", self.llm_provider, self.llm_model),
+                LLMProviderError(f"LLM call failed: {str(e)}", provider, model),
                 {"agent_type": self.agent_type, "error": str(e)}
             )
-            raise LLMProviderError(f"LLM call failed: {str(e)}", self.llm_provider, self.llm_model)
+            raise LLMProviderError(f"LLM call failed: {str(e)}", provider, model)
+
+    @staticmethod
+    async def _stream_llm(
+        llm: Union[ChatOpenAI, ChatAnthropic, ChatDeepSeek],
+        messages: List[Union[SystemMessage, HumanMessage, AIMessage]],
+        on_chunk: Any,
+        **kwargs
+    ) -> BaseMessage:
+        """
+        Stream a response to a chunk callback and return it as one message.
+        
+        Args:
+            llm: LLM client
+            messages: Messages to send
+            on_chunk: Callback receiving text chunks, closed when the stream ends
+            **kwargs: Additional arguments for the LLM call
+            
+        Returns:
+            Merged response message
+        """
+        response = None
+        try:
+            async for chunk in llm.astream(messages, **kwargs):
+                response = chunk if response is None else response + chunk
+                if isinstance(chunk.content, str) and chunk.content:
+                    await on_chunk(chunk.content)
+        finally:
+            await on_chunk.close()
+        return response if response is not None else AIMessage(content="")
+
+    async def _fit_prompt(self, builder: PromptBuilder, query: str, system_prompt: str) -> str:
+        """
+        Render a prompt within this agent's model context window.
+        
+        Context sections are compressed or dropped by relevance to the
+        task when the full prompt would not fit next to the system prompt
+        and the completion budget. The report is kept in
+        ``last_prompt_report``.
+        
+        Args:
+            builder: Prompt sections
+            query: Task description the context is ranked against
+            system_prompt: System prompt sent with the prompt
+            
+        Returns:
+            Prompt text
+        """
+        budget = prompt_token_budget(self.llm_model, system_prompt, self.max_tokens)
+        prompt = await builder.build(query, budget)
+        self.last_prompt_report = prompt.report
+        if prompt.truncated:
+            logger.info(
+                f"Prompt compressed to fit {self.llm_model} context window",
+                extra={
+                    "agent_type": self.agent_type,
+                    "budget_tokens": budget,
+                    "original_tokens": prompt.report["original_tokens"],
+                    "prompt_tokens": prompt.report["prompt_tokens"],
+                    "dropped_tokens": prompt.report["dropped_tokens"],
+                    "sections": {name: info["status"] for name, info in prompt.report["sections"].items()},
+                }
+            )
+        return prompt.text
+
+    @staticmethod
+    def _cache_prompts(messages: List[Union[SystemMessage, HumanMessage, AIMessage]]) -> tuple:
+        """
+        Split messages into the system prompt and conversation used as cache key.
+        
+        Args:
+            messages: Messages sent to the LLM
+            
+        Returns:
+            Tuple of (system prompt, conversation with roles)
+        """
+        system_parts = []
+        conversation = []
+        for message in messages:
+            content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+            if isinstance(message, SystemMessage):
+                system_parts.append(content)
+            else:
+                conversation.append({"role": message.type, "content": content})
+        return "\n\n".join(system_parts), json.dumps(conversation, ensure_ascii=False)
 
     def _parse_json_response(self, response: str) -> Dict[str, Any]:
         """
@@ -293,106 +504,15 @@ class BaseAgent(ABC):
         """
         logger.debug(f"Parsing JSON response: {response[:200]}...")
         
-        try:
-            # First, try to parse as-is
-            return json.loads(response)
-        except json.JSONDecodeError as e:
-            logger.warning(f"Direct JSON parsing failed: {e}")
-        
-        # Try to extract JSON from markdown code blocks
-        json_patterns = [
-            r'```json\s*\n(.*?)\n```',  # ```json ... ```
-            r'```\s*\n(.*?)\n```',      # ``` ... ```
-            r'`([^`]+)`',               # `...`
-        ]
-        
-        for pattern in json_patterns:
-            matches = re.findall(pattern, response, re.DOTALL | re.IGNORECASE)
-            for match in matches:
-                try:
-                    return json.loads(match.strip())
-                except json.JSONDecodeError:
-                    continue
-        
-        # Try to find JSON-like content in the response
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except json.JSONDecodeError:
-                pass
-        
-        # Try to find JSON at the beginning of the response
-        lines = response.strip().split('\n')
-        json_start = -1
-        json_end = -1
-        
-        for i, line in enumerate(lines):
-            if line.strip().startswith('{'):
-                json_start = i
-                break
-        
-        if json_start >= 0:
-            # Find the matching closing brace
-            brace_count = 0
-            for i in range(json_start, len(lines)):
-                line = lines[i].strip()
-                for char in line:
-                    if char == '{':
-                        brace_count += 1
-                    elif char == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            json_end = i
-                            break
-                if json_end >= 0:
-                    break
-            
-            if json_end >= 0:
-                json_lines = lines[json_start:json_end + 1]
-                json_text = '\n'.join(json_lines)
-                try:
-                    return json.loads(json_text)
-                except json.JSONDecodeError:
-                    pass
-        
-        # Try to fix common JSON issues
-        try:
-            # Remove any trailing commas or incomplete structures
-            cleaned_response = response.strip()
-            
-            # Try to find the last complete JSON object
-            brace_count = 0
-            last_brace = -1
-            for i, char in enumerate(cleaned_response):
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        last_brace = i
-                        break
-            
-            if last_brace > 0:
-                json_part = cleaned_response[:last_brace + 1]
-                try:
-                    return json.loads(json_part)
-                except json.JSONDecodeError:
-                    pass
-            
-            # Try to fix incomplete JSON by adding missing closing braces
-            if cleaned_response.count('{') > cleaned_response.count('}'):
-                missing_braces = cleaned_response.count('{') - cleaned_response.count('}')
-                fixed_response = cleaned_response + '}' * missing_braces
-                try:
-                    return json.loads(fixed_response)
-                except json.JSONDecodeError:
-                    pass
-                    
-        except Exception as e:
-            logger.warning(f"JSON repair attempt failed: {e}")
+        # One pass over the response: skips reasoning blocks, fences and
+        # prose, and repairs malformed or truncated JSON
+        extracted = find_json(response, openers="{")
+        if extracted is not None:
+            if extracted.repairs:
+                logger.warning(f"Repaired JSON in LLM response: {', '.join(extracted.repairs)}")
+            return extracted.value
         
-        # If all else fails, raise an error with more context
+        # No parseable JSON object in the response
         logger.error(f"Could not parse JSON from response. Response length: {len(response)}")
         logger.error(f"Response content: {response[:1000]}...")
         raise ValueError(f"Could not parse JSON from response. Response: {response[:500]}...")
@@ -406,7 +526,8 @@ class BaseAgent(ABC):
         tokens_used: Dict[str, int],
         status: str,
         error: Optional[str] = None,
-        db: Optional[AsyncSession] = None
+        db: Optional[AsyncSession] = None,
+        latency: Optional[Dict[str, Optional[float]]] = None
     ) -> str:
         """
         Log execution to database.
@@ -420,11 +541,14 @@ class BaseAgent(ABC):
             status: Execution status ('success', 'failure', 'timeout')
             error: Error message if execution failed
             db: Database session (optional, will create if not provided)
+            latency: Optional breakdown of LLM time with 'queue_seconds',
+                'time_to_first_token_seconds' and 'generation_seconds'
             
         Returns:
             Execution ID
         """
         execution_id = str(uuid4())
+        latency = latency or {}
         
         try:
             # Calculate cost
@@ -447,6 +571,9 @@ class BaseAgent(ABC):
                 completion_tokens=tokens_used.get('completion_tokens'),
                 cost_usd=cost_usd,
                 duration_seconds=duration,
+                queue_seconds=latency.get('queue_seconds'),
+                time_to_first_token_seconds=latency.get('time_to_first_token_seconds'),
+                generation_seconds=latency.get('generation_seconds'),
                 status=AgentExecutionStatus(status),
                 error_message=error,
                 started_at=self.start_time or datetime.utcnow(),
@@ -472,6 +599,7 @@ class BaseAgent(ABC):
                     "duration": duration,
                     "cost_usd": cost_usd,
                     "tokens_used": tokens_used,
+                    "latency": latency,
                 }
             )
             
@@ -548,6 +676,7 @@ class BaseAgent(ABC):
         """
         self.current_execution_id = str(uuid4())
         self.start_time = datetime.utcnow()
+        usage = UsageAccumulator()
         
         try:
             logger.info(
@@ -559,15 +688,16 @@ class BaseAgent(ABC):
                 }
             )
             
-            # Execute the agent
-            output_data = await self.execute(input_data)
+            # Execute the agent, collecting the usage of its LLM calls
+            with track_llm_usage(usage):
+                output_data = await self.execute(input_data)
             
             # Calculate duration
             duration = (datetime.utcnow() - self.start_time).total_seconds()
             
-            # Estimate token usage (this is approximate)
-            # In a real implementation, you'd get actual token counts from the LLM
-            estimated_tokens = self._estimate_tokens(input_data, output_data)
+            # Token counts of the LLM calls made (provider-reported where
+            # available); estimate from the data only if no call was recorded
+            tokens_used = usage.tokens() if usage.calls else self._estimate_tokens(input_data, output_data)
             
             # Log successful execution
             await self.log_execution(
@@ -575,9 +705,10 @@ class BaseAgent(ABC):
                 input_data=input_data,
                 output_data=output_data,
                 duration=duration,
-                tokens_used=estimated_tokens,
+                tokens_used=tokens_used,
                 status="success",
-                db=db
+                db=db,
+                latency=usage.latency()
             )
             
             logger.info(
@@ -602,10 +733,11 @@ class BaseAgent(ABC):
                 input_data=input_data,
                 output_data={},
                 duration=duration,
-                tokens_used={"prompt_tokens": 0, "completion_tokens": 0},
+                tokens_used=usage.tokens(),
                 status="failure",
                 error=str(e),
-                db=db
+                db=db,
+                latency=usage.latency()
             )
             
             logger.error(
@@ -625,8 +757,8 @@ class BaseAgent(ABC):
         """
         Estimate token usage for input and output data.
         
-        This is a rough estimation. In production, you'd want to use
-        the actual token counts from the LLM response.
+        Only used when an execution recorded no LLM calls; otherwise the
+        counts reported by the provider for each call are logged.
         
         Args:
             input_data: Input data
@@ -635,12 +767,11 @@ class BaseAgent(ABC):
         Returns:
             Dictionary with estimated token counts
         """
-        # Rough estimation: 1 token ≈ 4 characters for English text
-        input_text = json.dumps(input_data, separators=(',', ':'))
-        output_text = json.dumps(output_data, separators=(',', ':'))
+        input_text = json.dumps(input_data, separators=(',', ':'), default=str)
+        output_text = json.dumps(output_data, separators=(',', ':'), default=str)
         
-        prompt_tokens = max(1, len(input_text) // 4)
-        completion_tokens = max(1, len(output_text) // 4)
+        prompt_tokens = max(1, count_tokens(input_text))
+        completion_tokens = max(1, count_tokens(output_text))
         
         return {
             "prompt_tokens": prompt_tokens,
@@ -10,19 +10,34 @@ This agent is responsible for analyzing GitHub repositories to extract:
 - Code quality and technical debt indicators
 """
 
+import asyncio
+import functools
 import json
 import os
 import shutil
 import tempfile
+import time
 from datetime import datetime
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
 
 import git
 import yaml
 from loguru import logger
 
 from app.agents.base_agent import BaseAgent
+from app.core.llm_scheduler import Priority
+from app.services.repository_index import KUBERNETES_PATH_MARKERS, IndexedFile, RepositoryIndex
+from app.services.repository_mirror_cache import get_repository_mirror_cache
+
+T = TypeVar("T")
+
+
+def _runs_in_thread(method: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """Make a blocking analysis method awaitable by running it in a worker thread."""
+    @functools.wraps(method)
+    async def run(self, *args: Any, **kwargs: Any) -> T:
+        return await asyncio.to_thread(method, self, *args, **kwargs)
+    return run
 
 
 class GitHubAnalyzerAgent(BaseAgent):
@@ -40,6 +55,9 @@ class GitHubAnalyzerAgent(BaseAgent):
     - Generate architectural recommendations
     """
 
+    # Repository analysis is batch work; interactive calls go first
+    llm_priority = Priority.BATCH
+
     def __init__(self, github_token: Optional[str] = None):
         """
         Initialize the GitHub Analyzer Agent.
@@ -263,51 +281,63 @@ Be precise, detailed, and focus on actionable architectural insights."""
                 }
             )
             
-            # 1. Clone repository
-            repo_path = await self._clone_repository(repo_url, branch, clone_depth)
+            stage_timings: Dict[str, float] = {}
             
+            # 1. Get repository metadata from the GitHub API while cloning
+            metadata_task = None
+            if self.github_client and not analyze_private:
+                metadata_task = asyncio.create_task(self._timed_stage(
+                    "repository_metadata", stage_timings,
+                    self._get_repository_metadata(repo_url)
+                ))
+            
+            # 2. Clone repository
             try:
-                # 2. Analyze file structure
-                file_structure = await self._analyze_file_structure(repo_path)
-                
-                # 3. Extract technology stack
-                tech_stack = await self._extract_tech_stack(repo_path)
-                
-                # 4. Parse configuration files
-                configurations = await self._parse_configurations(repo_path)
-                
-                # 5. Analyze dependencies
-                dependencies = await self._analyze_dependencies(repo_path)
-                
-                # 6. Extract API contracts
-                api_contracts = await self._extract_api_contracts(repo_path)
-                
-                # 7. Analyze code quality indicators
-                code_quality = await self._analyze_code_quality(repo_path)
+                repo_path = await self._timed_stage(
+                    "clone", stage_timings, self._clone_repository(repo_url, branch, clone_depth)
+                )
+            except BaseException:
+                if metadata_task:
+                    metadata_task.cancel()
+                raise
+            
+            try:
+                # 3. Scan the checkout: structure, tech stack, configurations,
+                # dependencies, API contracts and code quality, in parallel
+                stages = await self._run_filesystem_stages(repo_path, stage_timings)
+                file_structure = stages["file_structure"]
+                tech_stack = stages["tech_stack"]
+                configurations = stages["configurations"]
+                dependencies = stages["dependencies"]
+                api_contracts = stages["api_contracts"]
+                code_quality = stages["code_quality"]
                 
-                # 8. Get repository metadata (if GitHub client available)
-                repo_metadata = {}
-                if self.github_client and not analyze_private:
-                    repo_metadata = await self._get_repository_metadata(repo_url)
+                repo_metadata = await metadata_task if metadata_task else {}
                 
-                # 9. Analyze architecture with LLM
-                architecture_analysis = await self._analyze_architecture_with_llm(
-                    file_structure,
-                    tech_stack,
-                    configurations,
-                    dependencies,
-                    api_contracts,
-                    code_quality
+                # 4. Analyze architecture with LLM
+                architecture_analysis = await self._timed_stage(
+                    "architecture_analysis", stage_timings,
+                    self._analyze_architecture_with_llm(
+                        file_structure,
+                        tech_stack,
+                        configurations,
+                        dependencies,
+                        api_contracts,
+                        code_quality
+                    )
                 )
                 
-                # 10. Generate recommendations
-                recommendations = await self._generate_recommendations(
-                    architecture_analysis,
-                    tech_stack,
-                    code_quality
+                # 5. Generate recommendations
+                recommendations = await self._timed_stage(
+                    "recommendations", stage_timings,
+                    self._generate_recommendations(
+                        architecture_analysis,
+                        tech_stack,
+                        code_quality
+                    )
                 )
                 
-                # 11. Compile final results
+                # 6. Compile final results
                 result = {
                     "repository_info": {
                         "url": repo_url,
@@ -328,6 +358,7 @@ Be precise, detailed, and focus on actionable architectural insights."""
                     "metadata": {
                         "analysis_timestamp": self.start_time.isoformat() if self.start_time else None,
                         "agent_version": self.agent_version,
+                        "stage_timings": stage_timings,
                         "analysis_notes": self._generate_analysis_notes(
                             file_structure, tech_stack, architecture_analysis
                         )
@@ -342,12 +373,15 @@ Be precise, detailed, and focus on actionable architectural insights."""
                         "services_count": len(architecture_analysis.get("services", [])),
                         "languages_count": len(tech_stack.get("languages", {})),
                         "frameworks_count": len(tech_stack.get("frameworks", [])),
+                        "stage_timings": stage_timings,
                     }
                 )
                 
                 return result
                 
             finally:
+                if metadata_task and not metadata_task.done():
+                    metadata_task.cancel()
                 # Always cleanup the cloned repository
                 await self._cleanup_repository(repo_path)
             
@@ -362,6 +396,65 @@ Be precise, detailed, and focus on actionable architectural insights."""
             )
             raise
 
+    async def _timed_stage(self, name: str, stage_timings: Dict[str, float], stage: Awaitable[T]) -> T:
+        """
+        Await an analysis stage and record its duration.
+        
+        Args:
+            name: Stage name
+            stage_timings: Seconds per stage, updated in place
+            stage: Stage coroutine
+            
+        Returns:
+            Stage result
+        """
+        started = time.perf_counter()
+        try:
+            return await stage
+        finally:
+            stage_timings[name] = round(time.perf_counter() - started, 3)
+            logger.debug(f"Repository analysis stage {name} took {stage_timings[name]:.3f}s")
+
+    async def _run_filesystem_stages(self, repo_path: str, stage_timings: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Index the checkout once, then run the stages reading it concurrently.
+        
+        The stages only read the repository and do not depend on each other;
+        they query the shared file index instead of walking the tree again.
+        All of them are awaited even when one fails, so the checkout is not
+        removed while a stage is still reading it.
+        
+        Args:
+            repo_path: Path to the cloned repository
+            stage_timings: Seconds per stage, updated in place
+            
+        Returns:
+            Stage results keyed by stage name
+            
+        Raises:
+            Exception: The first stage error
+        """
+        index = await self._timed_stage(
+            "scan", stage_timings,
+            asyncio.to_thread(RepositoryIndex.scan, repo_path, languages=self.language_extensions)
+        )
+        stages = {
+            "file_structure": self._analyze_file_structure,
+            "tech_stack": self._extract_tech_stack,
+            "configurations": self._parse_configurations,
+            "dependencies": self._analyze_dependencies,
+            "api_contracts": self._extract_api_contracts,
+            "code_quality": self._analyze_code_quality,
+        }
+        results = await asyncio.gather(
+            *(self._timed_stage(name, stage_timings, stage(repo_path, index)) for name, stage in stages.items()),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return dict(zip(stages, results))
+
     async def _clone_repository(
         self,
         repo_url: str,
@@ -371,10 +464,14 @@ Be precise, detailed, and focus on actionable architectural insights."""
         """
         Clone repository to temporary directory.
         
+        With the repository mirror cache enabled, the branch is checked out
+        from a locally cached mirror, which is only fetched (not cloned
+        again) when the repository was analyzed before.
+        
         Args:
             repo_url: GitHub repository URL
             branch: Git branch to clone
-            clone_depth: Clone depth for shallow clone
+            clone_depth: Clone depth for shallow clone (not used with the mirror cache)
             
         Returns:
             Path to cloned repository
@@ -382,13 +479,24 @@ Be precise, detailed, and focus on actionable architectural insights."""
         Raises:
             Exception: If repository cloning fails
         """
+        mirror_cache = get_repository_mirror_cache()
+        if mirror_cache is not None:
+            try:
+                logger.debug(f"Checking out {repo_url} ({branch}) from the mirror cache")
+                return await asyncio.to_thread(mirror_cache.checkout, repo_url, branch)
+            except git.exc.GitCommandError as e:
+                raise Exception(f"Failed to clone repository {repo_url}: {str(e)}")
+            except Exception as e:
+                raise Exception(f"Unexpected error cloning repository: {str(e)}")
+        
         temp_dir = tempfile.mkdtemp(prefix="archmesh_github_")
         
         try:
             logger.debug(f"Cloning repository {repo_url} to {temp_dir}")
             
             # Clone with shallow depth for speed
-            repo = git.Repo.clone_from(
+            await asyncio.to_thread(
+                git.Repo.clone_from,
                 repo_url,
                 temp_dir,
                 branch=branch,
@@ -405,18 +513,27 @@ Be precise, detailed, and focus on actionable architectural insights."""
             shutil.rmtree(temp_dir, ignore_errors=True)
             raise Exception(f"Unexpected error cloning repository: {str(e)}")
 
-    async def _analyze_file_structure(self, repo_path: str) -> Dict[str, Any]:
+    def _index_repository(self, repo_path: str, index: Optional[RepositoryIndex]) -> RepositoryIndex:
+        """Return the given index, or scan the checkout if there is none."""
+        if index is None:
+            index = RepositoryIndex.scan(repo_path, languages=self.language_extensions)
+        return index
+
+    @_runs_in_thread
+    def _analyze_file_structure(self, repo_path: str, index: Optional[RepositoryIndex] = None) -> Dict[str, Any]:
         """
         Analyze directory structure and identify key files.
         
         Args:
             repo_path: Path to cloned repository
+            index: File index of the repository (scanned if not given)
             
         Returns:
             Dictionary with file structure analysis
         """
+        index = self._index_repository(repo_path, index)
         structure = {
-            "root_files": [],
+            "root_files": index.root_files,
             "directories": {},
             "key_files": {
                 "readme": [],
@@ -429,88 +546,34 @@ Be precise, detailed, and focus on actionable architectural insights."""
                 "documentation": []
             },
             "file_counts": {
-                "total_files": 0,
-                "by_extension": {},
-                "by_language": {}
+                "total_files": len(index.files),
+                "by_extension": index.extension_counts(),
+                "by_language": index.language_counts()
             }
         }
         
-        # Directories to ignore
-        ignore_dirs = {
-            '.git', '.github', '.vscode', '.idea', 'node_modules', 'venv', 
-            '__pycache__', 'dist', 'build', 'target', '.gradle', 'vendor',
-            'coverage', '.nyc_output', 'logs', 'tmp', 'temp'
-        }
-        
-        # Walk directory tree
-        for root, dirs, files in os.walk(repo_path):
-            # Filter out ignored directories
-            dirs[:] = [d for d in dirs if d not in ignore_dirs and not d.startswith('.')]
-            
-            rel_path = os.path.relpath(root, repo_path)
-            if rel_path == '.':
-                rel_path = ''
-            
-            # Count files
-            structure["file_counts"]["total_files"] += len(files)
-            
-            for file in files:
-                file_lower = file.lower()
-                file_path = os.path.join(root, file)
-                rel_file_path = os.path.join(rel_path, file) if rel_path else file
-                
-                # Count by extension
-                ext = os.path.splitext(file)[1]
-                if ext:
-                    structure["file_counts"]["by_extension"][ext] = \
-                        structure["file_counts"]["by_extension"].get(ext, 0) + 1
-                
-                # Count by language
-                if ext in self.language_extensions:
-                    lang = self.language_extensions[ext]
-                    structure["file_counts"]["by_language"][lang] = \
-                        structure["file_counts"]["by_language"].get(lang, 0) + 1
-                
-                # Identify key files
-                if 'readme' in file_lower:
-                    structure["key_files"]["readme"].append(rel_file_path)
-                elif 'docker-compose' in file_lower or file_lower == 'compose.yml':
-                    structure["key_files"]["docker_compose"].append(rel_file_path)
-                elif file.endswith(('.yaml', '.yml')) and any(k8s in rel_path.lower() 
-                    for k8s in ['k8s', 'kubernetes', 'deploy', 'manifests']):
-                    structure["key_files"]["kubernetes"].append(rel_file_path)
-                elif any(api in file_lower for api in ['openapi', 'swagger', 'api.yaml', 'api.yml']):
-                    structure["key_files"]["openapi"].append(rel_file_path)
-                elif file in ['package.json', 'requirements.txt', 'pom.xml', 'go.mod', 
-                             'Cargo.toml', 'composer.json', 'Gemfile', 'pubspec.yaml']:
-                    structure["key_files"]["package_managers"].append(rel_file_path)
-                elif any(config in file_lower for config in ['config', 'settings', 'env']):
-                    structure["key_files"]["config_files"].append(rel_file_path)
-                elif any(test in file_lower for test in ['test', 'spec', 'specs']):
-                    structure["key_files"]["test_files"].append(rel_file_path)
-                elif file.endswith(('.md', '.rst', '.txt')) and 'readme' not in file_lower:
-                    structure["key_files"]["documentation"].append(rel_file_path)
-        
-        # Store root files
-        structure["root_files"] = [
-            f for f in os.listdir(repo_path) 
-            if os.path.isfile(os.path.join(repo_path, f))
-        ]
+        # Identify key files
+        for indexed_file in index.files:
+            if indexed_file.category in structure["key_files"]:
+                structure["key_files"][indexed_file.category].append(indexed_file.path)
         
         return structure
 
-    async def _extract_tech_stack(self, repo_path: str) -> Dict[str, Any]:
+    @_runs_in_thread
+    def _extract_tech_stack(self, repo_path: str, index: Optional[RepositoryIndex] = None) -> Dict[str, Any]:
         """
         Extract comprehensive technology stack from repository.
         
         Args:
             repo_path: Path to cloned repository
+            index: File index of the repository (scanned if not given)
             
         Returns:
             Dictionary with technology stack analysis
         """
+        index = self._index_repository(repo_path, index)
         tech_stack = {
-            "languages": {},
+            "languages": index.language_counts(),
             "frameworks": [],
             "databases": [],
             "infrastructure": [],
@@ -521,13 +584,6 @@ Be precise, detailed, and focus on actionable architectural insights."""
             "deployment_tools": []
         }
         
-        # Analyze language distribution
-        for ext, lang in self.language_extensions.items():
-            count = sum(1 for root, _, files in os.walk(repo_path)
-                       for file in files if file.endswith(ext))
-            if count > 0:
-                tech_stack["languages"][lang] = count
-        
         # Analyze package files for frameworks and dependencies
         package_files = [
             'package.json', 'requirements.txt', 'pom.xml', 'go.mod', 
@@ -536,24 +592,23 @@ Be precise, detailed, and focus on actionable architectural insights."""
         ]
         
         for package_file in package_files:
-            file_path = os.path.join(repo_path, package_file)
-            if os.path.exists(file_path):
-                await self._analyze_package_file(file_path, package_file, tech_stack)
+            if index.exists(package_file):
+                self._analyze_package_file(index, package_file, tech_stack)
         
         # Detect infrastructure tools
-        await self._detect_infrastructure_tools(repo_path, tech_stack)
+        self._detect_infrastructure_tools(index, tech_stack)
         
         # Detect testing frameworks
-        await self._detect_testing_frameworks(repo_path, tech_stack)
+        self._detect_testing_frameworks(index, tech_stack)
         
         # Detect build tools
-        await self._detect_build_tools(repo_path, tech_stack)
+        self._detect_build_tools(index, tech_stack)
         
         return tech_stack
 
-    async def _analyze_package_file(
+    def _analyze_package_file(
         self,
-        file_path: str,
+        index: RepositoryIndex,
         package_file: str,
         tech_stack: Dict[str, Any]
     ) -> None:
@@ -561,14 +616,13 @@ Be precise, detailed, and focus on actionable architectural insights."""
         Analyze a specific package file for frameworks and dependencies.
         
         Args:
-            file_path: Path to package file
-            package_file: Name of package file
+            index: File index of the repository
+            package_file: Path of the package file in the repository
             tech_stack: Technology stack dictionary to update
         """
         try:
             if package_file == 'package.json':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    package_data = json.load(f)
+                package_data = json.loads(index.read_text(package_file))
                     
                 # Extract package manager info
                 tech_stack["package_managers"]["npm"] = {
@@ -602,8 +656,7 @@ Be precise, detailed, and focus on actionable architectural insights."""
                         tech_stack["testing_frameworks"].append(framework)
                         
             elif package_file == 'requirements.txt':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    requirements = f.read().lower()
+                requirements = index.read_text(package_file).lower()
                     
                 tech_stack["package_managers"]["pip"] = {
                     "requirements_file": True,
@@ -618,8 +671,7 @@ Be precise, detailed, and focus on actionable architectural insights."""
                         
             elif package_file == 'pom.xml':
                 # Basic XML parsing for Maven
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    pom_content = f.read().lower()
+                pom_content = index.read_text(package_file).lower()
                     
                 tech_stack["package_managers"]["maven"] = {
                     "pom_file": True
@@ -631,8 +683,7 @@ Be precise, detailed, and focus on actionable architectural insights."""
                         tech_stack["frameworks"].append(framework)
                         
             elif package_file == 'go.mod':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    go_mod_content = f.read()
+                go_mod_content = index.read_text(package_file)
                     
                 tech_stack["package_managers"]["go"] = {
                     "go_mod": True,
@@ -648,46 +699,43 @@ Be precise, detailed, and focus on actionable architectural insights."""
         except Exception as e:
             logger.warning(f"Error analyzing package file {package_file}: {str(e)}")
 
-    async def _detect_infrastructure_tools(self, repo_path: str, tech_stack: Dict[str, Any]) -> None:
+    def _is_kubernetes_manifest(self, indexed_file: IndexedFile) -> bool:
+        """Whether a file looks like a Kubernetes manifest (YAML under a deployment path)."""
+        return indexed_file.extension in ('.yaml', '.yml') and any(
+            marker in indexed_file.path.lower() for marker in KUBERNETES_PATH_MARKERS
+        )
+
+    def _detect_infrastructure_tools(self, index: RepositoryIndex, tech_stack: Dict[str, Any]) -> None:
         """Detect infrastructure and deployment tools."""
         # Check for Docker files
-        docker_files = list(Path(repo_path).glob('**/Dockerfile*'))
-        if docker_files:
+        if index.named('Dockerfile*'):
             tech_stack["infrastructure"].append("Docker")
             
         # Check for Kubernetes manifests
-        k8s_files = list(Path(repo_path).glob('**/*.yaml')) + list(Path(repo_path).glob('**/*.yml'))
-        k8s_count = sum(1 for f in k8s_files if any(k8s in str(f).lower() 
-                       for k8s in ['k8s', 'kubernetes', 'deploy', 'manifests']))
-        if k8s_count > 0:
+        if index.find(self._is_kubernetes_manifest):
             tech_stack["infrastructure"].append("Kubernetes")
             
         # Check for Terraform
-        tf_files = list(Path(repo_path).glob('**/*.tf'))
-        if tf_files:
+        if index.find(lambda f: f.extension == '.tf'):
             tech_stack["infrastructure"].append("Terraform")
             
         # Check for Ansible
-        ansible_files = list(Path(repo_path).glob('**/playbook*.yml')) + \
-                       list(Path(repo_path).glob('**/ansible.cfg'))
-        if ansible_files:
+        if index.named('playbook*.yml', 'ansible.cfg'):
             tech_stack["infrastructure"].append("Ansible")
 
-    async def _detect_testing_frameworks(self, repo_path: str, tech_stack: Dict[str, Any]) -> None:
+    def _detect_testing_frameworks(self, index: RepositoryIndex, tech_stack: Dict[str, Any]) -> None:
         """Detect testing frameworks from file patterns."""
         # Python testing frameworks
-        if any(f.endswith('test_*.py') or f.startswith('test_') 
-               for root, _, files in os.walk(repo_path) for f in files):
+        if index.named('test_*.py'):
             if 'pytest' not in tech_stack["testing_frameworks"]:
                 tech_stack["testing_frameworks"].append("pytest")
                 
         # Java testing frameworks
-        if any(f.endswith('Test.java') or f.endswith('Tests.java')
-               for root, _, files in os.walk(repo_path) for f in files):
+        if index.named('*Test.java', '*Tests.java'):
             if 'JUnit' not in tech_stack["testing_frameworks"]:
                 tech_stack["testing_frameworks"].append("JUnit")
 
-    async def _detect_build_tools(self, repo_path: str, tech_stack: Dict[str, Any]) -> None:
+    def _detect_build_tools(self, index: RepositoryIndex, tech_stack: Dict[str, Any]) -> None:
         """Detect build tools from file patterns."""
         build_tools = {
             'Makefile': 'Make',
@@ -701,21 +749,25 @@ Be precise, detailed, and focus on actionable architectural insights."""
             'Gruntfile.js': 'Grunt'
         }
         
+        file_names = {indexed_file.name for indexed_file in index.files}
         for file_pattern, tool in build_tools.items():
-            if any(f == file_pattern for root, _, files in os.walk(repo_path) for f in files):
+            if file_pattern in file_names:
                 if tool not in tech_stack["build_tools"]:
                     tech_stack["build_tools"].append(tool)
 
-    async def _parse_configurations(self, repo_path: str) -> Dict[str, Any]:
+    @_runs_in_thread
+    def _parse_configurations(self, repo_path: str, index: Optional[RepositoryIndex] = None) -> Dict[str, Any]:
         """
         Parse configuration files to understand deployment and infrastructure.
         
         Args:
             repo_path: Path to cloned repository
+            index: File index of the repository (scanned if not given)
             
         Returns:
             Dictionary with configuration analysis
         """
+        index = self._index_repository(repo_path, index)
         configs = {
             "docker_compose": [],
             "kubernetes": [],
@@ -725,63 +777,58 @@ Be precise, detailed, and focus on actionable architectural insights."""
         }
         
         # Parse docker-compose files
-        docker_compose_files = list(Path(repo_path).glob('**/docker-compose*.yml')) + \
-                              list(Path(repo_path).glob('**/compose.yml'))
-        
-        for dc_file in docker_compose_files:
+        for dc_file in index.named('docker-compose*.yml', 'compose.yml'):
             try:
-                with open(dc_file, 'r', encoding='utf-8') as f:
-                    compose_config = yaml.safe_load(f)
+                compose_config = yaml.safe_load(index.read_text(dc_file.path))
                     
                 if compose_config and 'services' in compose_config:
                     configs["docker_compose"].append({
-                        "file": str(dc_file.relative_to(repo_path)),
+                        "file": dc_file.path,
                         "services": list(compose_config['services'].keys()),
                         "networks": list(compose_config.get('networks', {}).keys()),
                         "volumes": list(compose_config.get('volumes', {}).keys())
                     })
             except Exception as e:
-                logger.warning(f"Error parsing docker-compose file {dc_file}: {str(e)}")
+                logger.warning(f"Error parsing docker-compose file {dc_file.path}: {str(e)}")
         
         # Parse Kubernetes manifests
-        k8s_files = list(Path(repo_path).glob('**/*.yaml')) + list(Path(repo_path).glob('**/*.yml'))
-        for k8s_file in k8s_files:
-            if any(k8s in str(k8s_file).lower() for k8s in ['k8s', 'kubernetes', 'deploy', 'manifests']):
-                try:
-                    with open(k8s_file, 'r', encoding='utf-8') as f:
-                        k8s_config = yaml.safe_load(f)
-                        
-                    if k8s_config and 'kind' in k8s_config:
-                        configs["kubernetes"].append({
-                            "file": str(k8s_file.relative_to(repo_path)),
-                            "kind": k8s_config['kind'],
-                            "name": k8s_config.get('metadata', {}).get('name', 'unknown')
-                        })
-                except Exception as e:
-                    logger.warning(f"Error parsing Kubernetes file {k8s_file}: {str(e)}")
-        
-        # Parse CI/CD files
+        for k8s_file in index.find(self._is_kubernetes_manifest):
+            try:
+                k8s_config = yaml.safe_load(index.read_text(k8s_file.path))
+                    
+                if k8s_config and 'kind' in k8s_config:
+                    configs["kubernetes"].append({
+                        "file": k8s_file.path,
+                        "kind": k8s_config['kind'],
+                        "name": k8s_config.get('metadata', {}).get('name', 'unknown')
+                    })
+            except Exception as e:
+                logger.warning(f"Error parsing Kubernetes file {k8s_file.path}: {str(e)}")
+        
+        # Parse CI/CD files; .github is not indexed, so its fixed paths are checked directly
         ci_files = ['.github/workflows', '.gitlab-ci.yml', 'Jenkinsfile', 'azure-pipelines.yml']
         for ci_pattern in ci_files:
-            ci_path = Path(repo_path) / ci_pattern
-            if ci_path.exists():
+            if index.exists(ci_pattern) or os.path.exists(os.path.join(repo_path, ci_pattern)):
                 configs["ci_cd"].append({
                     "type": ci_pattern.split('/')[-1],
-                    "path": str(ci_path.relative_to(repo_path))
+                    "path": ci_pattern
                 })
         
         return configs
 
-    async def _analyze_dependencies(self, repo_path: str) -> Dict[str, Any]:
+    @_runs_in_thread
+    def _analyze_dependencies(self, repo_path: str, index: Optional[RepositoryIndex] = None) -> Dict[str, Any]:
         """
         Analyze external dependencies and their versions.
         
         Args:
             repo_path: Path to cloned repository
+            index: File index of the repository (scanned if not given)
             
         Returns:
             Dictionary with dependency analysis
         """
+        index = self._index_repository(repo_path, index)
         dependencies = {
             "runtime": {},
             "development": {},
@@ -793,11 +840,9 @@ Be precise, detailed, and focus on actionable architectural insights."""
         }
         
         # Analyze package.json dependencies
-        package_json_path = os.path.join(repo_path, 'package.json')
-        if os.path.exists(package_json_path):
+        if index.exists('package.json'):
             try:
-                with open(package_json_path, 'r', encoding='utf-8') as f:
-                    package_data = json.load(f)
+                package_data = json.loads(index.read_text('package.json'))
                     
                 dependencies["runtime"] = package_data.get("dependencies", {})
                 dependencies["development"] = package_data.get("devDependencies", {})
@@ -806,11 +851,9 @@ Be precise, detailed, and focus on actionable architectural insights."""
                 logger.warning(f"Error analyzing package.json dependencies: {str(e)}")
         
         # Analyze requirements.txt
-        requirements_path = os.path.join(repo_path, 'requirements.txt')
-        if os.path.exists(requirements_path):
+        if index.exists('requirements.txt'):
             try:
-                with open(requirements_path, 'r', encoding='utf-8') as f:
-                    requirements = f.read()
+                requirements = index.read_text('requirements.txt')
                     
                 deps = {}
                 for line in requirements.split('\n'):
@@ -832,36 +875,41 @@ Be precise, detailed, and focus on actionable architectural insights."""
         
         return dependencies
 
-    async def _extract_api_contracts(self, repo_path: str) -> List[Dict[str, Any]]:
+    @_runs_in_thread
+    def _extract_api_contracts(
+        self,
+        repo_path: str,
+        index: Optional[RepositoryIndex] = None
+    ) -> List[Dict[str, Any]]:
         """
         Extract API contracts from OpenAPI specs and code.
         
         Args:
             repo_path: Path to cloned repository
+            index: File index of the repository (scanned if not given)
             
         Returns:
             List of API contract information
         """
+        index = self._index_repository(repo_path, index)
         api_contracts = []
         
         # Find OpenAPI/Swagger files
-        openapi_files = []
-        for root, _, files in os.walk(repo_path):
-            for file in files:
-                if any(api in file.lower() for api in ['openapi', 'swagger', 'api.yaml', 'api.yml']):
-                    openapi_files.append(os.path.join(root, file))
+        openapi_files = index.find(
+            lambda f: any(api in f.name.lower() for api in ['openapi', 'swagger', 'api.yaml', 'api.yml'])
+        )
         
         for api_file in openapi_files:
             try:
-                with open(api_file, 'r', encoding='utf-8') as f:
-                    if api_file.endswith('.json'):
-                        api_spec = json.load(f)
-                    else:
-                        api_spec = yaml.safe_load(f)
+                content = index.read_text(api_file.path)
+                if api_file.extension == '.json':
+                    api_spec = json.loads(content)
+                else:
+                    api_spec = yaml.safe_load(content)
                 
                 if api_spec and 'openapi' in api_spec:
                     api_contracts.append({
-                        "file": os.path.relpath(api_file, repo_path),
+                        "file": api_file.path,
                         "type": "OpenAPI",
                         "version": api_spec.get('openapi', 'unknown'),
                         "title": api_spec.get('info', {}).get('title', 'unknown'),
@@ -870,7 +918,7 @@ Be precise, detailed, and focus on actionable architectural insights."""
                     })
                 elif api_spec and 'swagger' in api_spec:
                     api_contracts.append({
-                        "file": os.path.relpath(api_file, repo_path),
+                        "file": api_file.path,
                         "type": "Swagger",
                         "version": api_spec.get('swagger', 'unknown'),
                         "title": api_spec.get('info', {}).get('title', 'unknown'),
@@ -879,20 +927,23 @@ Be precise, detailed, and focus on actionable architectural insights."""
                     })
                     
             except Exception as e:
-                logger.warning(f"Error parsing API contract {api_file}: {str(e)}")
+                logger.warning(f"Error parsing API contract {api_file.path}: {str(e)}")
         
         return api_contracts
 
-    async def _analyze_code_quality(self, repo_path: str) -> Dict[str, Any]:
+    @_runs_in_thread
+    def _analyze_code_quality(self, repo_path: str, index: Optional[RepositoryIndex] = None) -> Dict[str, Any]:
         """
         Analyze code quality indicators.
         
         Args:
             repo_path: Path to cloned repository
+            index: File index of the repository (scanned if not given)
             
         Returns:
             Dictionary with code quality analysis
         """
+        index = self._index_repository(repo_path, index)
         quality = {
             "test_coverage": {
                 "has_tests": False,
@@ -915,24 +966,18 @@ Be precise, detailed, and focus on actionable architectural insights."""
         }
         
         # Check for test files
-        test_files = []
-        for root, _, files in os.walk(repo_path):
-            for file in files:
-                if any(test in file.lower() for test in ['test', 'spec', 'specs']):
-                    test_files.append(os.path.join(root, file))
+        test_files = index.find(lambda f: any(test in f.name.lower() for test in ['test', 'spec', 'specs']))
         
         quality["test_coverage"]["test_files_count"] = len(test_files)
         quality["test_coverage"]["has_tests"] = len(test_files) > 0
         
         # Check for documentation
-        readme_files = []
-        doc_files = []
-        for root, _, files in os.walk(repo_path):
-            for file in files:
-                if 'readme' in file.lower():
-                    readme_files.append(os.path.join(root, file))
-                elif file.endswith(('.md', '.rst', '.txt')) and 'readme' not in file.lower():
-                    doc_files.append(os.path.join(root, file))
+        readme_files = [f.path for f in index.find(lambda f: 'readme' in f.name.lower())]
+        doc_files = [
+            f.path for f in index.find(
+                lambda f: f.name.endswith(('.md', '.rst', '.txt')) and 'readme' not in f.name.lower()
+            )
+        ]
         
         quality["documentation"]["readme_files"] = readme_files
         quality["documentation"]["doc_files"] = doc_files
@@ -947,14 +992,14 @@ Be precise, detailed, and focus on actionable architectural insights."""
         ]
         
         for config in linting_configs:
-            config_path = os.path.join(repo_path, config)
-            if os.path.exists(config_path):
+            if index.exists(config):
                 quality["code_style"]["linting_configs"].append(config)
                 quality["code_style"]["has_linting"] = True
         
         return quality
 
-    async def _get_repository_metadata(self, repo_url: str) -> Dict[str, Any]:
+    @_runs_in_thread
+    def _get_repository_metadata(self, repo_url: str) -> Dict[str, Any]:
         """
         Get repository metadata from GitHub API.
         
@@ -1117,7 +1162,7 @@ Be thorough, specific, and provide actionable insights. Consider both explicit a
             HumanMessage(content=prompt)
         ]
         
-        response = await self._call_llm(messages)
+        response = await self._call_llm(messages, validate=self._parse_json_response)
         return self._parse_json_response(response)
 
     async def _generate_recommendations(
@@ -1193,8 +1238,12 @@ Be thorough, specific, and provide actionable insights. Consider both explicit a
             repo_path: Path to repository to clean up
         """
         try:
-            if os.path.exists(repo_path):
-                shutil.rmtree(repo_path, ignore_errors=True)
+            mirror_cache = get_repository_mirror_cache()
+            if mirror_cache is not None and mirror_cache.owns(repo_path):
+                await asyncio.to_thread(mirror_cache.release, repo_path)
+                logger.debug(f"Released repository checkout at {repo_path}")
+            elif os.path.exists(repo_path):
+                await asyncio.to_thread(shutil.rmtree, repo_path, ignore_errors=True)
                 logger.debug(f"Cleaned up repository at {repo_path}")
         except Exception as e:
             logger.warning(f"Error cleaning up repository {repo_path}: {str(e)}")
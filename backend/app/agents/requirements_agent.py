@@ -5,14 +5,76 @@ This agent is responsible for parsing business requirements documents and extrac
 structured requirements, generating clarifying questions, and identifying gaps.
 """
 
+import asyncio
 import os
 import re
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
 
 from loguru import logger
 
 from app.agents.base_agent import BaseAgent
+from app.config import settings
+from app.core.json_extraction import find_json
+from app.core.llm_scheduler import Priority, llm_priority
+from app.core.prompt_budget import PromptBuilder, prompt_token_budget
+from app.core.token_usage import count_tokens
+
+# JSON schema of one document's extraction
+EXTRACTION_SCHEMA = """{
+  "structured_requirements": {
+    "business_goals": [
+      "Clear, specific business objectives and goals"
+    ],
+    "functional_requirements": [
+      "Specific features and functionality the system must provide"
+    ],
+    "non_functional_requirements": {
+      "performance": ["Performance requirements (response time, throughput, etc.)"],
+      "security": ["Security requirements (authentication, authorization, data protection)"],
+      "scalability": ["Scalability requirements (user load, data volume, growth)"],
+      "reliability": ["Reliability requirements (uptime, fault tolerance, backup)"],
+      "maintainability": ["Maintainability requirements (code quality, documentation, testing)"],
+      "usability": ["Usability requirements (user interface, accessibility, user experience)"],
+      "compliance": ["Compliance requirements (regulatory, legal, industry standards)"]
+    },
+    "constraints": [
+      "Technical, business, or resource constraints"
+    ],
+    "stakeholders": [
+      {
+        "name": "Stakeholder name or role",
+        "role": "Specific role or title",
+        "concerns": ["Primary concerns and interests"],
+        "influence": "high|medium|low"
+      }
+    ]
+  },
+  "clarification_questions": [
+    {
+      "question": "Specific question to clarify requirements",
+      "category": "business|technical|constraint|stakeholder",
+      "priority": "high|medium|low",
+      "rationale": "Why this question is important"
+    }
+  ],
+  "identified_gaps": [
+    "Missing or unclear information that needs to be addressed"
+  ],
+  "confidence_score": 0.85
+}"""
+
+
+@dataclass
+class BatchDocument:
+    """A document read for batch extraction."""
+
+    index: int
+    path: str
+    content: str
+    tokens: int
 
 
 class RequirementsAgent(BaseAgent):
@@ -186,33 +248,8 @@ Be concise, accurate, and focus on actionable requirements."""
             if not content.strip():
                 raise ValueError(f"Document {document_path} is empty or contains no readable content")
             
-            # 2. Build comprehensive extraction prompt
-            prompt = self._build_extraction_prompt(content, project_context, domain)
-            
-            # 3. Call LLM for requirements extraction
-            from langchain_core.messages import SystemMessage, HumanMessage
-            messages = [
-                SystemMessage(content=self.get_system_prompt()),
-                HumanMessage(content=prompt)
-            ]
-            
-            response = await self._call_llm(messages)
-            
-            # 4. Parse and validate response
-            structured_data = self._parse_json_response(response)
-            
-            # 5. Validate and enhance the extracted data
-            enhanced_data = self._validate_and_enhance_extraction(structured_data, content)
-            
-            # 6. Add metadata
-            enhanced_data["metadata"] = {
-                "document_path": document_path,
-                "document_size": len(content),
-                "domain": domain,
-                "extraction_timestamp": self.start_time.isoformat() if self.start_time else None,
-                "agent_version": self.agent_version,
-                "processing_notes": self._generate_processing_notes(content, enhanced_data)
-            }
+            # 2. Extract, validate and enhance the requirements
+            enhanced_data = await self._extract_content(content, document_path, project_context, domain)
             
             logger.info(
                 f"Requirements extraction completed successfully",
@@ -238,10 +275,435 @@ Be concise, accurate, and focus on actionable requirements."""
             )
             raise
 
+    async def _extract_content(
+        self,
+        content: str,
+        document_path: str,
+        project_context: str,
+        domain: str
+    ) -> Dict[str, Any]:
+        """
+        Extract structured requirements from one document's content.
+
+        Args:
+            content: Document content
+            document_path: Path of the document (for metadata)
+            project_context: Additional project context
+            domain: Project domain
+
+        Returns:
+            Validated and enhanced extraction with metadata
+        """
+        # Build comprehensive extraction prompt within the context window
+        system_prompt = self.get_system_prompt()
+        prompt = await self._fit_prompt(
+            self._extraction_prompt_sections(content, project_context, domain),
+            self._extraction_query(project_context, domain),
+            system_prompt
+        )
+        # Read before the next await; batch extraction runs calls concurrently
+        prompt_report = self.last_prompt_report
+
+        # Call LLM for requirements extraction
+        from langchain_core.messages import SystemMessage, HumanMessage
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=prompt)
+        ]
+
+        response = await self._call_llm(messages, validate=self._parse_json_response)
+
+        # Parse and validate response
+        structured_data = self._parse_json_response(response)
+
+        return self._finish_extraction(structured_data, content, document_path, domain, prompt_report)
+
+    def _finish_extraction(
+        self,
+        structured_data: Dict[str, Any],
+        content: str,
+        document_path: str,
+        domain: str,
+        prompt_report: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Validate and enhance an extraction and add its metadata.
+
+        Args:
+            structured_data: Parsed LLM output for the document
+            content: Document content
+            document_path: Path of the document
+            domain: Project domain
+            prompt_report: Prompt budget report of the call
+
+        Returns:
+            Validated and enhanced extraction with metadata
+        """
+        enhanced_data = self._validate_and_enhance_extraction(structured_data, content)
+
+        enhanced_data["metadata"] = {
+            "document_path": document_path,
+            "document_size": len(content),
+            "domain": domain,
+            "extraction_timestamp": self.start_time.isoformat() if self.start_time else None,
+            "agent_version": self.agent_version,
+            "processing_notes": self._generate_processing_notes(content, enhanced_data),
+            "prompt_budget": prompt_report
+        }
+        return enhanced_data
+
+    async def extract_batch(
+        self,
+        documents: Sequence[str],
+        project_context: str = "",
+        domain: str = "cloud-native"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Extract requirements from many documents, yielding results as they complete.
+
+        Documents are read concurrently. Documents of up to
+        ``requirements_batch_pack_document_tokens`` tokens are packed into
+        shared calls (at most ``requirements_batch_pack_max_documents`` per
+        call, within the model's prompt budget); larger ones get a call
+        each. Calls run at batch priority, so the LLM scheduler holds them
+        to the provider's concurrency limits and serves interactive calls
+        first. Documents a packed call fails on or leaves out are extracted
+        again one per call.
+
+        Args:
+            documents: Paths of the documents
+            project_context: Additional project context
+            domain: Project domain (cloud-native, data-platform, enterprise)
+
+        Yields:
+            One result per document in completion order, with type
+            'document', index, document_path, status ('completed' or
+            'failed'), result or error, packed_with (documents sharing the
+            call) and elapsed_seconds; then a 'summary' with counts, calls
+            and throughput
+        """
+        start = time.perf_counter()
+        stats = {"extraction_calls": 0, "packed_calls": 0, "packed_documents": 0, "retried_documents": 0}
+        results: asyncio.Queue = asyncio.Queue()
+        succeeded = 0
+
+        def report(index: int, path: str, result: Optional[Dict[str, Any]] = None,
+                   error: Optional[str] = None, packed_with: int = 1) -> None:
+            item = {
+                "type": "document",
+                "index": index,
+                "document_path": path,
+                "status": "failed" if error is not None else "completed",
+                "packed_with": packed_with,
+                "elapsed_seconds": round(time.perf_counter() - start, 3),
+            }
+            if error is not None:
+                item["error"] = error
+            else:
+                item["result"] = result
+            results.put_nowait(item)
+
+        read_limit = asyncio.Semaphore(max(1, settings.requirements_batch_read_concurrency))
+
+        async def read(index: int, path: str) -> Optional[BatchDocument]:
+            async with read_limit:
+                try:
+                    content = await self._read_document(path)
+                    tokens = await asyncio.to_thread(count_tokens, content)
+                except Exception as e:
+                    report(index, path, error=str(e))
+                    return None
+            if not content.strip():
+                report(index, path, error=f"Document {path} is empty or contains no readable content")
+                return None
+            return BatchDocument(index, path, content, tokens)
+
+        read_documents = await asyncio.gather(*(read(i, path) for i, path in enumerate(documents)))
+        batch = [document for document in read_documents if document is not None]
+        packs = self._pack_documents(batch, project_context, domain)
+
+        logger.info(
+            "Starting batch requirements extraction",
+            extra={
+                "agent_type": self.agent_type,
+                "documents": len(documents),
+                "readable_documents": len(batch),
+                "calls_planned": len(packs),
+                "domain": domain,
+            }
+        )
+
+        with llm_priority(Priority.BATCH):
+            tasks = [
+                asyncio.create_task(self._extract_pack(pack, project_context, domain, report, stats))
+                for pack in packs
+            ]
+        try:
+            for _ in range(len(documents)):
+                item = await results.get()
+                succeeded += item["status"] == "completed"
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        elapsed = time.perf_counter() - start
+        document_tokens = sum(document.tokens for document in batch)
+        summary = {
+            "type": "summary",
+            "documents": len(documents),
+            "succeeded": succeeded,
+            "failed": len(documents) - succeeded,
+            **stats,
+            "document_tokens": document_tokens,
+            "elapsed_seconds": round(elapsed, 3),
+            "documents_per_second": round(len(documents) / elapsed, 3) if elapsed > 0 else None,
+            "document_tokens_per_second": round(document_tokens / elapsed, 1) if elapsed > 0 else None,
+        }
+        logger.info("Batch requirements extraction completed", extra={"agent_type": self.agent_type, **summary})
+        yield summary
+
+    def _pack_documents(
+        self,
+        documents: List[BatchDocument],
+        project_context: str,
+        domain: str
+    ) -> List[List[BatchDocument]]:
+        """
+        Group documents into extraction calls.
+
+        Args:
+            documents: Documents in input order
+            project_context: Additional project context
+            domain: Project domain
+
+        Returns:
+            Documents of each call; single-document calls use the regular
+            extraction prompt
+        """
+        max_documents = max(1, settings.requirements_batch_pack_max_documents)
+        budget = prompt_token_budget(self.llm_model, self._packed_system_prompt(), self.max_tokens)
+        overhead = count_tokens(self._packed_prompt_sections([], project_context, domain).render())
+
+        packs: List[List[BatchDocument]] = []
+        current: List[BatchDocument] = []
+        used = overhead
+        for document in documents:
+            if max_documents == 1 or document.tokens > settings.requirements_batch_pack_document_tokens:
+                packs.append([document])
+                continue
+            cost = count_tokens(self._packed_document_text(len(current), document)) + 1
+            if current and (len(current) >= max_documents or used + cost > budget):
+                packs.append(current)
+                current, used = [], overhead
+                cost = count_tokens(self._packed_document_text(0, document)) + 1
+            current.append(document)
+            used += cost
+        if current:
+            packs.append(current)
+        return packs
+
+    async def _extract_pack(
+        self,
+        pack: List[BatchDocument],
+        project_context: str,
+        domain: str,
+        report: Callable[..., None],
+        stats: Dict[str, int]
+    ) -> None:
+        """
+        Extract the documents of one call and report each result.
+
+        Args:
+            pack: Documents sharing the call
+            project_context: Additional project context
+            domain: Project domain
+            report: Callback receiving each document's result or error
+            stats: Batch counters to update
+        """
+        missing = pack
+        if len(pack) > 1:
+            completed = []
+            try:
+                stats["extraction_calls"] += 1
+                extractions, prompt_report = await self._extract_packed(pack, project_context, domain)
+                stats["packed_calls"] += 1
+                for position, document in enumerate(pack):
+                    data = extractions.get(self._packed_key(position))
+                    if isinstance(data, dict) and data.get("structured_requirements"):
+                        completed.append((document, self._finish_extraction(
+                            data, document.content, document.path, domain, prompt_report
+                        )))
+            except Exception as e:
+                completed = []
+                logger.warning(
+                    f"Packed requirements extraction failed, extracting documents separately: {str(e)}",
+                    extra={"agent_type": self.agent_type, "documents": [d.path for d in pack]}
+                )
+            for document, result in completed:
+                report(document.index, document.path, result=result, packed_with=len(pack))
+            stats["packed_documents"] += len(completed)
+            extracted = {document.index for document, _ in completed}
+            missing = [document for document in pack if document.index not in extracted]
+            stats["retried_documents"] += len(missing)
+
+        async def extract_one(document: BatchDocument) -> None:
+            try:
+                stats["extraction_calls"] += 1
+                result = await self._extract_content(document.content, document.path, project_context, domain)
+            except Exception as e:
+                report(document.index, document.path, error=str(e))
+            else:
+                report(document.index, document.path, result=result)
+
+        await asyncio.gather(*(extract_one(document) for document in missing))
+
+    async def _extract_packed(
+        self,
+        pack: List[BatchDocument],
+        project_context: str,
+        domain: str
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Extract several documents in one LLM call.
+
+        Args:
+            pack: Documents sharing the call
+            project_context: Additional project context
+            domain: Project domain
+
+        Returns:
+            Tuple of (extraction by document key, prompt budget report).
+            When the response was cut off, the last document in it is left
+            out since its extraction may be incomplete.
+
+        Raises:
+            ValueError: If the response contains no JSON object
+        """
+        system_prompt = self._packed_system_prompt()
+        prompt = await self._fit_prompt(
+            self._packed_prompt_sections(pack, project_context, domain),
+            self._extraction_query(project_context, domain),
+            system_prompt
+        )
+        prompt_report = self.last_prompt_report
+
+        from langchain_core.messages import SystemMessage, HumanMessage
+        response = await self._call_llm([
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=prompt)
+        ], validate=self._parse_packed_response)
+
+        return self._parse_packed_response(response), prompt_report
+
+    @staticmethod
+    def _parse_packed_response(response: str) -> Dict[str, Any]:
+        """
+        Parse the extractions of a packed call.
+
+        Args:
+            response: Raw LLM response text
+
+        Returns:
+            Extraction by document key, without the last document when the
+            response was cut off
+
+        Raises:
+            ValueError: If the response contains no JSON object
+        """
+        extracted = find_json(response, openers="{")
+        if extracted is None or not isinstance(extracted.value, dict):
+            raise ValueError(f"Could not parse JSON from packed response. Response: {response[:500]}...")
+        extractions = dict(extracted.value)
+        if "truncated" in extracted.repairs and extractions:
+            extractions.pop(next(reversed(extractions)))
+        return extractions
+
+    @staticmethod
+    def _packed_key(position: int) -> str:
+        """Key identifying a document of a packed call."""
+        return f"doc{position + 1}"
+
+    def _packed_document_text(self, position: int, document: BatchDocument) -> str:
+        """Delimited document text in a packed prompt."""
+        return f'DOCUMENT {self._packed_key(position)} ({Path(document.path).name}):\n"""\n{document.content}\n"""'
+
+    @staticmethod
+    def _packed_system_prompt() -> str:
+        """System prompt of packed extraction calls."""
+        return """You are an expert business analyst. Extract requirements from several documents at once and structure them into JSON.
+
+Analyze each document on its own and never mix requirements between documents.
+
+OUTPUT: Return ONLY valid JSON: one object with a key per document id, each holding that document's extraction in the format given in the prompt.
+
+Be concise, accurate, and focus on actionable requirements."""
+
+    def _packed_prompt_sections(
+        self,
+        pack: List[BatchDocument],
+        context: str,
+        domain: str
+    ) -> PromptBuilder:
+        """
+        Build the prompt extracting several documents in one call.
+
+        Documents are required sections; packing only groups documents
+        that fit the budget together.
+
+        Args:
+            pack: Documents sharing the call
+            context: Additional project context
+            domain: Project domain
+
+        Returns:
+            Prompt builder
+        """
+        keys = [self._packed_key(position) for position in range(len(pack))]
+        header = f"""Analyze each of the following {len(pack)} business requirements documents separately and extract structured requirements from each:
+
+PROJECT CONTEXT:
+Domain: {domain}
+{f"Additional Context: {context}" if context else "No additional context provided"}
+"""
+
+        instructions = f"""Return one JSON object with a key for each document id ({", ".join(keys)}), each holding that document's extraction according to this JSON schema:
+
+{EXTRACTION_SCHEMA}
+
+INSTRUCTIONS:
+1. Analyze each document on its own; never mix requirements between documents
+2. Extract ALL relevant requirements, even if implicit
+3. Generate 3-5 clarifying questions per document
+4. Keep each extraction concise; the documents share one response
+5. Provide a realistic confidence score (0.0-1.0) per document
+6. Consider the {domain} domain context in your analysis
+
+Output ONLY the JSON object keyed by document id, wrapped in ```json code blocks."""
+
+        builder = PromptBuilder(separator="\n")
+        builder.add("header", header, required=True)
+        for position, document in enumerate(pack):
+            builder.add(keys[position], self._packed_document_text(position, document), required=True)
+        builder.add("instructions", instructions, required=True)
+        return builder
+
     async def _read_document(self, file_path: str) -> str:
+        """
+        Read document content from file without blocking the event loop.
+
+        Args:
+            file_path: Path to the document file
+
+        Returns:
+            Document content as string
+        """
+        return await asyncio.to_thread(self._read_document_sync, file_path)
+
+    def _read_document_sync(self, file_path: str) -> str:
         """
         Read document content from file.
-        
+
         Currently supports:
         - .txt files (plain text)
         - .md files (markdown)
@@ -320,68 +782,53 @@ Be concise, accurate, and focus on actionable requirements."""
             domain: Project domain
             
         Returns:
-            Formatted prompt string
+            Formatted prompt string with the full document
         """
-        # Truncate content if too long (keep first 8000 characters)
-        max_content_length = 8000
-        if len(content) > max_content_length:
-            content = content[:max_content_length] + "\n\n[Document truncated for processing...]"
+        return self._extraction_prompt_sections(content, context, domain).render()
+
+    @staticmethod
+    def _extraction_query(context: str, domain: str) -> str:
+        """Task description document passages are ranked against."""
+        return (
+            f"Business goals, functional requirements, non-functional requirements "
+            f"(performance, security, scalability, reliability, compliance), constraints "
+            f"and stakeholders of a {domain} system. {context or ''}"
+        )
+
+    def _extraction_prompt_sections(
+        self,
+        content: str,
+        context: str,
+        domain: str
+    ) -> PromptBuilder:
+        """
+        Build the extraction prompt as sections.
         
-        prompt = f"""Analyze the following business requirements document and extract structured requirements:
+        The document is the only compressible section; when it does not fit
+        the model's context window its least relevant passages are omitted.
+        
+        Args:
+            content: Document content
+            context: Additional project context
+            domain: Project domain
+            
+        Returns:
+            Prompt builder
+        """
+        header = f"""Analyze the following business requirements document and extract structured requirements:
 
 PROJECT CONTEXT:
 Domain: {domain}
 {f"Additional Context: {context}" if context else "No additional context provided"}
 
 DOCUMENT CONTENT:
-\"\"\"
-{content}
-\"\"\"
+\"\"\""""
+        
+        instructions = f"""\"\"\"
 
 Please extract and structure the information according to this JSON schema:
 
-{{
-  "structured_requirements": {{
-    "business_goals": [
-      "Clear, specific business objectives and goals"
-    ],
-    "functional_requirements": [
-      "Specific features and functionality the system must provide"
-    ],
-    "non_functional_requirements": {{
-      "performance": ["Performance requirements (response time, throughput, etc.)"],
-      "security": ["Security requirements (authentication, authorization, data protection)"],
-      "scalability": ["Scalability requirements (user load, data volume, growth)"],
-      "reliability": ["Reliability requirements (uptime, fault tolerance, backup)"],
-      "maintainability": ["Maintainability requirements (code quality, documentation, testing)"],
-      "usability": ["Usability requirements (user interface, accessibility, user experience)"],
-      "compliance": ["Compliance requirements (regulatory, legal, industry standards)"]
-    }},
-    "constraints": [
-      "Technical, business, or resource constraints"
-    ],
-    "stakeholders": [
-      {{
-        "name": "Stakeholder name or role",
-        "role": "Specific role or title",
-        "concerns": ["Primary concerns and interests"],
-        "influence": "high|medium|low"
-      }}
-    ]
-  }},
-  "clarification_questions": [
-    {{
-      "question": "Specific question to clarify requirements",
-      "category": "business|technical|constraint|stakeholder",
-      "priority": "high|medium|low",
-      "rationale": "Why this question is important"
-    }}
-  ],
-  "identified_gaps": [
-    "Missing or unclear information that needs to be addressed"
-  ],
-  "confidence_score": 0.85
-}}
+{EXTRACTION_SCHEMA}
 
 INSTRUCTIONS:
 1. Be thorough and systematic in your analysis
@@ -394,7 +841,11 @@ INSTRUCTIONS:
 
 Output ONLY the JSON, wrapped in ```json code blocks. Be precise and comprehensive."""
 
-        return prompt
+        builder = PromptBuilder(separator="\n")
+        builder.add("header", header, required=True)
+        builder.add("document", content)
+        builder.add("instructions", instructions, required=True)
+        return builder
 
     def _validate_and_enhance_extraction(
         self,
@@ -2,6 +2,7 @@
 Admin API endpoints for the modular ArchMesh system
 """
 
+import asyncio
 from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
@@ -294,6 +295,26 @@ async def get_performance_metrics(days: int = Query(30, ge=1, le=365)):
         raise HTTPException(status_code=500, detail="Failed to get performance metrics")
 
 
+@router.get("/analytics/cache")
+async def get_cache_metrics():
+    """Get LLM response cache metrics"""
+    try:
+        return admin_service.get_cache_metrics()
+    except Exception as e:
+        logger.error(f"Failed to get cache metrics: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get cache metrics")
+
+
+@router.get("/analytics/hedging")
+async def get_hedging_metrics():
+    """Get hedged LLM request metrics"""
+    try:
+        return admin_service.get_hedging_metrics()
+    except Exception as e:
+        logger.error(f"Failed to get hedging metrics: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get hedging metrics")
+
+
 @router.get("/analytics/users/{user_id}")
 async def get_user_usage(user_id: str, days: int = Query(30, ge=1, le=365)):
     """Get user usage statistics"""
@@ -332,7 +353,8 @@ async def generate_usage_report(user_id: Optional[str] = Query(None), days: int
 @router.get("/llm/interactions")
 async def list_llm_interactions(stage: Optional[str] = Query(None), provider: Optional[str] = Query(None), model: Optional[str] = Query(None), limit: int = Query(200, ge=1, le=1000)):
     try:
-        items = list(read_interactions(stage=stage, provider=provider, model=model, limit=limit))
+        # Index lookups and file reads run off the event loop
+        items = list(await asyncio.to_thread(read_interactions, stage=stage, provider=provider, model=model, limit=limit))
         return {"data": items, "count": len(items)}
     except Exception as e:
         logger.error(f"Failed to read LLM interactions: {e}")
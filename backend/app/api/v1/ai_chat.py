@@ -11,6 +11,7 @@ import json
 import logging
 
 from app.services.ai_chat_service import AIChatService
+from app.services.websocket.llm_stream import LLMStreamForwarder
 from app.core.dependencies import get_current_user
 from app.models.user import User
 
@@ -318,28 +319,38 @@ async def websocket_endpoint(
                 }
                 await manager.send_message(str(current_user.id), session_id, user_message)
                 
-                # Generate AI response
+                # Generate AI response, streaming partial output as llm_stream messages
+                user_id = str(current_user.id)
+
+                async def send_chunk(chunk_message: dict) -> None:
+                    await manager.send_message(user_id, session_id, chunk_message)
+
+                forwarder = LLMStreamForwarder(send_chunk, session_id, stage="chat")
                 try:
                     response = await ai_chat_service.send_message(
                         session_id=session_id,
                         user_id=str(current_user.id),
                         content=content,
                         model=model,
-                        context=context
+                        context=context,
+                        on_chunk=forwarder
                     )
+                    await forwarder.close()
                     
                     # Send AI response
                     ai_message = {
                         "type": "ai_message",
-                        "content": response.message.content,
-                        "model_used": response.model_used,
-                        "timestamp": response.message.timestamp.isoformat(),
-                        "metadata": response.message.metadata
+                        "content": response["message"]["content"],
+                        "model_used": response["model_used"],
+                        "timestamp": response["message"]["timestamp"].isoformat(),
+                        "metadata": response["message"]["metadata"],
+                        "stream_id": forwarder.stream_id
                     }
                     await manager.send_message(str(current_user.id), session_id, ai_message)
                     
                 except Exception as e:
                     logger.error(f"Error generating AI response: {e}")
+                    await forwarder.close(metadata={"error": True})
                     error_message = {
                         "type": "error",
                         "content": f"Sorry, I encountered an error: {str(e)}",
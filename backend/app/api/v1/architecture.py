@@ -17,7 +17,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.dependencies import get_current_user
 from app.core.database import get_db
 from app.models.user import User
-from app.services.enhanced_knowledge_base_service import EnhancedKnowledgeBaseService
+from app.services.enhanced_knowledge_base_service import (
+    EnhancedKnowledgeBaseService,
+    get_enhanced_knowledge_base_service,
+)
 from app.services.diagram_generation_service import DiagramGenerationService, DiagramType, OutputFormat
 from app.core.llm_strategy import LLMStrategy
 
@@ -132,7 +135,7 @@ async def generate_architecture_proposal(
         
         # Initialize services
         llm_strategy = LLMStrategy()
-        kb_service = EnhancedKnowledgeBaseService()
+        kb_service = get_enhanced_knowledge_base_service()
         
         # Get project context from knowledge base
         project_context = await kb_service.get_project_knowledge(project_id)
@@ -331,7 +334,7 @@ async def save_architecture_to_knowledge_base(
     project_id: str,
     request: KnowledgeBaseRequest,
     current_user: User = Depends(get_current_user),
-    kb_service: EnhancedKnowledgeBaseService = Depends()
+    kb_service: EnhancedKnowledgeBaseService = Depends(get_enhanced_knowledge_base_service)
 ):
     """
     Save architecture proposal and diagrams to the knowledge base.
@@ -19,7 +19,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.agents.github_analyzer_agent import GitHubAnalyzerAgent
-from app.services.local_knowledge_base_service import LocalKnowledgeBaseService
+from app.services.local_knowledge_base_service import (
+    LocalKnowledgeBaseService,
+    get_local_knowledge_base_service,
+)
 from app.schemas.brownfield import (
     ArchitectureGraphResponse,
     ErrorResponse,
@@ -37,12 +40,12 @@ router = APIRouter(prefix="/brownfield", tags=["brownfield"])
 
 def get_knowledge_base_service() -> LocalKnowledgeBaseService:
     """
-    Dependency to get Local Knowledge Base Service instance.
+    Dependency to get the shared Local Knowledge Base Service instance.
     
     Returns:
-        LocalKnowledgeBaseService: Configured local knowledge base service
+        LocalKnowledgeBaseService: Process-wide local knowledge base service
     """
-    return LocalKnowledgeBaseService()
+    return get_local_knowledge_base_service()
 
 
 @router.post(
@@ -727,8 +730,10 @@ async def index_analysis_results(
             }
         )
         
-        # Initialize knowledge base service
-        kb_service = KnowledgeBaseService()
+        # Index into the same local knowledge base the brownfield endpoints
+        # and BrownfieldWorkflow search (the Pinecone KnowledgeBaseService
+        # named here before was never imported, so this task always failed)
+        kb_service = get_local_knowledge_base_service()
         
         # Index the analysis results
         result = await kb_service.index_repository_analysis(
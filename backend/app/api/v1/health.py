@@ -15,7 +15,13 @@ from sqlalchemy import text
 from app.core.database import get_db
 from app.core.redis_client import get_redis
 from app.core.logging_config import get_logger
+from app.core.circuit_breaker import get_circuit_breaker_stats
+from app.core.ollama_residency import get_ollama_residency_stats
+from app.core.http_clients import get_http_client_stats
+from app.core.llm_scheduler import get_llm_scheduler_stats
+from app.core.model_registry import get_model_registry
 from app.config import settings
+from app.services.embedding_service import get_embedding_services_stats
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -39,6 +45,7 @@ async def health_check(
     - Application status
     - Database connectivity
     - Redis connectivity
+    - Loaded models (load time and memory footprint)
     
     Args:
         db: Database session dependency
@@ -59,6 +66,7 @@ async def health_check(
         "checks": {
             "database": {"status": "unknown", "details": {}},
             "redis": {"status": "unknown", "details": {}},
+            "models": {"status": "unknown", "details": {}},
         },
     }
     
@@ -112,6 +120,12 @@ async def health_check(
         overall_healthy = False
         logger.error(f"Redis health check failed: {e}")
     
+    # Report loaded models; models load lazily, so none loaded is still healthy
+    health_status["checks"]["models"] = {
+        "status": "healthy",
+        "details": get_model_registry().get_stats(),
+    }
+    
     # Set overall status
     if not overall_healthy:
         health_status["status"] = "unhealthy"
@@ -201,6 +215,142 @@ async def liveness_check() -> Dict[str, Any]:
     }
 
 
+@router.get(
+    "/health/models",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Model status",
+    description="Get load time and memory footprint of loaded models",
+    tags=["health"],
+)
+async def models_status() -> Dict[str, Any]:
+    """
+    Get the status of process-wide models and embedding services.
+    
+    Returns:
+        Dict containing model load statistics and embedding cache statistics
+        
+    Example:
+        ```bash
+        curl -X GET "http://localhost:8000/api/v1/health/models"
+        ```
+    """
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "warmup_enabled": settings.embedding_model_warmup,
+        **get_model_registry().get_stats(),
+        "embedding_services": get_embedding_services_stats(),
+    }
+
+
+@router.get(
+    "/health/http-clients",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="LLM HTTP pool status",
+    description="Get connection pool utilisation of the pooled LLM provider clients",
+    tags=["health"],
+)
+async def http_clients_status() -> Dict[str, Any]:
+    """
+    Get connection pool utilisation per LLM provider.
+    
+    Returns:
+        Dict containing limits, request counts and open, idle and active
+        connections for each provider client
+        
+    Example:
+        ```bash
+        curl -X GET "http://localhost:8000/api/v1/health/http-clients"
+        ```
+    """
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        **get_http_client_stats(),
+    }
+
+
+@router.get(
+    "/health/llm-scheduler",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="LLM scheduler status",
+    description="Get concurrency caps, queue depth and wait times of the LLM call scheduler",
+    tags=["health"],
+)
+async def llm_scheduler_status() -> Dict[str, Any]:
+    """
+    Get adaptive concurrency limits and queues per LLM provider/model.
+    
+    Returns:
+        Dict containing the current cap, in-flight calls, queue depth per
+        priority class, wait times and token budget of each limiter
+        
+    Example:
+        ```bash
+        curl -X GET "http://localhost:8000/api/v1/health/llm-scheduler"
+        ```
+    """
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        **get_llm_scheduler_stats(),
+    }
+
+
+@router.get(
+    "/health/llm-circuits",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="LLM circuit breaker status",
+    description="Get circuit breaker state of each LLM provider and model",
+    tags=["health"],
+)
+async def llm_circuits_status() -> Dict[str, Any]:
+    """
+    Get circuit breaker state per LLM provider and provider/model.
+    
+    Returns:
+        Dict containing the state, consecutive failures, seconds until the
+        next probe and counters of each breaker
+        
+    Example:
+        ```bash
+        curl -X GET "http://localhost:8000/api/v1/health/llm-circuits"
+        ```
+    """
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        **get_circuit_breaker_stats(),
+    }
+
+
+@router.get(
+    "/health/ollama-models",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Ollama model residency",
+    description="Get the local models each Ollama server keeps loaded",
+    tags=["health"],
+)
+async def ollama_models_status() -> Dict[str, Any]:
+    """
+    Get loaded local models per Ollama server.
+    
+    Returns:
+        Dict containing, per server, the resident models with seconds
+        until their keep_alive expires, and warm-up and routing counters
+        
+    Example:
+        ```bash
+        curl -X GET "http://localhost:8000/api/v1/health/ollama-models"
+        ```
+    """
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "servers": get_ollama_residency_stats(),
+    }
+
+
 @router.get(
     "/health/version",
     response_model=Dict[str, Any],
@@ -5,19 +5,32 @@ This module provides endpoints for workflow session management including
 starting workflows, monitoring status, and handling human feedback.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
+from fastapi import (
+    APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, WebSocket, WebSocketDisconnect
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
 from sqlalchemy.orm import selectinload
 from typing import List, Optional, Dict, Any
-from uuid import UUID
+from uuid import UUID, uuid4
 from datetime import datetime
+import asyncio
 import json
 from loguru import logger
 
+from app.agents.requirements_agent import RequirementsAgent
+from app.config import settings
 from app.core.database import get_db
 from app.core.file_storage import file_storage
 from app.workflows import ArchitectureWorkflow
+from app.workflows.jobs import (
+    CONTINUE_ARCHITECTURE_JOB,
+    START_ARCHITECTURE_JOB,
+    get_architecture_job_queue,
+    get_session_stage,
+    job_event_message,
+)
 from app.schemas.workflow import (
     WorkflowStartRequest,
     WorkflowStatusResponse,
@@ -746,7 +759,16 @@ async def get_workflow_stats(
 
 # New workflow management endpoints
 
-@router.post("/start-architecture", response_model=Dict[str, Any], status_code=status.HTTP_201_CREATED)
+def _workflow_tenant(project: Project) -> str:
+    """Tenant a project's workflow jobs are scheduled against (its owner)."""
+    return str(project.owner_id or project.id)
+
+
+def _websocket_path(session_id: str) -> str:
+    return f"{settings.api_v1_prefix}{router.prefix}/{session_id}/ws"
+
+
+@router.post("/start-architecture", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
 async def start_architecture_workflow(
     file: UploadFile = File(..., description="Requirements document to process"),
     project_id: str = Form(..., description="Project ID"),
@@ -758,6 +780,9 @@ async def start_architecture_workflow(
     """
     Start a new architecture workflow with document upload.
     
+    The workflow runs as a background job; follow its progress on the
+    session WebSocket (``websocket_url``) or the status endpoint.
+    
     Args:
         file: Requirements document file
         project_id: Project ID
@@ -767,10 +792,10 @@ async def start_architecture_workflow(
         db: Database session
         
     Returns:
-        Session ID and initial workflow status
+        Session ID, queued job and initial workflow status
         
     Raises:
-        HTTPException: 400 if file validation fails, 404 if project not found, 500 if workflow fails
+        HTTPException: 400 if file validation fails, 404 if project not found, 500 if the job cannot be queued
     """
     try:
         # Verify project exists
@@ -788,22 +813,22 @@ async def start_architecture_workflow(
         # Save uploaded file
         file_info = await file_storage.save_uploaded_file(file, None)
         
-        # Initialize workflow
-        workflow = ArchitectureWorkflow()
-        
-        # Start workflow
-        session_id, initial_result = await workflow.start(
-            project_id=project_id,
-            document_path=file_info["file_path"],
-            domain=domain,
-            project_context=project_context,
-            db=db,
-            llm_provider=llm_provider
+        # Queue the workflow; the job moves the file to processed when done
+        session_id = str(uuid4())
+        job = get_architecture_job_queue().submit(
+            START_ARCHITECTURE_JOB,
+            session_id=session_id,
+            tenant=_workflow_tenant(project),
+            payload={
+                "project_id": project_id,
+                "document_path": file_info["file_path"],
+                "file_id": file_info["file_id"],
+                "domain": domain,
+                "project_context": project_context,
+                "llm_provider": llm_provider
+            }
         )
         
-        # Move file to processed directory
-        file_storage.move_to_processed(file_info["file_id"])
-        
         return {
             "session_id": session_id,
             "project_id": project_id,
@@ -813,11 +838,13 @@ async def start_architecture_workflow(
                 "file_size": file_info["file_size"]
             },
             "workflow_status": {
-                "current_stage": initial_result.get("current_stage", "unknown"),
-                "started_at": initial_result.get("started_at"),
+                "current_stage": "queued",
+                "started_at": job.created_at.isoformat(),
                 "is_active": True
             },
-            "message": "Workflow started successfully"
+            "job": job.to_dict(),
+            "websocket_url": _websocket_path(session_id),
+            "message": "Workflow queued"
         }
         
     except HTTPException:
@@ -829,6 +856,58 @@ async def start_architecture_workflow(
         )
 
 
+@router.post("/extract-requirements-batch")
+async def extract_requirements_batch(
+    files: List[UploadFile] = File(..., description="Requirements documents to process"),
+    domain: str = Form("cloud-native", description="Project domain"),
+    project_context: Optional[str] = Form(None, description="Additional project context shared by the documents"),
+) -> StreamingResponse:
+    """
+    Extract requirements from many documents, streaming results as they complete.
+
+    The response is newline-delimited JSON: one line per document (in
+    completion order, with its index in the upload and original filename)
+    followed by a summary line with counts and throughput.
+
+    Args:
+        files: Requirements documents
+        domain: Project domain (cloud-native, data-platform, enterprise)
+        project_context: Optional project context
+
+    Returns:
+        Streaming NDJSON response
+
+    Raises:
+        HTTPException: 400 if file validation fails
+    """
+    saved = []
+    try:
+        for file in files:
+            saved.append(await file_storage.save_uploaded_file(file, None))
+    except ValueError as e:
+        for file_info in saved:
+            file_storage.delete_file(file_info["file_id"])
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    agent = RequirementsAgent()
+
+    async def stream():
+        try:
+            async for item in agent.extract_batch(
+                [file_info["file_path"] for file_info in saved],
+                project_context=project_context or "",
+                domain=domain
+            ):
+                if item["type"] == "document":
+                    item["filename"] = saved[item["index"]]["original_filename"]
+                yield json.dumps(item, default=str) + "\n"
+        finally:
+            for file_info in saved:
+                file_storage.move_to_processed(file_info["file_id"])
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.get("/{session_id}/status", response_model=Dict[str, Any])
 async def get_workflow_status_new(
     session_id: str,
@@ -837,12 +916,16 @@ async def get_workflow_status_new(
     """
     Get current workflow status and progress.
     
+    Jobs are only known to the process that accepted them. When this
+    process has no job for the session, the status comes from the
+    checkpointed workflow state alone (``state_source`` is "checkpoint").
+    
     Args:
         session_id: Workflow session ID
         db: Database session
         
     Returns:
-        Current workflow state and progress
+        Current workflow state and progress, with the session's latest job
         
     Raises:
         HTTPException: 404 if session not found, 500 if status retrieval fails
@@ -852,27 +935,36 @@ async def get_workflow_status_new(
         workflow = ArchitectureWorkflow()
         
         # Get workflow status
-        status = await workflow.get_status(session_id)
+        workflow_state = await workflow.get_status(session_id)
+        job_queue = get_architecture_job_queue()
+        jobs = job_queue.get_session_jobs(session_id)
+        active_job = job_queue.get_active_job(session_id)
         
-        if not status:
+        if not workflow_state and not jobs:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Workflow session {session_id} not found"
             )
         
+        workflow_state = workflow_state or {"current_stage": "queued"}
+        current_stage = workflow_state.get("current_stage", "unknown")
         return {
             "session_id": session_id,
-            "current_stage": status.get("current_stage", "unknown"),
-            "project_id": status.get("project_id"),
-            "domain": status.get("domain"),
-            "is_active": status.get("current_stage") not in ["completed", "failed", "cancelled"],
-            "started_at": status.get("started_at"),
-            "last_updated": status.get("last_updated"),
-            "requirements": status.get("requirements"),
-            "architecture": status.get("architecture"),
-            "errors": status.get("errors", []),
-            "review_history": status.get("review_history", []),
-            "waiting_for_review": status.get("current_stage") in ["requirements_review", "architecture_review"]
+            "current_stage": current_stage,
+            "project_id": workflow_state.get("project_id") or (jobs[0].payload.get("project_id") if jobs else None),
+            "domain": workflow_state.get("domain"),
+            "is_active": active_job is not None or current_stage not in ["completed", "failed", "cancelled"],
+            "started_at": workflow_state.get("started_at"),
+            "last_updated": workflow_state.get("last_updated"),
+            "requirements": workflow_state.get("requirements"),
+            "architecture": workflow_state.get("architecture"),
+            "errors": workflow_state.get("errors", []),
+            "review_history": workflow_state.get("review_history", []),
+            "waiting_for_review": (
+                active_job is None and current_stage in ["requirements_review", "architecture_review"]
+            ),
+            "job": jobs[-1].to_dict() if jobs else None,
+            "state_source": "job" if jobs else "checkpoint"
         }
         
     except HTTPException:
@@ -884,7 +976,7 @@ async def get_workflow_status_new(
         )
 
 
-@router.post("/{session_id}/review", response_model=Dict[str, Any])
+@router.post("/{session_id}/review", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
 async def submit_workflow_review(
     session_id: str,
     decision: str = Form(..., description="Review decision: approved, rejected, needs_info"),
@@ -896,6 +988,9 @@ async def submit_workflow_review(
     """
     Submit human feedback and continue workflow.
     
+    The workflow continues as a background job, after any job of the
+    session that is still queued or running.
+    
     Args:
         session_id: Workflow session ID
         decision: Review decision (approved, rejected, needs_info)
@@ -905,10 +1000,10 @@ async def submit_workflow_review(
         db: Database session
         
     Returns:
-        Updated workflow status after processing feedback
+        Queued job and the workflow status it continues from
         
     Raises:
-        HTTPException: 400 if validation fails, 404 if session not found, 500 if processing fails
+        HTTPException: 400 if validation fails, 404 if session not found, 500 if the job cannot be queued
     """
     try:
         # Validate decision
@@ -953,19 +1048,42 @@ async def submit_workflow_review(
         # Initialize workflow
         workflow = ArchitectureWorkflow()
         
-        # Continue workflow with feedback
-        result = await workflow.continue_workflow(session_id, human_feedback)
+        workflow_state = await workflow.get_status(session_id)
+        job_queue = get_architecture_job_queue()
+        active_job = job_queue.get_active_job(session_id)
+        if not workflow_state and active_job is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Workflow session {session_id} not found"
+            )
+        
+        # Schedule against the same tenant as the session's project
+        project_id = workflow_state.get("project_id") or active_job.payload.get("project_id")
+        project_result = await db.execute(select(Project).where(Project.id == project_id))
+        project = project_result.scalar_one_or_none()
+        tenant = _workflow_tenant(project) if project else str(project_id)
+        
+        # Continue workflow with feedback in the background
+        job = job_queue.submit(
+            CONTINUE_ARCHITECTURE_JOB,
+            session_id=session_id,
+            tenant=tenant,
+            payload={"project_id": project_id, "human_feedback": human_feedback}
+        )
+        current_stage = workflow_state.get("current_stage", "queued")
         
         return {
             "session_id": session_id,
             "feedback_submitted": True,
             "decision": decision,
             "updated_status": {
-                "current_stage": result.get("current_stage", "unknown"),
-                "last_updated": result.get("last_updated"),
-                "is_active": result.get("current_stage") not in ["completed", "failed", "cancelled"]
+                "current_stage": current_stage,
+                "last_updated": workflow_state.get("last_updated"),
+                "is_active": True
             },
-            "message": f"Feedback submitted successfully. Workflow is now in stage: {result.get('current_stage', 'unknown')}"
+            "job": job.to_dict(),
+            "websocket_url": _websocket_path(session_id),
+            "message": f"Feedback submitted. Workflow continues from stage: {current_stage}"
         }
         
     except HTTPException:
@@ -977,6 +1095,62 @@ async def submit_workflow_review(
         )
 
 
+@router.websocket("/{session_id}/ws")
+async def workflow_progress_websocket(websocket: WebSocket, session_id: str) -> None:
+    """
+    Stream the progress of a workflow session's background jobs.
+    
+    Sends the state of the session's latest job on connect, then a
+    ``workflow_update`` message for every job event (queued, started,
+    each completed stage, retried, finished) and the agents' partial LLM
+    output as ``llm_stream`` messages. Replies "pong" to "ping".
+    
+    Args:
+        websocket: WebSocket connection
+        session_id: Workflow session ID
+    """
+    await websocket.accept()
+    job_queue = get_architecture_job_queue()
+    events = job_queue.subscribe(session_id)
+    receiver = asyncio.create_task(_answer_pings(websocket))
+    try:
+        stage = await get_session_stage(session_id) or "starting"
+        jobs = job_queue.get_session_jobs(session_id)
+        if jobs:
+            await websocket.send_json(job_event_message({"event": "job_state", "job": jobs[-1].to_dict()}, stage))
+        
+        while True:
+            next_event = asyncio.create_task(events.get())
+            done, _ = await asyncio.wait({next_event, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                next_event.cancel()
+                break
+            event = next_event.result()
+            if event["event"] == "llm_stream":
+                await websocket.send_json(event["message"])
+                continue
+            stage = event.get("stage") or (event["job"]["result"] or {}).get("current_stage") or stage
+            await websocket.send_json(job_event_message(event, stage))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Workflow WebSocket error for session {session_id}: {e}")
+        await websocket.close(code=1011, reason="Internal server error")
+    finally:
+        receiver.cancel()
+        job_queue.unsubscribe(session_id, events)
+
+
+async def _answer_pings(websocket: WebSocket) -> None:
+    """Reply to client pings until the client disconnects."""
+    try:
+        while True:
+            if await websocket.receive_text() == "ping":
+                await websocket.send_text("pong")
+    except WebSocketDisconnect:
+        pass
+
+
 @router.get("/{session_id}/requirements", response_model=Dict[str, Any])
 async def get_workflow_requirements(
     session_id: str,
@@ -42,6 +42,50 @@ class Settings(BaseSettings):
     database_pool_size: int = Field(default=10, description="Database pool size")
     database_max_overflow: int = Field(default=20, description="Database max overflow")
 
+    # Workflow checkpoints
+    workflow_checkpointer: str = Field(
+        default="database", description="LangGraph checkpointer for workflows ('database' or 'memory')"
+    )
+    workflow_checkpoint_batch_size: int = Field(
+        default=64, description="Buffered task writes that trigger a checkpoint flush"
+    )
+    workflow_checkpoint_flush_seconds: float = Field(
+        default=0.5, description="Longest time task writes stay buffered before they are flushed"
+    )
+    workflow_checkpoint_keep_last: int = Field(
+        default=20, description="Checkpoints kept per workflow thread when pruning (0 keeps all)"
+    )
+    workflow_checkpoint_prune_every: int = Field(
+        default=10, description="Checkpoints stored for a thread between prunings"
+    )
+    workflow_checkpoint_compress_bytes: int = Field(
+        default=1024, description="Serialized values larger than this are stored zlib-compressed"
+    )
+
+    # Workflow jobs
+    workflow_job_workers: int = Field(
+        default=4,
+        description=(
+            "Workflow jobs (start/continue) run concurrently per process. The job queue is "
+            "in-process, so the API must run as a single worker process"
+        )
+    )
+    workflow_job_tenant_concurrency: int = Field(
+        default=2, description="Running workflow jobs per tenant (project owner)"
+    )
+    workflow_job_lease_seconds: float = Field(
+        default=900.0, description="Time a workflow job may run without progress before it is retried"
+    )
+    workflow_job_max_attempts: int = Field(
+        default=3, description="Attempts before a workflow job fails"
+    )
+    workflow_job_retry_backoff_seconds: float = Field(
+        default=5.0, description="Delay before retrying a failed workflow job, doubled per attempt"
+    )
+    workflow_job_retention_seconds: float = Field(
+        default=3600.0, description="Time finished workflow jobs stay available to status requests"
+    )
+
     # Redis
     redis_url: str = Field(
         default="redis://localhost:6380/0", description="Redis connection URL"
@@ -119,7 +163,212 @@ class Settings(BaseSettings):
     adr_writing_llm_model: str = Field(
         default="deepseek-r1", description="LLM model for ADR writing"
     )
-    
+
+    # LLM HTTP connection pooling
+    llm_http_max_connections: int = Field(
+        default=50, description="Maximum pooled connections per hosted LLM provider"
+    )
+    llm_http_max_keepalive_connections: int = Field(
+        default=20, description="Maximum idle keep-alive connections per hosted LLM provider"
+    )
+    llm_http_keepalive_expiry: float = Field(
+        default=60.0, description="Seconds an idle LLM provider connection is kept open"
+    )
+    llm_local_http_max_connections: int = Field(
+        default=8, description="Maximum pooled connections to the local Ollama/DeepSeek server"
+    )
+    llm_http2_enabled: bool = Field(
+        default=True, description="Use HTTP/2 for hosted LLM providers when h2 is installed"
+    )
+
+    # LLM response cache
+    llm_cache_enabled: bool = Field(
+        default=True, description="Cache LLM responses by provider, model, prompts and temperature"
+    )
+    llm_cache_ttl_seconds: int = Field(
+        default=86400, description="Time to live of cached LLM responses in seconds"
+    )
+    llm_cache_max_entries: int = Field(
+        default=1000, description="Maximum LLM responses held in the in-process cache"
+    )
+    llm_cache_redis_enabled: bool = Field(
+        default=True, description="Share cached LLM responses through Redis when it is available"
+    )
+    llm_cache_semantic_enabled: bool = Field(
+        default=False, description="Serve near-identical prompts from cache by embedding similarity"
+    )
+    llm_cache_semantic_threshold: float = Field(
+        default=0.97, description="Minimum cosine similarity for a semantic cache hit"
+    )
+    llm_cache_semantic_max_chars: int = Field(
+        default=2000, description="Longest prompt eligible for semantic lookup (embeddings truncate long text)"
+    )
+
+    # LLM request coalescing
+    llm_single_flight_enabled: bool = Field(
+        default=True, description="Share one provider call between concurrent identical LLM requests"
+    )
+    llm_single_flight_redis_enabled: bool = Field(
+        default=False, description="Coalesce identical LLM requests across workers with a Redis lease"
+    )
+    llm_single_flight_lease_seconds: int = Field(
+        default=300, description="Redis lease lifetime and longest wait for another worker's LLM call"
+    )
+    llm_single_flight_poll_interval: float = Field(
+        default=0.5, description="Seconds between checks for another worker's LLM result"
+    )
+
+    # LLM call scheduling
+    llm_scheduler_enabled: bool = Field(
+        default=True, description="Bound concurrent LLM calls with adaptive per-provider limits"
+    )
+    llm_local_max_concurrency: int = Field(
+        default=2, description="Initial concurrent calls to the local Ollama/DeepSeek server"
+    )
+    llm_local_max_concurrency_limit: int = Field(
+        default=4, description="Upper bound the local concurrency cap may grow to"
+    )
+    llm_local_latency_target_seconds: float = Field(
+        default=120.0, description="Local LLM calls slower than this halve the concurrency cap"
+    )
+    llm_hosted_max_concurrency: int = Field(
+        default=8, description="Initial concurrent calls per hosted LLM model"
+    )
+    llm_hosted_max_concurrency_limit: int = Field(
+        default=32, description="Upper bound a hosted model's concurrency cap may grow to"
+    )
+    llm_hosted_latency_target_seconds: float = Field(
+        default=30.0, description="Hosted LLM calls slower than this halve the concurrency cap"
+    )
+    llm_batch_concurrency_fraction: float = Field(
+        default=0.5, description="Share of each concurrency cap batch work (brownfield analysis) may hold"
+    )
+    llm_openai_tokens_per_minute: int = Field(
+        default=200000, description="Tokens per minute budget per OpenAI model (0 disables)"
+    )
+    llm_anthropic_tokens_per_minute: int = Field(
+        default=40000, description="Tokens per minute budget per Anthropic model (0 disables)"
+    )
+
+    # Hedged LLM requests
+    llm_hedge_enabled: bool = Field(
+        default=True, description="Start the next fallback candidate when the current one runs slow"
+    )
+    llm_hedge_percentile: float = Field(
+        default=0.9, description="Latency percentile of a model after which its call is hedged"
+    )
+    llm_hedge_default_delay_seconds: float = Field(
+        default=30.0, description="Hedge delay used until a model has enough latency samples"
+    )
+    llm_hedge_min_delay_seconds: float = Field(
+        default=2.0, description="Shortest hedge delay"
+    )
+    llm_hedge_max_delay_seconds: float = Field(
+        default=120.0, description="Longest hedge delay"
+    )
+    llm_hedge_max_parallel: int = Field(
+        default=2, description="Maximum candidates of one hedged call running at once"
+    )
+    llm_hedge_stage_overrides: dict[str, dict] = Field(
+        default_factory=dict,
+        description='Per-stage hedge settings, e.g. {"github_analyzer": {"enabled": false}}',
+    )
+
+    # LLM circuit breakers
+    llm_circuit_breaker_enabled: bool = Field(
+        default=True, description="Skip LLM providers and models whose circuit breaker is open"
+    )
+    llm_circuit_failure_threshold: int = Field(
+        default=5, description="Consecutive provider failures that open a circuit"
+    )
+    llm_circuit_recovery_seconds: float = Field(
+        default=30.0, description="Seconds a circuit stays open before a half-open probe"
+    )
+    llm_circuit_max_recovery_seconds: float = Field(
+        default=300.0, description="Longest open period after repeated failed probes"
+    )
+
+    # Prompt token budgets
+    llm_context_windows: dict[str, int] = Field(
+        default_factory=lambda: {
+            "gpt-4o": 128000,
+            "gpt-4o-mini": 128000,
+            "gpt-4-turbo": 128000,
+            "gpt-4": 8192,
+            "gpt-3.5-turbo": 16385,
+            "claude-3": 200000,
+            "deepseek-r1": 8192,
+            "deepseek-coder": 8192,
+            "llama3.2": 8192,
+        },
+        description="Context window in tokens by model name or name prefix",
+    )
+    llm_default_context_window: int = Field(
+        default=8192, description="Context window of models missing from llm_context_windows"
+    )
+    prompt_budget_margin_ratio: float = Field(
+        default=0.1, description="Share of the prompt budget kept free for tokenizer estimate error"
+    )
+    prompt_budget_use_embeddings: bool = Field(
+        default=True, description="Rank prompt context by embedding similarity (else by word overlap)"
+    )
+
+    # Batch requirements extraction
+    requirements_batch_pack_document_tokens: int = Field(
+        default=1500, description="Documents up to this many tokens may share one extraction call"
+    )
+    requirements_batch_pack_max_documents: int = Field(
+        default=3, description="Most documents packed into one extraction call (they share its completion tokens)"
+    )
+    requirements_batch_read_concurrency: int = Field(
+        default=8, description="Documents read from disk at once during batch extraction"
+    )
+
+    # Ollama model residency
+    ollama_keep_alive: str = Field(
+        default="30m", description="How long Ollama keeps a model loaded after a call (e.g. '30m', '-1' forever)"
+    )
+    ollama_keep_alive_overrides: dict[str, str] = Field(
+        default_factory=dict,
+        description='Per-model keep_alive by name or name prefix, e.g. {"deepseek-r1": "10m"}',
+    )
+    ollama_warmup_on_startup: bool = Field(
+        default=True, description="Load the local models configured in ModelManager at startup"
+    )
+    ollama_residency_refresh_seconds: float = Field(
+        default=15.0, description="How long the list of loaded Ollama models is cached"
+    )
+    ollama_route_to_resident: bool = Field(
+        default=True, description="Try already-loaded local models first when their quality tier allows"
+    )
+    ollama_quality_tiers: dict[str, int] = Field(
+        default_factory=lambda: {"llama3.2": 1, "deepseek-coder": 2, "deepseek-r1": 3},
+        description="Quality tier by model name or name prefix; a loaded model may stand in for one of equal or lower tier",
+    )
+
+    # LLM interaction log
+    llm_interaction_log_dir: Optional[str] = Field(
+        default=None, description="Directory of the LLM interaction log (default: <repo>/logs)"
+    )
+    llm_interaction_log_queue_size: int = Field(
+        default=10000, description="Interactions buffered for the log writer before new ones are dropped"
+    )
+    llm_interaction_log_batch_size: int = Field(
+        default=200, description="Maximum interactions written per batch (one fsync per batch)"
+    )
+    llm_interaction_log_flush_seconds: float = Field(
+        default=1.0, description="Longest time an interaction waits in the buffer before being written"
+    )
+    llm_interaction_log_max_bytes: int = Field(
+        default=50 * 1024 * 1024, description="Size at which the active log file is rotated"
+    )
+    llm_interaction_log_max_age_hours: float = Field(
+        default=24.0, description="Age at which the active log file is rotated"
+    )
+    llm_interaction_log_backups: int = Field(
+        default=10, description="Compressed rotated log files kept"
+    )
+
     # Knowledge Base Service Settings
     pinecone_api_key: Optional[str] = Field(
         default=None, description="Pinecone API key for vector search"
@@ -139,6 +388,40 @@ class Settings(BaseSettings):
     knowledge_base_embedding_model: str = Field(
         default="all-MiniLM-L6-v2", description="Sentence transformer model for embeddings"
     )
+    knowledge_base_index_type: str = Field(
+        default="exact", description="Vector index backend for knowledge base search (exact or ivf_flat)"
+    )
+    knowledge_base_ivf_n_lists: Optional[int] = Field(
+        default=None, description="Number of IVF clusters (defaults to sqrt of the vector count)"
+    )
+    knowledge_base_ivf_n_probe: int = Field(
+        default=8, description="IVF clusters scored per query (higher improves recall, costs latency)"
+    )
+    embedding_max_batch_size: int = Field(
+        default=32, description="Maximum texts encoded per embedding batch"
+    )
+    embedding_max_wait_ms: float = Field(
+        default=10.0, description="Maximum time an embedding request waits for its batch to fill"
+    )
+    embedding_cache_size: int = Field(
+        default=10000, description="Embeddings kept in the in-memory LRU cache"
+    )
+    embedding_cache_dir: Optional[str] = Field(
+        default=None, description="Directory for the persistent embedding cache (disabled if unset)"
+    )
+    embedding_model_warmup: bool = Field(
+        default=False, description="Load embedding models at startup instead of on first use"
+    )
+
+    # Repository mirror cache
+    repository_mirror_cache_dir: Optional[str] = Field(
+        default=None,
+        description="Directory of bare repository mirrors reused across GitHub analyses (disabled if unset)"
+    )
+    repository_mirror_cache_max_bytes: int = Field(
+        default=2 * 1024 * 1024 * 1024,
+        description="Disk space the repository mirrors may use before least recently used ones are evicted"
+    )
 
     # File Processing
     max_file_size: int = Field(
@@ -0,0 +1,360 @@
+"""
+Circuit breakers for LLM providers and models.
+
+Each provider and each provider/model pair has a breaker shared by every
+caller in the process. After ``failure_threshold`` consecutive provider
+failures (timeouts, connection errors, rate limits, server errors) the
+breaker opens and calls are rejected immediately instead of paying
+retries and backoff against a provider that is down. Once the recovery
+timeout has passed the breaker goes half-open and lets a single probe
+call through: success closes it, failure re-opens it with a longer
+recovery timeout (doubling up to a maximum).
+
+Failures that only say something about one model (timeouts, rate limits,
+a missing or overloaded model) count against that model's breaker.
+Provider breakers only count provider-wide failures: connection and
+authentication errors, server errors, or failures of several models of
+the provider at once.
+"""
+
+import time
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from app.config import settings
+
+
+PROVIDER_WIDE_MESSAGES = (
+    "connection",
+    "network",
+    "unauthorized",
+    "authentication",
+    "api key",
+    "forbidden",
+    "internal server error",
+    "service unavailable",
+    "bad gateway",
+)
+
+
+def is_provider_wide_error(error: Optional[BaseException]) -> bool:
+    """
+    Determine if an error means the whole provider is failing.
+
+    Args:
+        error: Exception a call raised (None when unknown)
+
+    Returns:
+        True for connection, authentication and server errors
+    """
+    if error is None:
+        return False
+    if isinstance(error, ConnectionError):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in (401, 403) or status >= 500
+    error_message = str(error).lower()
+    return any(msg in error_message for msg in PROVIDER_WIDE_MESSAGES)
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker state."""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its provider's circuit is open."""
+
+    def __init__(self, message: str, provider: Optional[str] = None, model: Optional[str] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.model = model
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with half-open probing.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        max_recovery_timeout: float = 300.0
+    ):
+        """
+        Initialize breaker.
+
+        Args:
+            name: Breaker name used in stats and logs
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds the circuit stays open before a probe
+            max_recovery_timeout: Upper bound of the recovery timeout after
+                repeated failed probes
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max(recovery_timeout, max_recovery_timeout)
+        self.recovery_timeout = recovery_timeout
+
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        self.stats = {
+            "successes": 0,
+            "failures": 0,
+            "rejected": 0,
+            "opened": 0,
+            "probes": 0,
+        }
+
+    def _probe_due(self, now: float) -> bool:
+        if self.state == CircuitState.OPEN:
+            return now - self.opened_at >= self.recovery_timeout
+        if self.state == CircuitState.HALF_OPEN:
+            # A probe that never reported (cancelled caller) frees the slot
+            return self.probe_started_at is None or now - self.probe_started_at >= self.recovery_timeout
+        return True
+
+    def is_available(self) -> bool:
+        """
+        Check whether a call would be allowed, without reserving a probe.
+
+        Returns:
+            False while the circuit is open (or half-open with a probe in flight)
+        """
+        return self.state == CircuitState.CLOSED or self._probe_due(time.monotonic())
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may proceed, reserving the probe when half-open.
+
+        Returns:
+            True if the call may be sent
+        """
+        if self.state == CircuitState.CLOSED:
+            return True
+        now = time.monotonic()
+        if not self._probe_due(now):
+            self.stats["rejected"] += 1
+            return False
+        if self.state == CircuitState.OPEN:
+            self.state = CircuitState.HALF_OPEN
+            logger.info(f"Circuit {self.name} half-open, probing")
+        self.probe_started_at = now
+        self.stats["probes"] += 1
+        return True
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        self.stats["successes"] += 1
+        self.consecutive_failures = 0
+        if self.state != CircuitState.CLOSED:
+            logger.info(f"Circuit {self.name} closed after successful probe")
+        self.state = CircuitState.CLOSED
+        self.recovery_timeout = self.base_recovery_timeout
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        """
+        Record a provider failure.
+
+        Args:
+            error: Exception the call raised
+        """
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        if error is not None:
+            self.last_error = f"{type(error).__name__}: {str(error)[:200]}"
+
+        if self.state == CircuitState.HALF_OPEN:
+            self.recovery_timeout = min(self.max_recovery_timeout, self.recovery_timeout * 2)
+            self._open()
+        elif self.state == CircuitState.CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = CircuitState.OPEN
+        self.opened_at = time.monotonic()
+        self.probe_started_at = None
+        self.stats["opened"] += 1
+        logger.warning(
+            f"Circuit {self.name} open for {self.recovery_timeout:.0f}s after "
+            f"{self.consecutive_failures} consecutive failures: {self.last_error}"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get breaker state and counters.
+
+        Returns:
+            Dict with state, consecutive failures, seconds until the next probe and counters
+        """
+        retry_in = None
+        if self.state == CircuitState.OPEN:
+            retry_in = max(0.0, round(self.opened_at + self.recovery_timeout - time.monotonic(), 1))
+        return {
+            **self.stats,
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "recovery_timeout": self.recovery_timeout,
+            "retry_in_seconds": retry_in,
+            "last_error": self.last_error,
+        }
+
+
+class CircuitBreakerRegistry:
+    """
+    Shared breakers per provider and per provider/model.
+
+    A call is allowed only if both its provider breaker and its model
+    breaker allow it, so a provider outage trips every model at once while
+    a single broken model does not block its provider's other models.
+    """
+
+    # Models of one provider failing at the same time that count as a provider failure
+    failing_models_threshold = 2
+
+    def __init__(self):
+        """Initialize registry with no breakers; they are created on first use."""
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, provider: str, model: Optional[str] = None) -> CircuitBreaker:
+        """
+        Get the breaker of a provider, or of one of its models.
+
+        Args:
+            provider: Provider name
+            model: Model name (None for the provider-level breaker)
+
+        Returns:
+            Shared breaker
+        """
+        key = f"{provider}:{model}" if model else provider
+        if key not in self._breakers:
+            self._breakers[key] = CircuitBreaker(
+                key,
+                failure_threshold=settings.llm_circuit_failure_threshold,
+                recovery_timeout=settings.llm_circuit_recovery_seconds,
+                max_recovery_timeout=settings.llm_circuit_max_recovery_seconds,
+            )
+        return self._breakers[key]
+
+    def _chain(self, provider: str, model: Optional[str]):
+        yield self.breaker(provider)
+        if model:
+            yield self.breaker(provider, model)
+
+    def is_available(self, provider: str, model: Optional[str] = None) -> bool:
+        """
+        Check whether calls to a provider (and model) would be allowed.
+
+        Args:
+            provider: Provider name
+            model: Model name
+
+        Returns:
+            True unless a breaker on the path is open
+        """
+        if not settings.llm_circuit_breaker_enabled:
+            return True
+        return all(b.is_available() for b in self._chain(provider, model))
+
+    def allow_request(self, provider: str, model: Optional[str] = None) -> bool:
+        """
+        Check whether a call may proceed, reserving half-open probes.
+
+        Args:
+            provider: Provider name
+            model: Model name
+
+        Returns:
+            True if the call may be sent
+        """
+        if not settings.llm_circuit_breaker_enabled:
+            return True
+        breakers = list(self._chain(provider, model))
+        if not all(b.is_available() for b in breakers):
+            for b in breakers:
+                if not b.is_available():
+                    b.stats["rejected"] += 1
+            return False
+        # Every breaker is available, so this only moves due ones to half-open
+        return all([b.allow_request() for b in breakers])
+
+    def record_success(self, provider: str, model: Optional[str] = None) -> None:
+        """Record a successful call."""
+        for b in self._chain(provider, model):
+            b.record_success()
+
+    def record_failure(self, provider: str, model: Optional[str] = None, error: Optional[BaseException] = None) -> None:
+        """
+        Record a failed call.
+
+        Failures without a model, or with a provider-wide error, count on the
+        provider breaker and the model breaker. Other failures count on the
+        model breaker, and on the provider breaker only while several of the
+        provider's models are failing.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            error: Exception the call raised
+        """
+        if not model or is_provider_wide_error(error):
+            for b in self._chain(provider, model):
+                b.record_failure(error)
+            return
+
+        self.breaker(provider, model).record_failure(error)
+        failing_models = sum(
+            1 for key, b in self._breakers.items()
+            if key.startswith(f"{provider}:") and b.consecutive_failures > 0
+        )
+        if failing_models >= self.failing_models_threshold:
+            self.breaker(provider).record_failure(error)
+
+    def reset(self) -> None:
+        """Forget every breaker (closes all circuits)."""
+        self._breakers.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get state of every breaker.
+
+        Returns:
+            Dict keyed by breaker name
+        """
+        return {key: b.get_stats() for key, b in self._breakers.items()}
+
+
+circuit_breakers = CircuitBreakerRegistry()
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """
+    Get the process-wide circuit breaker registry.
+
+    Returns:
+        Shared registry
+    """
+    return circuit_breakers
+
+
+def get_circuit_breaker_stats() -> Dict[str, Any]:
+    """Get statistics of the shared circuit breakers."""
+    return {
+        "enabled": settings.llm_circuit_breaker_enabled,
+        "breakers": circuit_breakers.get_stats(),
+    }
@@ -7,13 +7,21 @@ via Ollama or similar local LLM servers.
 
 import asyncio
 import json
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 from urllib.parse import urljoin
 
 import httpx
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.messages import (
+    AIMessage, AIMessageChunk, BaseMessage, HumanMessage, SystemMessage
+)
 from loguru import logger
 
+from app.core.http_clients import get_http_client
+from app.core.llm_streaming import iter_ndjson, iter_sse_json
+from app.core.ollama_residency import get_ollama_residency
+from app.core.token_usage import usage_from_response
+from app.modules.llm_response_parser import LLMResponseParser
+
 
 class DeepSeekClient:
     """
@@ -48,6 +56,7 @@ class DeepSeekClient:
         
         # Determine if this is an Ollama server or OpenAI-compatible
         self.is_ollama = "11434" in base_url or "ollama" in base_url.lower()
+        self.provider = "ollama" if self.is_ollama else "deepseek"
         
     async def _make_request(
         self, 
@@ -69,17 +78,17 @@ class DeepSeekClient:
         """
         url = urljoin(self.base_url, endpoint)
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.post(url, json=payload)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError as e:
-                logger.error(f"HTTP error calling DeepSeek API: {e}")
-                raise
-            except Exception as e:
-                logger.error(f"Unexpected error calling DeepSeek API: {e}")
-                raise
+        client = get_http_client(self.provider)
+        try:
+            response = await client.post(url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP error calling DeepSeek API: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error calling DeepSeek API: {e}")
+            raise
     
     def _format_messages_for_ollama(self, messages: List[BaseMessage]) -> str:
         """
@@ -169,10 +178,12 @@ class DeepSeekClient:
         """
         prompt = self._format_messages_for_ollama(messages)
         
+        residency = get_ollama_residency(self.base_url)
         payload = {
             "model": self.model,
             "prompt": prompt,
             "stream": False,
+            "keep_alive": residency.keep_alive_for(self.model),
             "options": {
                 "temperature": kwargs.get("temperature", self.temperature),
             }
@@ -182,11 +193,12 @@ class DeepSeekClient:
             payload["options"]["num_predict"] = self.max_tokens
         
         response = await self._make_request("/api/generate", payload)
+        residency.mark_used(self.model)
         
         if "response" not in response:
             raise ValueError("Invalid response from Ollama API")
         
-        return AIMessage(content=response["response"])
+        return self._to_message(response["response"], response)
     
     async def _generate_openai_compatible(
         self, 
@@ -221,7 +233,101 @@ class DeepSeekClient:
             raise ValueError("Invalid response from OpenAI-compatible API")
         
         content = response["choices"][0]["message"]["content"]
-        return AIMessage(content=content)
+        return self._to_message(content, response)
+    
+    def _to_message(self, content: str, response: Dict[str, Any]) -> AIMessage:
+        """
+        Build the response message with the token usage the server reported.
+        
+        Args:
+            content: Generated text
+            response: Raw response data
+            
+        Returns:
+            AI message with ``usage_metadata`` and the raw usage fields in
+            ``response_metadata``
+        """
+        usage = usage_from_response(response)
+        if usage is None:
+            return AIMessage(content=content)
+        metadata = {
+            key: response[key]
+            for key in ("usage", "prompt_eval_count", "eval_count", "load_duration",
+                        "prompt_eval_duration", "eval_duration", "total_duration")
+            if key in response
+        }
+        return AIMessage(
+            content=content,
+            response_metadata=metadata,
+            usage_metadata={
+                "input_tokens": usage["prompt_tokens"],
+                "output_tokens": usage["completion_tokens"],
+                "total_tokens": usage["prompt_tokens"] + usage["completion_tokens"],
+            },
+        )
+    
+    async def stream(
+        self,
+        messages: List[BaseMessage],
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from the DeepSeek model as text chunks.
+        
+        Args:
+            messages: List of input messages
+            **kwargs: Additional parameters
+            
+        Yields:
+            Text chunks as the server generates them
+            
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        temperature = kwargs.get("temperature", self.temperature)
+        if self.is_ollama:
+            endpoint = "/api/generate"
+            payload = {
+                "model": self.model,
+                "prompt": self._format_messages_for_ollama(messages),
+                "stream": True,
+                "keep_alive": get_ollama_residency(self.base_url).keep_alive_for(self.model),
+                "options": {"temperature": temperature},
+            }
+            if self.max_tokens:
+                payload["options"]["num_predict"] = self.max_tokens
+        else:
+            endpoint = "/v1/chat/completions"
+            payload = {
+                "model": self.model,
+                "messages": self._format_messages_for_openai(messages),
+                "temperature": temperature,
+                "stream": True,
+            }
+            if self.max_tokens:
+                payload["max_tokens"] = self.max_tokens
+        
+        client = get_http_client(self.provider)
+        try:
+            async with client.stream(
+                "POST", urljoin(self.base_url, endpoint), json=payload, timeout=self.timeout
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                response.raise_for_status()
+                if self.is_ollama:
+                    async for chunk in iter_ndjson(response):
+                        text = LLMResponseParser.parse_ollama_stream_chunk(chunk)
+                        if text:
+                            yield text
+                else:
+                    async for event in iter_sse_json(response):
+                        text = LLMResponseParser.parse_openai_stream_chunk(event)
+                        if text:
+                            yield text
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP error streaming from DeepSeek API: {e}")
+            raise
     
     async def health_check(self) -> bool:
         """
@@ -231,16 +337,14 @@ class DeepSeekClient:
             True if server is healthy, False otherwise
         """
         try:
+            client = get_http_client(self.provider)
             if self.is_ollama:
                 # Check Ollama health
-                async with httpx.AsyncClient(timeout=5) as client:
-                    response = await client.get(f"{self.base_url}/api/tags")
-                    return response.status_code == 200
+                response = await client.get(f"{self.base_url}/api/tags", timeout=5)
             else:
                 # Check OpenAI-compatible health
-                async with httpx.AsyncClient(timeout=5) as client:
-                    response = await client.get(f"{self.base_url}/v1/models")
-                    return response.status_code == 200
+                response = await client.get(f"{self.base_url}/v1/models", timeout=5)
+            return response.status_code == 200
         except Exception as e:
             logger.warning(f"DeepSeek health check failed: {e}")
             return False
@@ -342,6 +446,27 @@ class ChatDeepSeek:
         
         return await self.client.generate(messages, **kwargs)
     
+    async def astream(
+        self,
+        messages: Union[List[BaseMessage], str],
+        **kwargs
+    ) -> AsyncIterator[AIMessageChunk]:
+        """
+        Async stream method compatible with LangChain.
+        
+        Args:
+            messages: Messages or prompt string
+            **kwargs: Additional parameters
+            
+        Yields:
+            AI message chunks as the model generates them
+        """
+        if isinstance(messages, str):
+            messages = [HumanMessage(content=messages)]
+        
+        async for text in self.client.stream(messages, **kwargs):
+            yield AIMessageChunk(content=text)
+    
     def invoke(
         self, 
         messages: Union[List[BaseMessage], str], 
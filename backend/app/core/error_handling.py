@@ -7,12 +7,15 @@ for LLM operations and workflow execution.
 
 import asyncio
 import random
-from typing import Any, Callable, Dict, List, Optional, Type, Union
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type, Union
 from functools import wraps
 from loguru import logger
 from enum import Enum
 
 from app.config import settings
+from app.core.circuit_breaker import CircuitOpenError, circuit_breakers, is_provider_wide_error
+from app.core.hedging import HedgeExhaustedError, get_hedge_policy, hedged_call
+from app.core.llm_scheduler import llm_slot_available
 
 
 class ErrorSeverity(Enum):
@@ -167,16 +170,25 @@ async def retry_with_fallback(
     *args,
     retry_config: Optional[RetryConfig] = None,
     fallback_config: Optional[FallbackConfig] = None,
+    hedge_stage: Optional[str] = None,
     **kwargs
 ) -> Any:
     """
     Execute a function with retry logic and fallback mechanisms.
     
+    When ``hedge_stage`` is given and hedging is enabled for it, an attempt
+    that runs past the model's latency percentile is hedged with the
+    fallback model in parallel; the first result wins.
+    
+    Every call goes through the shared circuit breakers: a provider or
+    model whose circuit is open is skipped without retries or backoff.
+    
     Args:
         func: Function to execute
         *args: Function arguments
         retry_config: Retry configuration
         fallback_config: Fallback configuration
+        hedge_stage: Stage whose hedging policy applies (None disables hedging)
         **kwargs: Function keyword arguments
         
     Returns:
@@ -192,6 +204,12 @@ async def retry_with_fallback(
     current_provider = kwargs.get('llm_provider', settings.default_llm_provider)
     current_model = kwargs.get('llm_model', settings.default_llm_model)
     
+    hedge_model = None
+    if hedge_stage and get_hedge_policy(hedge_stage).enabled:
+        hedge_model = get_fallback_model(current_provider, current_model, fallback_config)
+        if hedge_model == current_model:
+            hedge_model = None
+    
     # Try with current provider and model
     for attempt in range(retry_config.max_retries + 1):
         try:
@@ -201,7 +219,10 @@ async def retry_with_fallback(
             kwargs['llm_provider'] = current_provider
             kwargs['llm_model'] = current_model
             
-            result = await func(*args, **kwargs)
+            if hedge_model:
+                result = await _hedged_attempt(func, args, kwargs, current_model, hedge_model, hedge_stage)
+            else:
+                result = await _call_with_breaker(func, args, kwargs)
             logger.info(f"Success with provider: {current_provider}, model: {current_model}")
             return result
             
@@ -209,6 +230,10 @@ async def retry_with_fallback(
             last_error = error
             logger.warning(f"Attempt {attempt + 1} failed: {str(error)}")
             
+            if isinstance(error, CircuitOpenError) or not circuit_breakers.is_available(current_provider, current_model):
+                logger.warning(f"Circuit open for provider: {current_provider}, model: {current_model}; skipping retries")
+                break
+            
             if not is_retryable_error(error):
                 logger.error(f"Non-retryable error: {str(error)}")
                 break
@@ -228,12 +253,12 @@ async def retry_with_fallback(
             logger.info(f"Trying fallback model: {fallback_model} for provider: {current_provider}")
             try:
                 kwargs['llm_model'] = fallback_model
-                result = await func(*args, **kwargs)
+                result = await _call_with_breaker(func, args, kwargs)
                 logger.info(f"Success with fallback model: {fallback_model}")
                 return result
             except Exception as error:
                 logger.warning(f"Fallback model failed: {str(error)}")
-                last_error = error
+                last_error = _keep_cause(last_error, error)
     
     # Try fallback providers with timeout-based strategy
     if fallback_config.enable_provider_fallback:
@@ -249,7 +274,7 @@ async def retry_with_fallback(
                     kwargs['llm_provider'] = "ollama"
                     kwargs['llm_model'] = "llama3.2:3b"  # Fast local model
                     kwargs['timeout_seconds'] = 30  # Shorter timeout for local model
-                    result = await func(*args, **kwargs)
+                    result = await _call_with_breaker(func, args, kwargs)
                     logger.info(f"Success with fast local model fallback: {kwargs['llm_model']}")
                     return result
                 except Exception as error:
@@ -259,22 +284,102 @@ async def retry_with_fallback(
             try:
                 kwargs['llm_provider'] = fallback_provider
                 kwargs['llm_model'] = fallback_config.fallback_models.get(fallback_provider, [""])[0]
-                result = await func(*args, **kwargs)
+                result = await _call_with_breaker(func, args, kwargs)
                 logger.info(f"Success with fallback provider: {fallback_provider}")
                 return result
             except Exception as error:
                 logger.warning(f"Fallback provider failed: {str(error)}")
-                last_error = error
+                last_error = _keep_cause(last_error, error)
     
     # All attempts failed
     logger.error(f"All retry and fallback attempts failed. Last error: {str(last_error)}")
     raise last_error
 
 
+async def call_with_circuit_breaker(
+    provider: str,
+    model: Optional[str],
+    call: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Make a provider call unless its circuit is open, recording the outcome.
+    
+    Retryable errors (timeouts, connection errors, rate limits, server
+    errors) and authentication errors count as failures; other errors mean
+    the provider answered and count as healthy.
+    
+    Args:
+        provider: Provider name
+        model: Model name (None for provider-level only)
+        call: Coroutine function making the call
+        
+    Returns:
+        Call result
+        
+    Raises:
+        CircuitOpenError: If the provider or model circuit is open
+    """
+    if not circuit_breakers.allow_request(provider, model):
+        raise CircuitOpenError(f"Circuit open for provider: {provider}, model: {model}", provider, model)
+    try:
+        result = await call()
+    except Exception as error:
+        if is_retryable_error(error) or is_provider_wide_error(error):
+            circuit_breakers.record_failure(provider, model, error)
+        else:
+            circuit_breakers.record_success(provider, model)
+        raise
+    circuit_breakers.record_success(provider, model)
+    return result
+
+
+async def _call_with_breaker(func: Callable, args: tuple, kwargs: Dict[str, Any]) -> Any:
+    """Call func through the circuit breaker of its provider/model kwargs."""
+    return await call_with_circuit_breaker(
+        kwargs.get('llm_provider'), kwargs.get('llm_model'), lambda: func(*args, **kwargs)
+    )
+
+
+def _keep_cause(last_error: Optional[Exception], error: Exception) -> Exception:
+    """Prefer a real provider error over a circuit rejection as the error to raise."""
+    if isinstance(error, CircuitOpenError) and last_error is not None:
+        return last_error
+    return error
+
+
+async def _hedged_attempt(
+    func: Callable,
+    args: tuple,
+    kwargs: Dict[str, Any],
+    model: str,
+    hedge_model: str,
+    stage: str
+) -> Any:
+    """Run one attempt, hedging it with the fallback model if it runs slow."""
+    candidates = [
+        (model, lambda: _call_with_breaker(func, args, kwargs)),
+        (hedge_model, lambda: _call_with_breaker(func, args, {**kwargs, 'llm_model': hedge_model})),
+    ]
+    try:
+        result, hedge = await hedged_call(
+            candidates,
+            stage=stage,
+            advance_on_failure=False,
+            can_hedge=lambda: llm_slot_available(kwargs.get('llm_provider'), hedge_model)
+        )
+    except HedgeExhaustedError as e:
+        # Surface the primary error so retryability is judged as before
+        raise e.errors.get(f"0:{model}") or next(iter(e.errors.values()))
+    if hedge["winner"] != model:
+        logger.info(f"Hedged fallback model {hedge['winner']} answered before {model}")
+    return result
+
+
 def with_error_handling(
     retry_config: Optional[RetryConfig] = None,
     fallback_config: Optional[FallbackConfig] = None,
-    default_return: Optional[Any] = None
+    default_return: Optional[Any] = None,
+    hedge: bool = False
 ):
     """
     Decorator for adding error handling, retry logic, and fallback mechanisms.
@@ -283,6 +388,13 @@ def with_error_handling(
         retry_config: Retry configuration
         fallback_config: Fallback configuration
         default_return: Default return value if all attempts fail
+        hedge: Hedge slow attempts with the fallback model; the stage is the
+            ``agent_type`` of the bound instance, or the function name
+        
+    Calls start with the ``llm_provider`` and ``llm_model`` of the bound
+    instance (for example an agent) unless given as keyword arguments, so
+    retries, fallbacks and circuit breakers apply to the provider actually
+    called rather than the configured default.
         
     Returns:
         Decorated function
@@ -290,11 +402,22 @@ def with_error_handling(
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(*args, **kwargs):
+            instance = args[0] if args else None
+            for key in ('llm_provider', 'llm_model'):
+                value = getattr(instance, key, None)
+                if key not in kwargs and isinstance(value, str) and value:
+                    kwargs[key] = value
+            
+            hedge_stage = None
+            if hedge:
+                hedge_stage = getattr(args[0], "agent_type", None) if args else None
+                hedge_stage = hedge_stage or func.__name__
             try:
                 return await retry_with_fallback(
                     func, *args, 
                     retry_config=retry_config,
                     fallback_config=fallback_config,
+                    hedge_stage=hedge_stage,
                     **kwargs
                 )
             except Exception as error:
@@ -0,0 +1,280 @@
+"""
+Hedged LLM requests.
+
+A fallback chain normally waits for each candidate to fail or time out
+before trying the next, so a degraded model costs its full timeout. With
+hedging, once a candidate has run longer than a latency percentile of its
+model (observed from earlier calls), the next candidate is started in
+parallel. The first acceptable result wins and the remaining candidates
+are cancelled. A candidate that fails starts the next one immediately.
+
+The hedge delay and whether hedging is used at all are configurable per
+stage, and the outcome of each hedged call is counted per stage. A hedge
+is deferred while the caller reports no spare capacity for it, so it never
+queues behind the candidate it is meant to race.
+"""
+
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from app.config import settings
+
+# A candidate is a label (usually the model name) and a coroutine function
+Candidate = Tuple[str, Callable[[], Awaitable[Any]]]
+
+# Seconds between capacity checks of a deferred hedge
+HEDGE_RECHECK_SECONDS = 1.0
+
+
+class HedgeExhaustedError(Exception):
+    """
+    Raised when every hedged candidate failed or returned an unacceptable result.
+
+    ``errors`` is keyed by ``"<index>:<label>"`` so candidates sharing a
+    label (such as a model tried twice) each keep their error.
+    """
+
+    def __init__(self, message: str, errors: Dict[str, BaseException]):
+        super().__init__(message)
+        self.errors = errors
+
+
+class LatencyTracker:
+    """
+    Recent successful call latencies per model.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 5):
+        """
+        Initialize tracker.
+
+        Args:
+            window: Latencies kept per model
+            min_samples: Samples needed before a percentile is reported
+        """
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, model: str, latency: float) -> None:
+        """Record the latency of a successful call in seconds."""
+        self._samples[model].append(latency)
+
+    def percentile(self, model: str, percentile: float) -> Optional[float]:
+        """
+        Get a latency percentile of a model.
+
+        Args:
+            model: Model name
+            percentile: Percentile between 0 and 1
+
+        Returns:
+            Latency in seconds, or None with too few samples
+        """
+        samples = self._samples.get(model)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(percentile * len(ordered)))
+        return ordered[index]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get sample counts and p50/p90 per model."""
+        return {
+            model: {
+                "samples": len(samples),
+                "p50": self.percentile(model, 0.5),
+                "p90": self.percentile(model, 0.9),
+            }
+            for model, samples in self._samples.items()
+        }
+
+
+class HedgePolicy:
+    """Configuration for hedged requests."""
+
+    def __init__(self, enabled: bool = True, percentile: float = 0.9,
+                 default_delay: float = 30.0, min_delay: float = 2.0,
+                 max_delay: float = 120.0, max_parallel: int = 2):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_parallel = max(1, max_parallel)
+
+    def delay_for(self, model: str, tracker: LatencyTracker) -> float:
+        """
+        Seconds to wait on a candidate before hedging with the next one.
+
+        Args:
+            model: Model of the running candidate
+            tracker: Observed latencies
+
+        Returns:
+            Percentile latency clamped to the policy bounds, or the default
+            delay while the model has too few samples
+        """
+        observed = tracker.percentile(model, self.percentile)
+        if observed is None:
+            return self.default_delay
+        return min(self.max_delay, max(self.min_delay, observed))
+
+
+latency_tracker = LatencyTracker()
+
+_stage_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {
+    "calls": 0,
+    "hedges_started": 0,
+    "hedges_deferred": 0,
+    "primary_wins": 0,
+    "hedge_wins": 0,
+    "cancelled": 0,
+    "failures": 0,
+})
+
+
+def get_hedge_policy(stage: Optional[str] = None) -> HedgePolicy:
+    """
+    Get the hedging policy of a stage.
+
+    Stage overrides come from ``llm_hedge_stage_overrides``, for example
+    ``{"github_analyzer": {"enabled": false}, "chat": {"percentile": 0.75}}``.
+
+    Args:
+        stage: Workflow stage or agent type
+
+    Returns:
+        Policy with stage overrides applied to the global settings
+    """
+    options = {
+        "enabled": settings.llm_hedge_enabled,
+        "percentile": settings.llm_hedge_percentile,
+        "default_delay": settings.llm_hedge_default_delay_seconds,
+        "min_delay": settings.llm_hedge_min_delay_seconds,
+        "max_delay": settings.llm_hedge_max_delay_seconds,
+        "max_parallel": settings.llm_hedge_max_parallel,
+    }
+    if stage:
+        options.update(settings.llm_hedge_stage_overrides.get(stage, {}))
+    return HedgePolicy(**options)
+
+
+async def hedged_call(
+    candidates: Sequence[Candidate],
+    policy: Optional[HedgePolicy] = None,
+    *,
+    stage: str = "general",
+    accept: Optional[Callable[[Any], bool]] = None,
+    tracker: Optional[LatencyTracker] = None,
+    advance_on_failure: bool = True,
+    can_hedge: Optional[Callable[[], bool]] = None
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Run candidates as a hedged fallback chain.
+
+    With a disabled policy the candidates run strictly one after another.
+
+    Args:
+        candidates: Ordered (label, coroutine function) pairs
+        policy: Hedging policy (defaults to the stage policy)
+        stage: Stage the call is counted under
+        accept: Predicate a result must satisfy to win (default: any result)
+        tracker: Latency tracker (defaults to the shared one)
+        advance_on_failure: Start the next candidate when one fails; if False,
+            later candidates only run as hedges against a slow candidate
+        can_hedge: Checked before starting a hedge; while it returns False
+            the hedge is deferred (for example when no concurrency slot is
+            free, so the hedge would only queue behind the slow candidate)
+
+    Returns:
+        Tuple of (winning result, details with the winner label and how many
+        candidates were started)
+
+    Raises:
+        HedgeExhaustedError: If no candidate produced an acceptable result
+    """
+    policy = policy or get_hedge_policy(stage)
+    tracker = tracker or latency_tracker
+    accept = accept or (lambda result: True)
+    max_parallel = policy.max_parallel if policy.enabled else 1
+    stats = _stage_stats[stage]
+    stats["calls"] += 1
+
+    pending = list(enumerate(candidates))
+    running: Dict[asyncio.Task, Tuple[int, str, float]] = {}
+    errors: Dict[str, BaseException] = {}
+
+    def start_next() -> None:
+        index, (label, fn) = pending.pop(0)
+        running[asyncio.ensure_future(fn())] = (index, label, time.monotonic())
+        if len(running) > 1:
+            logger.info(f"Hedging {stage}: started {label} alongside {len(running) - 1} running candidate(s)")
+
+    start_next()
+    started = 1
+    recheck_at = 0.0
+    try:
+        while running:
+            timeout = None
+            if pending and len(running) < max_parallel:
+                _, newest_label, newest_started = max(running.values(), key=lambda r: r[2])
+                now = time.monotonic()
+                timeout = max(0.0, policy.delay_for(newest_label, tracker) - (now - newest_started), recheck_at - now)
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                if can_hedge is not None and not can_hedge():
+                    # No spare capacity; keep waiting on the running candidates
+                    recheck_at = time.monotonic() + HEDGE_RECHECK_SECONDS
+                    stats["hedges_deferred"] += 1
+                    continue
+                # The newest candidate is slower than its percentile; hedge
+                start_next()
+                started += 1
+                stats["hedges_started"] += 1
+                continue
+
+            for task in done:
+                index, label, task_started = running.pop(task)
+                error = task.exception()
+                if error is None and accept(task.result()):
+                    tracker.record(label, time.monotonic() - task_started)
+                    stats["primary_wins" if index == 0 else "hedge_wins"] += 1
+                    stats["cancelled"] += len(running)
+                    return task.result(), {"winner": label, "candidates_started": started}
+                key = f"{index}:{label}"
+                errors[key] = error or ValueError(f"Unacceptable result from {label}")
+                logger.warning(f"Candidate {label} for {stage} failed: {errors[key]}")
+
+            # A failed candidate starts the next one immediately
+            while advance_on_failure and pending and len(running) < max_parallel:
+                start_next()
+                started += 1
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    stats["failures"] += 1
+    raise HedgeExhaustedError(
+        f"No acceptable result from {started} of {len(candidates)} candidates for {stage}", errors
+    )
+
+
+def get_hedging_stats() -> Dict[str, Any]:
+    """
+    Get hedging outcomes per stage and observed model latencies.
+
+    Returns:
+        Dict with per-stage counters and per-model latency percentiles
+    """
+    return {
+        "enabled": settings.llm_hedge_enabled,
+        "stages": {stage: dict(stats) for stage, stats in _stage_stats.items()},
+        "latencies": latency_tracker.get_stats(),
+    }
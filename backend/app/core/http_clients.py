@@ -0,0 +1,231 @@
+"""
+Pooled HTTP clients for LLM providers.
+
+This module keeps one long-lived ``httpx.AsyncClient`` per LLM provider so
+calls reuse TCP/TLS connections instead of opening a new client for every
+request. Each provider gets its own connection limits and keep-alive
+settings; hosted APIs use HTTP/2 when the optional ``h2`` package is
+installed. Pool utilisation is reported for health and metrics endpoints.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+import httpx
+from loguru import logger
+
+from app.config import settings
+
+try:  # HTTP/2 support is optional (pip install httpx[http2])
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+LOCAL_PROVIDERS = frozenset({"ollama", "deepseek"})
+HOSTED_PROVIDERS = frozenset({"openai", "anthropic"})
+
+
+class ProviderClientRegistry:
+    """
+    Registry of pooled HTTP clients, one per LLM provider.
+
+    Clients are created lazily on first use and bound to the event loop
+    that created them; a client requested from a different loop (for
+    example in tests) is replaced rather than shared across loops, and the
+    replaced client is closed on the loop it belongs to.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._loops: Dict[str, asyncio.AbstractEventLoop] = {}
+        self._requests: Dict[str, int] = {}
+        self._created: Dict[str, str] = {}
+        self._closing: Set[asyncio.Task] = set()
+
+    def _limits(self, provider: str) -> httpx.Limits:
+        """Connection limits for a provider."""
+        if provider in LOCAL_PROVIDERS:
+            # A local server serves requests one model at a time; a small
+            # pool avoids queueing dozens of sockets against it.
+            max_connections = settings.llm_local_http_max_connections
+            return httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=settings.llm_http_keepalive_expiry,
+            )
+        return httpx.Limits(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+            keepalive_expiry=settings.llm_http_keepalive_expiry,
+        )
+
+    def _use_http2(self, provider: str) -> bool:
+        """Whether a provider's client should negotiate HTTP/2."""
+        return settings.llm_http2_enabled and HTTP2_AVAILABLE and provider in HOSTED_PROVIDERS
+
+    def _create_client(self, provider: str) -> httpx.AsyncClient:
+        """Create a pooled client for a provider."""
+        async def count_request(request: httpx.Request) -> None:
+            self._requests[provider] = self._requests.get(provider, 0) + 1
+
+        client = httpx.AsyncClient(
+            limits=self._limits(provider),
+            http2=self._use_http2(provider),
+            event_hooks={"request": [count_request]},
+        )
+        logger.info(
+            f"Created pooled HTTP client for {provider} "
+            f"(http2={self._use_http2(provider)}, "
+            f"max_connections={self._limits(provider).max_connections})"
+        )
+        return client
+
+    def get_client(self, provider: str) -> httpx.AsyncClient:
+        """
+        Get the pooled client for a provider, creating it if needed.
+
+        Callers must not close the returned client; pass a per-request
+        ``timeout=`` instead of configuring a client of their own.
+
+        Args:
+            provider: Provider name (openai, anthropic, ollama, deepseek, ...)
+
+        Returns:
+            Shared ``httpx.AsyncClient`` for the provider
+        """
+        provider = provider.lower()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        client = self._clients.get(provider)
+        if client is not None and not client.is_closed and self._loops.get(provider) is loop:
+            return client
+        if client is not None and not client.is_closed:
+            logger.debug(f"Replacing {provider} HTTP client bound to another event loop")
+            self._close_replaced(provider, client, self._loops.get(provider))
+
+        client = self._create_client(provider)
+        self._clients[provider] = client
+        self._loops[provider] = loop
+        self._created[provider] = datetime.utcnow().isoformat()
+        return client
+
+    def _close_replaced(
+        self,
+        provider: str,
+        client: httpx.AsyncClient,
+        loop: Optional[asyncio.AbstractEventLoop]
+    ) -> None:
+        """Close a replaced client on the event loop it belongs to."""
+        try:
+            if loop is None:
+                # Created outside any loop; close it on the current one
+                task = asyncio.get_running_loop().create_task(client.aclose())
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+            elif not loop.is_closed():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            else:
+                # Its loop is gone, so the connections cannot be shut down cleanly
+                logger.debug(f"Dropped {provider} HTTP client of a closed event loop")
+        except Exception as e:
+            logger.warning(f"Error closing replaced {provider} HTTP client: {e}")
+
+    async def close(self) -> None:
+        """Close every pooled client."""
+        for provider, client in list(self._clients.items()):
+            try:
+                if self._loops.get(provider) is asyncio.get_running_loop():
+                    await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing {provider} HTTP client: {e}")
+        self._clients.clear()
+        self._loops.clear()
+
+    def _pool_stats(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        """Connection counts read from the client's connection pool."""
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        if pool is None:
+            return {}
+        try:
+            connections = list(pool.connections)
+            idle = sum(1 for c in connections if c.is_idle())
+            return {
+                "connections": len(connections),
+                "idle_connections": idle,
+                "active_connections": len(connections) - idle,
+                "queued_requests": sum(
+                    1 for r in getattr(pool, "_requests", []) if getattr(r, "connection", None) is None
+                ),
+            }
+        except Exception:
+            return {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool utilisation per provider.
+
+        Returns:
+            Dict with HTTP/2 availability and, per provider, limits,
+            request counts and open/idle/active connection counts
+        """
+        providers = {}
+        for provider, client in self._clients.items():
+            limits = self._limits(provider)
+            stats = {
+                "closed": client.is_closed,
+                "http2": self._use_http2(provider),
+                "max_connections": limits.max_connections,
+                "max_keepalive_connections": limits.max_keepalive_connections,
+                "keepalive_expiry": limits.keepalive_expiry,
+                "requests": self._requests.get(provider, 0),
+                "created_at": self._created.get(provider),
+                **self._pool_stats(client),
+            }
+            if stats.get("max_connections") and "active_connections" in stats:
+                stats["utilization"] = stats["active_connections"] / stats["max_connections"]
+            providers[provider] = stats
+        return {"http2_available": HTTP2_AVAILABLE, "providers": providers}
+
+
+# Process-wide registry shared by all LLM clients
+http_client_registry = ProviderClientRegistry()
+
+
+def get_http_client(provider: str) -> httpx.AsyncClient:
+    """
+    Get the shared pooled HTTP client for an LLM provider.
+
+    Args:
+        provider: Provider name
+
+    Returns:
+        Shared ``httpx.AsyncClient``
+
+    Example:
+        ```python
+        client = get_http_client("openai")
+        response = await client.post(url, json=payload, timeout=30)
+        ```
+    """
+    return http_client_registry.get_client(provider)
+
+
+def get_http_client_stats() -> Dict[str, Any]:
+    """Get pool utilisation for every provider client."""
+    return http_client_registry.get_stats()
+
+
+async def close_http_clients() -> None:
+    """
+    Close every pooled provider client.
+
+    Should be called during application shutdown.
+    """
+    await http_client_registry.close()
@@ -0,0 +1,245 @@
+"""
+Single-pass JSON extraction from LLM responses.
+
+LLM responses wrap JSON in Markdown fences, prose and ``<think>`` /
+``<reasoning>`` blocks, and sometimes break it: raw newlines inside
+strings, trailing or missing commas, unquoted keys, or output cut off by
+the token limit. ``find_json`` walks the text once, skipping reasoning
+blocks, and at each candidate opening bracket first lets the C JSON
+decoder parse the outermost value in place (the common, valid case). Only
+if that fails is the candidate rescanned by a string- and escape-aware
+tokenizer that repairs problems as it goes and closes truncated output
+from its bracket stack; scanning then continues after the candidate.
+"""
+
+import json
+import re
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+# Reasoning blocks skipped outside JSON values
+REASONING_TAGS = (("<think>", "</think>"), ("<reasoning>", "</reasoning>"))
+
+# Candidates tried before giving up (bounds work on prose full of brackets)
+MAX_CANDIDATES = 16
+
+_decoder = json.JSONDecoder()
+
+_OUTSIDE = re.compile(r"[{\[<]")
+_STRUCTURE = re.compile(r'["{}\[\],:]')
+_IN_STRING = re.compile(r'["\\\x00-\x1f]')
+_BARE_KEY = re.compile(r"\s*([A-Za-z_][\w\-]*)\s*")
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class ExtractedJSON(NamedTuple):
+    """JSON value found in a response."""
+    value: Any
+    text: str
+    start: int
+    end: int
+    repairs: Tuple[str, ...]
+
+
+def _reasoning_end(text: str) -> int:
+    """Offset after a closing reasoning tag whose opening tag was stripped upstream."""
+    position = 0
+    for opening, closing in REASONING_TAGS:
+        end = text.rfind(closing)
+        if end != -1 and opening not in text[:end]:
+            position = max(position, end + len(closing))
+    return position
+
+
+def _ends_value(char: str) -> bool:
+    return bool(char) and (char in '"}]' or char.isalnum())
+
+
+def _repair_scan(text: str, start: int) -> Tuple[str, int, List[str]]:
+    """
+    Tokenize the value starting at ``start``, repairing it on the way.
+
+    Returns:
+        Repaired JSON text, offset after the value (or end of text if it
+        never closed) and the repairs applied
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    repairs: List[str] = []
+    last = ""            # Last significant character outside strings
+    comma_at = None      # Output index of a comma not yet followed by a value
+    bare_at = None       # Output index of bare text (number, literal or key)
+    in_string = False
+    position, length = start, len(text)
+
+    while position < length:
+        match = _STRUCTURE.search(text, position)
+        segment = text[position:match.start() if match else length]
+        if segment.strip():
+            if comma_at is None and _ends_value(last):
+                out.append(",")
+                repairs.append("missing comma")
+            bare_at = len(out)
+            last = segment.rstrip()[-1]
+            comma_at = None
+        out.append(segment)
+        if match is None:
+            position = length
+            break
+        char = match.group()
+        position = match.end()
+
+        if char in '"{[':
+            if comma_at is None and _ends_value(last):
+                out.append(",")
+                repairs.append("missing comma")
+            comma_at = None
+        if char == '"':
+            out.append('"')
+            in_string = True
+            while True:
+                inner = _IN_STRING.search(text, position)
+                if inner is None:
+                    out.append(text[position:])
+                    position = length
+                    break
+                out.append(text[position:inner.start()])
+                found = inner.group()
+                if found == '"':
+                    out.append('"')
+                    position = inner.end()
+                    in_string = False
+                    break
+                if found == "\\":
+                    out.append(text[inner.start():inner.start() + 2])
+                    position = inner.start() + 2
+                    continue
+                out.append(_CONTROL_ESCAPES.get(found, f"\\u{ord(found):04x}"))
+                if "unescaped control character" not in repairs:
+                    repairs.append("unescaped control character")
+                position = inner.end()
+            last = '"'
+            if in_string:
+                break
+        elif char in "{[":
+            stack.append(_CLOSERS[char])
+            out.append(char)
+            last = char
+        elif char in "}]":
+            if not stack:
+                position = match.start()
+                break
+            if comma_at is not None:
+                out[comma_at] = ""
+                repairs.append("trailing comma")
+                comma_at = None
+            closer = stack.pop()
+            if char != closer:
+                repairs.append("mismatched bracket")
+            out.append(closer)
+            last = closer
+            if not stack:
+                return "".join(out), position, repairs
+        elif char == ",":
+            if comma_at is not None:
+                repairs.append("duplicate comma")
+            else:
+                comma_at = len(out)
+                out.append(",")
+            last = ","
+        else:  # ":"
+            if bare_at == len(out) - 1 and stack and stack[-1] == "}":
+                key = _BARE_KEY.fullmatch(out[bare_at])
+                if key:
+                    out[bare_at] = json.dumps(key.group(1))
+                    repairs.append("unquoted key")
+            out.append(":")
+            last = ":"
+        bare_at = None
+
+    # Output ended inside the value: close what is open
+    if in_string:
+        out.append('"')
+    if comma_at is not None:
+        out[comma_at] = ""
+    elif last == ":":
+        out.append("null")
+    out.extend(reversed(stack))
+    repairs.append("truncated")
+    return "".join(out), position, repairs
+
+
+def find_json(text: str, openers: str = "{[") -> Optional[ExtractedJSON]:
+    """
+    Find the first JSON value in an LLM response.
+
+    Args:
+        text: Response text
+        openers: Brackets a value may start with ('{' for objects only)
+
+    Returns:
+        Extracted value with its (repaired) text, span and repairs, or None
+    """
+    if not text:
+        return None
+    position = _reasoning_end(text)
+    candidates = 0
+    while candidates < MAX_CANDIDATES:
+        match = _OUTSIDE.search(text, position)
+        if match is None:
+            return None
+        start = match.start()
+        char = match.group()
+
+        if char == "<":
+            position = start + 1
+            for opening, closing in REASONING_TAGS:
+                if text.startswith(opening, start):
+                    end = text.find(closing, start + len(opening))
+                    position = end + len(closing) if end != -1 else start + len(opening)
+                    break
+            continue
+        if char not in openers:
+            position = start + 1
+            continue
+
+        candidates += 1
+        try:
+            value, end = _decoder.raw_decode(text, start)
+            return ExtractedJSON(value, text[start:end], start, end, ())
+        except ValueError:
+            pass
+
+        repaired, end, repairs = _repair_scan(text, start)
+        try:
+            return ExtractedJSON(json.loads(repaired), repaired, start, end, tuple(repairs))
+        except ValueError:
+            # Continue after a candidate that closed; one that ran to the
+            # end of the text may have swallowed the real value
+            position = end if end < len(text) else start + 1
+    logger.debug(f"Gave up JSON extraction after {MAX_CANDIDATES} candidates")
+    return None
+
+
+def parse_json(text: str, openers: str = "{[") -> Any:
+    """
+    Parse the first JSON value in an LLM response.
+
+    Args:
+        text: Response text
+        openers: Brackets a value may start with ('{' for objects only)
+
+    Returns:
+        Parsed value
+
+    Raises:
+        ValueError: If the response contains no parseable JSON value
+    """
+    extracted = find_json(text, openers)
+    if extracted is None:
+        raise ValueError("No JSON value found in response")
+    if extracted.repairs:
+        logger.warning(f"Repaired JSON in LLM response: {', '.join(extracted.repairs)}")
+    return extracted.value
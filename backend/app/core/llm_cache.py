@@ -0,0 +1,369 @@
+"""
+Content-addressed cache for LLM responses.
+
+Responses are keyed on a hash of provider, model, system prompt, prompt and
+temperature, so identical requests (retries, re-runs after review, the
+refinement loop) are answered without calling the provider again. Entries
+live in a size-bounded in-process LRU with a TTL and, when Redis is
+initialized, in a shared Redis tier. An optional semantic tier serves
+near-identical prompts whose embeddings are above a similarity threshold.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional
+
+import numpy as np
+from loguru import logger
+
+from app.config import settings
+from app.core.redis_client import RedisCache, get_redis
+
+REDIS_KEY_PREFIX = "llm_cache:"
+
+# Seconds to skip the Redis tier after it fails, so an unavailable Redis
+# does not add a connection timeout to every LLM call
+REDIS_RETRY_SECONDS = 30.0
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    system_prompt: str,
+    prompt: str,
+    temperature: Optional[float]
+) -> str:
+    """
+    Hash the fields that determine an LLM response.
+
+    Args:
+        provider: Provider name
+        model: Model name
+        system_prompt: System prompt
+        prompt: User prompt
+        temperature: Sampling temperature
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps(
+        [provider, model, system_prompt, prompt, temperature], ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _namespace(provider: str, model: str, system_prompt: str, temperature: Optional[float]) -> str:
+    """Semantic lookups only match prompts sent with the same everything-else."""
+    return make_cache_key(provider, model, system_prompt, "", temperature)
+
+
+class LLMResponseCache:
+    """
+    Two-tier (memory, Redis) LLM response cache with optional semantic lookup.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 86400,
+        max_entries: int = 1000,
+        use_redis: bool = True,
+        semantic_enabled: bool = False,
+        semantic_threshold: float = 0.97,
+        semantic_max_chars: int = 2000,
+        embedding_service: Optional[Any] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: Time to live of an entry
+            max_entries: Maximum entries in the in-process tier
+            use_redis: Whether to use Redis when it is initialized
+            semantic_enabled: Whether to look up near-identical prompts
+            semantic_threshold: Minimum cosine similarity for a semantic hit
+            semantic_max_chars: Longest prompt eligible for semantic lookup
+            embedding_service: Embedding service (defaults to the shared one)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.use_redis = use_redis
+        self.semantic_enabled = semantic_enabled
+        self.semantic_threshold = semantic_threshold
+        self.semantic_max_chars = semantic_max_chars
+        self._embedding_service = embedding_service
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # namespace -> {key: normalized prompt embedding}
+        self._vectors: Dict[str, Dict[str, np.ndarray]] = defaultdict(dict)
+        self._redis_retry_at = 0.0
+
+        self.stats = {
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "redis_errors": 0,
+            "cost_saved": 0.0,
+        }
+        self._cost_saved_by_model: Dict[str, float] = defaultdict(float)
+
+    @property
+    def embedding_service(self):
+        """Shared embedding service, resolved on first semantic lookup."""
+        if self._embedding_service is None:
+            from app.services.embedding_service import get_embedding_service
+            self._embedding_service = get_embedding_service()
+        return self._embedding_service
+
+    async def get(
+        self,
+        provider: str,
+        model: str,
+        system_prompt: str,
+        prompt: str,
+        temperature: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            system_prompt: System prompt
+            prompt: User prompt
+            temperature: Sampling temperature
+
+        Returns:
+            Cached response text, or None on a miss
+        """
+        key = make_cache_key(provider, model, system_prompt, prompt, temperature)
+
+        entry = self._get_memory(key)
+        if entry is not None:
+            return self._hit("memory_hits", entry)
+
+        entry = await self._get_redis(key)
+        if entry is not None:
+            self._put_memory(key, entry)
+            return self._hit("redis_hits", entry)
+
+        if self._semantic_eligible(prompt):
+            entry = await self._get_semantic(
+                _namespace(provider, model, system_prompt, temperature), prompt
+            )
+            if entry is not None:
+                return self._hit("semantic_hits", entry)
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(
+        self,
+        provider: str,
+        model: str,
+        system_prompt: str,
+        prompt: str,
+        temperature: Optional[float],
+        response: str,
+        cost: float = 0.0
+    ) -> None:
+        """
+        Store a response.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            system_prompt: System prompt
+            prompt: User prompt
+            temperature: Sampling temperature
+            response: Response text
+            cost: Estimated cost of the call in USD, counted as saved on each hit
+        """
+        key = make_cache_key(provider, model, system_prompt, prompt, temperature)
+        entry = {
+            "response": response,
+            "provider": provider,
+            "model": model,
+            "cost": cost,
+            "expires_at": time.time() + self.ttl_seconds,
+        }
+        self._put_memory(key, entry)
+        self.stats["stores"] += 1
+
+        if self._semantic_eligible(prompt):
+            namespace = _namespace(provider, model, system_prompt, temperature)
+            try:
+                self._vectors[namespace][key] = self._normalize(await self.embedding_service.embed(prompt))
+            except Exception as e:
+                logger.warning(f"Could not embed prompt for semantic LLM cache: {e}")
+
+        await self._set_redis(key, entry)
+
+    def clear(self) -> None:
+        """Drop every in-process entry (the Redis tier expires on its own)."""
+        self._entries.clear()
+        self._vectors.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters and estimated savings.
+
+        Returns:
+            Dict with per-tier hits, misses, hit rate, entry count and cost saved
+        """
+        hits = self.stats["memory_hits"] + self.stats["redis_hits"] + self.stats["semantic_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "cost_saved": round(self.stats["cost_saved"], 6),
+            "hits": hits,
+            "lookups": lookups,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "redis_enabled": self.use_redis,
+            "semantic_enabled": self.semantic_enabled,
+            "cost_saved_by_model": {
+                model: round(cost, 6) for model, cost in self._cost_saved_by_model.items()
+            },
+        }
+
+    def _hit(self, counter: str, entry: Dict[str, Any]) -> str:
+        self.stats[counter] += 1
+        cost = entry.get("cost") or 0.0
+        self.stats["cost_saved"] += cost
+        self._cost_saved_by_model[entry.get("model") or "unknown"] += cost
+        return entry["response"]
+
+    def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires_at"] <= time.time():
+            self._remove(key)
+            self.stats["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put_memory(self, key: str, entry: Dict[str, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+        for vectors in self._vectors.values():
+            vectors.pop(key, None)
+
+    async def _redis(self) -> Optional[RedisCache]:
+        if not self.use_redis or time.monotonic() < self._redis_retry_at:
+            return None
+        try:
+            return RedisCache(await get_redis())
+        except RuntimeError:
+            # Redis not initialized (scripts, tests); memory tier only
+            return None
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+
+    def _redis_failed(self, e: Exception) -> None:
+        self.stats["redis_errors"] += 1
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.warning(f"LLM cache Redis tier unavailable for {REDIS_RETRY_SECONDS:.0f}s: {e}")
+
+    async def _get_redis(self, key: str) -> Optional[Dict[str, Any]]:
+        cache = await self._redis()
+        if cache is None:
+            return None
+        try:
+            entry = await cache.get(REDIS_KEY_PREFIX + key)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        if not isinstance(entry, dict) or "response" not in entry:
+            return None
+        return entry
+
+    async def _set_redis(self, key: str, entry: Dict[str, Any]) -> None:
+        cache = await self._redis()
+        if cache is None:
+            return
+        try:
+            await cache.set(REDIS_KEY_PREFIX + key, entry, expire=self.ttl_seconds)
+        except Exception as e:
+            self._redis_failed(e)
+
+    def _semantic_eligible(self, prompt: str) -> bool:
+        # Sentence embeddings truncate long inputs, so two long documents
+        # sharing a prefix would look identical; only short prompts qualify.
+        return self.semantic_enabled and 0 < len(prompt) <= self.semantic_max_chars
+
+    async def _get_semantic(self, namespace: str, prompt: str) -> Optional[Dict[str, Any]]:
+        vectors = self._vectors.get(namespace)
+        if not vectors:
+            return None
+        try:
+            query = self._normalize(await self.embedding_service.embed(prompt))
+        except Exception as e:
+            logger.warning(f"Semantic LLM cache lookup failed: {e}")
+            return None
+
+        keys = list(vectors)
+        scores = np.stack([vectors[k] for k in keys]) @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.semantic_threshold:
+            return None
+        entry = self._get_memory(keys[best])
+        if entry is not None:
+            logger.debug(f"Semantic LLM cache hit (similarity {scores[best]:.3f})")
+        return entry
+
+    @staticmethod
+    def _normalize(vector: Any) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Get the process-wide LLM response cache.
+
+    Returns:
+        Shared cache, or None when caching is disabled
+    """
+    global _llm_cache
+    if not settings.llm_cache_enabled:
+        return None
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache(
+            ttl_seconds=settings.llm_cache_ttl_seconds,
+            max_entries=settings.llm_cache_max_entries,
+            use_redis=settings.llm_cache_redis_enabled,
+            semantic_enabled=settings.llm_cache_semantic_enabled,
+            semantic_threshold=settings.llm_cache_semantic_threshold,
+            semantic_max_chars=settings.llm_cache_semantic_max_chars,
+        )
+    return _llm_cache
+
+
+def get_llm_cache_stats() -> Dict[str, Any]:
+    """Get statistics of the shared LLM response cache."""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.get_stats()}
@@ -0,0 +1,546 @@
+"""
+Scheduler bounding concurrent LLM provider calls.
+
+Every provider call takes a slot from an adaptive concurrency limiter and
+draws its estimated tokens from a tokens-per-minute bucket. Limiters adapt
+AIMD-style: the cap grows by one slot per window of calls that finish
+within the latency target and halves on a rate limit (HTTP 429), a timeout
+or a call slower than the target. Waiting calls are granted slots in
+priority order, and batch work may only occupy part of the cap, so an
+interactive chat request never queues behind a brownfield analysis.
+
+Local providers (Ollama, local DeepSeek) share one limiter because they
+compete for the same GPU whichever model is loaded; hosted providers get
+one limiter and bucket per model.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from app.config import settings
+from app.core.http_clients import LOCAL_PROVIDERS
+
+LOCAL_LIMITER_KEY = "local"
+
+
+class Priority(IntEnum):
+    """Scheduling class of an LLM call (lower is served first)."""
+
+    INTERACTIVE = 0
+    WORKFLOW = 1
+    BATCH = 2
+
+
+_current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "llm_priority", default=Priority.WORKFLOW
+)
+
+
+@contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """
+    Run LLM calls made in this context (and tasks it creates) at a priority.
+
+    Args:
+        priority: Scheduling class
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Check whether an exception reports provider rate limiting.
+
+    Args:
+        error: Exception raised by a provider call
+
+    Returns:
+        True for HTTP 429 responses and rate-limit errors of provider SDKs
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429
+    if getattr(error, "status_code", None) == 429:
+        return True
+    text = str(error).lower()
+    return "429" in text or "rate limit" in text or "ratelimit" in type(error).__name__.lower()
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """Check whether an exception means the provider could not keep up."""
+    return isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException)) or is_rate_limit_error(error)
+
+
+class TokenBucket:
+    """
+    Tokens-per-minute budget refilled continuously.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        """
+        Initialize bucket.
+
+        Args:
+            tokens_per_minute: Refill rate and capacity
+        """
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float) -> float:
+        """
+        Take tokens, going into debt if needed.
+
+        Requests larger than the capacity are charged the capacity so they
+        wait for a full bucket instead of forever.
+
+        Args:
+            tokens: Estimated tokens of the call
+
+        Returns:
+            Seconds the caller must wait before sending
+        """
+        self._refill()
+        self.tokens -= min(tokens, self.capacity)
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, tokens: float) -> None:
+        """Return tokens reserved for a call that was never sent."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + min(tokens, self.capacity))
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter with priority-ordered waiters.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        latency_target: float = 30.0,
+        batch_fraction: float = 0.5,
+        decrease_cooldown: float = 1.0
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            name: Limiter name used in stats and logs
+            initial_limit: Starting concurrency cap
+            min_limit: Lowest cap after decreases
+            max_limit: Highest cap after increases
+            latency_target: Calls slower than this (seconds) decrease the cap
+            batch_fraction: Share of the cap batch calls may occupy
+            decrease_cooldown: Minimum seconds between decreases, so one
+                overload burst halves the cap once rather than per failed call
+        """
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.latency_target = latency_target
+        self.batch_fraction = batch_fraction
+        self.decrease_cooldown = decrease_cooldown
+
+        self.in_flight = 0
+        self.batch_in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+
+        self.stats = {
+            "granted": 0,
+            "queued": 0,
+            "rate_limited": 0,
+            "timeouts": 0,
+            "slow_calls": 0,
+            "increases": 0,
+            "decreases": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+        }
+
+    @property
+    def capacity(self) -> int:
+        """Current whole-slot concurrency cap."""
+        return int(self.limit)
+
+    @property
+    def batch_capacity(self) -> int:
+        """Slots batch calls may hold at once."""
+        return max(1, int(self.capacity * self.batch_fraction))
+
+    def has_free_slot(self, priority: int = Priority.WORKFLOW) -> bool:
+        """
+        Check whether a call could start now without waiting.
+
+        Args:
+            priority: Scheduling class of the call
+
+        Returns:
+            True if the cap has room and nobody is queued
+        """
+        return not self._waiters and self._can_grant(priority)
+
+    def _can_grant(self, priority: int) -> bool:
+        if self.in_flight >= self.capacity:
+            return False
+        return priority < Priority.BATCH or self.batch_in_flight < self.batch_capacity
+
+    def _grant(self, priority: int) -> None:
+        self.in_flight += 1
+        if priority >= Priority.BATCH:
+            self.batch_in_flight += 1
+        self.stats["granted"] += 1
+
+    async def acquire(self, priority: int = Priority.WORKFLOW) -> float:
+        """
+        Wait for a slot.
+
+        Args:
+            priority: Scheduling class of the call
+
+        Returns:
+            Milliseconds spent waiting
+        """
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), future))
+        self._wake()
+        if future.done():
+            return 0.0
+
+        self.stats["queued"] += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted as we were cancelled; hand the slot on
+                self._release_slot(priority)
+            else:
+                self._waiters = [w for w in self._waiters if w[2] is not future]
+                heapq.heapify(self._waiters)
+            raise
+
+        wait_ms = (time.monotonic() - started) * 1000
+        self.stats["total_wait_ms"] += wait_ms
+        self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], wait_ms)
+        return wait_ms
+
+    def release(
+        self,
+        priority: int = Priority.WORKFLOW,
+        latency: Optional[float] = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """
+        Return a slot and adapt the cap to the call outcome.
+
+        Args:
+            priority: Scheduling class the slot was acquired with
+            latency: Seconds the call took
+            error: Exception the call raised, if any
+        """
+        if error is not None and is_rate_limit_error(error):
+            self.stats["rate_limited"] += 1
+            self._decrease("rate limited")
+        elif error is not None and is_overload_error(error):
+            self.stats["timeouts"] += 1
+            self._decrease("timed out")
+        elif latency is not None and latency > self.latency_target:
+            self.stats["slow_calls"] += 1
+            self._decrease(f"took {latency:.1f}s")
+        elif error is None and self.in_flight >= self.capacity and self.limit < self.max_limit:
+            # Grow only while the cap is actually the bottleneck
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self.stats["increases"] += 1
+        self._release_slot(priority)
+
+    def _decrease(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        previous = self.capacity
+        self.limit = max(float(self.min_limit), self.limit / 2)
+        self.stats["decreases"] += 1
+        logger.warning(f"LLM limiter {self.name}: call {reason}, concurrency {previous} -> {self.capacity}")
+
+    def _release_slot(self, priority: int) -> None:
+        self.in_flight -= 1
+        if priority >= Priority.BATCH:
+            self.batch_in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters:
+            waiter_priority, _, future = self._waiters[0]
+            if future.done() or future.get_loop().is_closed():
+                heapq.heappop(self._waiters)
+                continue
+            # Waiters are ordered by priority, so if the head cannot run
+            # (cap reached, or batch share used up) nothing behind it can
+            if not self._can_grant(waiter_priority):
+                return
+            heapq.heappop(self._waiters)
+            self._grant(waiter_priority)
+            future.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get limiter state and counters.
+
+        Returns:
+            Dict with cap, in-flight calls, queue depth per priority and wait times
+        """
+        depth = {p.name.lower(): 0 for p in Priority}
+        for waiter_priority, _, future in self._waiters:
+            if not future.done():
+                depth[Priority(waiter_priority).name.lower()] += 1
+        granted = self.stats["granted"]
+        return {
+            **self.stats,
+            "limit": self.capacity,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "batch_limit": self.batch_capacity,
+            "in_flight": self.in_flight,
+            "queue_depth": sum(depth.values()),
+            "queue_depth_by_priority": depth,
+            "avg_wait_ms": round(self.stats["total_wait_ms"] / granted, 1) if granted else 0.0,
+            "total_wait_ms": round(self.stats["total_wait_ms"], 1),
+            "max_wait_ms": round(self.stats["max_wait_ms"], 1),
+        }
+
+
+class LLMScheduler:
+    """
+    Per-provider/model limiters and token buckets for LLM calls.
+    """
+
+    def __init__(self):
+        """Initialize scheduler with no limiters; they are created on first use."""
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+
+    @staticmethod
+    def _key(provider: str, model: str) -> str:
+        provider = (provider or "unknown").lower()
+        if provider in LOCAL_PROVIDERS:
+            return LOCAL_LIMITER_KEY
+        return f"{provider}:{model}"
+
+    def limiter(self, provider: str, model: str) -> AdaptiveLimiter:
+        """
+        Get the limiter for a provider and model.
+
+        Args:
+            provider: Provider name
+            model: Model name
+
+        Returns:
+            Shared limiter
+        """
+        key = self._key(provider, model)
+        if key not in self._limiters:
+            if key == LOCAL_LIMITER_KEY:
+                self._limiters[key] = AdaptiveLimiter(
+                    key,
+                    initial_limit=settings.llm_local_max_concurrency,
+                    max_limit=settings.llm_local_max_concurrency_limit,
+                    latency_target=settings.llm_local_latency_target_seconds,
+                    batch_fraction=settings.llm_batch_concurrency_fraction,
+                )
+            else:
+                self._limiters[key] = AdaptiveLimiter(
+                    key,
+                    initial_limit=settings.llm_hosted_max_concurrency,
+                    max_limit=settings.llm_hosted_max_concurrency_limit,
+                    latency_target=settings.llm_hosted_latency_target_seconds,
+                    batch_fraction=settings.llm_batch_concurrency_fraction,
+                )
+        return self._limiters[key]
+
+    def bucket(self, provider: str, model: str) -> Optional[TokenBucket]:
+        """
+        Get the tokens-per-minute bucket for a provider and model.
+
+        Args:
+            provider: Provider name
+            model: Model name
+
+        Returns:
+            Shared bucket, or None if the provider has no token budget
+        """
+        key = self._key(provider, model)
+        if key not in self._buckets:
+            budgets = {
+                "openai": settings.llm_openai_tokens_per_minute,
+                "anthropic": settings.llm_anthropic_tokens_per_minute,
+            }
+            tokens_per_minute = budgets.get((provider or "").lower(), 0)
+            self._buckets[key] = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        return self._buckets[key]
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        provider: str,
+        model: str,
+        *,
+        priority: Optional[Priority] = None,
+        tokens: int = 0
+    ) -> AsyncIterator[None]:
+        """
+        Hold a concurrency slot and token budget for one provider call.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            priority: Scheduling class (defaults to the current ``llm_priority``)
+            tokens: Estimated prompt plus completion tokens
+
+        Yields:
+            None once the call may be sent
+        """
+        if priority is None:
+            priority = _current_priority.get()
+        limiter = self.limiter(provider, model)
+        await limiter.acquire(priority)
+
+        bucket = self.bucket(provider, model)
+        try:
+            delay = bucket.reserve(tokens) if bucket and tokens else 0.0
+            if delay:
+                logger.debug(f"LLM limiter {limiter.name}: waiting {delay:.1f}s for token budget")
+                await asyncio.sleep(delay)
+        except BaseException:
+            if bucket and tokens:
+                bucket.refund(tokens)
+            limiter.release(priority)
+            raise
+
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            limiter.release(priority, time.monotonic() - started, e)
+            raise
+        limiter.release(priority, time.monotonic() - started)
+
+    def has_free_slot(self, provider: str, model: str, priority: Optional[Priority] = None) -> bool:
+        """
+        Check whether a call to a provider and model could start now.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            priority: Scheduling class (defaults to the current ``llm_priority``)
+
+        Returns:
+            True if its limiter has a free slot
+        """
+        if priority is None:
+            priority = _current_priority.get()
+        return self.limiter(provider, model).has_free_slot(priority)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get state of every limiter and bucket.
+
+        Returns:
+            Dict keyed by limiter name
+        """
+        stats = {}
+        for key, limiter in self._limiters.items():
+            bucket = self._buckets.get(key)
+            stats[key] = {
+                **limiter.get_stats(),
+                "tokens_per_minute": int(bucket.capacity) if bucket else None,
+                "tokens_available": int(max(bucket.tokens, 0)) if bucket else None,
+            }
+        return stats
+
+
+llm_scheduler = LLMScheduler()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """
+    Get the process-wide LLM scheduler.
+
+    Returns:
+        Shared scheduler
+    """
+    return llm_scheduler
+
+
+@asynccontextmanager
+async def llm_slot(
+    provider: str,
+    model: str,
+    *,
+    priority: Optional[Priority] = None,
+    tokens: int = 0
+) -> AsyncIterator[None]:
+    """
+    Hold a scheduler slot for one provider call (no-op when scheduling is disabled).
+
+    Args:
+        provider: Provider name
+        model: Model name
+        priority: Scheduling class (defaults to the current ``llm_priority``)
+        tokens: Estimated prompt plus completion tokens
+    """
+    if not settings.llm_scheduler_enabled:
+        yield
+        return
+    async with llm_scheduler.slot(provider, model, priority=priority, tokens=tokens):
+        yield
+
+
+def llm_slot_available(provider: str, model: str, priority: Optional[Priority] = None) -> bool:
+    """
+    Check whether a call could get a scheduler slot without waiting.
+
+    Args:
+        provider: Provider name
+        model: Model name
+        priority: Scheduling class (defaults to the current ``llm_priority``)
+
+    Returns:
+        True if a slot is free or scheduling is disabled
+    """
+    if not settings.llm_scheduler_enabled:
+        return True
+    return llm_scheduler.has_free_slot(provider, model, priority)
+
+
+def get_llm_scheduler_stats() -> Dict[str, Any]:
+    """Get statistics of the shared LLM scheduler."""
+    return {
+        "enabled": settings.llm_scheduler_enabled,
+        "limiters": llm_scheduler.get_stats(),
+    }
@@ -11,6 +11,7 @@ from enum import Enum
 from loguru import logger
 
 from app.config import settings
+from app.core.circuit_breaker import circuit_breakers
 
 
 class TaskType(Enum):
@@ -144,7 +145,8 @@ class LLMStrategy:
     @classmethod
     def _is_provider_available(cls, provider: str) -> bool:
         """
-        Check if a provider is available based on API keys and configuration.
+        Check if a provider is available based on API keys, configuration
+        and circuit breaker state.
         
         Args:
             provider: The LLM provider to check
@@ -153,6 +155,9 @@ class LLMStrategy:
             True if provider is available, False otherwise
         """
         try:
+            # Skip providers whose circuit breaker is open (recent outage)
+            if not circuit_breakers.is_available(provider):
+                return False
             if provider == "openai":
                 return bool(settings.openai_api_key)
             elif provider == "anthropic":
@@ -0,0 +1,138 @@
+"""
+Helpers for reading streamed LLM HTTP responses.
+
+Hosted providers (OpenAI, Anthropic and OpenAI-compatible servers) stream
+server-sent events, while Ollama streams newline-delimited JSON. These
+helpers turn an open ``httpx`` streaming response into parsed JSON
+payloads so provider clients only have to extract the text delta.
+
+``stream_llm_output`` asks agent LLM calls made in its context to stream
+their output, for example to a workflow job's event channel.
+"""
+
+import contextvars
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+import httpx
+from loguru import logger
+
+
+async def iter_sse_json(response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield the JSON payload of each server-sent event.
+
+    Stops at the OpenAI ``[DONE]`` sentinel; comments, keep-alives and
+    ``event:`` lines are skipped.
+
+    Args:
+        response: Open streaming response
+
+    Yields:
+        Parsed ``data:`` payloads
+    """
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if not data:
+            continue
+        if data == "[DONE]":
+            break
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed stream event: {data[:100]}")
+
+
+async def iter_ndjson(response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield each line of a newline-delimited JSON stream (Ollama).
+
+    Stops after the chunk marked ``done``.
+
+    Args:
+        response: Open streaming response
+
+    Yields:
+        Parsed JSON objects
+    """
+    async for line in response.aiter_lines():
+        if not line.strip():
+            continue
+        try:
+            chunk = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed stream chunk: {line[:100]}")
+            continue
+        if chunk.get("error"):
+            raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+        yield chunk
+        if chunk.get("done"):
+            break
+
+
+class StreamTimer:
+    """
+    Measures time to first token and total duration of a stream.
+    """
+
+    def __init__(self):
+        """Start timing."""
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.chunks = 0
+
+    def mark(self) -> None:
+        """Record that a non-empty chunk was emitted."""
+        self.chunks += 1
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    @property
+    def time_to_first_token_ms(self) -> Optional[float]:
+        """Milliseconds until the first chunk, or None if nothing was emitted."""
+        if self.first_token_at is None:
+            return None
+        return round((self.first_token_at - self.started) * 1000, 1)
+
+    @property
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the stream started."""
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+
+# Called as open_stream(stage, **metadata) when a streamed call starts. It
+# returns an on_chunk callback with an async close() (an LLMStreamForwarder).
+StreamOpener = Callable[..., Any]
+
+_current_stream: contextvars.ContextVar[Optional[StreamOpener]] = contextvars.ContextVar(
+    "llm_stream", default=None
+)
+
+
+@contextmanager
+def stream_llm_output(open_stream: StreamOpener) -> Iterator[None]:
+    """
+    Stream the output of agent LLM calls made in this context (and tasks it creates).
+
+    Args:
+        open_stream: Opens the chunk callback of each call
+    """
+    token = _current_stream.set(open_stream)
+    try:
+        yield
+    finally:
+        _current_stream.reset(token)
+
+
+def current_llm_stream() -> Optional[StreamOpener]:
+    """
+    Get the stream opener of the current ``stream_llm_output`` context.
+
+    Returns:
+        Opener, or None when calls should not stream
+    """
+    return _current_stream.get()
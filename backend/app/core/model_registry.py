@@ -0,0 +1,171 @@
+"""
+Model registry for process-wide machine learning models.
+
+This module keeps one instance of each heavyweight model (such as
+sentence transformers) per process. Models load lazily on first use, or
+eagerly during application startup when warm-up is enabled, and record
+their load time and memory footprint for health reporting.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+from app.config import settings
+
+
+def _model_memory_bytes(model: Any) -> Optional[int]:
+    """Bytes held by a torch module's parameters and buffers, if it is one."""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except AttributeError:
+        return None
+    return int(sum(t.numel() * t.element_size() for t in tensors))
+
+
+def _process_rss_bytes() -> Optional[int]:
+    """Current resident set size of this process (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Thread-safe registry of lazily loaded models.
+
+    Each model is loaded at most once per process, even when several
+    services or threads request it concurrently.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Get a model, loading it with ``loader`` on first use.
+
+        Args:
+            key: Registry key identifying the model
+            loader: Callable returning the loaded model
+
+        Returns:
+            The shared model instance
+        """
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._key_lock(key):
+            model = self._models.get(key)
+            if model is not None:
+                return model
+
+            rss_before = _process_rss_bytes()
+            start = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - start
+            rss_after = _process_rss_bytes()
+
+            self._stats[key] = {
+                "loaded_at": datetime.utcnow().isoformat(),
+                "load_seconds": round(load_seconds, 3),
+                "memory_bytes": _model_memory_bytes(model),
+                "rss_delta_bytes": (
+                    rss_after - rss_before if rss_before is not None and rss_after is not None else None
+                ),
+            }
+            self._models[key] = model
+            logger.info(f"Model loaded: {key} in {load_seconds:.2f}s")
+            return model
+
+    def get_sentence_transformer(self, model_name: str) -> Any:
+        """
+        Get a shared sentence transformer model.
+
+        Args:
+            model_name: Sentence transformer model name
+
+        Returns:
+            SentenceTransformer instance
+        """
+        def _load():
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(model_name)
+
+        return self.get(f"sentence-transformers/{model_name}", _load)
+
+    async def warm_up(self, model_names: Iterable[str]) -> None:
+        """
+        Load sentence transformer models ahead of first use.
+
+        Loading runs in a worker thread so startup does not block the event loop.
+
+        Args:
+            model_names: Sentence transformer model names
+        """
+        for model_name in model_names:
+            try:
+                await asyncio.to_thread(self.get_sentence_transformer, model_name)
+            except Exception as e:
+                logger.error(f"Failed to warm up model {model_name}: {str(e)}")
+
+    def is_loaded(self, key: str) -> bool:
+        """Check whether a model has been loaded."""
+        return key in self._models
+
+    def clear(self) -> None:
+        """Drop every loaded model."""
+        with self._lock:
+            self._models.clear()
+            self._stats.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get load time and memory footprint of every loaded model."""
+        return {
+            "loaded_models": len(self._models),
+            "process_rss_bytes": _process_rss_bytes(),
+            "models": {key: dict(stats) for key, stats in self._stats.items()},
+        }
+
+
+# Process-wide model registry
+model_registry = ModelRegistry()
+
+
+async def init_models() -> None:
+    """
+    Warm up configured models.
+
+    Should be called during application startup. Does nothing unless
+    ``embedding_model_warmup`` is enabled, in which case models otherwise loaded on
+    first request are loaded now.
+    """
+    if settings.embedding_model_warmup:
+        await model_registry.warm_up([settings.knowledge_base_embedding_model])
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Get the process-wide model registry.
+
+    Returns:
+        ModelRegistry: Shared registry instance
+    """
+    return model_registry
@@ -0,0 +1,296 @@
+"""
+Ollama model residency.
+
+Ollama unloads a model five minutes after its last call by default, and
+reloading a multi-gigabyte model adds tens of seconds to the next call.
+The residency manager loads the local models configured in ModelManager
+at startup, sends a per-model ``keep_alive`` with every call, and tracks
+which models are loaded (from ``/api/ps``, refreshed at most every
+``ollama_residency_refresh_seconds``, and from the calls it sees). Local
+fallback chains are reordered so a loaded model runs first when its
+quality tier is at least that of the model the chain prefers.
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+from loguru import logger
+
+from app.config import settings
+from app.core.http_clients import get_http_client
+
+# Tier of models missing from ollama_quality_tiers; never stands in for a known model
+UNKNOWN_QUALITY_TIER = 0
+
+_DURATION = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*([smh]?)\s*$")
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
+def normalize_model_name(model: str) -> str:
+    """Ollama model name with its tag ('deepseek-r1' -> 'deepseek-r1:latest')."""
+    return model if ":" in model else f"{model}:latest"
+
+
+def _lookup_by_prefix(values: Dict[str, Any], model: str, default: Any) -> Any:
+    """Value configured for a model name, its untagged name or the longest matching prefix."""
+    for name in (model, model.split(":", 1)[0]):
+        if name in values:
+            return values[name]
+    prefixes = [name for name in values if model.startswith(name)]
+    return values[max(prefixes, key=len)] if prefixes else default
+
+
+def keep_alive_seconds(keep_alive: str) -> Optional[float]:
+    """
+    Seconds a keep_alive value keeps a model loaded.
+
+    Args:
+        keep_alive: Ollama duration ('30m', '1h', '300', '-1')
+
+    Returns:
+        Seconds, or None for negative values (loaded until evicted)
+    """
+    match = _DURATION.match(str(keep_alive))
+    if not match:
+        return 300.0
+    value = float(match.group(1)) * _UNITS[match.group(2)]
+    return None if value < 0 else value
+
+
+def quality_tier(model: str) -> int:
+    """Quality tier of a local model."""
+    return _lookup_by_prefix(settings.ollama_quality_tiers, model, UNKNOWN_QUALITY_TIER)
+
+
+class OllamaResidencyManager:
+    """
+    Tracks and extends which models an Ollama server keeps loaded.
+    """
+
+    def __init__(self, base_url: str, client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize manager.
+
+        Args:
+            base_url: Ollama server URL
+            client: HTTP client (defaults to the pooled Ollama client)
+        """
+        self.base_url = base_url.rstrip("/")
+        self._client = client
+        # Normalized model name -> monotonic expiry (None: until evicted)
+        self._resident: Dict[str, Optional[float]] = {}
+        self._refreshed_at: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+        self.stats = {"warmups": 0, "warmup_failures": 0, "refreshes": 0, "reordered": 0}
+
+    def _http(self) -> httpx.AsyncClient:
+        return self._client or get_http_client("ollama")
+
+    def keep_alive_for(self, model: str) -> str:
+        """
+        keep_alive to send with calls to a model.
+
+        Args:
+            model: Model name
+
+        Returns:
+            Ollama duration string
+        """
+        return str(_lookup_by_prefix(settings.ollama_keep_alive_overrides, model, settings.ollama_keep_alive))
+
+    def mark_used(self, model: str) -> None:
+        """
+        Record a completed call; the model stays loaded for its keep_alive.
+
+        Args:
+            model: Model name
+        """
+        name = normalize_model_name(model)
+        if name not in self._resident:
+            # Loading it may have evicted another model
+            self._refreshed_at = None
+        seconds = keep_alive_seconds(self.keep_alive_for(model))
+        if seconds == 0:
+            self._resident.pop(name, None)
+        else:
+            self._resident[name] = None if seconds is None else time.monotonic() + seconds
+
+    def is_resident(self, model: str) -> bool:
+        """
+        Check whether a model is believed to be loaded.
+
+        Args:
+            model: Model name
+
+        Returns:
+            True if loaded and not past its keep_alive
+        """
+        name = normalize_model_name(model)
+        if name not in self._resident:
+            return False
+        expires = self._resident[name]
+        return expires is None or expires > time.monotonic()
+
+    async def refresh(self, force: bool = False) -> None:
+        """
+        Update resident models from ``/api/ps``.
+
+        Args:
+            force: Refresh even if the cached list is recent
+        """
+        async with self._refresh_lock:
+            now = time.monotonic()
+            if (not force and self._refreshed_at is not None
+                    and now - self._refreshed_at < settings.ollama_residency_refresh_seconds):
+                return
+            try:
+                response = await self._http().get(f"{self.base_url}/api/ps", timeout=5)
+                response.raise_for_status()
+                models = response.json().get("models") or []
+            except Exception as e:
+                logger.debug(f"Could not list loaded Ollama models: {e}")
+                self._refreshed_at = now
+                return
+            resident = {}
+            for model in models:
+                name = model.get("name") or model.get("model")
+                if name:
+                    # Expiry is kept from our own bookkeeping; /api/ps
+                    # reports wall-clock times that may be in another zone
+                    resident[normalize_model_name(name)] = self._resident.get(normalize_model_name(name))
+            self._resident = resident
+            self._refreshed_at = now
+            self.stats["refreshes"] += 1
+
+    async def warm_up(self, models: Sequence[str]) -> Dict[str, bool]:
+        """
+        Load models and set their keep_alive.
+
+        An empty generate request makes Ollama load the model without
+        generating anything.
+
+        Args:
+            models: Model names
+
+        Returns:
+            Whether each model loaded
+        """
+        results = {}
+        for model in dict.fromkeys(models):
+            start = time.perf_counter()
+            try:
+                response = await self._http().post(
+                    f"{self.base_url}/api/generate",
+                    json={"model": model, "keep_alive": self.keep_alive_for(model)},
+                    timeout=httpx.Timeout(600.0, connect=5.0),
+                )
+                response.raise_for_status()
+                self.mark_used(model)
+                self.stats["warmups"] += 1
+                results[model] = True
+                logger.info(f"Ollama model {model} loaded in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                self.stats["warmup_failures"] += 1
+                results[model] = False
+                logger.warning(f"Could not load Ollama model {model}: {e}")
+        return results
+
+    async def prefer_resident(self, models: Sequence[str]) -> List[str]:
+        """
+        Order a fallback chain so loaded models run first where quality allows.
+
+        Loaded models whose tier is at least the tier of the chain's first
+        (preferred) model move to the front; order is otherwise kept.
+
+        Args:
+            models: Model names in preference order
+
+        Returns:
+            Reordered model names
+        """
+        if not settings.ollama_route_to_resident or len(models) < 2:
+            return list(models)
+        await self.refresh()
+        required = quality_tier(models[0])
+        promoted = [m for m in models if self.is_resident(m) and quality_tier(m) >= required]
+        if not promoted or promoted[0] == models[0]:
+            return list(models)
+        ordered = promoted + [m for m in models if m not in promoted]
+        self.stats["reordered"] += 1
+        logger.debug(f"Local models reordered by residency: {ordered}")
+        return ordered
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get resident models and counters.
+
+        Returns:
+            Dict with resident models (seconds until keep_alive expires,
+            None if unknown or unlimited) and counters
+        """
+        now = time.monotonic()
+        return {
+            "base_url": self.base_url,
+            "resident": {
+                name: (round(expires - now, 1) if expires is not None else None)
+                for name, expires in self._resident.items() if self.is_resident(name)
+            },
+            **self.stats,
+        }
+
+
+_managers: Dict[str, OllamaResidencyManager] = {}
+_warmup_task: Optional[asyncio.Task] = None
+
+
+def get_ollama_residency(base_url: Optional[str] = None) -> OllamaResidencyManager:
+    """
+    Get the residency manager of an Ollama server.
+
+    Args:
+        base_url: Server URL (defaults to ``settings.ollama_base_url``)
+
+    Returns:
+        Shared manager for the server
+    """
+    url = (base_url or settings.ollama_base_url).rstrip("/")
+    if url not in _managers:
+        _managers[url] = OllamaResidencyManager(url)
+    return _managers[url]
+
+
+def configured_local_models() -> List[str]:
+    """Active local (Ollama/DeepSeek) models configured in ModelManager."""
+    from app.modules.admin.model_manager import ModelManager
+    from app.modules.admin.models import ModelProvider
+
+    manager = ModelManager()
+    return [
+        model.model_name
+        for provider in (ModelProvider.OLLAMA, ModelProvider.DEEPSEEK)
+        for model in manager.get_models_by_provider(provider)
+    ]
+
+
+async def init_ollama_models() -> None:
+    """
+    Load the configured local models in the background.
+
+    Should be called during application startup. Does nothing unless
+    ``ollama_warmup_on_startup`` is enabled; loading runs as a task so a
+    slow or missing Ollama server does not delay startup.
+    """
+    global _warmup_task
+    if not settings.ollama_warmup_on_startup:
+        return
+    models = configured_local_models()
+    if models:
+        _warmup_task = asyncio.create_task(get_ollama_residency().warm_up(models))
+
+
+def get_ollama_residency_stats() -> Dict[str, Any]:
+    """Get residency of every tracked Ollama server."""
+    return {url: manager.get_stats() for url, manager in _managers.items()}
@@ -0,0 +1,288 @@
+"""
+Token-budgeted prompt assembly.
+
+Agent prompts are built from sections: fixed instructions and output
+schemas that must always be sent, and context (requirement documents,
+requirement lists, existing services) that may be shortened. When the
+whole prompt fits the model's context window it is sent unchanged.
+Otherwise context is split into paragraphs or lines, ranked by relevance
+to the task (embedding similarity through the shared embedding service,
+or word overlap as a fallback), and the most relevant chunks are kept in
+their original order until the budget is used. Omitted chunks are marked
+in the prompt and the report says how much of each section was dropped.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from app.config import settings
+from app.core.token_usage import count_tokens
+
+# Chunks longer than this are split further, line by line
+MAX_CHUNK_TOKENS = 200
+
+# Completion tokens reserved when the agent sets no max_tokens
+DEFAULT_COMPLETION_TOKENS = 2000
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def get_context_window(model: Optional[str]) -> int:
+    """
+    Get the context window of a model.
+
+    Args:
+        model: Model name; configured names match exactly or as a prefix
+            (``llama3.2`` matches ``llama3.2:3b``)
+
+    Returns:
+        Context window in tokens
+    """
+    windows = settings.llm_context_windows
+    if model:
+        if model in windows:
+            return windows[model]
+        prefixes = [name for name in windows if model.startswith(name)]
+        if prefixes:
+            return windows[max(prefixes, key=len)]
+    return settings.llm_default_context_window
+
+
+def prompt_token_budget(model: Optional[str], system_prompt: str = "", max_completion_tokens: Optional[int] = None) -> int:
+    """
+    Tokens available for the user prompt of a call.
+
+    Args:
+        model: Model name
+        system_prompt: System prompt sent with the prompt
+        max_completion_tokens: Completion tokens to reserve
+
+    Returns:
+        Context window minus the system prompt, the completion and a safety
+        margin for tokenizer estimate error
+    """
+    window = get_context_window(model)
+    available = window - count_tokens(system_prompt) - (max_completion_tokens or DEFAULT_COMPLETION_TOKENS)
+    return max(0, int(available * (1 - settings.prompt_budget_margin_ratio)))
+
+
+def _has_paragraphs(text: str) -> bool:
+    return re.search(r"\n\s*\n", text.strip()) is not None
+
+
+def _split_chunks(text: str) -> List[str]:
+    """Split text into paragraphs, and long paragraphs into lines; lists split into items."""
+    if not _has_paragraphs(text):
+        return [line for line in text.strip().split("\n") if line.strip()]
+    chunks = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        if not paragraph.strip():
+            continue
+        if count_tokens(paragraph) <= MAX_CHUNK_TOKENS:
+            chunks.append(paragraph)
+        else:
+            chunks.extend(line for line in paragraph.split("\n") if line.strip())
+    return chunks
+
+
+def _words(text: str) -> set:
+    return set(_WORD_PATTERN.findall(text.lower()))
+
+
+class PromptSection:
+    """A named part of a prompt."""
+
+    def __init__(self, name: str, text: str, required: bool = False, weight: float = 1.0, title: Optional[str] = None):
+        self.name = name
+        self.text = text
+        self.required = required
+        self.weight = weight
+        self.title = title
+
+    def render(self, chunks: Optional[Sequence[str]] = None, omitted: int = 0) -> str:
+        """Render the section, optionally with only some of its chunks."""
+        joiner = "\n\n" if _has_paragraphs(self.text) else "\n"
+        body = self.text if chunks is None else joiner.join(chunks)
+        if omitted:
+            body += f"{joiner}[{omitted} less relevant part(s) omitted to fit the context window]"
+        return f"{self.title}\n{body}" if self.title else body
+
+
+class BudgetedPrompt:
+    """Prompt text fitted to a budget, with a report of what was dropped."""
+
+    def __init__(self, text: str, report: Dict[str, Any]):
+        self.text = text
+        self.report = report
+
+    @property
+    def truncated(self) -> bool:
+        """True if any context was compressed or dropped."""
+        return self.report["dropped_tokens"] > 0
+
+
+class PromptBuilder:
+    """
+    Assembles a prompt from sections within a token budget.
+
+    Usage:
+        builder = PromptBuilder()
+        builder.add("header", "Analyze the document:", required=True)
+        builder.add("document", content)
+        builder.add("schema", schema_text, required=True)
+        prompt = await builder.build(query="extract requirements", budget_tokens=3000)
+    """
+
+    def __init__(self, separator: str = "\n\n"):
+        """
+        Initialize builder.
+
+        Args:
+            separator: Text placed between sections
+        """
+        self.separator = separator
+        self.sections: List[PromptSection] = []
+
+    def add(self, name: str, text: str, *, required: bool = False, weight: float = 1.0, title: Optional[str] = None) -> "PromptBuilder":
+        """
+        Add a section.
+
+        Args:
+            name: Section name used in the report
+            text: Section text
+            required: Always include the section in full
+            weight: Relevance multiplier of the section's chunks
+            title: Heading rendered above the section while any of it is kept
+
+        Returns:
+            The builder, for chaining
+        """
+        if text or title:
+            self.sections.append(PromptSection(name, text, required, weight, title))
+        return self
+
+    def render(self) -> str:
+        """Render every section in full."""
+        return self.separator.join(section.render() for section in self.sections)
+
+    async def build(self, query: str, budget_tokens: int) -> BudgetedPrompt:
+        """
+        Render the prompt within a token budget.
+
+        Args:
+            query: Task description the context is ranked against
+            budget_tokens: Maximum prompt tokens
+
+        Returns:
+            Fitted prompt and report with budget, token counts and the
+            status of each section ('kept', 'compressed' or 'dropped')
+        """
+        full_text = self.render()
+        original_tokens = count_tokens(full_text)
+        report: Dict[str, Any] = {
+            "budget_tokens": budget_tokens,
+            "original_tokens": original_tokens,
+            "sections": {},
+        }
+        if original_tokens <= budget_tokens:
+            report.update(prompt_tokens=original_tokens, dropped_tokens=0, fits=True)
+            for section in self.sections:
+                tokens = count_tokens(section.render())
+                report["sections"][section.name] = {"original_tokens": tokens, "kept_tokens": tokens, "status": "kept"}
+            return BudgetedPrompt(full_text, report)
+
+        section_chunks = {
+            index: _split_chunks(section.text)
+            for index, section in enumerate(self.sections) if not section.required
+        }
+        pool = [(index, position, chunk) for index, chunks in section_chunks.items() for position, chunk in enumerate(chunks)]
+        scores = await self._relevance(query, [chunk for _, _, chunk in pool])
+        ranked = sorted(
+            range(len(pool)),
+            key=lambda i: scores[i] * self.sections[pool[i][0]].weight,
+            reverse=True
+        )
+
+        # Greedily keep the most relevant chunks the budget allows, then
+        # verify on the rendered text (titles, separators and omission
+        # notes cost tokens too) and drop the least relevant until it fits
+        required_tokens = sum(count_tokens(s.render()) for s in self.sections if s.required)
+        remaining = budget_tokens - required_tokens
+        kept = set()
+        for i in ranked:
+            cost = count_tokens(pool[i][2]) + 1
+            if cost <= remaining:
+                kept.add(i)
+                remaining -= cost
+
+        text = self._render_kept(pool, kept, section_chunks)
+        for i in reversed(ranked):
+            if count_tokens(text) <= budget_tokens:
+                break
+            if i in kept:
+                kept.discard(i)
+                text = self._render_kept(pool, kept, section_chunks)
+
+        prompt_tokens = count_tokens(text)
+        report.update(
+            prompt_tokens=prompt_tokens,
+            dropped_tokens=max(0, original_tokens - prompt_tokens),
+            fits=prompt_tokens <= budget_tokens,
+        )
+        for index, section in enumerate(self.sections):
+            original = count_tokens(section.render())
+            if section.required:
+                kept_tokens, status = original, "kept"
+            else:
+                kept_chunks = [pool[i][2] for i in sorted(kept) if pool[i][0] == index]
+                kept_tokens = sum(count_tokens(chunk) for chunk in kept_chunks)
+                if not kept_chunks:
+                    status = "dropped"
+                elif len(kept_chunks) == len(section_chunks[index]):
+                    status = "kept"
+                else:
+                    status = "compressed"
+            report["sections"][section.name] = {"original_tokens": original, "kept_tokens": kept_tokens, "status": status}
+
+        if not report["fits"]:
+            logger.warning(
+                f"Required prompt sections alone ({required_tokens} tokens) exceed the budget of {budget_tokens} tokens"
+            )
+        return BudgetedPrompt(text, report)
+
+    def _render_kept(self, pool, kept, section_chunks) -> str:
+        parts = []
+        for index, section in enumerate(self.sections):
+            if section.required:
+                parts.append(section.render())
+                continue
+            chunks = [pool[i][2] for i in sorted(kept) if pool[i][0] == index]
+            if chunks:
+                parts.append(section.render(chunks, omitted=len(section_chunks[index]) - len(chunks)))
+        return self.separator.join(parts)
+
+    async def _relevance(self, query: str, chunks: List[str]) -> List[float]:
+        """Relevance of each chunk to the query, between 0 and 1."""
+        if not chunks:
+            return []
+        if settings.prompt_budget_use_embeddings:
+            try:
+                from app.services.embedding_service import get_embedding_service
+
+                vectors = await get_embedding_service().embed_many([query, *chunks])
+                norms = np.linalg.norm(vectors, axis=1)
+                norms[norms == 0] = 1.0
+                similarities = (vectors[1:] @ vectors[0]) / (norms[1:] * norms[0])
+                return [float((s + 1) / 2) for s in similarities]
+            except Exception as e:
+                logger.warning(f"Embedding relevance unavailable, ranking prompt context by word overlap: {e}")
+
+        query_words = _words(query)
+        scores = []
+        for chunk in chunks:
+            words = _words(chunk)
+            scores.append(len(words & query_words) / len(words | query_words) if words else 0.0)
+        return scores
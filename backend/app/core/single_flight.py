@@ -0,0 +1,219 @@
+"""
+Single-flight coalescing of concurrent identical LLM calls.
+
+When several requests send the same prompt at the same time (users opening
+the same project, a workflow node retried while its first attempt is still
+running) only the first one calls the provider; the others await its
+result. Within a process the callers share one task. With the Redis lease
+enabled, workers also coordinate: the worker holding the lease calls the
+provider and publishes the result, and workers that find the lease taken
+poll for that result instead of sending a duplicate request.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
+from app.core.redis_client import RedisCache, get_redis
+
+LEASE_KEY_PREFIX = "llm_flight:lease:"
+RESULT_KEY_PREFIX = "llm_flight:result:"
+
+# Seconds to skip the Redis lease after it fails
+REDIS_RETRY_SECONDS = 30.0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one upstream call.
+    """
+
+    def __init__(
+        self,
+        use_redis: bool = False,
+        lease_seconds: int = 300,
+        poll_interval: float = 0.5
+    ):
+        """
+        Initialize single-flight group.
+
+        Args:
+            use_redis: Whether to coordinate across workers with a Redis lease
+            lease_seconds: Lease lifetime; also the longest a worker waits for another
+            poll_interval: Seconds between checks for another worker's result
+        """
+        self.use_redis = use_redis
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._redis_retry_at = 0.0
+
+        self.stats = {
+            "leaders": 0,
+            "coalesced": 0,
+            "remote_coalesced": 0,
+            "lease_waits": 0,
+            "lease_timeouts": 0,
+            "redis_errors": 0,
+        }
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[str]]) -> Tuple[str, bool]:
+        """
+        Run ``fn`` unless an identical call is already in flight.
+
+        The upstream call runs as its own task, so a caller being cancelled
+        does not cancel it for the others. Exceptions are raised to every
+        caller sharing the call.
+
+        Args:
+            key: Normalized request key
+            fn: Coroutine function making the upstream call
+
+        Returns:
+            Tuple of (result, whether it was shared from another call)
+        """
+        loop = asyncio.get_running_loop()
+        task = self._in_flight.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self.stats["coalesced"] += 1
+            logger.debug(f"Coalesced LLM call {key[:12]} with in-flight request")
+            result, _ = await asyncio.shield(task)
+            return result, True
+
+        self.stats["leaders"] += 1
+        task = loop.create_task(self._run(key, fn))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing counters.
+
+        Returns:
+            Dict with leader and coalesced call counts and in-flight calls
+        """
+        return {
+            **self.stats,
+            "in_flight": sum(1 for t in self._in_flight.values() if not t.done()),
+            "redis_enabled": self.use_redis,
+        }
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Retrieve the exception so an unawaited failure is not logged as lost
+            task.exception()
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[str]]) -> Tuple[str, bool]:
+        cache = await self._redis()
+        if cache is None:
+            return await fn(), False
+
+        token = str(uuid.uuid4())
+        deadline = time.monotonic() + self.lease_seconds
+        while True:
+            try:
+                acquired = await cache.redis.set(
+                    LEASE_KEY_PREFIX + key, token, nx=True, ex=self.lease_seconds
+                )
+            except Exception as e:
+                self._redis_failed(e)
+                return await fn(), False
+
+            if acquired:
+                return await self._lead(cache, key, token, fn), False
+
+            self.stats["lease_waits"] += 1
+            result = await self._wait_for_result(cache, key, deadline)
+            if result is not None:
+                self.stats["remote_coalesced"] += 1
+                return result, True
+            if time.monotonic() >= deadline:
+                self.stats["lease_timeouts"] += 1
+                logger.warning(f"Timed out waiting for LLM call {key[:12]} on another worker")
+                return await fn(), False
+            # Lease released without a result (the other worker failed); try to lead
+
+    async def _lead(self, cache: RedisCache, key: str, token: str, fn: Callable[[], Awaitable[str]]) -> str:
+        try:
+            result = await fn()
+            try:
+                await cache.set(RESULT_KEY_PREFIX + key, {"response": result}, expire=self.lease_seconds)
+            except Exception as e:
+                self._redis_failed(e)
+            return result
+        finally:
+            try:
+                if await cache.get(LEASE_KEY_PREFIX + key) == token:
+                    await cache.delete(LEASE_KEY_PREFIX + key)
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def _wait_for_result(self, cache: RedisCache, key: str, deadline: float) -> Optional[str]:
+        """Poll until another worker publishes a result, releases the lease or the deadline passes"""
+        while time.monotonic() < deadline:
+            try:
+                published = await cache.get(RESULT_KEY_PREFIX + key)
+                if isinstance(published, dict) and "response" in published:
+                    return published["response"]
+                if not await cache.exists(LEASE_KEY_PREFIX + key):
+                    return None
+            except Exception as e:
+                self._redis_failed(e)
+                return None
+            await asyncio.sleep(self.poll_interval)
+        return None
+
+    async def _redis(self) -> Optional[RedisCache]:
+        if not self.use_redis or time.monotonic() < self._redis_retry_at:
+            return None
+        try:
+            return RedisCache(await get_redis())
+        except RuntimeError:
+            # Redis not initialized; coalesce within this process only
+            return None
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+
+    def _redis_failed(self, e: Exception) -> None:
+        self.stats["redis_errors"] += 1
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.warning(f"LLM single-flight Redis lease unavailable for {REDIS_RETRY_SECONDS:.0f}s: {e}")
+
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """
+    Get the process-wide single-flight group for LLM calls.
+
+    Returns:
+        Shared group, or None when coalescing is disabled
+    """
+    global _single_flight
+    if not settings.llm_single_flight_enabled:
+        return None
+    if _single_flight is None:
+        _single_flight = SingleFlight(
+            use_redis=settings.llm_single_flight_redis_enabled,
+            lease_seconds=settings.llm_single_flight_lease_seconds,
+            poll_interval=settings.llm_single_flight_poll_interval,
+        )
+    return _single_flight
+
+
+def get_single_flight_stats() -> Dict[str, Any]:
+    """Get statistics of the shared single-flight group."""
+    flight = get_single_flight()
+    if flight is None:
+        return {"enabled": False}
+    return {"enabled": True, **flight.get_stats()}
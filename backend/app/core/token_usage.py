@@ -0,0 +1,361 @@
+"""
+Token accounting for LLM calls.
+
+Provider responses report the tokens they actually billed: OpenAI and
+OpenAI-compatible servers in ``usage.prompt_tokens``/``completion_tokens``,
+Anthropic in ``usage.input_tokens``/``output_tokens`` and Ollama in
+``prompt_eval_count``/``eval_count`` (plus load, prompt evaluation and
+generation durations). This module normalizes those fields, provides a
+local tokenizer for pre-flight estimates when no usage is reported, and
+accumulates per-call usage and latency for the agent execution that made
+the calls, so costs and throughput are logged from real counts.
+"""
+
+import contextvars
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+try:  # Exact BPE counts are optional (pip install tiktoken)
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+
+# Word pieces, numbers and single punctuation marks, roughly how BPE
+# tokenizers pre-split text
+_PRETOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]|\s+")
+
+# Characters per token within a long word (BPE merges common subwords)
+_CHARS_PER_WORD_TOKEN = 4
+
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    """Lazily load the shared tiktoken encoding (once; failures are not retried)."""
+    global _encoding, _encoding_failed
+    if _encoding is None and TIKTOKEN_AVAILABLE and not _encoding_failed:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:  # Encoding files may be unavailable offline
+            _encoding_failed = True
+            logger.warning(f"tiktoken encoding unavailable, using heuristic token counts: {e}")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count (or estimate) the tokens of a text.
+
+    Uses tiktoken's ``cl100k_base`` encoding when installed; otherwise the
+    text is pre-split like a BPE tokenizer and long words are counted as
+    several tokens. Local models use other vocabularies, so the result is
+    an estimate for pre-flight budgeting, not a billing count.
+
+    Args:
+        text: Text to count
+
+    Returns:
+        Token count
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    tokens = 0
+    for piece in _PRETOKEN_PATTERN.findall(text):
+        if piece.isspace():
+            # Runs of whitespace (indentation) merge into few tokens
+            tokens += 1 if "\n" in piece or len(piece) > 1 else 0
+        elif piece.isalpha():
+            tokens += -(-len(piece) // _CHARS_PER_WORD_TOKEN)
+        else:
+            tokens += 1
+    return max(1, tokens)
+
+
+def _ns_to_ms(value: Any) -> Optional[float]:
+    return round(value / 1e6, 1) if isinstance(value, (int, float)) and value else None
+
+
+def usage_from_response(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Extract token usage from a raw provider response.
+
+    Args:
+        data: Response JSON of OpenAI, Anthropic, Ollama or an
+            OpenAI-compatible server
+
+    Returns:
+        Dict with ``prompt_tokens`` and ``completion_tokens`` (Ollama
+        responses also carry ``load_ms``, ``prompt_eval_ms`` and
+        ``generation_ms``), or None if the response reports no usage
+    """
+    if not isinstance(data, dict):
+        return None
+
+    if "prompt_eval_count" in data or "eval_count" in data:
+        usage = {
+            "prompt_tokens": data.get("prompt_eval_count") or 0,
+            "completion_tokens": data.get("eval_count") or 0,
+        }
+        for field, key in (("load_duration", "load_ms"), ("prompt_eval_duration", "prompt_eval_ms"),
+                           ("eval_duration", "generation_ms")):
+            value = _ns_to_ms(data.get(field))
+            if value is not None:
+                usage[key] = value
+        return usage
+
+    reported = data.get("usage") or data.get("token_usage")
+    if not isinstance(reported, dict):
+        return None
+    if "input_tokens" in reported or "output_tokens" in reported:
+        # Anthropic; cached prompt tokens are billed as input as well
+        prompt_tokens = (
+            (reported.get("input_tokens") or 0)
+            + (reported.get("cache_creation_input_tokens") or 0)
+            + (reported.get("cache_read_input_tokens") or 0)
+        )
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": reported.get("output_tokens") or 0}
+    if "prompt_tokens" in reported or "completion_tokens" in reported:
+        return {
+            "prompt_tokens": reported.get("prompt_tokens") or 0,
+            "completion_tokens": reported.get("completion_tokens") or 0,
+        }
+    return None
+
+
+def usage_from_message(message: Any) -> Optional[Dict[str, Any]]:
+    """
+    Extract token usage from a LangChain chat message.
+
+    Reads ``usage_metadata`` (set by the OpenAI and Anthropic integrations
+    and by ChatDeepSeek) and falls back to the raw fields in
+    ``response_metadata``.
+
+    Args:
+        message: Message returned by ``ainvoke``
+
+    Returns:
+        Usage dict as returned by ``usage_from_response``, or None
+    """
+    metadata = getattr(message, "response_metadata", None) or {}
+    usage = usage_from_response(metadata)
+    usage_metadata = getattr(message, "usage_metadata", None)
+    if usage_metadata:
+        usage = {
+            **(usage or {}),
+            "prompt_tokens": usage_metadata.get("input_tokens", 0),
+            "completion_tokens": usage_metadata.get("output_tokens", 0),
+        }
+    return usage
+
+
+class UsageAccumulator:
+    """
+    Token usage and latency of the LLM calls made by one execution.
+    """
+
+    def __init__(self):
+        """Initialize an empty accumulator."""
+        self.calls: List[Dict[str, Any]] = []
+
+    def add(
+        self,
+        provider: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        *,
+        estimated: bool = False,
+        queue_ms: float = 0.0,
+        time_to_first_token_ms: Optional[float] = None,
+        generation_ms: Optional[float] = None,
+        duration_ms: Optional[float] = None
+    ) -> None:
+        """
+        Record one LLM call.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            prompt_tokens: Prompt tokens
+            completion_tokens: Completion tokens
+            estimated: True if the counts are local estimates rather than
+                provider-reported usage
+            queue_ms: Time spent waiting for a scheduler slot
+            time_to_first_token_ms: Time until the first token (or until
+                the prompt was processed, for non-streamed calls)
+            generation_ms: Time spent generating the completion
+            duration_ms: Wall-clock time of the call after queueing
+        """
+        self.calls.append({
+            "provider": provider,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "estimated": estimated,
+            "queue_ms": queue_ms,
+            "time_to_first_token_ms": time_to_first_token_ms,
+            "generation_ms": generation_ms,
+            "duration_ms": duration_ms,
+        })
+
+    def tokens(self) -> Dict[str, int]:
+        """
+        Get total token counts.
+
+        Returns:
+            Dict with 'prompt_tokens' and 'completion_tokens'
+        """
+        return {
+            "prompt_tokens": sum(call["prompt_tokens"] for call in self.calls),
+            "completion_tokens": sum(call["completion_tokens"] for call in self.calls),
+        }
+
+    def add_queue_time(self, queue_ms: float) -> None:
+        """
+        Attribute scheduler wait measured around the calls to the first call.
+
+        Args:
+            queue_ms: Milliseconds spent waiting for a slot
+        """
+        if self.calls:
+            self.calls[0]["queue_ms"] += queue_ms
+
+    @property
+    def estimated(self) -> bool:
+        """True if any call's counts are local estimates."""
+        return any(call["estimated"] for call in self.calls)
+
+    def latency(self) -> Dict[str, Optional[float]]:
+        """
+        Get the latency breakdown summed over calls, in seconds.
+
+        Returns:
+            Dict with 'queue_seconds', 'time_to_first_token_seconds' and
+            'generation_seconds' (None when no call reported the phase)
+        """
+        def total(field: str) -> Optional[float]:
+            values = [call[field] for call in self.calls if call[field] is not None]
+            return round(sum(values) / 1000, 3) if values else None
+
+        return {
+            "queue_seconds": total("queue_ms"),
+            "time_to_first_token_seconds": total("time_to_first_token_ms"),
+            "generation_seconds": total("generation_ms"),
+        }
+
+
+_current_usage: contextvars.ContextVar[Optional[UsageAccumulator]] = contextvars.ContextVar(
+    "llm_usage", default=None
+)
+
+
+@contextmanager
+def track_llm_usage(accumulator: Optional[UsageAccumulator] = None) -> Iterator[UsageAccumulator]:
+    """
+    Collect the usage of LLM calls made in this context (and tasks it creates).
+
+    Calls collected by a nested context are also added to the enclosing
+    one when the nested context exits.
+
+    Args:
+        accumulator: Accumulator to collect into (a new one by default)
+
+    Yields:
+        Accumulator receiving each call recorded with ``record_llm_usage``
+    """
+    accumulator = accumulator if accumulator is not None else UsageAccumulator()
+    parent = _current_usage.get()
+    token = _current_usage.set(accumulator)
+    try:
+        yield accumulator
+    finally:
+        _current_usage.reset(token)
+        if parent is not None and parent is not accumulator:
+            parent.calls.extend(accumulator.calls)
+
+
+def record_llm_usage(provider: str, model: str, prompt_tokens: int, completion_tokens: int, **details: Any) -> None:
+    """
+    Record an LLM call in the current ``track_llm_usage`` context, if any.
+
+    Args:
+        provider: Provider name
+        model: Model name
+        prompt_tokens: Prompt tokens
+        completion_tokens: Completion tokens
+        **details: Latency fields and ``estimated`` (see ``UsageAccumulator.add``)
+    """
+    accumulator = _current_usage.get()
+    if accumulator is not None:
+        accumulator.add(provider, model, prompt_tokens, completion_tokens, **details)
+
+
+class CallTimer:
+    """
+    Splits an LLM call into queue wait and provider time.
+    """
+
+    def __init__(self):
+        """Start timing; the queue phase runs until ``started`` is called."""
+        self.created = time.perf_counter()
+        self.sent: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def started(self) -> None:
+        """Mark the call as sent to the provider."""
+        self.sent = time.perf_counter()
+
+    def stopped(self) -> None:
+        """Mark the response as received."""
+        self.finished = time.perf_counter()
+
+    @property
+    def queue_ms(self) -> float:
+        """Milliseconds between creation and sending."""
+        return round(((self.sent or self.created) - self.created) * 1000, 1)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        """Milliseconds between sending and the response."""
+        if self.sent is None or self.finished is None:
+            return None
+        return round((self.finished - self.sent) * 1000, 1)
+
+
+def call_latency(timer: CallTimer, usage: Optional[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    """
+    Latency breakdown of a non-streamed call.
+
+    Ollama reports model load and prompt evaluation (the time before the
+    first token) and generation time; for hosted providers, which report
+    no timings, the whole provider time counts as generation.
+
+    Args:
+        timer: Timer of the call
+        usage: Usage extracted from the response
+
+    Returns:
+        Dict with queue_ms, time_to_first_token_ms, generation_ms and duration_ms
+    """
+    usage = usage or {}
+    time_to_first_token_ms = None
+    if "prompt_eval_ms" in usage or "load_ms" in usage:
+        time_to_first_token_ms = round(usage.get("load_ms", 0.0) + usage.get("prompt_eval_ms", 0.0), 1)
+    return {
+        "queue_ms": timer.queue_ms,
+        "time_to_first_token_ms": time_to_first_token_ms,
+        "generation_ms": usage.get("generation_ms", timer.duration_ms),
+        "duration_ms": timer.duration_ms,
+    }
@@ -0,0 +1,616 @@
+"""
+Durable LangGraph checkpointer on the application database.
+
+Workflow graphs used to checkpoint into a ``MemorySaver`` owned by each
+workflow instance, so a request handled by a fresh instance, another
+worker or a restarted process could not see a session's state. The
+database checkpointer stores checkpoints in the ``workflow_checkpoint*``
+tables through the shared ``AsyncSessionLocal`` pool, so any worker can
+resume any session.
+
+Checkpoints are stored as deltas: a checkpoint row holds only channel
+versions, and a channel value is written once per version, so a step
+adds only the channels it changed. Values above
+``workflow_checkpoint_compress_bytes`` are zlib-compressed. Checkpoints
+and task writes are buffered and written in one transaction when
+``workflow_checkpoint_batch_size`` writes are pending, after
+``workflow_checkpoint_flush_seconds``, before any read and when a
+workflow run ends. Every ``workflow_checkpoint_prune_every`` checkpoints
+a thread is pruned to its ``workflow_checkpoint_keep_last`` latest
+checkpoints, with the channel versions no kept checkpoint references.
+"""
+
+import asyncio
+import random
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from loguru import logger
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.workflow_checkpoint import WorkflowCheckpoint, WorkflowCheckpointBlob, WorkflowCheckpointWrite
+
+COMPRESSED_SUFFIX = "+zlib"
+
+# Blob keys per statement when deleting unreferenced channel versions
+DELETE_CHUNK = 200
+
+# Statements use the tables rather than the ORM classes so checkpointing never
+# depends on configuring the application's mappers
+checkpoints_table = WorkflowCheckpoint.__table__
+blobs_table = WorkflowCheckpointBlob.__table__
+writes_table = WorkflowCheckpointWrite.__table__
+
+
+def _thread_config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+
+
+class DatabaseCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpointer storing checkpoint deltas in the database.
+
+    Only the async interface is implemented; graphs must be run with
+    ``ainvoke``/``astream`` and inspected with ``aget_state``.
+    """
+
+    def __init__(self, session_factory: Optional[async_sessionmaker] = None):
+        """
+        Initialize checkpointer.
+
+        Args:
+            session_factory: Session factory (defaults to ``AsyncSessionLocal``)
+        """
+        super().__init__()
+        if session_factory is None:
+            from app.core.database import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self._session_factory = session_factory
+        # Buffered rows keyed by primary key; a later put of the same key replaces the earlier
+        self._checkpoints: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._blobs: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
+        self._writes: Dict[Tuple[str, str, str, str, int], Dict[str, Any]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._since_prune: Dict[str, int] = {}
+        self.stats = {"checkpoints": 0, "writes": 0, "blobs": 0, "flushes": 0, "flush_failures": 0, "pruned": 0}
+
+    # Serialization
+
+    def _dump(self, value: Any) -> Tuple[str, bytes]:
+        value_type, data = self.serde.dumps_typed(value)
+        if len(data) > settings.workflow_checkpoint_compress_bytes:
+            return value_type + COMPRESSED_SUFFIX, zlib.compress(data)
+        return value_type, data
+
+    def _load(self, value_type: str, data: Optional[bytes]) -> Any:
+        if value_type.endswith(COMPRESSED_SUFFIX):
+            value_type, data = value_type[:-len(COMPRESSED_SUFFIX)], zlib.decompress(data)
+        return self.serde.loads_typed((value_type, data or b""))
+
+    # Writing
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """
+        Buffer a checkpoint and the channel values it changed.
+
+        Args:
+            config: Config of the parent checkpoint
+            checkpoint: Checkpoint to store
+            metadata: Checkpoint metadata
+            new_versions: Channel versions created by this checkpoint
+
+        Returns:
+            Config of the stored checkpoint
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        for channel, version in new_versions.items():
+            value_type, value = self._dump(values[channel]) if channel in values else ("empty", None)
+            self._blobs[(thread_id, checkpoint_ns, channel, str(version))] = {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "channel": channel,
+                "version": str(version),
+                "value_type": value_type,
+                "value": value,
+            }
+        checkpoint_type, data = self._dump(stored)
+        metadata_type, metadata_data = self._dump(get_checkpoint_metadata(config, metadata))
+        self._checkpoints[(thread_id, checkpoint_ns, checkpoint["id"])] = {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+            "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+            "checkpoint_type": checkpoint_type,
+            "checkpoint": data,
+            "metadata_type": metadata_type,
+            "metadata": metadata_data,
+        }
+        self._buffered()
+        return _thread_config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """
+        Buffer the writes of a task.
+
+        Args:
+            config: Config of the checkpoint the writes belong to
+            writes: (channel, value) pairs
+            task_id: Task that produced the writes
+            task_path: Path of the task
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        for position, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, position)
+            key = (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            if idx >= 0 and key in self._writes:
+                continue
+            value_type, data = self._dump(value)
+            self._writes[key] = {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "idx": idx,
+                "channel": channel,
+                "value_type": value_type,
+                "value": data,
+                "task_path": task_path,
+            }
+        self._buffered()
+
+    def _pending(self) -> int:
+        return len(self._checkpoints) + len(self._blobs) + len(self._writes)
+
+    def _buffered(self) -> None:
+        """Flush now when the batch is full, else make sure a flush is scheduled."""
+        if self._pending() >= settings.workflow_checkpoint_batch_size:
+            self._start_flush()
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(settings.workflow_checkpoint_flush_seconds, self._start_flush)
+
+    def _start_flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._background_flush())
+
+    async def _background_flush(self) -> None:
+        try:
+            await self.aflush()
+        except Exception:
+            # Logged and re-buffered by aflush; the next flush retries
+            pass
+
+    def _insert(self, session: AsyncSession, table):
+        dialect = session.bind.dialect.name
+        if dialect == "postgresql":
+            return postgresql_insert(table)
+        if dialect == "sqlite":
+            return sqlite_insert(table)
+        raise NotImplementedError(f"Workflow checkpoints are not supported on {dialect}")
+
+    async def aflush(self) -> None:
+        """
+        Write buffered checkpoints, channel values and task writes in one transaction.
+
+        Raises:
+            Exception: If the database write fails; the rows stay buffered
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        async with self._flush_lock:
+            if not self._pending():
+                return
+            checkpoints, self._checkpoints = self._checkpoints, {}
+            blobs, self._blobs = self._blobs, {}
+            writes, self._writes = self._writes, {}
+            try:
+                async with self._session_factory() as session:
+                    async with session.begin():
+                        if blobs:
+                            await session.execute(
+                                self._insert(session, blobs_table).on_conflict_do_nothing(),
+                                list(blobs.values())
+                            )
+                        if checkpoints:
+                            await session.execute(self._upsert_checkpoints(session), list(checkpoints.values()))
+                        regular = [row for row in writes.values() if row["idx"] >= 0]
+                        special = [row for row in writes.values() if row["idx"] < 0]
+                        if regular:
+                            await session.execute(
+                                self._insert(session, writes_table).on_conflict_do_nothing(),
+                                regular
+                            )
+                        if special:
+                            await session.execute(self._upsert_special_writes(session), special)
+            except Exception as e:
+                # Keep the rows (behind anything buffered meanwhile) for the next flush
+                self._checkpoints = {**checkpoints, **self._checkpoints}
+                self._blobs = {**blobs, **self._blobs}
+                self._writes = {**writes, **self._writes}
+                self.stats["flush_failures"] += 1
+                logger.error(f"Failed to write workflow checkpoints: {e}")
+                if self._flush_handle is None:
+                    self._flush_handle = asyncio.get_running_loop().call_later(
+                        settings.workflow_checkpoint_flush_seconds, self._start_flush
+                    )
+                raise
+
+            self.stats["flushes"] += 1
+            self.stats["checkpoints"] += len(checkpoints)
+            self.stats["blobs"] += len(blobs)
+            self.stats["writes"] += len(writes)
+            threads = [thread_id for thread_id, _, _ in checkpoints]
+        await self._prune_due(threads)
+
+    def _upsert_checkpoints(self, session: AsyncSession):
+        statement = self._insert(session, checkpoints_table)
+        return statement.on_conflict_do_update(
+            index_elements=["thread_id", "checkpoint_ns", "checkpoint_id"],
+            set_={
+                "parent_checkpoint_id": statement.excluded.parent_checkpoint_id,
+                "checkpoint_type": statement.excluded.checkpoint_type,
+                "checkpoint": statement.excluded.checkpoint,
+                "metadata_type": statement.excluded.metadata_type,
+                "metadata": statement.excluded["metadata"],
+            }
+        )
+
+    def _upsert_special_writes(self, session: AsyncSession):
+        # Errors, interrupts and resume values replace earlier ones of the task
+        statement = self._insert(session, writes_table)
+        return statement.on_conflict_do_update(
+            index_elements=["thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"],
+            set_={
+                "channel": statement.excluded.channel,
+                "value_type": statement.excluded.value_type,
+                "value": statement.excluded.value,
+                "task_path": statement.excluded.task_path,
+            }
+        )
+
+    # Pruning
+
+    async def _prune_due(self, threads: List[str]) -> None:
+        if settings.workflow_checkpoint_keep_last <= 0:
+            return
+        for thread_id in threads:
+            self._since_prune[thread_id] = self._since_prune.get(thread_id, 0) + 1
+        for thread_id in dict.fromkeys(threads):
+            if self._since_prune[thread_id] >= settings.workflow_checkpoint_prune_every:
+                self._since_prune[thread_id] = 0
+                try:
+                    await self.aprune(thread_id)
+                except Exception as e:
+                    logger.warning(f"Failed to prune checkpoints of thread {thread_id}: {e}")
+
+    async def aprune(self, thread_id: str, keep_last: Optional[int] = None) -> int:
+        """
+        Delete all but the latest checkpoints of a thread.
+
+        Task writes of deleted checkpoints and channel versions no kept
+        checkpoint references are deleted with them.
+
+        Args:
+            thread_id: Workflow thread
+            keep_last: Checkpoints kept per namespace
+                (defaults to ``workflow_checkpoint_keep_last``)
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        keep_last = settings.workflow_checkpoint_keep_last if keep_last is None else keep_last
+        if keep_last <= 0:
+            return 0
+        await self.aflush()
+        deleted = 0
+        async with self._session_factory() as session:
+            async with session.begin():
+                rows = (await session.execute(
+                    select(
+                        checkpoints_table.c.checkpoint_ns,
+                        checkpoints_table.c.checkpoint_id,
+                        checkpoints_table.c.checkpoint_type,
+                        checkpoints_table.c.checkpoint,
+                    )
+                    .where(checkpoints_table.c.thread_id == thread_id)
+                    .order_by(checkpoints_table.c.checkpoint_ns, checkpoints_table.c.checkpoint_id.desc())
+                )).all()
+                by_ns: Dict[str, List[Any]] = {}
+                for row in rows:
+                    by_ns.setdefault(row.checkpoint_ns, []).append(row)
+
+                for checkpoint_ns, ns_rows in by_ns.items():
+                    stale = [row.checkpoint_id for row in ns_rows[keep_last:]]
+                    if not stale:
+                        continue
+                    referenced = set()
+                    for row in ns_rows[:keep_last]:
+                        versions = self._load(row.checkpoint_type, row.checkpoint)["channel_versions"]
+                        referenced.update((channel, str(version)) for channel, version in versions.items())
+
+                    ns_filter = and_(
+                        checkpoints_table.c.thread_id == thread_id, checkpoints_table.c.checkpoint_ns == checkpoint_ns
+                    )
+                    await session.execute(delete(checkpoints_table).where(
+                        ns_filter, checkpoints_table.c.checkpoint_id.in_(stale)
+                    ))
+                    await session.execute(delete(writes_table).where(
+                        writes_table.c.thread_id == thread_id,
+                        writes_table.c.checkpoint_ns == checkpoint_ns,
+                        writes_table.c.checkpoint_id.in_(stale)
+                    ))
+                    blob_keys = (await session.execute(
+                        select(blobs_table.c.channel, blobs_table.c.version).where(
+                            blobs_table.c.thread_id == thread_id,
+                            blobs_table.c.checkpoint_ns == checkpoint_ns
+                        )
+                    )).all()
+                    unreferenced = [(channel, version) for channel, version in blob_keys
+                                    if (channel, version) not in referenced]
+                    for start in range(0, len(unreferenced), DELETE_CHUNK):
+                        await session.execute(delete(blobs_table).where(
+                            blobs_table.c.thread_id == thread_id,
+                            blobs_table.c.checkpoint_ns == checkpoint_ns,
+                            or_(*(
+                                and_(blobs_table.c.channel == channel, blobs_table.c.version == version)
+                                for channel, version in unreferenced[start:start + DELETE_CHUNK]
+                            ))
+                        ))
+                    deleted += len(stale)
+        self.stats["pruned"] += deleted
+        if deleted:
+            logger.debug(f"Pruned {deleted} checkpoints of workflow thread {thread_id}")
+        return deleted
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """
+        Delete all checkpoints, writes and channel values of a thread.
+
+        Args:
+            thread_id: Workflow thread
+        """
+        await self.aflush()
+        async with self._session_factory() as session:
+            async with session.begin():
+                for table in (checkpoints_table, writes_table, blobs_table):
+                    await session.execute(delete(table).where(table.c.thread_id == thread_id))
+        self._since_prune.pop(thread_id, None)
+
+    # Reading
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """
+        Get a checkpoint, or the latest checkpoint of a thread.
+
+        Args:
+            config: Config with thread_id and optionally checkpoint_ns and checkpoint_id
+
+        Returns:
+            Checkpoint tuple, or None if not found
+        """
+        await self.aflush()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = select(checkpoints_table).where(
+            checkpoints_table.c.thread_id == thread_id,
+            checkpoints_table.c.checkpoint_ns == checkpoint_ns
+        )
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            query = query.where(checkpoints_table.c.checkpoint_id == checkpoint_id)
+        else:
+            query = query.order_by(checkpoints_table.c.checkpoint_id.desc()).limit(1)
+        async with self._session_factory() as session:
+            row = (await session.execute(query)).first()
+            if row is None:
+                return None
+            return await self._load_tuple(session, row)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """
+        List checkpoints, latest first.
+
+        Args:
+            config: Config selecting the thread (and optionally namespace and checkpoint)
+            filter: Metadata values checkpoints must have
+            before: Only list checkpoints older than this one
+            limit: Maximum number of checkpoints
+
+        Yields:
+            Checkpoint tuples
+        """
+        await self.aflush()
+        query = select(checkpoints_table).order_by(
+            checkpoints_table.c.thread_id, checkpoints_table.c.checkpoint_id.desc()
+        )
+        if config:
+            query = query.where(checkpoints_table.c.thread_id == config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                query = query.where(checkpoints_table.c.checkpoint_ns == checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query = query.where(checkpoints_table.c.checkpoint_id == checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query = query.where(checkpoints_table.c.checkpoint_id < before_id)
+        if limit is not None and not filter:
+            query = query.limit(limit)
+
+        async with self._session_factory() as session:
+            rows = (await session.execute(query)).all()
+            for row in rows:
+                if limit is not None and limit <= 0:
+                    break
+                metadata = self._load(row.metadata_type, row.metadata)
+                if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                if limit is not None:
+                    limit -= 1
+                yield await self._load_tuple(session, row, metadata)
+
+    async def _load_tuple(
+        self,
+        session: AsyncSession,
+        row: Any,
+        metadata: Optional[CheckpointMetadata] = None
+    ) -> CheckpointTuple:
+        """Rebuild a checkpoint with its channel values and pending writes."""
+        checkpoint = self._load(row.checkpoint_type, row.checkpoint)
+        versions = checkpoint["channel_versions"]
+        channel_values = {}
+        if versions:
+            blobs = (await session.execute(
+                select(blobs_table).where(
+                    blobs_table.c.thread_id == row.thread_id,
+                    blobs_table.c.checkpoint_ns == row.checkpoint_ns,
+                    or_(*(
+                        and_(blobs_table.c.channel == channel, blobs_table.c.version == str(version))
+                        for channel, version in versions.items()
+                    ))
+                )
+            )).all()
+            for blob in blobs:
+                if blob.value_type != "empty":
+                    channel_values[blob.channel] = self._load(blob.value_type, blob.value)
+
+        writes = (await session.execute(
+            select(writes_table).where(
+                writes_table.c.thread_id == row.thread_id,
+                writes_table.c.checkpoint_ns == row.checkpoint_ns,
+                writes_table.c.checkpoint_id == row.checkpoint_id
+            ).order_by(writes_table.c.task_id, writes_table.c.idx)
+        )).all()
+
+        return CheckpointTuple(
+            config=_thread_config(row.thread_id, row.checkpoint_ns, row.checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=metadata if metadata is not None else self._load(row.metadata_type, row.metadata),
+            parent_config=(
+                _thread_config(row.thread_id, row.checkpoint_ns, row.parent_checkpoint_id)
+                if row.parent_checkpoint_id else None
+            ),
+            pending_writes=[
+                (write.task_id, write.channel, self._load(write.value_type, write.value)) for write in writes
+            ],
+        )
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        """
+        Next channel version: a zero-padded counter with a random suffix.
+
+        Args:
+            current: Current version
+            channel: Unused
+
+        Returns:
+            Version string that sorts after the current one
+        """
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffered rows and write counters."""
+        return {"backend": "database", "pending": self._pending(), **self.stats}
+
+    async def aclose(self) -> None:
+        """Write buffered checkpoints and stop the flush timer."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self.aflush()
+
+
+_checkpointer: Optional[BaseCheckpointSaver] = None
+
+
+def get_workflow_checkpointer() -> BaseCheckpointSaver:
+    """
+    Get the checkpointer shared by all workflow graphs.
+
+    Returns:
+        Database checkpointer, or an in-memory one when
+        ``workflow_checkpointer`` is 'memory' (state then survives only
+        within this process)
+    """
+    global _checkpointer
+    if _checkpointer is None:
+        if settings.workflow_checkpointer == "memory":
+            _checkpointer = MemorySaver()
+        else:
+            _checkpointer = DatabaseCheckpointSaver()
+        logger.info(f"Workflow checkpointer: {settings.workflow_checkpointer}")
+    return _checkpointer
+
+
+async def flush_workflow_checkpoints() -> None:
+    """Write buffered checkpoints so other workers see the latest state."""
+    if isinstance(_checkpointer, DatabaseCheckpointSaver):
+        await _checkpointer.aflush()
+
+
+async def close_workflow_checkpointer() -> None:
+    """
+    Write buffered checkpoints.
+
+    Should be called during application shutdown, before the database
+    engine is disposed.
+    """
+    global _checkpointer
+    if isinstance(_checkpointer, DatabaseCheckpointSaver):
+        try:
+            await _checkpointer.aclose()
+        except Exception as e:
+            logger.error(f"Failed to write buffered workflow checkpoints: {e}")
+    _checkpointer = None
@@ -0,0 +1,537 @@
+"""
+Background job queue for workflow execution.
+
+Starting or continuing a workflow runs LLM stages that take minutes, so the
+API submits a job and returns the session ID immediately. In-process
+asyncio workers run the jobs:
+
+- A worker leases a job for ``workflow_job_lease_seconds``. Handlers renew
+  the lease with ``heartbeat`` (or ``progress``) as they make progress; a
+  job whose lease expires is considered stuck, cancelled and retried.
+- A failed job is retried with exponential backoff until it has been
+  attempted ``workflow_job_max_attempts`` times.
+- Pending jobs are queued per tenant and tenants are served round-robin,
+  each with at most ``workflow_job_tenant_concurrency`` running jobs, so a
+  burst from one tenant does not hold up the others.
+- Jobs of one session run one at a time, in submission order.
+- ``cancel`` drops a session's queued jobs and cancels its running one.
+
+Job events are published to per-session subscribers, which the workflow
+WebSocket forwards to clients. Workflow state lives in the shared
+checkpointer, so a retried job can resume from the last checkpoint.
+
+Jobs, their events and cancellation live in the memory of one process.
+The API must therefore run as a single worker process; other processes
+only see a session through its checkpointed workflow state.
+"""
+
+import asyncio
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from loguru import logger
+
+from app.config import settings
+
+# Events buffered per subscriber before the oldest are dropped
+SUBSCRIBER_BUFFER = 100
+
+
+class JobStatus(str, Enum):
+    """Lifecycle state of a workflow job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+class LeaseExpiredError(Exception):
+    """A running job sent no heartbeat before its lease expired."""
+
+
+@dataclass
+class WorkflowJob:
+    """A workflow operation waiting for, or held by, a worker."""
+
+    kind: str
+    session_id: str
+    tenant: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: JobStatus = JobStatus.QUEUED
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # Event loop times
+    not_before: float = 0.0
+    lease_expires_at: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the job as a JSON-serializable dict (without its payload)."""
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "session_id": self.session_id,
+            "status": self.status.value,
+            "attempts": self.attempts,
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+JobHandler = Callable[[WorkflowJob, "WorkflowJobQueue"], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class WorkflowJobQueue:
+    """
+    Fair, leased job queue run by in-process asyncio workers.
+
+    Workers start on the first submitted job.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        tenant_concurrency: Optional[int] = None,
+        lease_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        retry_backoff_seconds: Optional[float] = None
+    ):
+        """
+        Initialize job queue.
+
+        Args:
+            workers: Jobs run concurrently (defaults to ``workflow_job_workers``)
+            tenant_concurrency: Running jobs per tenant
+                (defaults to ``workflow_job_tenant_concurrency``)
+            lease_seconds: Time a job may run without a heartbeat
+                (defaults to ``workflow_job_lease_seconds``)
+            max_attempts: Attempts before a job fails
+                (defaults to ``workflow_job_max_attempts``)
+            retry_backoff_seconds: Delay before the first retry, doubled for each
+                further one (defaults to ``workflow_job_retry_backoff_seconds``)
+        """
+        self.workers = workers or settings.workflow_job_workers
+        self.tenant_concurrency = tenant_concurrency or settings.workflow_job_tenant_concurrency
+        self.lease_seconds = lease_seconds or settings.workflow_job_lease_seconds
+        self.max_attempts = max_attempts or settings.workflow_job_max_attempts
+        self.retry_backoff_seconds = (
+            settings.workflow_job_retry_backoff_seconds if retry_backoff_seconds is None else retry_backoff_seconds
+        )
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: Dict[str, WorkflowJob] = {}
+        self._session_jobs: Dict[str, List[str]] = {}
+        # Pending jobs per tenant, and tenants with pending jobs in serving order
+        self._pending: Dict[str, Deque[WorkflowJob]] = {}
+        self._tenants: Deque[str] = deque()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._running_done: Dict[str, asyncio.Event] = {}
+        self._running_sessions: Set[str] = set()
+        self._tenant_running: Dict[str, int] = {}
+        self._cancel_reasons: Dict[str, str] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {
+            "submitted": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "retried": 0,
+            "leases_expired": 0,
+        }
+
+    def register_handler(self, kind: str, handler: JobHandler) -> None:
+        """
+        Register the coroutine running jobs of a kind.
+
+        Args:
+            kind: Job kind
+            handler: Coroutine called with the job and this queue; its return
+                value is stored as the job result
+        """
+        self._handlers[kind] = handler
+
+    # Submitting and cancelling
+
+    def submit(
+        self,
+        kind: str,
+        session_id: str,
+        tenant: str,
+        payload: Optional[Dict[str, Any]] = None
+    ) -> WorkflowJob:
+        """
+        Queue a job.
+
+        Args:
+            kind: Job kind (a registered handler)
+            session_id: Workflow session the job operates on
+            tenant: Tenant the job is scheduled fairly against
+            payload: Handler arguments
+
+        Returns:
+            Queued job
+
+        Raises:
+            ValueError: If no handler is registered for the kind
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for workflow job '{kind}'")
+        self._ensure_started()
+        job = WorkflowJob(kind=kind, session_id=session_id, tenant=tenant, payload=payload or {})
+        self._jobs[job.id] = job
+        self._session_jobs.setdefault(session_id, []).append(job.id)
+        self._enqueue(job)
+        self.stats["submitted"] += 1
+        self._forget_finished()
+        self.publish(job, "job_queued")
+        logger.info(f"Queued {kind} job {job.id} for session {session_id} (tenant {tenant})")
+        return job
+
+    async def cancel(self, session_id: str) -> int:
+        """
+        Cancel a session's queued and running jobs.
+
+        Args:
+            session_id: Workflow session
+
+        Returns:
+            Number of jobs cancelled
+        """
+        cancelled = 0
+        stopping = []
+        for job in self.get_session_jobs(session_id):
+            if job.status == JobStatus.QUEUED:
+                self._dequeue(job)
+                self._finish(job, JobStatus.CANCELLED)
+                cancelled += 1
+            elif job.status == JobStatus.RUNNING and job.id in self._running:
+                self._cancel_reasons[job.id] = "cancelled"
+                self._running[job.id].cancel()
+                stopping.append(self._running_done[job.id])
+                cancelled += 1
+        # Return once the workers have recorded the cancellations
+        for done in stopping:
+            await done.wait()
+        return cancelled
+
+    # Lookup
+
+    def get_job(self, job_id: str) -> Optional[WorkflowJob]:
+        """Get a job by ID."""
+        return self._jobs.get(job_id)
+
+    def get_session_jobs(self, session_id: str) -> List[WorkflowJob]:
+        """Get a session's jobs, oldest first."""
+        return [self._jobs[job_id] for job_id in self._session_jobs.get(session_id, []) if job_id in self._jobs]
+
+    def get_active_job(self, session_id: str) -> Optional[WorkflowJob]:
+        """Get a session's oldest unfinished job."""
+        for job in self.get_session_jobs(session_id):
+            if job.status not in FINISHED_STATUSES:
+                return job
+        return None
+
+    # Progress reporting
+
+    def heartbeat(self, job: WorkflowJob) -> None:
+        """
+        Renew a running job's lease.
+
+        Args:
+            job: Running job
+        """
+        if job.status == JobStatus.RUNNING:
+            job.lease_expires_at = asyncio.get_running_loop().time() + self.lease_seconds
+
+    def progress(self, job: WorkflowJob, **data: Any) -> None:
+        """
+        Renew a job's lease and publish a progress event.
+
+        Args:
+            job: Running job
+            **data: Event fields (for example the workflow stage)
+        """
+        self.heartbeat(job)
+        self.publish(job, "job_progress", **data)
+
+    def subscribe(self, session_id: str) -> asyncio.Queue:
+        """
+        Receive a session's job events.
+
+        Args:
+            session_id: Workflow session
+
+        Returns:
+            Queue of event dicts; slow subscribers lose the oldest events
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        self._subscribers.setdefault(session_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, session_id: str, queue: asyncio.Queue) -> None:
+        """Stop receiving a session's job events."""
+        subscribers = self._subscribers.get(session_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[session_id]
+
+    def publish(self, job: WorkflowJob, event: str, **data: Any) -> None:
+        """
+        Send a job event to the session's subscribers.
+
+        Args:
+            job: Job the event is about
+            event: Event name
+            **data: Extra event fields
+        """
+        message = {"event": event, "job": job.to_dict(), "timestamp": datetime.utcnow().isoformat(), **data}
+        for queue in self._subscribers.get(job.session_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    # Scheduling
+
+    def _enqueue(self, job: WorkflowJob, front: bool = False) -> None:
+        pending = self._pending.get(job.tenant)
+        if pending is None:
+            pending = self._pending[job.tenant] = deque()
+            self._tenants.append(job.tenant)
+        if front:
+            pending.appendleft(job)
+        else:
+            pending.append(job)
+        self._wakeup.set()
+
+    def _dequeue(self, job: WorkflowJob) -> None:
+        pending = self._pending.get(job.tenant)
+        if pending is None or job not in pending:
+            return
+        pending.remove(job)
+        if not pending:
+            del self._pending[job.tenant]
+            self._tenants.remove(job.tenant)
+
+    def _lease_next(self) -> Optional[WorkflowJob]:
+        """Take the next runnable job, visiting tenants round-robin."""
+        now = asyncio.get_running_loop().time()
+        for _ in range(len(self._tenants)):
+            tenant = self._tenants[0]
+            self._tenants.rotate(-1)
+            if self._tenant_running.get(tenant, 0) >= self.tenant_concurrency:
+                continue
+            # A session's jobs run in order, so a job waits behind the session's
+            # running job and behind its earlier jobs still backing off
+            blocked = set(self._running_sessions)
+            for job in self._pending[tenant]:
+                if job.session_id in blocked:
+                    continue
+                if job.not_before <= now:
+                    self._dequeue(job)
+                    return job
+                blocked.add(job.session_id)
+        return None
+
+    def _next_ready_delay(self) -> Optional[float]:
+        """Seconds until the earliest backing-off job may run, or None."""
+        now = asyncio.get_running_loop().time()
+        delays = [
+            job.not_before - now
+            for pending in self._pending.values()
+            for job in pending
+            if job.not_before > now
+        ]
+        return max(min(delays), 0.0) if delays else None
+
+    # Workers
+
+    def _ensure_started(self) -> None:
+        self._tasks = [task for task in self._tasks if not task.done()]
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(loop.create_task(self._monitor_leases()))
+        logger.info(f"Started {self.workers} workflow job workers")
+
+    async def _worker(self) -> None:
+        while True:
+            job = self._lease_next()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._next_ready_delay())
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: WorkflowJob) -> None:
+        loop = asyncio.get_running_loop()
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.started_at = datetime.utcnow()
+        job.lease_expires_at = loop.time() + self.lease_seconds
+        self._running_sessions.add(job.session_id)
+        self._tenant_running[job.tenant] = self._tenant_running.get(job.tenant, 0) + 1
+        self.publish(job, "job_started")
+
+        task = loop.create_task(self._handlers[job.kind](job, self))
+        self._running[job.id] = task
+        self._running_done[job.id] = asyncio.Event()
+        try:
+            job.result = await task
+            self._finish(job, JobStatus.SUCCEEDED)
+        except asyncio.CancelledError:
+            reason = self._cancel_reasons.pop(job.id, None)
+            if reason == "cancelled":
+                self._finish(job, JobStatus.CANCELLED)
+            elif reason == "lease_expired":
+                self._retry_or_fail(job, LeaseExpiredError(
+                    f"No heartbeat within {self.lease_seconds:g}s lease"
+                ))
+            else:
+                # The worker itself is stopping
+                task.cancel()
+                self._finish(job, JobStatus.CANCELLED, "Job queue stopped")
+                raise
+        except Exception as e:
+            self._retry_or_fail(job, e)
+        finally:
+            del self._running[job.id]
+            self._running_done.pop(job.id).set()
+            self._running_sessions.discard(job.session_id)
+            self._tenant_running[job.tenant] -= 1
+            if not self._tenant_running[job.tenant]:
+                del self._tenant_running[job.tenant]
+            self._wakeup.set()
+
+    def _retry_or_fail(self, job: WorkflowJob, error: BaseException) -> None:
+        job.error = str(error) or type(error).__name__
+        if job.attempts >= self.max_attempts:
+            logger.error(f"Workflow job {job.id} failed after {job.attempts} attempts: {job.error}")
+            self._finish(job, JobStatus.FAILED, job.error)
+            return
+        delay = self.retry_backoff_seconds * 2 ** (job.attempts - 1)
+        logger.warning(f"Workflow job {job.id} attempt {job.attempts} failed, retrying in {delay:g}s: {job.error}")
+        job.status = JobStatus.QUEUED
+        job.not_before = asyncio.get_running_loop().time() + delay
+        # Ahead of the session's later jobs
+        self._enqueue(job, front=True)
+        self.stats["retried"] += 1
+        self.publish(job, "job_retrying", retry_in_seconds=delay)
+
+    def _finish(self, job: WorkflowJob, status: JobStatus, error: Optional[str] = None) -> None:
+        job.status = status
+        job.finished_at = datetime.utcnow()
+        if error is not None:
+            job.error = error
+        self.stats[status.value] += 1
+        self.publish(job, f"job_{status.value}")
+        logger.info(f"Workflow job {job.id} ({job.kind}) {status.value}")
+
+    async def _monitor_leases(self) -> None:
+        interval = min(self.lease_seconds / 4, 5.0)
+        while True:
+            await asyncio.sleep(interval)
+            now = asyncio.get_running_loop().time()
+            for job_id, task in list(self._running.items()):
+                job = self._jobs[job_id]
+                if now > job.lease_expires_at and job_id not in self._cancel_reasons:
+                    logger.warning(f"Lease of workflow job {job_id} expired, cancelling it for retry")
+                    self.stats["leases_expired"] += 1
+                    self._cancel_reasons[job_id] = "lease_expired"
+                    task.cancel()
+
+    def _forget_finished(self) -> None:
+        """Drop finished jobs older than ``workflow_job_retention_seconds``."""
+        now = datetime.utcnow()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at and (now - job.finished_at).total_seconds() > settings.workflow_job_retention_seconds:
+                del self._jobs[job_id]
+                session_jobs = self._session_jobs.get(job.session_id, [])
+                if job_id in session_jobs:
+                    session_jobs.remove(job_id)
+                if not session_jobs:
+                    self._session_jobs.pop(job.session_id, None)
+
+    async def stop(self) -> None:
+        """Cancel running jobs and stop the workers."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and job counters."""
+        return {
+            "workers": len([task for task in self._tasks if not task.done()]),
+            "queued": sum(len(pending) for pending in self._pending.values()),
+            "running": len(self._running),
+            "tenants_waiting": len(self._tenants),
+            **self.stats,
+        }
+
+
+_job_queue: Optional[WorkflowJobQueue] = None
+
+
+def get_workflow_job_queue() -> WorkflowJobQueue:
+    """
+    Get the job queue shared by the workflow API.
+
+    Returns:
+        Shared job queue
+    """
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = WorkflowJobQueue()
+    return _job_queue
+
+
+async def cancel_workflow_jobs(session_id: str) -> int:
+    """
+    Cancel a session's queued and running jobs.
+
+    Args:
+        session_id: Workflow session
+
+    Returns:
+        Number of jobs cancelled
+    """
+    if _job_queue is None:
+        return 0
+    return await _job_queue.cancel(session_id)
+
+
+async def close_workflow_job_queue() -> None:
+    """
+    Stop the workers.
+
+    Should be called during application shutdown. Running jobs are
+    cancelled; their sessions keep the state of their last checkpoint.
+    """
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.stop()
+    _job_queue = None
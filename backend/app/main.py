@@ -17,7 +17,16 @@ from fastapi.openapi.utils import get_openapi
 
 from app.config import settings
 from app.core.database import init_db, close_db
+from app.core.workflow_checkpointer import close_workflow_checkpointer
+from app.core.workflow_jobs import close_workflow_job_queue
 from app.core.redis_client import init_redis, close_redis
+from app.core.http_clients import close_http_clients
+from app.core.model_registry import init_models
+from app.core.ollama_residency import init_ollama_models
+from app.modules.admin.llm_logger import close_interaction_log
+from app.services.embedding_service import close_embedding_services
+from app.services.enhanced_knowledge_base_service import close_enhanced_knowledge_base_service
+from app.services.local_knowledge_base_service import close_local_knowledge_base_service
 from app.core.logging_config import get_logger
 from app.api.v1 import health, projects, workflows, brownfield, auth
 from app.api.v1 import ai_chat, refinement, diagrams, workflow_diagrams, architecture
@@ -52,6 +61,12 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         await init_redis()
         logger.info("Redis initialized successfully")
         
+        # Warm up models (loaded lazily on first use unless enabled)
+        await init_models()
+        
+        # Load local LLMs in the background and keep them resident
+        await init_ollama_models()
+        
         logger.info("Application startup completed")
         
     except Exception as e:
@@ -64,6 +79,29 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logger.info("Shutting down ArchMesh PoC application...")
     
     try:
+        # Stop workflow job workers first so no job uses the shared resources
+        # closed below (running jobs keep their last checkpoint)
+        await close_workflow_job_queue()
+        logger.info("Workflow job workers stopped")
+        
+        # Write buffered workflow checkpoints
+        await close_workflow_checkpointer()
+        logger.info("Workflow checkpoints written")
+        
+        # Persist and release shared knowledge base services
+        await close_local_knowledge_base_service()
+        await close_enhanced_knowledge_base_service()
+        close_embedding_services()
+        logger.info("Knowledge base services closed")
+        
+        # Close pooled LLM provider connections
+        await close_http_clients()
+        logger.info("LLM HTTP clients closed")
+        
+        # Write buffered LLM interactions
+        close_interaction_log()
+        logger.info("LLM interaction log closed")
+        
         # Close Redis connections
         await close_redis()
         logger.info("Redis connections closed")
@@ -11,6 +11,7 @@ from .requirement import Requirement, RequirementStatus
 from .architecture import Architecture, ArchitectureStatus
 from .workflow_session import WorkflowSession, WorkflowStageEnum
 from .agent_execution import AgentExecution, AgentExecutionStatus
+from .workflow_checkpoint import WorkflowCheckpoint, WorkflowCheckpointBlob, WorkflowCheckpointWrite
 
 __all__ = [
     # Project models
@@ -33,4 +34,9 @@ __all__ = [
     # Agent execution models
     "AgentExecution",
     "AgentExecutionStatus",
+    
+    # Workflow checkpoint models
+    "WorkflowCheckpoint",
+    "WorkflowCheckpointBlob",
+    "WorkflowCheckpointWrite",
 ]
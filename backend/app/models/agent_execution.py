@@ -117,6 +117,24 @@ class AgentExecution(Base):
         comment="Execution duration in seconds"
     )
     
+    queue_seconds: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+        comment="Time LLM calls waited for a scheduler slot in seconds"
+    )
+    
+    time_to_first_token_seconds: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+        comment="Time until LLM calls produced their first token in seconds"
+    )
+    
+    generation_seconds: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+        comment="Time LLM calls spent generating completions in seconds"
+    )
+    
     # Status and error information
     status: Mapped[AgentExecutionStatus] = mapped_column(
         Enum(AgentExecutionStatus),
@@ -212,6 +230,13 @@ class AgentExecution(Base):
             return None
         return self.total_tokens / self.duration_seconds
     
+    @property
+    def generation_tokens_per_second(self) -> Optional[float]:
+        """Get completion tokens generated per second of generation time."""
+        if self.completion_tokens is None or not self.generation_seconds:
+            return None
+        return self.completion_tokens / self.generation_seconds
+    
     def complete(self, status: AgentExecutionStatus, output_data: Optional[Dict[str, Any]] = None, error_message: Optional[str] = None) -> None:
         """Mark the execution as completed."""
         self.status = status
@@ -0,0 +1,211 @@
+"""
+Workflow checkpoint models for ArchMesh PoC.
+
+This module defines the tables behind the database LangGraph checkpointer.
+A checkpoint row holds the checkpoint without its channel values; each
+channel value is stored once per version in the blob table, so a
+checkpoint only adds the channels its step changed. Pending writes of
+tasks are stored per checkpoint.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Index, Integer, LargeBinary, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class WorkflowCheckpoint(Base):
+    """
+    WorkflowCheckpoint model representing one LangGraph checkpoint.
+
+    Checkpoint ids increase monotonically within a thread, so the latest
+    checkpoint of a thread is the one with the greatest id.
+    """
+
+    __tablename__ = "workflow_checkpoints"
+
+    thread_id: Mapped[str] = mapped_column(
+        String(255),
+        primary_key=True,
+        comment="Workflow thread (session) identifier"
+    )
+
+    checkpoint_ns: Mapped[str] = mapped_column(
+        String(255),
+        primary_key=True,
+        default="",
+        comment="Checkpoint namespace (empty for the root graph)"
+    )
+
+    checkpoint_id: Mapped[str] = mapped_column(
+        String(64),
+        primary_key=True,
+        comment="Monotonically increasing checkpoint identifier"
+    )
+
+    parent_checkpoint_id: Mapped[Optional[str]] = mapped_column(
+        String(64),
+        nullable=True,
+        comment="Checkpoint this one was created from"
+    )
+
+    checkpoint_type: Mapped[str] = mapped_column(
+        String(50),
+        nullable=False,
+        comment="Serialization type of the checkpoint"
+    )
+
+    checkpoint: Mapped[bytes] = mapped_column(
+        LargeBinary,
+        nullable=False,
+        comment="Serialized checkpoint without channel values"
+    )
+
+    metadata_type: Mapped[str] = mapped_column(
+        String(50),
+        nullable=False,
+        comment="Serialization type of the metadata"
+    )
+
+    checkpoint_metadata: Mapped[bytes] = mapped_column(
+        "metadata",
+        LargeBinary,
+        nullable=False,
+        comment="Serialized checkpoint metadata"
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="When the checkpoint was stored"
+    )
+
+    __table_args__ = (
+        Index("idx_workflow_checkpoints_created_at", "created_at"),
+    )
+
+    def __repr__(self) -> str:
+        """String representation of the checkpoint."""
+        return f"<WorkflowCheckpoint(thread_id={self.thread_id}, checkpoint_id={self.checkpoint_id})>"
+
+
+class WorkflowCheckpointBlob(Base):
+    """
+    WorkflowCheckpointBlob model representing one version of a channel value.
+    """
+
+    __tablename__ = "workflow_checkpoint_blobs"
+
+    thread_id: Mapped[str] = mapped_column(
+        String(255),
+        primary_key=True,
+        comment="Workflow thread (session) identifier"
+    )
+
+    checkpoint_ns: Mapped[str] = mapped_column(
+        String(255),
+        primary_key=True,
+        default="",
+        comment="Checkpoint namespace (empty for the root graph)"
+    )
+
+    channel: Mapped[str] = mapped_column(
+        String(255),
+        primary_key=True,
+        comment="State channel name"
+    )
+
+    version: Mapped[str] = mapped_column(
+        String(64),
+        primary_key=True,
+        comment="Channel version"
+    )
+
+    value_type: Mapped[str] = mapped_column(
+        String(50),
+        nullable=False,
+        comment="Serialization type of the value ('empty' for a cleared channel)"
+    )
+
+    value: Mapped[Optional[bytes]] = mapped_column(
+        LargeBinary,
+        nullable=True,
+        comment="Serialized channel value"
+    )
+
+    def __repr__(self) -> str:
+        """String representation of the blob."""
+        return f"<WorkflowCheckpointBlob(thread_id={self.thread_id}, channel={self.channel}, version={self.version})>"
+
+
+class WorkflowCheckpointWrite(Base):
+    """
+    WorkflowCheckpointWrite model representing a pending write of a task.
+    """
+
+    __tablename__ = "workflow_checkpoint_writes"
+
+    thread_id: Mapped[str] = mapped_column(
+        String(255),
+        primary_key=True,
+        comment="Workflow thread (session) identifier"
+    )
+
+    checkpoint_ns: Mapped[str] = mapped_column(
+        String(255),
+        primary_key=True,
+        default="",
+        comment="Checkpoint namespace (empty for the root graph)"
+    )
+
+    checkpoint_id: Mapped[str] = mapped_column(
+        String(64),
+        primary_key=True,
+        comment="Checkpoint the write belongs to"
+    )
+
+    task_id: Mapped[str] = mapped_column(
+        String(255),
+        primary_key=True,
+        comment="Task that produced the write"
+    )
+
+    idx: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        comment="Index of the write within the task (negative for special writes)"
+    )
+
+    channel: Mapped[str] = mapped_column(
+        String(255),
+        nullable=False,
+        comment="Channel written to"
+    )
+
+    value_type: Mapped[str] = mapped_column(
+        String(50),
+        nullable=False,
+        comment="Serialization type of the value"
+    )
+
+    value: Mapped[Optional[bytes]] = mapped_column(
+        LargeBinary,
+        nullable=True,
+        comment="Serialized written value"
+    )
+
+    task_path: Mapped[str] = mapped_column(
+        Text,
+        nullable=False,
+        default="",
+        comment="Path of the task that produced the write"
+    )
+
+    def __repr__(self) -> str:
+        """String representation of the write."""
+        return f"<WorkflowCheckpointWrite(thread_id={self.thread_id}, task_id={self.task_id}, idx={self.idx})>"
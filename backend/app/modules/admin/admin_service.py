@@ -103,10 +103,13 @@ class AdminService:
     
     # Analytics Methods
     def track_request(self, user_id: str, model_id: str, prompt_tokens: int, 
-                     completion_tokens: int, cost: float, response_time: float):
+                     completion_tokens: int, cost: float, response_time: float,
+                     latency: Optional[Dict[str, Optional[float]]] = None,
+                     tokens_estimated: bool = False):
         """Track a request"""
         self.analytics_collector.track_request(
-            user_id, model_id, prompt_tokens, completion_tokens, cost, response_time
+            user_id, model_id, prompt_tokens, completion_tokens, cost, response_time,
+            latency=latency, tokens_estimated=tokens_estimated
         )
     
     def track_error(self, user_id: str, model_id: str, error_type: str, error_message: str):
@@ -133,6 +136,14 @@ class AdminService:
         """Get performance metrics"""
         return self.analytics_collector.get_performance_metrics(days)
     
+    def get_cache_metrics(self) -> Dict[str, Any]:
+        """Get LLM response cache metrics"""
+        return self.analytics_collector.get_cache_metrics()
+    
+    def get_hedging_metrics(self) -> Dict[str, Any]:
+        """Get hedged request metrics"""
+        return self.analytics_collector.get_hedging_metrics()
+    
     # Dashboard Methods
     def get_admin_dashboard(self) -> Dict[str, Any]:
         """Get admin dashboard data"""
@@ -141,6 +152,8 @@ class AdminService:
             "usage_stats": self.get_usage_stats(7).dict(),  # Last 7 days
             "cost_analysis": self.get_cost_analysis(7),
             "performance_metrics": self.get_performance_metrics(7),
+            "cache_metrics": self.get_cache_metrics(),
+            "hedging_metrics": self.get_hedging_metrics(),
             "model_statistics": self.model_manager.get_model_statistics(),
             "user_statistics": self.user_manager.get_user_statistics(),
             "top_models": self._get_top_models(),
@@ -8,6 +8,10 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 from loguru import logger
 
+from app.core.hedging import get_hedging_stats
+from app.core.llm_cache import get_llm_cache_stats
+from app.core.single_flight import get_single_flight_stats
+
 from .models import AnalyticsMetric, MetricType, SystemHealth, UsageStats
 
 
@@ -32,8 +36,18 @@ class AnalyticsCollector:
         self.response_times = []
     
     def track_request(self, user_id: str, model_id: str, prompt_tokens: int, 
-                     completion_tokens: int, cost: float, response_time: float):
-        """Track a successful request"""
+                     completion_tokens: int, cost: float, response_time: float,
+                     latency: Optional[Dict[str, Optional[float]]] = None,
+                     tokens_estimated: bool = False):
+        """Track a successful request
+        
+        ``latency`` optionally breaks the response time down into
+        queue_seconds, time_to_first_token_seconds and generation_seconds;
+        ``tokens_estimated`` marks counts that are local estimates rather
+        than provider-reported usage.
+        """
+        latency = latency or {}
+        generation_seconds = latency.get("generation_seconds")
         # Track usage metrics
         self.metrics.append(AnalyticsMetric(
             id=f"usage_{int(time.time())}_{user_id}",
@@ -45,7 +59,9 @@ class AnalyticsCollector:
                 "prompt_tokens": prompt_tokens,
                 "completion_tokens": completion_tokens,
                 "total_tokens": prompt_tokens + completion_tokens,
-                "response_time": response_time
+                "tokens_estimated": tokens_estimated,
+                "response_time": response_time,
+                **latency
             }
         ))
         
@@ -69,7 +85,9 @@ class AnalyticsCollector:
             value=response_time,
             metadata={
                 "model_id": model_id,
-                "tokens_per_second": (prompt_tokens + completion_tokens) / response_time if response_time > 0 else 0
+                "tokens_per_second": (prompt_tokens + completion_tokens) / response_time if response_time > 0 else 0,
+                "generation_tokens_per_second": completion_tokens / generation_seconds if generation_seconds else None,
+                **latency
             }
         ))
         
@@ -274,6 +292,17 @@ class AnalyticsCollector:
             "performance_by_model": self._get_performance_by_model(recent_metrics)
         }
     
+    def get_cache_metrics(self) -> Dict[str, Any]:
+        """Get LLM response cache and request coalescing counters"""
+        return {
+            **get_llm_cache_stats(),
+            "single_flight": get_single_flight_stats(),
+        }
+    
+    def get_hedging_metrics(self) -> Dict[str, Any]:
+        """Get hedged request outcomes per stage and observed model latencies"""
+        return get_hedging_stats()
+    
     def _get_performance_by_model(self, metrics: List[AnalyticsMetric]) -> Dict[str, Dict[str, float]]:
         """Get performance metrics grouped by model"""
         model_performance = defaultdict(list)
@@ -1,25 +1,445 @@
+"""
+LLM interaction log.
+
+Every LLM call is appended to a JSON Lines log for the admin console.
+``log_interaction`` only enqueues the entry; a background writer thread
+drains a bounded queue in batches, appends them and fsyncs once per batch,
+so the event loop never waits on disk. The active file is rotated by size
+or age into gzip-compressed segments, and only the newest segments are
+kept.
+
+Each segment has a sidecar index with one small record per entry
+(timestamp, stage, provider, model, byte offset and length). Admin queries
+scan the indexes backwards, newest segment first, and read just the newest
+matching entries instead of parsing and sorting the whole log.
+"""
+
+import gzip
 import json
 import os
+import queue
+import shutil
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
 
 LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "..", "..", "logs")
 LOG_DIR = os.path.abspath(LOG_DIR)
-LOG_PATH = os.path.join(LOG_DIR, "llm_interactions.jsonl")
+LOG_NAME = "llm_interactions"
+LOG_PATH = os.path.join(LOG_DIR, f"{LOG_NAME}.jsonl")
+
+# Index fields used to filter entries without reading them
+INDEX_FIELDS = ("stage", "provider", "model")
+
+_READ_BLOCK_SIZE = 64 * 1024
+
+
+def _index_path(log_path: str) -> str:
+    base = log_path[:-3] if log_path.endswith(".gz") else log_path
+    return base[:-len(".jsonl")] + ".idx"
+
+
+def _iter_lines_reversed(path: str) -> Iterator[bytes]:
+    """Yield the lines of a file from last to first, reading from the end."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0:
+            size = min(_READ_BLOCK_SIZE, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + remainder).split(b"\n")
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if remainder:
+            yield remainder
+
+
+class InteractionLog:
+    """
+    Buffered, rotated and indexed JSON Lines log.
+    """
+
+    def __init__(
+        self,
+        directory: str = LOG_DIR,
+        name: str = LOG_NAME,
+        queue_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_bytes: int = 50 * 1024 * 1024,
+        max_age_seconds: float = 24 * 3600,
+        backups: int = 10
+    ):
+        """
+        Initialize log; the writer thread starts on the first entry.
+
+        Args:
+            directory: Log directory
+            name: Base name of the log files
+            queue_size: Entries buffered before new entries are dropped
+            batch_size: Maximum entries written (and fsynced) at once
+            flush_interval: Longest time an entry waits in the buffer
+            max_bytes: Size at which the active file is rotated
+            max_age_seconds: Age at which the active file is rotated
+            backups: Compressed rotated files kept
+        """
+        self.directory = directory
+        self.name = name
+        self.path = os.path.join(directory, f"{name}.jsonl")
+        self.index_path = _index_path(self.path)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.backups = backups
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._segment_started: Optional[float] = None
+        self.stats = {"written": 0, "dropped": 0, "batches": 0, "rotations": 0, "errors": 0}
+
+    def log(self, entry: Dict[str, Any]) -> None:
+        """
+        Enqueue an entry without blocking.
+
+        Entries are dropped (and counted) while the buffer is full.
+
+        Args:
+            entry: Interaction data; a UTC ``timestamp`` is added
+        """
+        entry_with_ts = {
+            **entry,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(entry_with_ts)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            if self.stats["dropped"] % 1000 == 1:
+                logger.warning(f"LLM interaction log buffer full, {self.stats['dropped']} entries dropped")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until entries enqueued so far are written.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            True if the entries were written within the timeout
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Write buffered entries and stop the writer thread.
+
+        Args:
+            timeout: Seconds to wait for the writer
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopping = True
+        self.flush(timeout)
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+        self._thread = None
+        self._stopping = False
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._reconcile_index()
+            self._thread = threading.Thread(target=self._run, name="llm-interaction-log", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch, waiters = [], []
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while True:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size or self._stopping:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    with self._lock:
+                        self._write_batch(batch)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logger.error(f"Failed to write {len(batch)} LLM interactions: {e}")
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Append entries and their index records; one fsync per file."""
+        self._rotate_if_needed()
+        with open(self.path, "ab") as log_file, open(self.index_path, "ab") as index_file:
+            offset = log_file.tell()
+            lines, records = [], []
+            for entry in batch:
+                line = (json.dumps(entry, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+                lines.append(line)
+                records.append(self._index_record(entry, offset, len(line)))
+                offset += len(line)
+            log_file.write(b"".join(lines))
+            log_file.flush()
+            os.fsync(log_file.fileno())
+            # The index is written after the log, so it never points past it
+            index_file.write(b"".join(records))
+            index_file.flush()
+            os.fsync(index_file.fileno())
+        if self._segment_started is None:
+            self._segment_started = time.time()
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+
+    @staticmethod
+    def _index_record(entry: Dict[str, Any], offset: int, length: int) -> bytes:
+        record = {"timestamp": entry.get("timestamp")}
+        record.update({field: entry.get(field) for field in INDEX_FIELDS})
+        record.update(offset=offset, length=length)
+        return (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+    def _reconcile_index(self) -> None:
+        """Index entries missing from the active file's index (older logs, crashes)."""
+        if not os.path.exists(self.path):
+            return
+        size = os.path.getsize(self.path)
+        indexed_to = 0
+        if os.path.exists(self.index_path):
+            for line in _iter_lines_reversed(self.index_path):
+                try:
+                    record = json.loads(line)
+                    indexed_to = record["offset"] + record["length"]
+                    break
+                except (ValueError, KeyError):
+                    continue
+        if indexed_to >= size:
+            self._segment_started = self._first_timestamp()
+            return
+
+        added = 0
+        with open(self.path, "rb") as log_file, open(self.index_path, "ab") as index_file:
+            log_file.seek(indexed_to)
+            offset = indexed_to
+            for line in log_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = None
+                if isinstance(entry, dict) and line.endswith(b"\n"):
+                    index_file.write(self._index_record(entry, offset, len(line)))
+                    added += 1
+                offset += len(line)
+        self._segment_started = self._first_timestamp()
+        logger.info(f"Indexed {added} LLM interactions in {self.path}")
 
+    def _first_timestamp(self) -> Optional[float]:
+        """Time of the active file's first entry, from its index."""
+        try:
+            with open(self.index_path, "rb") as f:
+                return datetime.fromisoformat(json.loads(f.readline())["timestamp"]).timestamp()
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
 
-def _ensure_log_dir() -> None:
-    os.makedirs(LOG_DIR, exist_ok=True)
+    def _rotate_if_needed(self) -> None:
+        if not os.path.exists(self.path):
+            self._segment_started = None
+            return
+        too_big = os.path.getsize(self.path) >= self.max_bytes
+        too_old = (
+            self._segment_started is not None
+            and time.time() - self._segment_started >= self.max_age_seconds
+        )
+        if too_big or too_old:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        """Compress the active file into a segment and start a new one."""
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        segment = os.path.join(self.directory, f"{self.name}.{stamp}.jsonl.gz")
+        with open(self.path, "rb") as source, gzip.open(segment, "wb") as target:
+            shutil.copyfileobj(source, target)
+        if os.path.exists(self.index_path):
+            os.replace(self.index_path, _index_path(segment))
+        os.remove(self.path)
+        self._segment_started = None
+        self.stats["rotations"] += 1
+
+        for old in self._segments()[self.backups:]:
+            for path in (old, _index_path(old)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _segments(self) -> List[str]:
+        """Rotated segments, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        prefix, suffix = f"{self.name}.", ".jsonl.gz"
+        names = sorted(
+            (name for name in os.listdir(self.directory) if name.startswith(prefix) and name.endswith(suffix)),
+            reverse=True
+        )
+        return [os.path.join(self.directory, name) for name in names]
+
+    def read(
+        self,
+        *,
+        stage: Optional[str] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        limit: int = 200,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the newest matching entries.
+
+        Args:
+            stage: Only entries of this stage
+            provider: Only entries of this provider
+            model: Only entries of this model
+            limit: Maximum entries (1 to 1000)
+
+        Returns:
+            Entries, newest first
+        """
+        limit = max(1, min(limit, 1000))
+        filters = {field: value for field, value in (("stage", stage), ("provider", provider), ("model", model)) if value}
+        self.flush()
+
+        results: List[Dict[str, Any]] = []
+        with self._lock:
+            if os.path.exists(self.path) and not os.path.exists(self.index_path):
+                self._reconcile_index()
+            for path in [self.path, *self._segments()]:
+                if len(results) >= limit or not os.path.exists(path):
+                    continue
+                targets = self._matching_offsets(_index_path(path), filters, limit - len(results))
+                results.extend(self._read_entries(path, targets))
+        return results
+
+    @staticmethod
+    def _matching_offsets(index_path: str, filters: Dict[str, str], limit: int) -> List[Tuple[int, int]]:
+        """Offsets of the newest matching entries of a segment, newest first."""
+        if not os.path.exists(index_path):
+            return []
+        targets = []
+        for line in _iter_lines_reversed(index_path):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if any(record.get(field) != value for field, value in filters.items()):
+                continue
+            targets.append((record["offset"], record["length"]))
+            if len(targets) >= limit:
+                break
+        return targets
+
+    @staticmethod
+    def _read_entries(path: str, targets: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """Read entries at the given offsets, keeping their order."""
+        opener = gzip.open if path.endswith(".gz") else open
+        entries: Dict[int, Dict[str, Any]] = {}
+        with opener(path, "rb") as f:
+            # Ascending offsets so compressed segments are read in one pass
+            for offset, length in sorted(targets):
+                f.seek(offset)
+                try:
+                    entries[offset] = json.loads(f.read(length))
+                except ValueError:
+                    continue
+        return [entries[offset] for offset, _ in targets if offset in entries]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get writer statistics.
+
+        Returns:
+            Dict with written, dropped, batch, rotation and error counts and
+            the number of buffered entries
+        """
+        return {**self.stats, "queued": self._queue.qsize()}
+
+
+_interaction_log: Optional[InteractionLog] = None
+
+
+def get_interaction_log() -> InteractionLog:
+    """
+    Get the shared interaction log.
+
+    Returns:
+        Log configured from settings
+    """
+    global _interaction_log
+    if _interaction_log is None:
+        _interaction_log = InteractionLog(
+            directory=settings.llm_interaction_log_dir or LOG_DIR,
+            queue_size=settings.llm_interaction_log_queue_size,
+            batch_size=settings.llm_interaction_log_batch_size,
+            flush_interval=settings.llm_interaction_log_flush_seconds,
+            max_bytes=settings.llm_interaction_log_max_bytes,
+            max_age_seconds=settings.llm_interaction_log_max_age_hours * 3600,
+            backups=settings.llm_interaction_log_backups,
+        )
+    return _interaction_log
+
+
+def close_interaction_log() -> None:
+    """Write buffered interactions and stop the shared log's writer."""
+    if _interaction_log is not None:
+        _interaction_log.close()
 
 
 def log_interaction(entry: Dict[str, Any]) -> None:
-    _ensure_log_dir()
-    entry_with_ts = {
-        **entry,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-    }
-    with open(LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry_with_ts, ensure_ascii=False) + "\n")
+    get_interaction_log().log(entry)
 
 
 def read_interactions(
@@ -29,25 +449,4 @@ def read_interactions(
     model: Optional[str] = None,
     limit: int = 200,
 ) -> Iterable[Dict[str, Any]]:
-    if not os.path.exists(LOG_PATH):
-        return []
-
-    results = []
-    with open(LOG_PATH, "r", encoding="utf-8") as f:
-        for line in f:
-            try:
-                data = json.loads(line)
-            except Exception:
-                continue
-            if stage and data.get("stage") != stage:
-                continue
-            if provider and data.get("provider") != provider:
-                continue
-            if model and data.get("model") != model:
-                continue
-            results.append(data)
-    # newest first
-    results.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-    return results[: max(1, min(limit, 1000))]
-
-
+    return get_interaction_log().read(stage=stage, provider=provider, model=model, limit=limit)
@@ -7,6 +7,8 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 from loguru import logger
 
+from app.core.circuit_breaker import circuit_breakers
+
 from .models import ModelConfig, ModelProvider, ModelStatus
 
 
@@ -129,7 +131,11 @@ class ModelManager:
         Returns:
             Optimal model configuration
         """
-        available_models = self.get_available_models()
+        # Skip models whose provider or model circuit breaker is open
+        available_models = [
+            model for model in self.get_available_models()
+            if circuit_breakers.is_available(model.provider.value, model.model_name)
+        ]
         
         if not available_models:
             logger.warning("No available models found")
@@ -2,10 +2,11 @@
 LLM Response Parser - Provider-specific response handling
 """
 import re
-import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
 
+from app.core.json_extraction import find_json
+
 logger = logging.getLogger(__name__)
 
 
@@ -51,107 +52,113 @@ class LLMResponseParser:
         
         return response_text
     
+    @staticmethod
+    def parse_openai_stream_chunk(chunk_data: Dict[str, Any]) -> str:
+        """Parse the text delta of an OpenAI-compatible streaming chunk"""
+        choices = chunk_data.get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content") or ""
+    
+    @staticmethod
+    def parse_anthropic_stream_event(event_data: Dict[str, Any]) -> str:
+        """Parse the text delta of an Anthropic streaming event"""
+        if event_data.get("type") != "content_block_delta":
+            return ""
+        return (event_data.get("delta") or {}).get("text") or ""
+    
+    @staticmethod
+    def parse_ollama_stream_chunk(chunk_data: Dict[str, Any]) -> str:
+        """Parse the text delta of an Ollama streaming chunk (chat or generate API)"""
+        if "message" in chunk_data:
+            return (chunk_data["message"] or {}).get("content") or ""
+        return chunk_data.get("response") or ""
+    
     @staticmethod
     def extract_json(text: str) -> str:
         """
         Extract JSON from LLM response text.
-        Handles various formats: plain JSON, markdown code blocks, reasoning blocks
+        Handles various formats: plain JSON, markdown code blocks, reasoning blocks,
+        and repairs malformed or truncated JSON (see app.core.json_extraction)
         """
         if not text:
             return "{}"
         
-        # Remove markdown code blocks - handle both ```json and ``` formats
-        # First, remove the opening ```json or ``` at the start
-        if text.strip().startswith('```json'):
-            text = text.replace('```json', '', 1)
-        elif text.strip().startswith('```'):
-            text = text.replace('```', '', 1)
-        
-        # Remove any remaining backticks
-        text = re.sub(r'```', '', text)
-        
-        # Remove thinking/reasoning blocks
-        text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL)
-        text = re.sub(r'<reasoning>.*?</reasoning>', '', text, flags=re.DOTALL)
-        text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL)
-        
-        # Find the main JSON object boundaries
-        json_start = text.find('{')
-        json_end = text.rfind('}')
-        
-        if json_start != -1 and json_end != -1 and json_end > json_start:
-            # Extract the JSON object
-            json_text = text[json_start:json_end + 1]
-            
-            # Clean up any remaining non-JSON text
-            json_text = json_text.strip()
-            
-            # Fix common JSON issues in PlantUML code
-            # Replace unescaped newlines in string values with escaped newlines
-            json_text = re.sub(r'"([^"]*)\n([^"]*)"', r'"\1\\n\2"', json_text)
-            
-            # Replace other control characters that might break JSON
-            json_text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', json_text)
-            
-            return json_text
-        else:
-            # If no JSON object found, try to find any JSON-like structure
-            array_start = text.find('[')
-            array_end = text.rfind(']')
-            if array_start != -1 and array_end != -1 and array_end > array_start:
-                return text[array_start:array_end + 1]
-        
-        return "{}"
+        # Prefer an object; fall back to an array
+        extracted = find_json(text, openers="{") or find_json(text, openers="[")
+        return extracted.text if extracted else "{}"
     
     @staticmethod
     def parse_json_response(text: str, fallback: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Parse JSON from LLM response with robust error handling
         """
-        try:
-            # Extract and clean JSON
-            cleaned_text = LLMResponseParser.extract_json(text)
-            
-            # Try to parse
-            return json.loads(cleaned_text)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON from LLM response: {e}")
-            logger.debug(f"Response text: {text[:500]}...")
-            
-            # Try to fix common JSON issues
-            try:
-                fixed_json = LLMResponseParser._fix_common_json_issues(cleaned_text)
-                return json.loads(fixed_json)
-            except json.JSONDecodeError as e2:
-                logger.error(f"Failed to parse even after fixing JSON issues: {e2}")
-                
-                if fallback:
-                    return fallback
-                
-                # Return minimal valid structure
-                return {"error": "Failed to parse LLM response", "raw_response": text[:200]}
-    
-    @staticmethod
-    def _fix_common_json_issues(json_text: str) -> str:
-        """
-        Fix common JSON syntax issues that LLMs often produce
-        """
-        # Fix missing commas between array elements
-        json_text = re.sub(r'}\s*\n\s*{', '},\n{', json_text)
-        json_text = re.sub(r']\s*\n\s*{', '],\n{', json_text)
-        json_text = re.sub(r'}\s*\n\s*\[', '},\n[', json_text)
-        
-        # Fix missing commas between object properties
-        json_text = re.sub(r'"\s*\n\s*"', '",\n"', json_text)
-        json_text = re.sub(r'}\s*\n\s*"', '},\n"', json_text)
-        json_text = re.sub(r']\s*\n\s*"', '],\n"', json_text)
+        extracted = (find_json(text, openers="{") or find_json(text, openers="[")) if text else None
+        if extracted is not None:
+            if extracted.repairs:
+                logger.warning(f"Repaired JSON in LLM response: {', '.join(extracted.repairs)}")
+            return extracted.value
         
-        # Fix trailing commas (remove them)
-        json_text = re.sub(r',\s*}', '}', json_text)
-        json_text = re.sub(r',\s*]', ']', json_text)
+        logger.error("Failed to parse JSON from LLM response")
+        logger.debug(f"Response text: {(text or '')[:500]}...")
         
-        # Fix missing quotes around keys
-        json_text = re.sub(r'(\w+):', r'"\1":', json_text)
+        if fallback:
+            return fallback
         
-        return json_text
+        # Return minimal valid structure
+        return {"error": "Failed to parse LLM response", "raw_response": (text or "")[:200]}
 
+
+
+class ReasoningFilter:
+    """
+    Strip <think>/<reasoning> blocks from streamed text.
+    
+    Streaming counterpart of the block removal in ``parse_ollama``: tags may be
+    split across chunks, so text that could be the start of a tag is held
+    back until the next chunk decides it.
+    """
+    
+    TAGS = ("think", "reasoning")
+    
+    def __init__(self):
+        self._buffer = ""
+        self._closing_tag: Optional[str] = None
+    
+    def feed(self, text: str) -> str:
+        """Add a streamed chunk and return the text that is safe to emit"""
+        self._buffer += text
+        output = []
+        while self._buffer:
+            if self._closing_tag:
+                end = self._buffer.find(self._closing_tag)
+                if end == -1:
+                    # Keep only a possible partial closing tag
+                    self._buffer = self._buffer[-(len(self._closing_tag) - 1):]
+                    break
+                self._buffer = self._buffer[end + len(self._closing_tag):]
+                self._closing_tag = None
+                continue
+            
+            start = self._buffer.find("<")
+            if start == -1:
+                output.append(self._buffer)
+                self._buffer = ""
+                break
+            output.append(self._buffer[:start])
+            self._buffer = self._buffer[start:]
+            tag = next((t for t in self.TAGS if self._buffer.startswith(f"<{t}>")), None)
+            if tag:
+                self._buffer = self._buffer[len(tag) + 2:]
+                self._closing_tag = f"</{tag}>"
+            elif any(f"<{t}>".startswith(self._buffer) for t in self.TAGS):
+                # Could still become an opening tag; wait for more text
+                break
+            else:
+                output.append("<")
+                self._buffer = self._buffer[1:]
+        return "".join(output)
+    
+    def flush(self) -> str:
+        """Return held-back text at the end of the stream"""
+        text = "" if self._closing_tag else self._buffer
+        self._buffer = ""
+        return text
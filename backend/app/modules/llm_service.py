@@ -4,17 +4,38 @@ Simple LLM Service for the modular ArchMesh system
 
 import json
 import os
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
 import httpx
 from loguru import logger
 from dotenv import load_dotenv
+from app.core.circuit_breaker import circuit_breakers
+from app.core.error_handling import call_with_circuit_breaker
+from app.core.hedging import HedgeExhaustedError, hedged_call
+from app.core.http_clients import get_http_client
+from app.core.llm_cache import get_llm_cache, make_cache_key
+from app.core.llm_scheduler import Priority, llm_slot, llm_slot_available
+from app.core.single_flight import get_single_flight
+from app.core.token_usage import (
+    CallTimer, call_latency, count_tokens, record_llm_usage, track_llm_usage, usage_from_response
+)
+from app.core.llm_streaming import StreamTimer, iter_ndjson, iter_sse_json
+from app.core.ollama_residency import get_ollama_residency
 from app.modules.admin.llm_logger import log_interaction
-from app.modules.llm_response_parser import LLMResponseParser
+from app.modules.llm_response_parser import LLMResponseParser, ReasoningFilter
 from app.modules.admin.model_manager import ModelManager
 
 # Load environment variables
 load_dotenv()
 
+# Async callback receiving each streamed text chunk
+ChunkCallback = Callable[[str], Awaitable[None]]
+
+# Sampling temperature used for every provider call (part of the cache key)
+DEFAULT_TEMPERATURE = 0.3
+
+# Completion limit of hosted provider calls (also budgeted by the scheduler)
+MAX_COMPLETION_TOKENS = 2000
+
 
 class SimpleLLMService:
     """
@@ -30,53 +51,89 @@ class SimpleLLMService:
         self.fast_local_model = os.getenv("OLLAMA_FAST_MODEL", os.getenv("OLLAMA_MODEL", "llama3.2:3b"))
         self.model_manager = ModelManager()
         
-    async def call_llm(self, prompt: str, system_prompt: str = "", model: str = "gpt-4o-mini", *, stage: str = "general", provider_hint: Optional[str] = None) -> str:
+    async def call_llm(self, prompt: str, system_prompt: str = "", model: str = "gpt-4o-mini", *, stage: str = "general", provider_hint: Optional[str] = None, on_chunk: Optional[ChunkCallback] = None, use_cache: bool = True, priority: Optional[Priority] = None) -> str:
         """
         Make a simple LLM call using the configured provider.
+        
+        When ``on_chunk`` is given the response is streamed and each text
+        chunk is passed to the callback as it arrives (for example to forward
+        partial output over a WebSocket); the complete text is still returned.
+        Identical requests are answered from the LLM response cache unless
+        ``use_cache`` is False. Provider calls wait for a scheduler slot at
+        ``priority`` (defaults to the current ``llm_priority`` context).
         """
-        try:
-            # Try DeepSeek first (local, cost-effective, preferred for development)
-            if self.deepseek_base_url and (provider_hint in (None, "deepseek", "ollama")):
-                result = await self._call_deepseek(prompt, system_prompt)
-                log_interaction({
-                    "stage": stage,
-                    "provider": "deepseek",
-                    "model": self.deepseek_model,
-                    "prompt": prompt,
-                    "system_prompt": system_prompt,
-                    "response": result,
-                })
-                return result
-            
-            # Try OpenAI as fallback (most reliable)
-            elif self.openai_api_key and (provider_hint == "openai" or model.startswith("gpt")):
-                result = await self._call_openai(prompt, system_prompt, model)
-                log_interaction({
-                    "stage": stage,
-                    "provider": "openai",
-                    "model": model,
-                    "prompt": prompt,
-                    "system_prompt": system_prompt,
-                    "response": result,
-                })
-                return result
-            
-            # Try Anthropic as fallback
-            elif self.anthropic_api_key and (provider_hint in (None, "anthropic")):
-                result = await self._call_anthropic(prompt, system_prompt)
+        if on_chunk is not None:
+            chunks = []
+            async for chunk in self.stream_llm(prompt, system_prompt, model, stage=stage, provider_hint=provider_hint, use_cache=use_cache, priority=priority):
+                chunks.append(chunk)
+                await on_chunk(chunk)
+            return "".join(chunks).strip()
+        
+        selected = self._select_provider(model, provider_hint)
+        if selected is None:
+            logger.warning("No LLM provider available, using fallback")
+            return self._fallback_response(prompt)
+        provider, model_used = selected
+        
+        cache = get_llm_cache() if use_cache else None
+        if cache:
+            cached = await cache.get(provider, model_used, system_prompt, prompt, DEFAULT_TEMPERATURE)
+            if cached is not None:
                 log_interaction({
                     "stage": stage,
-                    "provider": "anthropic",
-                    "model": "claude-3-sonnet-20240229",
+                    "provider": provider,
+                    "model": model_used,
                     "prompt": prompt,
                     "system_prompt": system_prompt,
-                    "response": result,
+                    "response": cached,
+                    "cache_hit": True,
                 })
-                return result
-            
+                return cached
+        
+        # Token usage of the provider call made by this request (stays empty
+        # when the call was coalesced with another request's)
+        usage_entry: Dict[str, Any] = {}
+        
+        async def _call_provider() -> str:
+            if provider == "deepseek":
+                # The local chain may hedge, so each candidate holds its own slot
+                call = lambda: self._call_deepseek(prompt, system_prompt, stage, priority=priority)
+                with track_llm_usage() as usage:
+                    result = await call_with_circuit_breaker(provider, None, call)
+            else:
+                timer = CallTimer()
+                async with llm_slot(provider, model_used, priority=priority, tokens=self._estimate_tokens(system_prompt, prompt)):
+                    timer.started()
+                    if provider == "openai":
+                        call = lambda: self._call_openai(prompt, system_prompt, model)
+                    else:
+                        call = lambda: self._call_anthropic(prompt, system_prompt)
+                    with track_llm_usage() as usage:
+                        result = await call_with_circuit_breaker(provider, None, call)
+                        usage.add_queue_time(timer.queue_ms)
+            usage_entry.update({**usage.tokens(), "tokens_estimated": usage.estimated, **usage.latency()})
+            await self._cache_response(cache, provider, model_used, system_prompt, prompt, result, usage.tokens())
+            return result
+        
+        try:
+            # Concurrent identical requests share one provider call
+            flight = get_single_flight()
+            if flight:
+                key = make_cache_key(provider, model_used, system_prompt, prompt, DEFAULT_TEMPERATURE)
+                result, coalesced = await flight.do(key, _call_provider)
             else:
-                logger.warning("No LLM provider available, using fallback")
-                return self._fallback_response(prompt)
+                result, coalesced = await _call_provider(), False
+            log_interaction({
+                "stage": stage,
+                "provider": provider,
+                "model": model_used,
+                "prompt": prompt,
+                "system_prompt": system_prompt,
+                "response": result,
+                "coalesced": coalesced,
+                **usage_entry,
+            })
+            return result
                 
         except Exception as e:
             logger.error(f"LLM call failed: {e}")
@@ -86,59 +143,245 @@ class SimpleLLMService:
             logger.error(f"LLM call failed - Traceback: {traceback.format_exc()}")
             log_interaction({
                 "stage": stage,
-                "provider": provider_hint or "auto",
-                "model": model,
+                "provider": provider,
+                "model": model_used,
                 "prompt": prompt,
                 "system_prompt": system_prompt,
                 "error": str(e),
             })
             return self._fallback_response(prompt)
     
+    def _select_provider(self, model: str, provider_hint: Optional[str]) -> Optional[Tuple[str, str]]:
+        """Provider and model name a call will use, or None if no provider is configured and healthy"""
+        # DeepSeek first (local, cost-effective, preferred for development),
+        # then OpenAI (most reliable), then Anthropic. Providers whose circuit
+        # breaker is open are skipped.
+        if self.deepseek_base_url and (provider_hint in (None, "deepseek", "ollama")) and circuit_breakers.is_available("deepseek"):
+            return "deepseek", self.deepseek_model
+        if self.openai_api_key and (provider_hint == "openai" or model.startswith("gpt")) and circuit_breakers.is_available("openai"):
+            return "openai", model
+        if self.anthropic_api_key and (provider_hint in (None, "anthropic")) and circuit_breakers.is_available("anthropic"):
+            return "anthropic", "claude-3-sonnet-20240229"
+        return None
+    
+    async def _cache_response(self, cache, provider: str, model: str, system_prompt: str, prompt: str, response: str, tokens: Optional[Dict[str, int]] = None) -> None:
+        """Store a successful response in the LLM response cache with the cost it saves"""
+        if not cache or not response or not response.strip():
+            return
+        try:
+            if not tokens or not any(tokens.values()):
+                tokens = {
+                    "prompt_tokens": count_tokens(system_prompt) + count_tokens(prompt),
+                    "completion_tokens": count_tokens(response),
+                }
+            cost = self._estimate_cost(model, tokens["prompt_tokens"], tokens["completion_tokens"])
+            await cache.set(provider, model, system_prompt, prompt, DEFAULT_TEMPERATURE, response, cost=cost)
+        except Exception as e:
+            logger.warning(f"Failed to cache LLM response: {e}")
+    
+    @staticmethod
+    def _estimate_tokens(system_prompt: str, prompt: str) -> int:
+        """Estimate prompt plus maximum completion tokens of a call with the local tokenizer"""
+        return count_tokens(system_prompt) + count_tokens(prompt) + MAX_COMPLETION_TOKENS
+    
+    def _estimate_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """USD cost of a call from configured pricing"""
+        config = next(
+            (m for m in self.model_manager.get_available_models() if model in (m.id, m.model_name)),
+            None
+        )
+        if not config or not config.cost_per_1k_tokens:
+            return 0.0
+        return (
+            prompt_tokens * config.cost_per_1k_tokens.get("prompt", 0.0)
+            + completion_tokens * config.cost_per_1k_tokens.get("completion", 0.0)
+        ) / 1000
+    
+    async def stream_llm(self, prompt: str, system_prompt: str = "", model: str = "gpt-4o-mini", *, stage: str = "general", provider_hint: Optional[str] = None, use_cache: bool = True, priority: Optional[Priority] = None) -> AsyncIterator[str]:
+        """
+        Stream an LLM response as text chunks using the configured provider.
+        
+        Provider selection matches ``call_llm``. If the provider fails before
+        producing any text the fallback response is yielded instead; a failure
+        mid-stream ends the stream after the text already produced. A cached
+        response is yielded as a single chunk.
+        """
+        selected = self._select_provider(model, provider_hint)
+        if selected is None:
+            logger.warning("No LLM provider available, using fallback")
+            yield self._fallback_response(prompt)
+            return
+        provider, model_used = selected
+        
+        cache = get_llm_cache() if use_cache else None
+        if cache:
+            cached = await cache.get(provider, model_used, system_prompt, prompt, DEFAULT_TEMPERATURE)
+            if cached is not None:
+                log_interaction({
+                    "stage": stage,
+                    "provider": provider,
+                    "model": model_used,
+                    "prompt": prompt,
+                    "system_prompt": system_prompt,
+                    "response": cached,
+                    "cache_hit": True,
+                    "streamed": True,
+                })
+                yield cached
+                return
+        
+        if provider == "deepseek":
+            stream = self._stream_deepseek(prompt, system_prompt)
+        elif provider == "openai":
+            stream = self._stream_openai(prompt, system_prompt, model)
+        else:
+            stream = self._stream_anthropic(prompt, system_prompt)
+        
+        timer = StreamTimer()
+        chunks: List[str] = []
+        entry = {
+            "stage": stage,
+            "provider": provider,
+            "model": model_used,
+            "prompt": prompt,
+            "system_prompt": system_prompt,
+            "streamed": True,
+        }
+        try:
+            async with llm_slot(provider, model_used, priority=priority, tokens=self._estimate_tokens(system_prompt, prompt)):
+                async for chunk in stream:
+                    if not chunk:
+                        continue
+                    timer.mark()
+                    chunks.append(chunk)
+                    yield chunk
+        except Exception as e:
+            logger.error(f"LLM stream failed after {len(chunks)} chunks: {e}")
+            log_interaction({
+                **entry,
+                "response": "".join(chunks),
+                "error": str(e),
+                "time_to_first_token_ms": timer.time_to_first_token_ms,
+                "duration_ms": timer.elapsed_ms,
+            })
+            if not chunks:
+                circuit_breakers.record_failure(provider, error=e)
+                yield self._fallback_response(prompt)
+            return
+        circuit_breakers.record_success(provider)
+        
+        # Streams report no usage here; count the text locally
+        response = "".join(chunks)
+        tokens = {
+            "prompt_tokens": count_tokens(system_prompt) + count_tokens(prompt),
+            "completion_tokens": count_tokens(response),
+        }
+        record_llm_usage(
+            provider, model_used, tokens["prompt_tokens"], tokens["completion_tokens"],
+            estimated=True,
+            time_to_first_token_ms=timer.time_to_first_token_ms,
+            generation_ms=timer.elapsed_ms - (timer.time_to_first_token_ms or 0.0),
+            duration_ms=timer.elapsed_ms,
+        )
+        log_interaction({
+            **entry,
+            "response": response,
+            **tokens,
+            "tokens_estimated": True,
+            "time_to_first_token_ms": timer.time_to_first_token_ms,
+            "duration_ms": timer.elapsed_ms,
+        })
+        await self._cache_response(cache, provider, model_used, system_prompt, prompt, response.strip(), tokens)
+    
     async def _call_openai(self, prompt: str, system_prompt: str, model: str) -> str:
         """Call OpenAI API"""
         # Get timeout from model manager
         model_config = self.model_manager.get_model_by_id(model)
         timeout = model_config.timeout_seconds if model_config else 30
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.openai_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": model,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 2000
-                },
-                timeout=httpx.Timeout(timeout)
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return self._parse_openai_response(data)
-            else:
+        client = get_http_client("openai")
+        timer = CallTimer()
+        timer.started()
+        response = await client.post(
+            "https://api.openai.com/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.openai_api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": DEFAULT_TEMPERATURE,
+                "max_tokens": MAX_COMPLETION_TOKENS
+            },
+            timeout=httpx.Timeout(timeout)
+        )
+        
+        if response.status_code == 200:
+            timer.stopped()
+            data = response.json()
+            result = self._parse_openai_response(data)
+            self._record_usage("openai", model, data, timer, system_prompt + prompt, result)
+            return result
+        else:
+            raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+    
+    async def _stream_openai(self, prompt: str, system_prompt: str, model: str) -> AsyncIterator[str]:
+        """Stream OpenAI API chat completion deltas"""
+        model_config = self.model_manager.get_model_by_id(model)
+        timeout = model_config.timeout_seconds if model_config else 30
+        
+        client = get_http_client("openai")
+        async with client.stream(
+            "POST",
+            "https://api.openai.com/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.openai_api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": DEFAULT_TEMPERATURE,
+                "max_tokens": MAX_COMPLETION_TOKENS,
+                "stream": True
+            },
+            timeout=httpx.Timeout(timeout)
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
                 raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+            async for event in iter_sse_json(response):
+                yield LLMResponseParser.parse_openai_stream_chunk(event)
     
     def _parse_openai_response(self, data: dict) -> str:
         """Parse OpenAI API response"""
         return LLMResponseParser.parse_openai(data)
     
-    async def _call_deepseek(self, prompt: str, system_prompt: str) -> str:
-        """Call DeepSeek API (local Ollama) with retry and fast-model fallback."""
+    async def _call_deepseek(self, prompt: str, system_prompt: str, stage: str = "general", priority: Optional[Priority] = None) -> str:
+        """Call DeepSeek API (local Ollama) with hedged fast-model fallback."""
         # Get timeout from model manager
         model_config = self.model_manager.get_model_by_id("deepseek-r1")
         default_timeout = model_config.timeout_seconds if model_config else 300
         
+        residency = get_ollama_residency(self.deepseek_base_url)
+        tokens = self._estimate_tokens(system_prompt, prompt)
+        
         async def _call_model(model: str, timeout_s: float = None) -> str:
             if timeout_s is None:
                 timeout_s = default_timeout
-            async with httpx.AsyncClient() as client:
+            client = get_http_client("ollama")
+            timer = CallTimer()
+            # Every request to the local server holds a slot, so hedged
+            # candidates stay within the local concurrency limit
+            async with llm_slot("ollama", model, priority=priority, tokens=tokens):
+                timer.started()
                 resp = await client.post(
                     f"{self.deepseek_base_url}/api/chat",
                     json={
@@ -148,72 +391,195 @@ class SimpleLLMService:
                             {"role": "user", "content": prompt}
                         ],
                         "stream": False,
+                        "keep_alive": residency.keep_alive_for(model),
                         "options": {
-                            "temperature": 0.3,
+                            "temperature": DEFAULT_TEMPERATURE,
                             "num_predict": 8000,
                             "format": "json"
                         }
                     },
                     timeout=httpx.Timeout(timeout_s)
                 )
-                if resp.status_code == 200:
-                    data = resp.json()
-                    return self._parse_ollama_response(data)
-                raise Exception(f"Ollama API error {resp.status_code}: {resp.text}")
+            if resp.status_code == 200:
+                timer.stopped()
+                residency.mark_used(model)
+                data = resp.json()
+                result = self._parse_ollama_response(data)
+                self._record_usage("ollama", model, data, timer, system_prompt + prompt, result)
+                return result
+            raise Exception(f"Ollama API error {resp.status_code}: {resp.text}")
 
-        # Try fast local model first (more reliable)
+        # Fast local model first (more reliable), then DeepSeek twice; an
+        # already-loaded model of at least the fast model's quality tier goes
+        # first. With hedging, a candidate running past its latency percentile
+        # starts the next one in parallel instead of holding the chain for its
+        # timeout.
+        timeouts = {self.fast_local_model: 60.0}
+        chain = await residency.prefer_resident([self.fast_local_model, self.deepseek_model, self.deepseek_model])
+        candidates = [
+            (model, lambda model=model: _call_model(model, timeout_s=timeouts.get(model)))
+            for model in chain
+        ]
         try:
-            logger.info(f"Using fast local model: {self.fast_local_model}")
-            out = await _call_model(self.fast_local_model, timeout_s=60.0)
-            if out and len(out.strip()) > 2:
-                return out
-        except Exception as e:
-            logger.warning(f"Fast local model failed: {e}")
-
-        # Try DeepSeek as fallback
+            out, hedge = await hedged_call(
+                candidates,
+                stage=stage,
+                accept=lambda out: bool(out) and len(out.strip()) > 2,
+                # Hedge only when a local slot is free to run it alongside
+                can_hedge=lambda: llm_slot_available("ollama", self.deepseek_model, priority),
+            )
+        except HedgeExhaustedError as e:
+            raise Exception(f"All model calls failed: {e.errors}")
+        logger.info(f"Local model {hedge['winner']} answered ({hedge['candidates_started']} candidate(s) started)")
+        return out
+    
+    async def _stream_deepseek(self, prompt: str, system_prompt: str) -> AsyncIterator[str]:
+        """Stream from local Ollama, falling back across models until one produces output."""
+        model_config = self.model_manager.get_model_by_id("deepseek-r1")
+        default_timeout = model_config.timeout_seconds if model_config else 300
+        
+        # Same order as _call_deepseek: fast local model, then DeepSeek twice,
+        # loaded models first where quality allows. A model is only abandoned
+        # if it fails before producing any text.
+        residency = get_ollama_residency(self.deepseek_base_url)
+        chain = await residency.prefer_resident([self.fast_local_model, self.deepseek_model, self.deepseek_model])
+        attempts = [(model, 60.0 if model == self.fast_local_model else default_timeout) for model in chain]
         last_err: Exception | None = None
-        for attempt in range(2):
+        for model, timeout_s in attempts:
+            emitted = False
+            reasoning = ReasoningFilter()
             try:
-                out = await _call_model(self.deepseek_model)
-                if out and len(out.strip()) > 2:
-                    return out
+                client = get_http_client("ollama")
+                async with client.stream(
+                    "POST",
+                    f"{self.deepseek_base_url}/api/chat",
+                    json={
+                        "model": model,
+                        "messages": [
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": prompt}
+                        ],
+                        "stream": True,
+                        "keep_alive": residency.keep_alive_for(model),
+                        "options": {
+                            "temperature": DEFAULT_TEMPERATURE,
+                            "num_predict": 8000,
+                            "format": "json"
+                        }
+                    },
+                    timeout=httpx.Timeout(timeout_s)
+                ) as resp:
+                    if resp.status_code != 200:
+                        await resp.aread()
+                        raise Exception(f"Ollama API error {resp.status_code}: {resp.text}")
+                    residency.mark_used(model)
+                    async for data in iter_ndjson(resp):
+                        text = reasoning.feed(LLMResponseParser.parse_ollama_stream_chunk(data))
+                        if not emitted:
+                            # Match parse_ollama, which strips the complete response
+                            text = text.lstrip()
+                        if text:
+                            emitted = True
+                            yield text
+                text = reasoning.flush()
+                if text.strip():
+                    emitted = True
+                    yield text
             except Exception as e:
+                if emitted:
+                    raise
                 last_err = e
-                logger.warning(f"DeepSeek attempt {attempt+1} failed: {e}")
-
+                logger.warning(f"Streaming from {model} failed: {e}")
+                continue
+            if emitted:
+                return
+        
         raise Exception(f"All model calls failed: {last_err}")
     
+    async def _stream_anthropic(self, prompt: str, system_prompt: str) -> AsyncIterator[str]:
+        """Stream Anthropic API message deltas"""
+        model_config = self.model_manager.get_model_by_id("claude-3-sonnet-20240229")
+        timeout = model_config.timeout_seconds if model_config else 30
+        
+        client = get_http_client("anthropic")
+        async with client.stream(
+            "POST",
+            "https://api.anthropic.com/v1/messages",
+            headers={
+                "x-api-key": self.anthropic_api_key,
+                "Content-Type": "application/json",
+                "anthropic-version": "2023-06-01"
+            },
+            json={
+                "model": "claude-3-sonnet-20240229",
+                "max_tokens": MAX_COMPLETION_TOKENS,
+                "temperature": DEFAULT_TEMPERATURE,
+                "system": system_prompt,
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ],
+                "stream": True
+            },
+            timeout=httpx.Timeout(timeout)
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise Exception(f"Anthropic API error: {response.status_code} - {response.text}")
+            async for event in iter_sse_json(response):
+                if event.get("type") == "error":
+                    raise Exception(f"Anthropic stream error: {event.get('error')}")
+                yield LLMResponseParser.parse_anthropic_stream_event(event)
+    
     async def _call_anthropic(self, prompt: str, system_prompt: str) -> str:
         """Call Anthropic API"""
         # Get timeout from model manager
         model_config = self.model_manager.get_model_by_id("claude-3-sonnet-20240229")
         timeout = model_config.timeout_seconds if model_config else 30
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": self.anthropic_api_key,
-                    "Content-Type": "application/json",
-                    "anthropic-version": "2023-06-01"
-                },
-                json={
-                    "model": "claude-3-sonnet-20240229",
-                    "max_tokens": 2000,
-                    "temperature": 0.3,
-                    "system": system_prompt,
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ]
-                },
-                timeout=httpx.Timeout(timeout)
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return self._parse_anthropic_response(data)
-            else:
-                raise Exception(f"Anthropic API error: {response.status_code} - {response.text}")
+        client = get_http_client("anthropic")
+        timer = CallTimer()
+        timer.started()
+        response = await client.post(
+            "https://api.anthropic.com/v1/messages",
+            headers={
+                "x-api-key": self.anthropic_api_key,
+                "Content-Type": "application/json",
+                "anthropic-version": "2023-06-01"
+            },
+            json={
+                "model": "claude-3-sonnet-20240229",
+                "max_tokens": MAX_COMPLETION_TOKENS,
+                "temperature": DEFAULT_TEMPERATURE,
+                "system": system_prompt,
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ]
+            },
+            timeout=httpx.Timeout(timeout)
+        )
+        
+        if response.status_code == 200:
+            timer.stopped()
+            data = response.json()
+            result = self._parse_anthropic_response(data)
+            self._record_usage("anthropic", "claude-3-sonnet-20240229", data, timer, system_prompt + prompt, result)
+            return result
+        else:
+            raise Exception(f"Anthropic API error: {response.status_code} - {response.text}")
+    
+    @staticmethod
+    def _record_usage(provider: str, model: str, data: dict, timer: CallTimer, prompt_text: str, response: str) -> None:
+        """Record the token usage a provider reported, or a local estimate if it reported none"""
+        usage = usage_from_response(data)
+        if usage:
+            prompt_tokens, completion_tokens = usage["prompt_tokens"], usage["completion_tokens"]
+        else:
+            prompt_tokens, completion_tokens = count_tokens(prompt_text), count_tokens(response)
+        record_llm_usage(
+            provider, model, prompt_tokens, completion_tokens,
+            estimated=usage is None,
+            **call_latency(timer, usage)
+        )
     
     def _parse_ollama_response(self, data: dict) -> str:
         """Parse Ollama API response (DeepSeek, Llama, etc.)"""
@@ -227,9 +593,11 @@ class SimpleLLMService:
         """Fallback response when no LLM is available"""
         return f"LLM service unavailable. Original prompt: {prompt[:100]}..."
     
-    async def extract_requirements(self, text: str) -> Dict[str, Any]:
+    async def extract_requirements(self, text: str, on_chunk: Optional[ChunkCallback] = None) -> Dict[str, Any]:
         """
         Extract requirements using LLM with enhanced depth and technical analysis.
+        
+        ``on_chunk`` receives partial LLM output while the response streams.
         """
         system_prompt = """You are an expert requirements analyst. Extract requirements from the given text and return a JSON response with this structure:
 
@@ -286,7 +654,7 @@ Extract relevant requirements from the text. Be thorough and accurate."""
         user_prompt = f"Analyze the following text and extract comprehensive requirements with technical depth:\n\n{text}"
         
         try:
-            response = await self.call_llm(user_prompt, system_prompt + "\n\nReturn ONLY valid JSON. No Markdown, no prose.", stage="requirements_extraction", provider_hint="deepseek")
+            response = await self.call_llm(user_prompt, system_prompt + "\n\nReturn ONLY valid JSON. No Markdown, no prose.", stage="requirements_extraction", provider_hint="deepseek", on_chunk=on_chunk)
             
             return LLMResponseParser.parse_json_response(response)
             
@@ -298,9 +666,11 @@ Extract relevant requirements from the text. Be thorough and accurate."""
             logger.error(f"LLM extraction failed: {e}")
             return self._fallback_requirements(text)
     
-    async def generate_architecture_analysis(self, requirements: Dict[str, Any], domain: str = "cloud-native") -> Dict[str, Any]:
+    async def generate_architecture_analysis(self, requirements: Dict[str, Any], domain: str = "cloud-native", on_chunk: Optional[ChunkCallback] = None) -> Dict[str, Any]:
         """
         Generate comprehensive architecture analysis using LLM.
+        
+        ``on_chunk`` receives partial LLM output while the response streams.
         """
         system_prompt = f"""You are an expert system architect and technical lead. Generate a comprehensive architecture analysis for a {domain} system based on the provided requirements. Return a JSON response with the following structure:
 
@@ -481,7 +851,7 @@ DOMAIN: {domain}
 Please provide a detailed, technically sound architecture that addresses all requirements with specific technologies, detailed component specifications, and comprehensive implementation guidance."""
 
         try:
-            response = await self.call_llm(user_prompt, system_prompt + "\n\nReturn ONLY valid JSON. No Markdown, no prose.", stage="architecture_analysis", provider_hint="deepseek")
+            response = await self.call_llm(user_prompt, system_prompt + "\n\nReturn ONLY valid JSON. No Markdown, no prose.", stage="architecture_analysis", provider_hint="deepseek", on_chunk=on_chunk)
             
             return LLMResponseParser.parse_json_response(response)
             
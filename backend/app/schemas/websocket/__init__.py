@@ -8,12 +8,14 @@ including workflow updates, notifications, and system events.
 from .websocket_messages import (
     WebSocketMessage,
     WorkflowUpdate,
+    WorkflowStatus,
     NotificationMessage,
     PingMessage,
     PongMessage,
     ErrorMessage,
     LargeDataMessage,
-    LargeDataReceivedMessage
+    LargeDataReceivedMessage,
+    LLMStreamChunk
 )
 
 from .websocket_config import WebSocketConfig
@@ -21,11 +23,13 @@ from .websocket_config import WebSocketConfig
 __all__ = [
     "WebSocketMessage",
     "WorkflowUpdate", 
+    "WorkflowStatus",
     "NotificationMessage",
     "PingMessage",
     "PongMessage",
     "ErrorMessage",
     "LargeDataMessage",
     "LargeDataReceivedMessage",
+    "LLMStreamChunk",
     "WebSocketConfig"
 ]
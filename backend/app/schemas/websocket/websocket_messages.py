@@ -20,14 +20,17 @@ class MessageType(str, Enum):
     ERROR = "error"
     LARGE_DATA = "large_data"
     LARGE_DATA_RECEIVED = "large_data_received"
+    LLM_STREAM = "llm_stream"
 
 
 class WorkflowStatus(str, Enum):
     """Workflow status values"""
+    QUEUED = "queued"
     STARTING = "starting"
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
     REVIEW_REQUIRED = "review_required"
 
 
@@ -116,6 +119,18 @@ class LargeDataReceivedMessage(BaseWebSocketMessage):
     size: int = Field(..., description="Data size in bytes")
 
 
+class LLMStreamChunk(BaseWebSocketMessage):
+    """Partial LLM output streamed while a response is generated"""
+    type: MessageType = Field(default=MessageType.LLM_STREAM, description="Message type")
+    session_id: str = Field(..., description="Chat or workflow session ID")
+    stream_id: str = Field(..., description="ID shared by all chunks of one response")
+    stage: str = Field(..., description="Chat or workflow stage producing the output")
+    index: int = Field(..., ge=0, description="Chunk sequence number within the stream")
+    content: str = Field(..., description="Text added since the previous chunk")
+    done: bool = Field(default=False, description="Whether this is the final chunk")
+    metadata: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional metadata")
+
+
 # Union type for all WebSocket messages
 WebSocketMessage = Union[
     WorkflowUpdate,
@@ -124,5 +139,6 @@ WebSocketMessage = Union[
     PongMessage,
     ErrorMessage,
     LargeDataMessage,
-    LargeDataReceivedMessage
+    LargeDataReceivedMessage,
+    LLMStreamChunk
 ]
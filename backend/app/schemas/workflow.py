@@ -212,6 +212,24 @@ class AgentExecutionData(BaseModel):
         description="Execution duration in seconds",
         examples=[45.2]
     )
+    queue_seconds: Optional[float] = Field(
+        None,
+        ge=0.0,
+        description="Time LLM calls waited for a scheduler slot in seconds",
+        examples=[1.3]
+    )
+    time_to_first_token_seconds: Optional[float] = Field(
+        None,
+        ge=0.0,
+        description="Time until LLM calls produced their first token in seconds",
+        examples=[2.1]
+    )
+    generation_seconds: Optional[float] = Field(
+        None,
+        ge=0.0,
+        description="Time LLM calls spent generating completions in seconds",
+        examples=[38.5]
+    )
     status: AgentExecutionStatusEnum = Field(
         ...,
         description="Execution status",
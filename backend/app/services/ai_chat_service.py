@@ -3,7 +3,7 @@ AI Chat Service for ArchMesh
 TDD Implementation - RED phase: Define interfaces and create failing tests first
 """
 
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Awaitable, Callable, Optional, List, Tuple
 from enum import Enum
 from dataclasses import dataclass
 from datetime import datetime
@@ -12,9 +12,12 @@ import json
 
 from app.core.llm_strategy import LLMStrategy, TaskType
 from app.config import settings
-import httpx
+from app.core.http_clients import get_http_client
+from app.core.llm_scheduler import Priority, llm_slot
+from app.core.llm_streaming import iter_sse_json
 from app.core.logging_config import get_logger
 from app.core.exceptions import AIChatError, ValidationError
+from app.modules.llm_response_parser import LLMResponseParser
 
 logger = get_logger(__name__)
 
@@ -22,6 +25,9 @@ logger = get_logger(__name__)
 _SESSIONS: Dict[str, Dict[str, Any]] = {}
 _USER_SESSIONS: Dict[str, List[str]] = {}
 
+# Async callback receiving each streamed response chunk
+ChunkCallback = Callable[[str], Awaitable[None]]
+
 
 class ChatContextType(Enum):
     """Types of chat contexts"""
@@ -127,7 +133,8 @@ class AIChatService:
         self,
         message: str,
         context: ChatContext,
-        selected_model: Optional[str] = None
+        selected_model: Optional[str] = None,
+        on_chunk: Optional[ChunkCallback] = None
     ) -> ChatMessage:
         """
         Process a chat message and generate a response
@@ -136,6 +143,8 @@ class AIChatService:
             message: User's message
             context: Chat context
             selected_model: User-selected model (optional)
+            on_chunk: Callback receiving partial response text while the
+                model streams (optional)
             
         Returns:
             Assistant's response message
@@ -183,7 +192,7 @@ class AIChatService:
             
             # Generate response
             response_content = await self._generate_response(
-                message, context, history, selected_model
+                message, context, history, selected_model, on_chunk=on_chunk
             )
             
             # Create assistant message
@@ -251,11 +260,21 @@ class AIChatService:
         message: str,
         context: ChatContext,
         history: List[ChatMessage],
-        model: str
+        model: str,
+        on_chunk: Optional[ChunkCallback] = None
     ) -> str:
         """Generate AI response using the selected model.
         If OPENAI is configured and selected, call it with chat history; otherwise fall back to rule-based text.
+        When on_chunk is given, provider responses are streamed to it as they are generated.
         """
+        streamed: List[str] = []
+        if on_chunk is not None:
+            forward_chunk = on_chunk
+
+            async def on_chunk(chunk: str) -> None:
+                streamed.append(chunk)
+                await forward_chunk(chunk)
+
         # Decide provider by selected model or settings
         selected_provider = self.available_models.get(model, ModelInfo("deepseek","","","",[],"free","fast")).provider
         use_openai = (selected_provider == "openai") or (settings.default_llm_provider == "openai")
@@ -281,17 +300,35 @@ class AIChatService:
                     raise RuntimeError("OpenAI client not available")
                 client = AsyncOpenAI(api_key=settings.openai_api_key)
                 model_name = settings.default_llm_model or "gpt-4o-mini"
-                resp = await client.chat.completions.create(
-                    model=model_name,
-                    messages=messages_payload,
-                    temperature=0.3,
-                )
-                content = resp.choices[0].message.content if resp.choices else ""
+                tokens = sum(len(m["content"]) for m in messages_payload) // 4
+                async with llm_slot("openai", model_name, priority=Priority.INTERACTIVE, tokens=tokens):
+                    if on_chunk is None:
+                        resp = await client.chat.completions.create(
+                            model=model_name,
+                            messages=messages_payload,
+                            temperature=0.3,
+                        )
+                        content = resp.choices[0].message.content if resp.choices else ""
+                    else:
+                        stream = await client.chat.completions.create(
+                            model=model_name,
+                            messages=messages_payload,
+                            temperature=0.3,
+                            stream=True,
+                        )
+                        async for event in stream:
+                            delta = event.choices[0].delta.content if event.choices else None
+                            if delta:
+                                await on_chunk(delta)
+                        content = "".join(streamed)
                 if not content:
                     content = "I'm here to help. Could you please clarify your request?"
                 return content
             except Exception as e:
                 logger.error(f"OpenAI generation failed: {e}")
+                if streamed:
+                    # The client already has partial output; don't restart on another model
+                    return "".join(streamed)
                 # Continue to fallback below
 
         # DeepSeek local (Ollama-compatible) when configured as default
@@ -308,65 +345,55 @@ class AIChatService:
                 base = settings.deepseek_base_url.rstrip("/")
                 # Use OpenAI-compatible endpoint
                 url = f"{base}/v1/chat/completions"
-                async with httpx.AsyncClient(timeout=120) as client:  # Increased timeout
-                    resp = await client.post(
-                        url,
-                        json={
-                            "model": model_name,
-                            "messages": messages_payload,
-                            "stream": False,
-                            "temperature": 0.3,
-                            "top_p": 0.9,  # Add top_p for better quality
-                            "max_tokens": 1000,  # Limit response length for faster generation
-                            "options": {
-                                "num_ctx": 2048,  # Reduce context window for better performance
-                                "num_gpu": 1,  # Limit GPU usage
-                            }
-                        },
-                    )
-                resp.raise_for_status()
-                data = resp.json()
-                # OpenAI-compatible format: {choices: [{message: {content}}]}
-                content = (
-                    (data.get("choices") or [{}])[0].get("message", {}).get("content")
-                    or data.get("message", {}).get("content")
-                    or ""
+                content = await self._deepseek_chat(
+                    url,
+                    {
+                        "model": model_name,
+                        "messages": messages_payload,
+                        "temperature": 0.3,
+                        "top_p": 0.9,  # Add top_p for better quality
+                        "max_tokens": 1000,  # Limit response length for faster generation
+                        "options": {
+                            "num_ctx": 2048,  # Reduce context window for better performance
+                            "num_gpu": 1,  # Limit GPU usage
+                        }
+                    },
+                    timeout=120,
+                    on_chunk=on_chunk,
                 )
                 if not content:
                     content = "I'm here to help. Could you please clarify your request?"
                 return content
             except Exception as e:
                 logger.error(f"DeepSeek local generation failed: {e}")
+                if streamed:
+                    # The client already has partial output; don't restart on another model
+                    return "".join(streamed)
                 # Try faster model as fallback
                 try:
                     faster_model = "deepseek-coder:latest"  # Usually faster than r1
                     logger.info(f"Trying fallback model: {faster_model}")
-                    async with httpx.AsyncClient(timeout=60) as client:
-                        resp = await client.post(
-                            url,
-                            json={
-                                "model": faster_model,
-                                "messages": messages_payload,
-                                "stream": False,
-                                "temperature": 0.3,
-                                "max_tokens": 500,  # Shorter responses for speed
-                                "options": {
-                                    "num_ctx": 1024,  # Smaller context for speed
-                                }
-                            },
-                        )
-                    resp.raise_for_status()
-                    data = resp.json()
-                    content = (
-                        (data.get("choices") or [{}])[0].get("message", {}).get("content")
-                        or data.get("message", {}).get("content")
-                        or ""
+                    content = await self._deepseek_chat(
+                        url,
+                        {
+                            "model": faster_model,
+                            "messages": messages_payload,
+                            "temperature": 0.3,
+                            "max_tokens": 500,  # Shorter responses for speed
+                            "options": {
+                                "num_ctx": 1024,  # Smaller context for speed
+                            }
+                        },
+                        timeout=60,
+                        on_chunk=on_chunk,
                     )
                     if content:
                         logger.info("Fallback model succeeded")
                         return content
                 except Exception as fallback_e:
                     logger.error(f"Fallback model also failed: {fallback_e}")
+                    if streamed:
+                        return "".join(streamed)
                 # Fall back to template below
 
         # Fallback: lightweight, context-aware template
@@ -379,6 +406,49 @@ class AIChatService:
             return f"{system_prompt} For: '{message}'. Share the language/framework and any code so I can assist precisely."
         return f"{system_prompt} You asked: '{message}'. Tell me the most critical detail I should consider first."
     
+    async def _deepseek_chat(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: float,
+        on_chunk: Optional[ChunkCallback] = None
+    ) -> str:
+        """Call the local OpenAI-compatible chat endpoint, streaming to on_chunk when given"""
+        async with llm_slot("deepseek", payload["model"], priority=Priority.INTERACTIVE):
+            return await self._deepseek_request(url, payload, timeout, on_chunk)
+    
+    async def _deepseek_request(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: float,
+        on_chunk: Optional[ChunkCallback] = None
+    ) -> str:
+        """Send a chat request to the local endpoint"""
+        client = get_http_client("deepseek")
+        if on_chunk is None:
+            resp = await client.post(url, json={**payload, "stream": False}, timeout=timeout)
+            resp.raise_for_status()
+            data = resp.json()
+            # OpenAI-compatible format: {choices: [{message: {content}}]}
+            return (
+                (data.get("choices") or [{}])[0].get("message", {}).get("content")
+                or data.get("message", {}).get("content")
+                or ""
+            )
+        
+        parts: List[str] = []
+        async with client.stream("POST", url, json={**payload, "stream": True}, timeout=timeout) as resp:
+            if resp.is_error:
+                await resp.aread()
+            resp.raise_for_status()
+            async for event in iter_sse_json(resp):
+                delta = LLMResponseParser.parse_openai_stream_chunk(event)
+                if delta:
+                    parts.append(delta)
+                    await on_chunk(delta)
+        return "".join(parts)
+    
     def _create_system_prompt(self, context: ChatContext) -> str:
         """Create a context-aware system prompt"""
         base_prompt = "You are ArchMesh AI, an intelligent assistant for architecture design and development workflows."
@@ -473,13 +543,16 @@ class AIChatService:
         content: str,
         model: Optional[str] = None,
         context: Optional[Dict[str, Any]] = None,
+        on_chunk: Optional[ChunkCallback] = None,
     ) -> Dict[str, Any]:
         session = await self.get_session(session_id, user_id)
         if not session:
             raise ValidationError("Session not found")
         model_key = model or session.get("current_model", "deepseek-r1")
         chat_context = ChatContext(user_id=user_id, context_type=ChatContextType.GENERAL)
-        assistant_msg = await self.process_chat_message(content, chat_context, selected_model=model_key)
+        assistant_msg = await self.process_chat_message(
+            content, chat_context, selected_model=model_key, on_chunk=on_chunk
+        )
         # append messages to session
         session["messages"].append({
             "id": self._generate_message_id(),
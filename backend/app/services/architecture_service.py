@@ -11,7 +11,7 @@ from datetime import datetime
 from uuid import uuid4
 
 from app.core.llm_strategy import LLMStrategy
-from app.services.enhanced_knowledge_base_service import EnhancedKnowledgeBaseService
+from app.services.enhanced_knowledge_base_service import get_enhanced_knowledge_base_service
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +23,7 @@ class ArchitectureService:
 
     def __init__(self):
         self.llm_strategy = LLMStrategy()
-        self.kb_service = EnhancedKnowledgeBaseService()
+        self.kb_service = get_enhanced_knowledge_base_service()
         logger.info("ArchitectureService initialized")
 
     async def get_architecture_proposal(self, project_id: str) -> Optional[Dict[str, Any]]:
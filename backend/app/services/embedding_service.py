@@ -0,0 +1,425 @@
+"""
+Shared Embedding Service for ArchMesh knowledge bases.
+
+This service owns the sentence transformer model used by every knowledge base
+service and turns text into embeddings efficiently:
+
+- Micro-batching: concurrent requests are coalesced into one ``encode`` call,
+  bounded by a maximum batch size and a maximum wait
+- Deduplication: identical texts are keyed by content hash and encoded once,
+  both within a batch and across in-flight requests
+- Caching: an in-memory LRU cache with an optional SQLite disk tier
+- Off-loop encoding: model inference runs in a worker thread so the event loop
+  is never blocked
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from loguru import logger
+from app.config import settings
+from app.core.model_registry import model_registry
+
+
+class EmbeddingDiskCache:
+    """SQLite-backed persistent embedding cache keyed by content hash."""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Initialize the disk cache.
+
+        Args:
+            path: SQLite database file path
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Look up embeddings for content hashes."""
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = list(keys[start:start + 500])
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        """Store embeddings by content hash."""
+        if not vectors:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in vectors.items()]
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingService:
+    """
+    Batched, deduplicated and cached text embedding service.
+
+    One instance exists per embedding model and is shared by all knowledge
+    base services through ``get_embedding_service``.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        max_batch_size: int = 32,
+        max_wait_ms: float = 10.0,
+        cache_size: int = 10000,
+        cache_dir: Optional[Union[str, Path]] = None
+    ):
+        """
+        Initialize the embedding service.
+
+        Args:
+            model_name: Sentence transformer model name
+            max_batch_size: Maximum texts per model ``encode`` call
+            max_wait_ms: Maximum time a request waits for its batch to fill
+            cache_size: Maximum embeddings held in the in-memory LRU cache
+            cache_dir: Optional directory for the persistent disk cache
+        """
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.cache_size = cache_size
+
+        self._model: Optional[Any] = None
+        self._model_lock = threading.Lock()
+
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.disk_cache = EmbeddingDiskCache(Path(cache_dir) / f"{self._safe_name}.sqlite") if cache_dir else None
+
+        # Micro-batching state, bound to the event loop that created it
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: List[Tuple[str, str]] = []
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+        self.stats = {
+            "requests": 0,
+            "texts": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "deduplicated": 0,
+            "encoded": 0,
+            "batches": 0,
+            "encode_seconds": 0.0
+        }
+
+    @property
+    def _safe_name(self) -> str:
+        return "".join(c if c.isalnum() or c in "-_." else "_" for c in self.model_name)
+
+    @property
+    def model(self) -> Any:
+        """The sentence transformer model, shared through the model registry and loaded on first use."""
+        if self._model is None:
+            self._model = model_registry.get_sentence_transformer(self.model_name)
+        return self._model
+
+    def content_key(self, text: str) -> str:
+        """Content hash identifying a text for this model."""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[np.ndarray]:
+        with self._cache_lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+            return vector
+
+    def _cache_put(self, key: str, vector: np.ndarray) -> None:
+        with self._cache_lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _encode_batch(self, keys: List[str], texts: List[str]) -> List[np.ndarray]:
+        """
+        Resolve a batch of unique texts via the disk tier, then the model.
+
+        Runs in a worker thread for async callers.
+        """
+        vectors: Dict[str, np.ndarray] = {}
+        if self.disk_cache:
+            vectors = self.disk_cache.get_many(keys)
+            self.stats["disk_hits"] += len(vectors)
+
+        misses = [(key, text) for key, text in zip(keys, texts) if key not in vectors]
+        if misses:
+            start = time.perf_counter()
+            with self._model_lock:
+                encoded = self.model.encode(
+                    [text for _, text in misses],
+                    batch_size=self.max_batch_size,
+                    convert_to_numpy=True
+                )
+            self.stats["encode_seconds"] += time.perf_counter() - start
+            self.stats["encoded"] += len(misses)
+            self.stats["batches"] += 1
+
+            new_vectors = {
+                key: np.asarray(vector, dtype=np.float32)
+                for (key, _), vector in zip(misses, encoded)
+            }
+            vectors.update(new_vectors)
+            if self.disk_cache:
+                self.disk_cache.put_many(new_vectors)
+
+        for key, vector in vectors.items():
+            vector.flags.writeable = False
+            self._cache_put(key, vector)
+        return [vectors[key] for key in keys]
+
+    def encode(self, texts: Union[str, Sequence[str]]) -> np.ndarray:
+        """
+        Embed texts synchronously in the calling thread.
+
+        Shares the caches with the async API and accepts the same input as
+        ``SentenceTransformer.encode``. Prefer ``embed_many`` from async code.
+
+        Args:
+            texts: A text or sequence of texts
+
+        Returns:
+            Embedding vector for a single text, otherwise an (n, dimension) array
+        """
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        self.stats["requests"] += 1
+        self.stats["texts"] += len(texts)
+
+        vectors: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+        keys = [self.content_key(text) for text in texts]
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                self.stats["deduplicated"] += 1
+                continue
+            cached = self._cache_get(key)
+            if cached is not None:
+                self.stats["memory_hits"] += 1
+                vectors[key] = cached
+            else:
+                missing[key] = text
+
+        if missing:
+            vectors.update(zip(missing, self._encode_batch(list(missing), list(missing.values()))))
+
+        result = self._stack([vectors[key] for key in keys])
+        return result[0] if single else result
+
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Embed a single text.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector
+        """
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed texts, coalescing with other concurrent requests.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Array of shape (len(texts), dimension)
+        """
+        texts = list(texts)
+        self.stats["requests"] += 1
+        self.stats["texts"] += len(texts)
+
+        loop = asyncio.get_running_loop()
+        self._bind_loop(loop)
+
+        keys = [self.content_key(text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+
+        for key, text in zip(keys, texts):
+            if key in vectors or key in waiting:
+                self.stats["deduplicated"] += 1
+                continue
+            cached = self._cache_get(key)
+            if cached is not None:
+                self.stats["memory_hits"] += 1
+                vectors[key] = cached
+                continue
+            future = self._pending.get(key)
+            if future is None:
+                future = loop.create_future()
+                self._pending[key] = future
+                self._queue.append((key, text))
+            else:
+                self.stats["deduplicated"] += 1
+            waiting[key] = future
+
+        if self._queue:
+            self._schedule_flush()
+
+        if waiting:
+            results = await asyncio.gather(*waiting.values())
+            vectors.update(zip(waiting, results))
+
+        return self._stack([vectors[key] for key in keys])
+
+    @staticmethod
+    def _stack(vectors: List[np.ndarray]) -> np.ndarray:
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack(vectors)
+
+    def _bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Reset micro-batching state if the service is used from a new event loop."""
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = []
+        self._pending = {}
+        self._flush_handle = None
+
+    def _schedule_flush(self) -> None:
+        """Flush now if a batch is full, otherwise after ``max_wait_ms``."""
+        if len(self._queue) >= self.max_batch_size:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            self._loop.create_task(self._flush())
+        elif self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(
+                self.max_wait_ms / 1000, lambda: self._loop.create_task(self._flush())
+            )
+
+    async def _flush(self) -> None:
+        """Encode one batch from the queue in a worker thread and resolve its futures."""
+        self._flush_handle = None
+        batch = self._queue[:self.max_batch_size]
+        self._queue = self._queue[self.max_batch_size:]
+        if self._queue:
+            self._schedule_flush()
+        if not batch:
+            return
+
+        keys = [key for key, _ in batch]
+        try:
+            vectors = await asyncio.to_thread(self._encode_batch, keys, [text for _, text in batch])
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {str(e)}")
+            for key in keys:
+                future = self._pending.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, vector in zip(keys, vectors):
+            future = self._pending.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(vector)
+
+    def close(self) -> None:
+        """Cancel pending flushes and close the disk cache."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self.disk_cache:
+            self.disk_cache.close()
+            self.disk_cache = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get embedding service statistics."""
+        with self._cache_lock:
+            cached = len(self._cache)
+        return {
+            **self.stats,
+            "model": self.model_name,
+            "model_loaded": self._model is not None,
+            "cached_embeddings": cached,
+            "disk_cache": str(self.disk_cache.path) if self.disk_cache else None,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms
+        }
+
+
+# Shared instances, one per embedding model
+_embedding_services: Dict[str, EmbeddingService] = {}
+_embedding_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: Optional[str] = None) -> EmbeddingService:
+    """
+    Get the shared embedding service for a model.
+
+    Args:
+        model_name: Sentence transformer model, defaults to the configured model
+
+    Returns:
+        EmbeddingService instance shared across the process
+    """
+    model_name = model_name or settings.knowledge_base_embedding_model
+    with _embedding_services_lock:
+        service = _embedding_services.get(model_name)
+        if service is None:
+            service = EmbeddingService(
+                model_name=model_name,
+                max_batch_size=settings.embedding_max_batch_size,
+                max_wait_ms=settings.embedding_max_wait_ms,
+                cache_size=settings.embedding_cache_size,
+                cache_dir=settings.embedding_cache_dir
+            )
+            _embedding_services[model_name] = service
+        return service
+
+
+def get_embedding_services_stats() -> Dict[str, Dict[str, Any]]:
+    """Get statistics of every shared embedding service, keyed by model name."""
+    with _embedding_services_lock:
+        services = dict(_embedding_services)
+    return {model_name: service.get_stats() for model_name, service in services.items()}
+
+
+def close_embedding_services() -> None:
+    """
+    Close and forget every shared embedding service.
+
+    Should be called during application shutdown.
+    """
+    with _embedding_services_lock:
+        for service in _embedding_services.values():
+            service.close()
+        _embedding_services.clear()
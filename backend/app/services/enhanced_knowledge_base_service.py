@@ -9,19 +9,23 @@ This service provides comprehensive knowledge handling for both greenfield and b
 - LLM-assisted knowledge synthesis
 """
 
+import asyncio
 import json
 import uuid
+from collections import defaultdict
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple, Union
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
 from dataclasses import dataclass, asdict
 from enum import Enum
 
 from loguru import logger
-from sentence_transformers import SentenceTransformer
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
 from app.config import settings
+from app.services.embedding_service import get_embedding_service
+from app.services.knowledge_entity_store import KnowledgeEntityStore
+from app.services.vector_store import MmapVectorStore, create_index
 
 
 class KnowledgeType(Enum):
@@ -110,7 +114,8 @@ class EnhancedKnowledgeBaseService:
     def __init__(
         self,
         storage_path: str = "./enhanced_knowledge_base",
-        embedding_model: str = "all-MiniLM-L6-v2"
+        embedding_model: str = "all-MiniLM-L6-v2",
+        index_type: Optional[str] = None
     ):
         """
         Initialize the enhanced knowledge base service.
@@ -118,18 +123,40 @@ class EnhancedKnowledgeBaseService:
         Args:
             storage_path: Path to store knowledge base data
             embedding_model: Sentence transformer model for embeddings
+            index_type: Vector index backend (exact or ivf_flat), defaults to settings
         """
-        self.storage_path = storage_path
+        self.storage_path = Path(storage_path)
+        self.storage_path.mkdir(parents=True, exist_ok=True)
         self.embedding_model = embedding_model
         self.embedding_dimension = 384  # all-MiniLM-L6-v2 dimension
         
-        # Knowledge storage
+        # Knowledge storage, persisted to SQLite as it changes
         self.entities: Dict[str, KnowledgeEntity] = {}
         self.relationships: Dict[str, KnowledgeRelationship] = {}
-        self.embeddings: Dict[str, np.ndarray] = {}
+        self.entity_store = KnowledgeEntityStore(self.storage_path / "knowledge.sqlite")
         
-        # Initialize embedding model
-        self.embedder = SentenceTransformer(self.embedding_model)
+        # Secondary indexes: entity IDs by project, type and workflow
+        self._by_project: Dict[str, Set[str]] = defaultdict(set)
+        self._by_type: Dict[KnowledgeType, Set[str]] = defaultdict(set)
+        self._by_workflow: Dict[str, Set[str]] = defaultdict(set)
+        
+        # Entity embeddings: memory-mapped segments with one row per entity
+        self.index_type = index_type or settings.knowledge_base_index_type
+        self.store = MmapVectorStore(
+            self.storage_path / "segments",
+            dimension=self.embedding_dimension,
+            index=create_index(
+                self.index_type,
+                n_lists=settings.knowledge_base_ivf_n_lists,
+                n_probe=settings.knowledge_base_ivf_n_probe
+            )
+        )
+        self.index_file = self.storage_path / f"{self.index_type}_index.npz"
+        self._entity_rows: Dict[str, int] = {}
+        self._compaction_task: Optional[asyncio.Task] = None
+        
+        # Shared embedding service, batches and caches encodes across services
+        self.embedder = get_embedding_service(self.embedding_model)
         
         # Load existing knowledge
         self._load_knowledge()
@@ -175,15 +202,23 @@ class EnhancedKnowledgeBaseService:
                 confidence=confidence
             )
             
-            # Store entity
-            self.entities[entity_id] = entity
+            # Generate embedding; the vector is appended before the entity is
+            # committed so a stored entity always has an embedding
+            embedding = await self.embedder.embed(content)
+            await self._wait_for_compaction()
+            self._entity_rows[entity_id] = self.store.add(embedding, {
+                "entity_id": entity_id,
+                "project_id": project_id,
+                "type": knowledge_type.value,
+                "workflow_id": workflow_id
+            })
             
-            # Generate embedding
-            embedding = self.embedder.encode(content)
-            self.embeddings[entity_id] = embedding
+            # Store and index entity
+            self.entities[entity_id] = entity
+            self._index_entity(entity)
             
             # Save knowledge
-            await self._save_knowledge()
+            await self._save_knowledge(entity_ids=[entity_id])
             
             logger.info(f"Added knowledge entity: {entity_id}")
             return entity_id
@@ -238,7 +273,10 @@ class EnhancedKnowledgeBaseService:
                 self.entities[to_entity_id].relationships.append(relationship_id)
             
             # Save knowledge
-            await self._save_knowledge()
+            await self._save_knowledge(
+                entity_ids=[from_entity_id, to_entity_id],
+                relationship_ids=[relationship_id]
+            )
             
             logger.info(f"Added relationship: {relationship_id}")
             return relationship_id
@@ -261,31 +299,29 @@ class EnhancedKnowledgeBaseService:
             List of (entity, similarity_score) tuples
         """
         try:
+            # Resolve candidate entities from the project, type and workflow indexes
+            candidate_ids = self._find_entity_ids(
+                context.project_id, context.knowledge_types, context.workflow_id
+            )
+            if not candidate_ids:
+                return []
+            
             # Generate query embedding
-            query_embedding = self.embedder.encode(context.query)
-            
-            # Filter by project and knowledge types
-            candidate_entities = []
-            for entity_id, entity in self.entities.items():
-                if (entity.project_id == context.project_id and 
-                    entity.type in context.knowledge_types):
-                    candidate_entities.append((entity_id, entity))
-            
-            # Calculate similarities
-            similarities = []
-            for entity_id, entity in candidate_entities:
-                if entity_id in self.embeddings:
-                    similarity = cosine_similarity(
-                        query_embedding.reshape(1, -1),
-                        self.embeddings[entity_id].reshape(1, -1)
-                    )[0][0]
-                    
-                    if similarity >= context.similarity_threshold:
-                        similarities.append((entity, similarity))
-            
-            # Sort by similarity and limit results
-            similarities.sort(key=lambda x: x[1], reverse=True)
-            return similarities[:context.max_results]
+            query_embedding = await self.embedder.embed(context.query)
+            await self._wait_for_compaction()
+            
+            # Score only the candidate rows and keep those above the threshold
+            matches = self.store.search(
+                query_embedding,
+                top_k=context.max_results,
+                rows=[self._entity_rows[entity_id] for entity_id in candidate_ids if entity_id in self._entity_rows]
+            )
+            
+            return [
+                (self.entities[self.store.metadata[row]["entity_id"]], similarity)
+                for row, similarity in matches
+                if similarity >= context.similarity_threshold
+            ]
             
         except Exception as e:
             logger.error(f"Error searching knowledge: {str(e)}")
@@ -357,11 +393,12 @@ class EnhancedKnowledgeBaseService:
             entity.metadata.update(refinement_metadata)
             
             # Update embedding
-            new_embedding = self.embedder.encode(refined_content)
-            self.embeddings[entity_id] = new_embedding
+            new_embedding = await self.embedder.embed(refined_content)
+            await self._wait_for_compaction()
+            self.store.update(self._entity_rows[entity_id], new_embedding)
             
             # Save knowledge
-            await self._save_knowledge()
+            await self._save_knowledge(entity_ids=[entity_id])
             
             logger.info(f"Refined knowledge entity: {entity_id}")
             return True
@@ -370,6 +407,57 @@ class EnhancedKnowledgeBaseService:
             logger.error(f"Error refining knowledge: {str(e)}")
             return False
     
+    async def delete_project_knowledge(self, project_id: str) -> int:
+        """
+        Remove all knowledge entities, relationships and embeddings of a project.
+        
+        Args:
+            project_id: Project ID
+            
+        Returns:
+            Number of entities removed
+        """
+        try:
+            await self._wait_for_compaction()
+            entity_ids = set(self._by_project.get(project_id, ()))
+            
+            # Delete durably first, then from memory and the vector store
+            self.entity_store.delete_project(project_id)
+            
+            for entity_id in entity_ids:
+                self._unindex_entity(self.entities.pop(entity_id))
+            
+            removed_relationships = {
+                rel_id: relationship for rel_id, relationship in self.relationships.items()
+                if relationship.from_entity_id in entity_ids
+                or relationship.to_entity_id in entity_ids
+            }
+            for rel_id in removed_relationships:
+                del self.relationships[rel_id]
+            
+            # Unlink the removed relationships from surviving endpoints in other projects
+            touched_ids = set()
+            for relationship in removed_relationships.values():
+                for endpoint_id in (relationship.from_entity_id, relationship.to_entity_id):
+                    if endpoint_id in self.entities:
+                        touched_ids.add(endpoint_id)
+            for entity_id in touched_ids:
+                entity = self.entities[entity_id]
+                entity.relationships = [
+                    rel_id for rel_id in entity.relationships if rel_id not in removed_relationships
+                ]
+            
+            self._delete_embeddings(entity_ids)
+            self._schedule_compaction()
+            await self._save_knowledge(entity_ids=touched_ids)
+            
+            logger.info(f"Deleted {len(entity_ids)} knowledge entities for project: {project_id}")
+            return len(entity_ids)
+            
+        except Exception as e:
+            logger.error(f"Error deleting project knowledge: {str(e)}")
+            return 0
+    
     async def get_project_knowledge_graph(
         self,
         project_id: str,
@@ -388,17 +476,17 @@ class EnhancedKnowledgeBaseService:
         try:
             # Get project entities
             project_entities = {
-                entity_id: entity for entity_id, entity in self.entities.items()
-                if entity.project_id == project_id
+                entity_id: self.entities[entity_id]
+                for entity_id in self._by_project.get(project_id, ())
             }
             
             # Get project relationships
             project_relationships = {}
             if include_relationships:
-                for rel_id, relationship in self.relationships.items():
-                    if (relationship.from_entity_id in project_entities or 
-                        relationship.to_entity_id in project_entities):
-                        project_relationships[rel_id] = relationship
+                for entity in project_entities.values():
+                    for rel_id in entity.relationships:
+                        if rel_id in self.relationships:
+                            project_relationships[rel_id] = self.relationships[rel_id]
             
             return {
                 "project_id": project_id,
@@ -515,26 +603,201 @@ class EnhancedKnowledgeBaseService:
         
         return synthesis
     
-    async def _save_knowledge(self):
-        """Save knowledge to storage."""
+    def _index_entity(self, entity: KnowledgeEntity) -> None:
+        """Add an entity to the secondary indexes."""
+        self._by_project[entity.project_id].add(entity.id)
+        self._by_type[entity.type].add(entity.id)
+        if entity.workflow_id:
+            self._by_workflow[entity.workflow_id].add(entity.id)
+    
+    def _unindex_entity(self, entity: KnowledgeEntity) -> None:
+        """Remove an entity from the secondary indexes."""
+        for index, key in (
+            (self._by_project, entity.project_id),
+            (self._by_type, entity.type),
+            (self._by_workflow, entity.workflow_id)
+        ):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(entity.id)
+                if not ids:
+                    del index[key]
+    
+    def _find_entity_ids(
+        self,
+        project_id: str,
+        knowledge_types: Iterable[KnowledgeType],
+        workflow_id: Optional[str] = None
+    ) -> Set[str]:
+        """Intersect the secondary indexes to find entities with an embedding."""
+        candidates = set(self._by_project.get(project_id, ()))
+        if not candidates:
+            return candidates
+        
+        by_type: Set[str] = set()
+        for knowledge_type in knowledge_types:
+            by_type |= self._by_type.get(knowledge_type, set())
+        candidates &= by_type
+        
+        if workflow_id:
+            candidates &= self._by_workflow.get(workflow_id, set())
+        
+        return {entity_id for entity_id in candidates if entity_id in self._entity_rows}
+    
+    def _delete_embeddings(self, entity_ids: Set[str]) -> None:
+        """Tombstone entity embeddings; rows are reclaimed by compaction."""
+        rows = [self._entity_rows.pop(entity_id) for entity_id in entity_ids if entity_id in self._entity_rows]
+        if not rows:
+            return
+        
+        mask = np.zeros(len(self.store.metadata), dtype=bool)
+        mask[rows] = True
+        self.store.delete(mask)
+    
+    def _schedule_compaction(self) -> None:
+        """Compact tombstoned rows in a background thread if enough have accumulated."""
+        if not self.store.needs_compaction:
+            return
+        if self._compaction_task is not None and not self._compaction_task.done():
+            return
+        
+        async def _compact() -> None:
+            try:
+                await self.store.compact_in_background()
+            except Exception as e:
+                logger.error(f"Error compacting knowledge embeddings: {str(e)}")
+            finally:
+                # Compaction renumbers rows
+                self._rebuild_entity_rows()
+        
+        self._compaction_task = asyncio.create_task(_compact())
+    
+    async def _wait_for_compaction(self) -> None:
+        """
+        Wait for a running compaction before resolving entity rows.
+        
+        Callers must not yield between this and their use of the rows.
+        """
+        if self._compaction_task is not None and not self._compaction_task.done():
+            await self._compaction_task
+    
+    def _rebuild_entity_rows(self) -> None:
+        """Map entity IDs to their vector store rows."""
+        self._entity_rows = {
+            self.store.metadata[row]["entity_id"]: int(row) for row in self.store.live_rows
+        }
+    
+    @staticmethod
+    def _entity_to_record(entity: KnowledgeEntity) -> Dict[str, Any]:
+        """Serialize an entity for storage."""
+        record = asdict(entity)
+        record["type"] = entity.type.value
+        record["source"] = entity.source.value
+        record["created_at"] = entity.created_at.isoformat()
+        record["updated_at"] = entity.updated_at.isoformat()
+        return record
+    
+    @staticmethod
+    def _entity_from_record(record: Dict[str, Any]) -> KnowledgeEntity:
+        """Deserialize a stored entity."""
+        return KnowledgeEntity(**{
+            **record,
+            "type": KnowledgeType(record["type"]),
+            "source": KnowledgeSource(record["source"]),
+            "created_at": datetime.fromisoformat(record["created_at"]),
+            "updated_at": datetime.fromisoformat(record["updated_at"])
+        })
+    
+    async def _save_knowledge(
+        self,
+        entity_ids: Iterable[str] = (),
+        relationship_ids: Iterable[str] = ()
+    ):
+        """
+        Save changed knowledge to storage.
+        
+        Args:
+            entity_ids: Entities to write
+            relationship_ids: Relationships to write
+        """
         try:
-            # This would typically save to persistent storage
-            # For now, just log the save operation
-            logger.info("Knowledge saved to storage")
+            self.entity_store.save(
+                entities=[
+                    self._entity_to_record(self.entities[entity_id])
+                    for entity_id in dict.fromkeys(entity_ids) if entity_id in self.entities
+                ],
+                relationships=[
+                    asdict(self.relationships[rel_id])
+                    for rel_id in relationship_ids if rel_id in self.relationships
+                ]
+            )
         except Exception as e:
             logger.error(f"Error saving knowledge: {str(e)}")
+            raise
     
     def _load_knowledge(self):
         """Load knowledge from storage."""
         try:
-            # This would typically load from persistent storage
-            # For now, just log the load operation
-            logger.info("Knowledge loaded from storage")
+            self.store.open(index_path=self.index_file)
+            
+            entities, relationships = self.entity_store.load()
+            for record in entities:
+                entity = self._entity_from_record(record)
+                self.entities[entity.id] = entity
+                self._index_entity(entity)
+            for record in relationships:
+                self.relationships[record["id"]] = KnowledgeRelationship(**record)
+            
+            self._rebuild_entity_rows()
+            
+            # Drop embeddings whose entity was never committed
+            orphans = set(self._entity_rows) - set(self.entities)
+            if orphans:
+                self._delete_embeddings(orphans)
+                if self.store.needs_compaction:
+                    # Nothing else uses the rows yet while loading
+                    self.store.compact()
+                    self._rebuild_entity_rows()
+                logger.warning(f"Removed {len(orphans)} orphaned knowledge embeddings")
+            
+            missing = len(self.entities) - len(self._entity_rows)
+            if missing:
+                logger.warning(f"{missing} knowledge entities have no embedding and are not searchable")
+            
+            logger.info(
+                f"Knowledge loaded from storage: {len(self.entities)} entities, "
+                f"{len(self.relationships)} relationships"
+            )
         except Exception as e:
             logger.error(f"Error loading knowledge: {str(e)}")
+    
+    async def close(self) -> None:
+        """Finish compaction, persist the vector index and close the entity store."""
+        await self._wait_for_compaction()
+        try:
+            self.store.index.save(self.index_file)
+        except Exception as e:
+            logger.error(f"Error saving knowledge index: {str(e)}")
+        self.entity_store.close()
+
+
+# Shared service instance, managed by the application lifespan
+_enhanced_knowledge_base_service: Optional[EnhancedKnowledgeBaseService] = None
 
 
-# Factory function
 def get_enhanced_knowledge_base_service() -> EnhancedKnowledgeBaseService:
-    """Get enhanced knowledge base service instance."""
-    return EnhancedKnowledgeBaseService()
+    """Get the shared enhanced knowledge base service, creating it on first use."""
+    global _enhanced_knowledge_base_service
+    
+    if _enhanced_knowledge_base_service is None:
+        _enhanced_knowledge_base_service = EnhancedKnowledgeBaseService()
+    return _enhanced_knowledge_base_service
+
+
+async def close_enhanced_knowledge_base_service() -> None:
+    """Persist and release the shared enhanced knowledge base service."""
+    global _enhanced_knowledge_base_service
+    
+    if _enhanced_knowledge_base_service is not None:
+        await _enhanced_knowledge_base_service.close()
+        _enhanced_knowledge_base_service = None
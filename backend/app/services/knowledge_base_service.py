@@ -12,17 +12,17 @@ Components:
 - Sentence Transformers: Text embeddings for semantic similarity
 """
 
+import asyncio
 import json
-import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import pinecone
 from loguru import logger
 from py2neo import Graph, Node, Relationship
-from sentence_transformers import SentenceTransformer
-
 from app.config import settings
+from app.services.embedding_service import get_embedding_service
+from app.services.knowledge_chunks import chunk_key, finalize_chunks
 
 
 class KnowledgeBaseService:
@@ -84,6 +84,7 @@ class KnowledgeBaseService:
         
         # Index configuration
         self.index_name = "archmesh-knowledge"
+        self.pinecone_batch_size = 100
         
         # Initialize services
         self._initialize_services()
@@ -122,9 +123,8 @@ class KnowledgeBaseService:
             else:
                 logger.warning("Pinecone credentials not provided, vector search disabled")
             
-            # Initialize embedding model
-            self.embedder = SentenceTransformer(self.embedding_model)
-            logger.info(f"Embedding model loaded: {self.embedding_model}")
+            # Shared embedding service, batches and caches encodes across services
+            self.embedder = get_embedding_service(self.embedding_model)
             
             # Initialize Neo4j
             self.graph = Graph(
@@ -198,6 +198,10 @@ class KnowledgeBaseService:
                 "project_id": project_id,
                 "indexed_at": datetime.utcnow().isoformat(),
                 "indexed_chunks": vector_results["chunks_indexed"],
+                "inserted": vector_results["inserted"],
+                "updated": vector_results["updated"],
+                "skipped": vector_results["skipped"],
+                "deleted": vector_results["deleted"],
                 "created_nodes": graph_results["nodes_created"],
                 "created_relationships": graph_results["relationships_created"],
                 "metadata_stored": metadata_results["success"],
@@ -253,8 +257,8 @@ class KnowledgeBaseService:
             Scalability Features: {json.dumps(arch.get('scalability', {}), indent=2)}
             """
             chunks.append({
-                "id": f"{project_id}_arch_{len(chunks)}",
-                "values": self._generate_embedding(text.strip()),
+                "id": f"{project_id}_arch",
+                "text": text.strip(),
                 "metadata": {
                     "project_id": project_id,
                     "chunk_type": "architecture",
@@ -277,8 +281,8 @@ class KnowledgeBaseService:
                 Scalability: {service.get('scalability', 'Unknown')}
                 """
                 chunks.append({
-                    "id": f"{project_id}_service_{len(chunks)}",
-                    "values": self._generate_embedding(text.strip()),
+                    "id": f"{project_id}_service_{chunk_key(service.get('name'))}",
+                    "text": text.strip(),
                     "metadata": {
                         "project_id": project_id,
                         "chunk_type": "service",
@@ -302,8 +306,8 @@ class KnowledgeBaseService:
             Testing Frameworks: {', '.join(tech.get('testing_frameworks', []))}
             """
             chunks.append({
-                "id": f"{project_id}_tech_{len(chunks)}",
-                "values": self._generate_embedding(text.strip()),
+                "id": f"{project_id}_tech",
+                "text": text.strip(),
                 "metadata": {
                     "project_id": project_id,
                     "chunk_type": "technology",
@@ -325,8 +329,8 @@ class KnowledgeBaseService:
                 Components: {', '.join(contract.get('components', []))}
                 """
                 chunks.append({
-                    "id": f"{project_id}_api_{len(chunks)}",
-                    "values": self._generate_embedding(text.strip()),
+                    "id": f"{project_id}_api_{chunk_key(contract.get('title'))}",
+                    "text": text.strip(),
                     "metadata": {
                         "project_id": project_id,
                         "chunk_type": "api_contract",
@@ -352,8 +356,8 @@ class KnowledgeBaseService:
             {chr(10).join(recommendations_text)}
             """
             chunks.append({
-                "id": f"{project_id}_rec_{len(chunks)}",
-                "values": self._generate_embedding(text.strip()),
+                "id": f"{project_id}_rec",
+                "text": text.strip(),
                 "metadata": {
                     "project_id": project_id,
                     "chunk_type": "recommendations",
@@ -363,7 +367,7 @@ class KnowledgeBaseService:
                 }
             })
         
-        return chunks
+        return finalize_chunks(chunks)
 
     async def _index_vectors(
         self,
@@ -372,7 +376,12 @@ class KnowledgeBaseService:
         chunks: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """
-        Generate embeddings and store vectors in Pinecone.
+        Generate embeddings and store vectors in Pinecone incrementally.
+        
+        Vectors are keyed by chunk ID. Chunks whose stored content hash is
+        unchanged are skipped, changed chunks are upserted over their previous
+        vector and vectors of chunks no longer in the analysis are deleted by
+        ID. Pinecone client calls are blocking and run in worker threads.
         
         Args:
             project_id: Project identifier
@@ -384,40 +393,123 @@ class KnowledgeBaseService:
         """
         if not self.index or not self.embedder:
             logger.warning("Pinecone or embedder not available, skipping vector indexing")
-            return {"chunks_indexed": 0, "success": False}
+            return {"chunks_indexed": 0, "inserted": 0, "updated": 0, "skipped": 0, "deleted": 0,
+                    "success": False}
         
         try:
-            # Generate embeddings
-            texts = [chunk["text"] for chunk in chunks]
-            embeddings = self.embedder.encode(texts).tolist()
+            # Compare content hashes with the vectors already stored for the project
+            chunk_ids = [chunk["id"] for chunk in chunks]
+            previous_ids = await asyncio.to_thread(self._list_project_vector_ids, project_id)
+            previous_hashes = await asyncio.to_thread(
+                self._fetch_content_hashes, project_id, sorted(set(previous_ids) | set(chunk_ids))
+            )
+            changed = [
+                chunk for chunk in chunks
+                if previous_hashes.get(chunk["id"]) != chunk["metadata"]["content_hash"]
+            ]
+            
+            # Generate embeddings for new and changed chunks in batched model calls
+            embeddings = (await self.embedder.embed_many([chunk["text"] for chunk in changed])).tolist()
             
             # Prepare vectors for Pinecone
             vectors = []
-            for i, (embedding, chunk) in enumerate(zip(embeddings, chunks)):
-                vector_id = f"{project_id}_{uuid.uuid4().hex[:8]}_{i}"
-                
+            for embedding, chunk in zip(embeddings, changed):
                 vectors.append({
-                    "id": vector_id,
+                    "id": chunk["id"],
                     "values": embedding,
                     "metadata": {
                         "project_id": project_id,
                         "repository_url": repository_url,
-                        "chunk_type": chunk["type"],
+                        "chunk_id": chunk["id"],
+                        "chunk_type": chunk["metadata"].get("chunk_type"),
                         "content": chunk["text"][:1000],  # Truncate for metadata
                         "indexed_at": datetime.utcnow().isoformat(),
                         **chunk.get("metadata", {})
                     }
                 })
             
-            # Upload to Pinecone
-            self.index.upsert(vectors=vectors)
+            # Upload to Pinecone; upserts replace previous versions in place
+            for start in range(0, len(vectors), self.pinecone_batch_size):
+                await asyncio.to_thread(
+                    self.index.upsert, vectors=vectors[start:start + self.pinecone_batch_size]
+                )
             
-            logger.debug(f"Indexed {len(vectors)} vectors in Pinecone")
-            return {"chunks_indexed": len(vectors), "success": True}
+            # Remove vectors of chunks that no longer exist
+            current_ids = set(chunk_ids)
+            stale_ids = sorted(vector_id for vector_id in previous_hashes if vector_id not in current_ids)
+            for start in range(0, len(stale_ids), self.pinecone_batch_size):
+                await asyncio.to_thread(
+                    self.index.delete, ids=stale_ids[start:start + self.pinecone_batch_size]
+                )
+            
+            inserted = sum(1 for chunk in changed if chunk["id"] not in previous_hashes)
+            result = {
+                "chunks_indexed": len(chunks),
+                "inserted": inserted,
+                "updated": len(changed) - inserted,
+                "skipped": len(chunks) - len(changed),
+                "deleted": len(stale_ids),
+                "success": True
+            }
+            logger.debug(f"Indexed vectors in Pinecone: {result}")
+            return result
             
         except Exception as e:
             logger.error(f"Error indexing vectors: {str(e)}")
-            return {"chunks_indexed": 0, "success": False, "error": str(e)}
+            return {"chunks_indexed": 0, "inserted": 0, "updated": 0, "skipped": 0, "deleted": 0,
+                    "success": False, "error": str(e)}
+
+    def _list_project_vector_ids(self, project_id: str) -> List[str]:
+        """
+        List the IDs of vectors that may belong to a project.
+        
+        Chunk IDs are prefixed with the project ID, so the IDs are listed by
+        prefix. The result can include IDs of other projects sharing the
+        prefix; callers filter them by metadata. Indexes that cannot list IDs
+        fall back to a metadata-filtered query.
+        
+        Args:
+            project_id: Project identifier
+            
+        Returns:
+            Candidate vector IDs
+        """
+        if hasattr(self.index, "list"):
+            ids = []
+            for page in self.index.list(prefix=f"{project_id}_"):
+                ids.extend(page)
+            return ids
+        
+        probe = [1.0] + [0.0] * (self.embedding_dimension - 1)
+        results = self.index.query(
+            vector=probe,
+            top_k=10000,
+            include_metadata=False,
+            filter={"project_id": {"$eq": project_id}}
+        )
+        return [match["id"] for match in results["matches"]]
+
+    def _fetch_content_hashes(self, project_id: str, ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Fetch the stored content hash of a project's existing vectors.
+        
+        Args:
+            project_id: Project the vectors must belong to
+            ids: Vector IDs to look up
+            
+        Returns:
+            Mapping of the project's existing vector IDs to their content hash
+        """
+        hashes = {}
+        for start in range(0, len(ids), self.pinecone_batch_size):
+            response = self.index.fetch(ids=ids[start:start + self.pinecone_batch_size])
+            vectors = response.vectors if hasattr(response, "vectors") else response.get("vectors", {})
+            for vector_id, vector in (vectors or {}).items():
+                metadata = (vector.metadata if hasattr(vector, "metadata") else vector.get("metadata")) or {}
+                if metadata.get("project_id", project_id) != project_id:
+                    continue
+                hashes[vector_id] = metadata.get("content_hash")
+        return hashes
 
     def _create_architecture_graph(
         self,
@@ -583,7 +675,7 @@ class KnowledgeBaseService:
         
         try:
             # Generate query embedding
-            query_embedding = self.embedder.encode([query])[0].tolist()
+            query_embedding = (await self.embedder.embed(query)).tolist()
             
             # Prepare filter
             filter_dict = {}
@@ -957,9 +1049,9 @@ class KnowledgeBaseService:
         
         return status
 
-    def _generate_embedding(self, text: str) -> List[float]:
+    async def _generate_embedding(self, text: str) -> List[float]:
         """
-        Generate embedding for a single text.
+        Generate embedding for a single text off the event loop.
         
         Args:
             text: Text to embed
@@ -971,8 +1063,7 @@ class KnowledgeBaseService:
             return []
         
         try:
-            embedding = self.embedder.encode([text])[0]
-            return embedding.tolist()
+            return (await self.embedder.embed(text)).tolist()
         except Exception as e:
             logger.error(f"Error generating embedding: {str(e)}")
             return []
@@ -0,0 +1,66 @@
+"""
+Helpers for building stable, content-addressed knowledge base chunks.
+
+Chunk IDs are derived from what a chunk describes (the project plus, for
+example, the service name) rather than its position in the analysis, and
+each chunk carries a hash of its content. Re-indexing the same repository
+can therefore match chunks to their previous version and skip, replace or
+remove them instead of appending duplicates.
+"""
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, List
+
+
+def chunk_key(value: Any) -> str:
+    """
+    Turn a name into a stable chunk ID component.
+
+    Args:
+        value: Name such as a service or API title
+
+    Returns:
+        Lowercase slug, ``unknown`` for empty names
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", str(value or "").lower()).strip("-")
+    return slug or "unknown"
+
+
+def content_hash(text: str, metadata: Dict[str, Any]) -> str:
+    """
+    Hash a chunk's text and metadata.
+
+    Args:
+        text: Text that is embedded
+        metadata: Stored chunk metadata
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps({"text": text, "metadata": metadata}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def finalize_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Make chunk IDs unique and stamp each chunk with its content hash.
+
+    Repeated IDs (for example two services with the same name) get a
+    numeric suffix in order of appearance.
+
+    Args:
+        chunks: Chunks with ``id``, ``text`` and ``metadata`` keys
+
+    Returns:
+        The same chunks, updated in place
+    """
+    seen: Dict[str, int] = {}
+    for chunk in chunks:
+        base_id = chunk["id"]
+        seen[base_id] = seen.get(base_id, 0) + 1
+        if seen[base_id] > 1:
+            chunk["id"] = f"{base_id}_{seen[base_id]}"
+        chunk["metadata"]["content_hash"] = content_hash(chunk["text"], chunk["metadata"])
+    return chunks
@@ -0,0 +1,145 @@
+"""
+Durable storage for enhanced knowledge base entities and relationships.
+
+Entities and relationships are kept in a SQLite database next to the
+knowledge base's vector segments. Rows are written as they change, so the
+knowledge base survives restarts, and indexed by project so project-scoped
+loads and deletes never scan the whole table.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    id TEXT PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    workflow_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entities_project_type ON entities (project_id, type);
+CREATE INDEX IF NOT EXISTS idx_entities_workflow ON entities (workflow_id);
+
+CREATE TABLE IF NOT EXISTS relationships (
+    id TEXT PRIMARY KEY,
+    from_entity_id TEXT NOT NULL,
+    to_entity_id TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_relationships_from ON relationships (from_entity_id);
+CREATE INDEX IF NOT EXISTS idx_relationships_to ON relationships (to_entity_id);
+"""
+
+
+class KnowledgeEntityStore:
+    """
+    SQLite store for serialized knowledge entities and relationships.
+
+    Records are stored as JSON documents alongside the columns used for
+    lookups (project, type, workflow and relationship endpoints).
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open or create the store.
+
+        Args:
+            path: SQLite database file path
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def save(
+        self,
+        entities: Iterable[Dict[str, Any]] = (),
+        relationships: Iterable[Dict[str, Any]] = ()
+    ) -> None:
+        """
+        Insert or replace entities and relationships in one transaction.
+
+        Values JSON cannot represent natively, such as datetimes in metadata,
+        are stored as strings.
+
+        Args:
+            entities: Serialized entities with id, project_id, type and workflow_id keys
+            relationships: Serialized relationships with id and endpoint keys
+        """
+        entity_rows = [
+            (e["id"], e["project_id"], e["type"], e.get("workflow_id"), json.dumps(e, default=str))
+            for e in entities
+        ]
+        relationship_rows = [
+            (r["id"], r["from_entity_id"], r["to_entity_id"], json.dumps(r, default=str))
+            for r in relationships
+        ]
+        with self._lock, self._conn:
+            if entity_rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO entities (id, project_id, type, workflow_id, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    entity_rows
+                )
+            if relationship_rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO relationships (id, from_entity_id, to_entity_id, data) "
+                    "VALUES (?, ?, ?, ?)",
+                    relationship_rows
+                )
+
+    def load(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Load every stored entity and relationship.
+
+        Returns:
+            Tuple of (serialized entities, serialized relationships)
+        """
+        with self._lock:
+            entities = [json.loads(data) for (data,) in self._conn.execute("SELECT data FROM entities")]
+            relationships = [
+                json.loads(data) for (data,) in self._conn.execute("SELECT data FROM relationships")
+            ]
+        return entities, relationships
+
+    def delete_project(self, project_id: str) -> int:
+        """
+        Delete a project's entities and every relationship touching them.
+
+        Args:
+            project_id: Project ID
+
+        Returns:
+            Number of entities deleted
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM relationships WHERE from_entity_id IN "
+                "(SELECT id FROM entities WHERE project_id = ?) "
+                "OR to_entity_id IN (SELECT id FROM entities WHERE project_id = ?)",
+                (project_id, project_id)
+            )
+            return self._conn.execute(
+                "DELETE FROM entities WHERE project_id = ?", (project_id,)
+            ).rowcount
+
+    def count(self) -> Dict[str, int]:
+        """Get the number of stored entities and relationships."""
+        with self._lock:
+            entities = self._conn.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+            relationships = self._conn.execute("SELECT COUNT(*) FROM relationships").fetchone()[0]
+        return {"entities": entities, "relationships": relationships}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -17,13 +17,14 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple, Union
 from pathlib import Path
 import pickle
+import asyncio
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
 from loguru import logger
-from sentence_transformers import SentenceTransformer
-
 from app.config import settings
+from app.services.embedding_service import get_embedding_service
+from app.services.knowledge_chunks import chunk_key, finalize_chunks
+from app.services.vector_store import MmapVectorStore, create_index
 
 
 class LocalKnowledgeBaseService:
@@ -48,7 +49,8 @@ class LocalKnowledgeBaseService:
         embedding_model: str = "all-MiniLM-L6-v2",
         neo4j_uri: Optional[str] = None,
         neo4j_user: Optional[str] = None,
-        neo4j_password: Optional[str] = None
+        neo4j_password: Optional[str] = None,
+        index_type: Optional[str] = None
     ):
         """
         Initialize the local knowledge base service.
@@ -59,6 +61,7 @@ class LocalKnowledgeBaseService:
             neo4j_uri: Optional Neo4j URI for graph storage
             neo4j_user: Optional Neo4j username
             neo4j_password: Optional Neo4j password
+            index_type: Vector index backend (exact or ivf_flat), defaults to settings
         """
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(exist_ok=True)
@@ -71,9 +74,21 @@ class LocalKnowledgeBaseService:
         self.neo4j_user = neo4j_user or settings.neo4j_user
         self.neo4j_password = neo4j_password or settings.neo4j_password
         
-        # Local storage
-        self.vectors = []  # List of vectors
-        self.metadata = []  # List of metadata
+        # Local storage: memory-mapped, append-only segments with row-aligned metadata
+        self.index_type = index_type or settings.knowledge_base_index_type
+        self.store = MmapVectorStore(
+            self.storage_path / "segments",
+            dimension=self.embedding_dimension,
+            index=create_index(
+                self.index_type,
+                n_lists=settings.knowledge_base_ivf_n_lists,
+                n_probe=settings.knowledge_base_ivf_n_probe
+            )
+        )
+        self.index_file = self.storage_path / f"{self.index_type}_index.npz"
+        self._compaction_task: Optional[asyncio.Task] = None
+        
+        # Legacy whole-file storage, migrated into segments on first start
         self.embeddings_file = self.storage_path / "embeddings.pkl"
         self.metadata_file = self.storage_path / "metadata.json"
         
@@ -87,12 +102,21 @@ class LocalKnowledgeBaseService:
         
         logger.info("Local Knowledge Base Service initialized", extra={"service": "local_knowledge_base"})
 
+    @property
+    def vectors(self) -> np.ndarray:
+        """Normalised stored vectors, one row per chunk."""
+        return self.store.vectors
+
+    @property
+    def metadata(self) -> List[Dict[str, Any]]:
+        """Metadata of stored chunks that have not been deleted."""
+        return self.store.live_metadata
+
     def _initialize_services(self) -> None:
         """Initialize embedding model and Neo4j (if available)."""
         try:
-            # Initialize embedding model
-            self.embedder = SentenceTransformer(self.embedding_model)
-            logger.info(f"Embedding model loaded: {self.embedding_model}")
+            # Shared embedding service, batches and caches encodes across services
+            self.embedder = get_embedding_service(self.embedding_model)
             
             # Try to initialize Neo4j (optional)
             try:
@@ -113,40 +137,56 @@ class LocalKnowledgeBaseService:
             raise
 
     def _load_stored_data(self) -> None:
-        """Load existing vectors and metadata from storage."""
+        """Open the segment store, migrating legacy pickle/JSON storage if present."""
+        self.store.open(index_path=self.index_file)
+        logger.info(f"Opened vector store with {len(self.store)} vectors")
+        
+        if len(self.store) > 0 or not (self.embeddings_file.exists() and self.metadata_file.exists()):
+            return
+        
         try:
-            if self.embeddings_file.exists():
-                with open(self.embeddings_file, 'rb') as f:
-                    self.vectors = pickle.load(f)
-                logger.info(f"Loaded {len(self.vectors)} vectors from storage")
-            
-            if self.metadata_file.exists():
-                with open(self.metadata_file, 'r') as f:
-                    self.metadata = json.load(f)
-                logger.info(f"Loaded {len(self.metadata)} metadata entries from storage")
+            with open(self.embeddings_file, 'rb') as f:
+                vectors = pickle.load(f)
+
+            with open(self.metadata_file, 'r') as f:
+                metadata = json.load(f)
+
+            self.store.bulk_load(vectors, metadata)
+            self._save_data()
+            logger.info(f"Migrated {len(self.store)} vectors from legacy storage")
                 
         except Exception as e:
-            logger.warning(f"Error loading stored data: {str(e)}")
-            self.vectors = []
-            self.metadata = []
+            logger.warning(f"Error migrating legacy stored data: {str(e)}")
 
     def _save_data(self) -> None:
-        """Save vectors and metadata to storage."""
+        """Persist the vector index; vectors and metadata are appended by the store."""
         try:
-            with open(self.embeddings_file, 'wb') as f:
-                pickle.dump(self.vectors, f)
-            
-            with open(self.metadata_file, 'w') as f:
-                json.dump(self.metadata, f, indent=2)
+            self.store.index.save(self.index_file)
                 
         except Exception as e:
             logger.error(f"Error saving data: {str(e)}")
 
-    def _generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text."""
+    def _schedule_compaction(self) -> None:
+        """Compact tombstoned rows in a background thread if enough have accumulated."""
+        if not self.store.needs_compaction:
+            return
+        if self._compaction_task is not None and not self._compaction_task.done():
+            return
+        
+        async def _compact() -> None:
+            try:
+                await self.store.compact_in_background()
+                self._save_data()
+            except Exception as e:
+                logger.error(f"Error compacting vector store: {str(e)}")
+        
+        self._compaction_task = asyncio.create_task(_compact())
+
+    async def _generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings for texts in as few model calls as possible."""
         if not self.embedder:
             raise RuntimeError("Embedding model not initialized")
-        return self.embedder.encode([text])[0].tolist()
+        return await self.embedder.embed_many(texts)
 
     async def index_repository_analysis(
         self,
@@ -180,22 +220,35 @@ class LocalKnowledgeBaseService:
             # Create searchable chunks from analysis
             chunks = self._create_searchable_chunks(project_id, analysis)
             
-            # Store vectors and metadata
-            for chunk in chunks:
-                self.vectors.append(chunk["values"])
-                self.metadata.append(chunk["metadata"])
+            # Embed only chunks that are new or whose content changed
+            previous_hashes = {
+                chunk_id: content_hash
+                for chunk_id, (_, content_hash) in self._project_chunks(project_id).items()
+            }
+            changed = [
+                chunk for chunk in chunks
+                if previous_hashes.get(chunk["id"]) != chunk["metadata"]["content_hash"]
+            ]
+            embeddings = await self._generate_embeddings([chunk["text"] for chunk in changed])
+            
+            # Apply the changes; rows are renumbered by compaction, so wait for
+            # any running compaction and resolve rows without yielding afterwards
+            if self._compaction_task is not None and not self._compaction_task.done():
+                await self._compaction_task
+            changes = self._apply_chunk_changes(project_id, chunks, changed, embeddings)
             
             # Store in graph database if available
             graph_results = await self._store_in_graph(project_id, analysis)
             
-            # Save to local storage
+            # Persist the vector index
             self._save_data()
             
             result = {
                 "indexed_chunks": len(chunks),
+                **changes,
                 "created_nodes": graph_results.get("nodes_created", 0),
                 "created_relationships": graph_results.get("relationships_created", 0),
-                "total_vectors": len(self.vectors),
+                "total_vectors": len(self.store),
                 "total_metadata": len(self.metadata)
             }
             
@@ -204,6 +257,10 @@ class LocalKnowledgeBaseService:
                 extra={
                     "project_id": project_id,
                     "chunks_indexed": result["indexed_chunks"],
+                    "chunks_inserted": result["inserted"],
+                    "chunks_updated": result["updated"],
+                    "chunks_skipped": result["skipped"],
+                    "chunks_deleted": result["deleted"],
                     "service": "local_knowledge_base"
                 }
             )
@@ -214,6 +271,74 @@ class LocalKnowledgeBaseService:
             logger.error(f"Failed to index repository analysis: {str(e)}")
             raise
 
+    def _project_chunks(self, project_id: str) -> Dict[str, Tuple[int, Optional[str]]]:
+        """Map a project's stored chunk IDs to their (row, content hash)."""
+        rows = np.intersect1d(
+            np.flatnonzero(self.store.build_mask({"project_id": project_id})), self.store.live_rows
+        )
+        chunks = {}
+        for row in rows:
+            entry = self.store.metadata[row]
+            chunks.setdefault(entry.get("id"), (int(row), entry.get("content_hash")))
+        return chunks
+
+    def _apply_chunk_changes(
+        self,
+        project_id: str,
+        chunks: List[Dict[str, Any]],
+        changed: List[Dict[str, Any]],
+        embeddings: np.ndarray
+    ) -> Dict[str, int]:
+        """
+        Reconcile a project's stored chunks with a fresh set of chunks.
+        
+        Changed chunks replace their previous row in place, new chunks are
+        appended and stored chunks that no longer exist are tombstoned.
+        
+        Args:
+            project_id: Project identifier
+            chunks: Every chunk of the new analysis
+            changed: Chunks that are new or changed, aligned with ``embeddings``
+            embeddings: Embeddings of the changed chunks
+            
+        Returns:
+            Inserted, updated, skipped and deleted chunk counts
+        """
+        previous = self._project_chunks(project_id)
+        
+        # Rows of vanished chunks, plus duplicate rows left by earlier full re-indexing
+        current_ids = {chunk["id"] for chunk in chunks}
+        kept_rows = [row for chunk_id, (row, _) in previous.items() if chunk_id in current_ids]
+        stale = np.flatnonzero(self.store.build_mask({"project_id": project_id}))
+        stale = stale[~np.isin(stale, kept_rows)]
+        
+        inserts = []
+        updated = 0
+        for chunk, embedding in zip(changed, embeddings):
+            metadata = {"id": chunk["id"], **chunk["metadata"]}
+            if chunk["id"] in previous:
+                self.store.update(previous[chunk["id"]][0], embedding, metadata)
+                updated += 1
+            else:
+                inserts.append((embedding, metadata))
+        
+        if inserts:
+            self.store.add_many([vector for vector, _ in inserts], [metadata for _, metadata in inserts])
+        
+        deleted = 0
+        if stale.size:
+            mask = np.zeros(len(self.store.metadata), dtype=bool)
+            mask[stale] = True
+            deleted = self.store.delete(mask)
+            self._schedule_compaction()
+        
+        return {
+            "inserted": len(inserts),
+            "updated": updated,
+            "skipped": len(chunks) - len(changed),
+            "deleted": deleted
+        }
+
     def _create_searchable_chunks(self, project_id: str, analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Create text chunks from analysis for embedding."""
         chunks = []
@@ -230,8 +355,8 @@ class LocalKnowledgeBaseService:
             Scalability Features: {json.dumps(arch.get('scalability', {}), indent=2)}
             """
             chunks.append({
-                "id": f"{project_id}_arch_{len(chunks)}",
-                "values": self._generate_embedding(text.strip()),
+                "id": f"{project_id}_arch",
+                "text": text.strip(),
                 "metadata": {
                     "project_id": project_id,
                     "chunk_type": "architecture",
@@ -254,8 +379,8 @@ class LocalKnowledgeBaseService:
                 Scalability: {service.get('scalability', 'Unknown')}
                 """
                 chunks.append({
-                    "id": f"{project_id}_service_{len(chunks)}",
-                    "values": self._generate_embedding(text.strip()),
+                    "id": f"{project_id}_service_{chunk_key(service.get('name'))}",
+                    "text": text.strip(),
                     "metadata": {
                         "project_id": project_id,
                         "chunk_type": "service",
@@ -278,8 +403,8 @@ class LocalKnowledgeBaseService:
             Build Tools: {', '.join(tech.get('build_tools', []))}
             """
             chunks.append({
-                "id": f"{project_id}_tech_{len(chunks)}",
-                "values": self._generate_embedding(text.strip()),
+                "id": f"{project_id}_tech",
+                "text": text.strip(),
                 "metadata": {
                     "project_id": project_id,
                     "chunk_type": "technology",
@@ -289,7 +414,7 @@ class LocalKnowledgeBaseService:
                 }
             })
         
-        return chunks
+        return finalize_chunks(chunks)
 
     async def _store_in_graph(self, project_id: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Store analysis results in Neo4j graph database."""
@@ -367,7 +492,8 @@ class LocalKnowledgeBaseService:
         query: str,
         project_id: Optional[str] = None,
         top_k: int = 5,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        exact: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Search for similar architectures using semantic search.
@@ -377,50 +503,66 @@ class LocalKnowledgeBaseService:
             project_id: Optional filter by project
             top_k: Number of results to return
             filters: Optional filter dictionary
+            exact: Bypass the approximate index and scan every vector
             
         Returns:
             List of similar architecture results with scores and metadata
         """
-        if not self.vectors or not self.embedder:
+        if len(self.store) == 0 or not self.embedder:
             logger.warning("No vectors available for search")
             return []
         
         try:
             # Generate query embedding
-            query_embedding = self._generate_embedding(query)
-            query_vector = np.array(query_embedding).reshape(1, -1)
-            
-            # Calculate similarities
-            similarities = []
-            for i, vector in enumerate(self.vectors):
-                # Apply filters
-                metadata = self.metadata[i]
-                if project_id and metadata.get("project_id") != project_id:
-                    continue
-                
-                if filters:
-                    for key, value in filters.items():
-                        if metadata.get(key) != value:
-                            continue
-                
-                # Calculate cosine similarity
-                vector_array = np.array(vector).reshape(1, -1)
-                similarity = cosine_similarity(query_vector, vector_array)[0][0]
-                
-                similarities.append({
-                    "id": metadata.get("id", f"chunk_{i}"),
-                    "score": float(similarity),
-                    "metadata": metadata
-                })
+            query_embedding = (await self._generate_embeddings([query]))[0]
+            
+            # Apply project and metadata filters as a boolean mask
+            search_filters = dict(filters or {})
+            if project_id:
+                search_filters["project_id"] = project_id
             
-            # Sort by similarity and return top_k
-            similarities.sort(key=lambda x: x["score"], reverse=True)
-            return similarities[:top_k]
+            # Score all candidate rows at once and select top_k
+            matches = self.store.search(
+                query_embedding, top_k=top_k, filters=search_filters, exact=exact
+            )
+            
+            return [
+                {
+                    "id": self.store.metadata[row].get("id", f"chunk_{row}"),
+                    "score": score,
+                    "metadata": self.store.metadata[row]
+                }
+                for row, score in matches
+            ]
             
         except Exception as e:
             logger.error(f"Error in semantic search: {str(e)}")
             return []
 
+    async def delete_project(self, project_id: str) -> int:
+        """
+        Remove all indexed chunks for a project.
+        
+        Args:
+            project_id: Project identifier
+            
+        Returns:
+            Number of chunks removed
+        """
+        deleted = self.store.delete_where({"project_id": project_id})
+        if deleted:
+            self._schedule_compaction()
+        
+        logger.info(
+            "Deleted project chunks from knowledge base",
+            extra={
+                "project_id": project_id,
+                "chunks_deleted": deleted,
+                "service": "local_knowledge_base"
+            }
+        )
+        return deleted
+
     async def get_service_dependencies(self, project_id: str) -> List[Dict[str, Any]]:
         """Get service dependencies for a project."""
         if not self.graph:
@@ -648,7 +790,7 @@ class LocalKnowledgeBaseService:
         return {
             "embedder": self.embedder is not None,
             "graph": self.graph is not None,
-            "vectors_loaded": len(self.vectors) > 0,
+            "vectors_loaded": len(self.store) > 0,
             "metadata_loaded": len(self.metadata) > 0,
             "overall": self.embedder is not None
         }
@@ -658,8 +800,47 @@ class LocalKnowledgeBaseService:
         return {
             "embedding_model": self.embedding_model,
             "embedding_dimension": self.embedding_dimension,
-            "vectors_count": len(self.vectors),
+            "vectors_count": len(self.store),
             "metadata_count": len(self.metadata),
             "neo4j_available": self.graph is not None,
+            "vector_index": self.store.index.get_stats(),
+            "vector_storage": self.store.get_stats(),
             "storage_path": str(self.storage_path)
         }
+
+    async def close(self) -> None:
+        """Finish background compaction and persist the vector index."""
+        if self._compaction_task is not None and not self._compaction_task.done():
+            await self._compaction_task
+        self._save_data()
+
+
+# Shared service instance, managed by the application lifespan
+_local_knowledge_base_service: Optional[LocalKnowledgeBaseService] = None
+
+
+def get_local_knowledge_base_service() -> LocalKnowledgeBaseService:
+    """
+    Get the shared local knowledge base service, creating it on first use.
+    
+    Returns:
+        LocalKnowledgeBaseService: Process-wide service instance
+    """
+    global _local_knowledge_base_service
+    
+    if _local_knowledge_base_service is None:
+        _local_knowledge_base_service = LocalKnowledgeBaseService()
+    return _local_knowledge_base_service
+
+
+async def close_local_knowledge_base_service() -> None:
+    """
+    Close the shared local knowledge base service.
+    
+    Should be called during application shutdown.
+    """
+    global _local_knowledge_base_service
+    
+    if _local_knowledge_base_service is not None:
+        await _local_knowledge_base_service.close()
+        _local_knowledge_base_service = None
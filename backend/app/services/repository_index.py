@@ -0,0 +1,376 @@
+"""
+Single-pass file index of a repository checkout.
+
+``RepositoryIndex.scan`` walks the checkout once with ``os.scandir`` and
+records every file's path, size, extension, language and classification.
+Dependency, build output and hidden directories are skipped, as are paths
+matched by the repository's ``.gitignore`` files. Repository analysis
+stages query the index instead of walking the tree again, and file
+contents are only read, once, when a stage asks for them.
+"""
+
+import fnmatch
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+# Directories never indexed (in addition to hidden directories)
+DEFAULT_IGNORED_DIRS = frozenset({
+    '.git', '.github', '.vscode', '.idea', 'node_modules', 'venv',
+    '__pycache__', 'dist', 'build', 'target', '.gradle', 'vendor',
+    'coverage', '.nyc_output', 'logs', 'tmp', 'temp'
+})
+
+PACKAGE_MANAGER_FILES = frozenset({
+    'package.json', 'requirements.txt', 'pom.xml', 'go.mod',
+    'Cargo.toml', 'composer.json', 'Gemfile', 'pubspec.yaml'
+})
+
+KUBERNETES_PATH_MARKERS = ('k8s', 'kubernetes', 'deploy', 'manifests')
+
+
+@dataclass(frozen=True)
+class IndexedFile:
+    """A file in the repository index."""
+    path: str  # POSIX path relative to the repository root
+    size: int
+    extension: str
+    language: Optional[str]
+    category: Optional[str]
+
+    @property
+    def name(self) -> str:
+        """File name without directories."""
+        return self.path.rsplit('/', 1)[-1]
+
+    @property
+    def directory(self) -> str:
+        """Directory relative to the repository root, empty at the root."""
+        return self.path.rsplit('/', 1)[0] if '/' in self.path else ''
+
+
+def classify_file(path: str) -> Optional[str]:
+    """
+    Classify a file by the role its name and location suggest.
+
+    Args:
+        path: POSIX path relative to the repository root
+
+    Returns:
+        Category such as ``readme`` or ``package_managers``, or None
+    """
+    directory, _, name = path.rpartition('/')
+    name_lower = name.lower()
+    if 'readme' in name_lower:
+        return "readme"
+    if 'docker-compose' in name_lower or name_lower == 'compose.yml':
+        return "docker_compose"
+    if name.endswith(('.yaml', '.yml')) and any(marker in directory.lower() for marker in KUBERNETES_PATH_MARKERS):
+        return "kubernetes"
+    if any(api in name_lower for api in ['openapi', 'swagger', 'api.yaml', 'api.yml']):
+        return "openapi"
+    if name in PACKAGE_MANAGER_FILES:
+        return "package_managers"
+    if any(config in name_lower for config in ['config', 'settings', 'env']):
+        return "config_files"
+    if any(test in name_lower for test in ['test', 'spec', 'specs']):
+        return "test_files"
+    if name.endswith(('.md', '.rst', '.txt')):
+        return "documentation"
+    return None
+
+
+def _translate_gitignore_glob(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression body."""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == len(pattern):
+            regex.append('/.*')
+            i += 3
+        elif pattern.startswith('**', i):
+            regex.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            regex.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            regex.append('[^/]')
+            i += 1
+        elif pattern[i] == '[' and ']' in pattern[i + 1:]:
+            end = pattern.index(']', i + 1)
+            body = pattern[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            regex.append(f'[{body}]')
+            i = end + 1
+        elif pattern[i] == '\\' and i + 1 < len(pattern):
+            regex.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(regex)
+
+
+@dataclass(frozen=True)
+class _IgnoreRule:
+    base: str  # Directory of the .gitignore, relative to the repository root
+    regex: "re.Pattern[str]"
+    negated: bool
+    dir_only: bool
+    anchored: bool
+
+    def matches(self, path: str, name: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not path.startswith(self.base + '/'):
+                return False
+            path = path[len(self.base) + 1:]
+        return bool(self.regex.match(path if self.anchored else name))
+
+
+def parse_gitignore(text: str, base: str = '') -> List[_IgnoreRule]:
+    """
+    Parse the rules of a ``.gitignore`` file.
+
+    Args:
+        text: File contents
+        base: Directory containing the file, relative to the repository root
+
+    Returns:
+        Rules in file order
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        anchored = '/' in line
+        line = line.lstrip('/')
+        regex = re.compile(_translate_gitignore_glob(line) + '$')
+        rules.append(_IgnoreRule(base, regex, negated, dir_only, anchored))
+    return rules
+
+
+def _is_ignored(rules: List[_IgnoreRule], path: str, name: str, is_dir: bool) -> bool:
+    """Apply gitignore rules; the last matching rule decides."""
+    ignored = False
+    for rule in rules:
+        if rule.matches(path, name, is_dir):
+            ignored = not rule.negated
+    return ignored
+
+
+class RepositoryIndex:
+    """
+    In-memory index of the files in a repository checkout.
+
+    Built once per analysis by ``scan``. Contents read through ``read_text``
+    are cached, so stages looking at the same file share one read.
+    """
+
+    def __init__(self, root: str, files: Iterable[IndexedFile]):
+        """
+        Initialize the index.
+
+        Args:
+            root: Path of the repository checkout
+            files: Indexed files
+        """
+        self.root = root
+        self.files: List[IndexedFile] = sorted(files, key=lambda f: f.path)
+        self._by_path: Dict[str, IndexedFile] = {f.path: f for f in self.files}
+        self._contents: Dict[str, str] = {}
+
+    @classmethod
+    def scan(
+        cls,
+        root: str,
+        languages: Optional[Dict[str, str]] = None,
+        ignored_dirs: Iterable[str] = DEFAULT_IGNORED_DIRS,
+        use_gitignore: bool = True
+    ) -> "RepositoryIndex":
+        """
+        Walk a checkout once and index its files.
+
+        Like ``os.walk``, directories that cannot be read are skipped and
+        symlinked directories are not followed.
+
+        Args:
+            root: Path of the repository checkout
+            languages: Language by file extension
+            ignored_dirs: Directory names never descended into
+            use_gitignore: Whether to apply the repository's ``.gitignore`` files
+
+        Returns:
+            Repository index
+        """
+        languages = languages or {}
+        ignored_dirs = frozenset(ignored_dirs)
+        files: List[IndexedFile] = []
+        skipped = 0
+        # Directories still to scan, with the gitignore rules that apply to them
+        pending: List[Tuple[str, List[_IgnoreRule]]] = [('', [])]
+
+        while pending:
+            rel_dir, rules = pending.pop()
+            abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+            try:
+                with os.scandir(abs_dir) as scanner:
+                    entries = sorted(scanner, key=lambda e: e.name)
+            except OSError as e:
+                logger.debug(f"Skipping unreadable directory {abs_dir}: {e}")
+                continue
+
+            if use_gitignore and any(e.name == '.gitignore' for e in entries):
+                try:
+                    with open(os.path.join(abs_dir, '.gitignore'), 'r', encoding='utf-8', errors='replace') as f:
+                        rules = rules + parse_gitignore(f.read(), rel_dir)
+                except OSError as e:
+                    logger.debug(f"Could not read .gitignore in {abs_dir}: {e}")
+
+            for entry in entries:
+                if entry.name == '.git':
+                    # Repository metadata, a directory or (in worktrees) a link file
+                    continue
+                path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if not is_dir and not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+
+                if is_dir:
+                    if entry.name in ignored_dirs or entry.name.startswith('.'):
+                        continue
+                    if rules and _is_ignored(rules, path, entry.name, True):
+                        skipped += 1
+                        continue
+                    pending.append((path, rules))
+                    continue
+
+                if rules and _is_ignored(rules, path, entry.name, False):
+                    skipped += 1
+                    continue
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    size = 0
+                extension = os.path.splitext(entry.name)[1]
+                files.append(IndexedFile(
+                    path=path,
+                    size=size,
+                    extension=extension,
+                    language=languages.get(extension),
+                    category=classify_file(path)
+                ))
+
+        logger.debug(f"Indexed {len(files)} files in {root} ({skipped} paths excluded by .gitignore)")
+        return cls(root, files)
+
+    def get(self, path: str) -> Optional[IndexedFile]:
+        """
+        Look up a file.
+
+        Args:
+            path: POSIX path relative to the repository root
+
+        Returns:
+            Indexed file, or None if it is not indexed
+        """
+        return self._by_path.get(path)
+
+    def exists(self, path: str) -> bool:
+        """Whether a file is indexed."""
+        return path in self._by_path
+
+    def find(self, predicate: Callable[[IndexedFile], bool]) -> List[IndexedFile]:
+        """
+        Find the files matching a predicate.
+
+        Args:
+            predicate: Function called with each indexed file
+
+        Returns:
+            Matching files in path order
+        """
+        return [f for f in self.files if predicate(f)]
+
+    def named(self, *patterns: str) -> List[IndexedFile]:
+        """
+        Find files whose name matches any of the given glob patterns.
+
+        Args:
+            patterns: Patterns such as ``Dockerfile*`` (case-sensitive)
+
+        Returns:
+            Matching files in path order
+        """
+        return self.find(lambda f: any(fnmatch.fnmatchcase(f.name, pattern) for pattern in patterns))
+
+    def in_category(self, category: str) -> List[IndexedFile]:
+        """Files classified as the given category."""
+        return self.find(lambda f: f.category == category)
+
+    @property
+    def root_files(self) -> List[str]:
+        """Names of the files at the repository root."""
+        return [f.path for f in self.files if '/' not in f.path]
+
+    def extension_counts(self) -> Dict[str, int]:
+        """Number of files per extension, files without one excluded."""
+        counts: Dict[str, int] = {}
+        for f in self.files:
+            if f.extension:
+                counts[f.extension] = counts.get(f.extension, 0) + 1
+        return counts
+
+    def language_counts(self) -> Dict[str, int]:
+        """Number of files per language, files of unknown language excluded."""
+        counts: Dict[str, int] = {}
+        for f in self.files:
+            if f.language:
+                counts[f.language] = counts.get(f.language, 0) + 1
+        return counts
+
+    def read_text(self, path: str) -> str:
+        """
+        Read an indexed file, reusing earlier reads.
+
+        Args:
+            path: POSIX path relative to the repository root
+
+        Returns:
+            File contents
+
+        Raises:
+            FileNotFoundError: If the file is not indexed
+            OSError: If the file cannot be read
+            UnicodeDecodeError: If the file is not UTF-8
+        """
+        if path not in self._by_path:
+            raise FileNotFoundError(f"{path} is not in the repository index")
+        content = self._contents.get(path)
+        if content is None:
+            with open(os.path.join(self.root, path), 'r', encoding='utf-8') as f:
+                content = f.read()
+            self._contents[path] = content
+        return content
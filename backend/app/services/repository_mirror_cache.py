@@ -0,0 +1,258 @@
+"""
+Local cache of bare repository mirrors for repository analysis.
+
+The first analysis of a repository makes a bare ``git clone --mirror`` into
+the cache directory. Later analyses only ``git fetch`` the new objects into
+the mirror and check the requested branch out as a detached worktree, which
+is cheap because the worktree shares the mirror's object store. Mirrors are
+evicted least recently used first once the cache exceeds its size limit;
+mirrors with a checkout in use are never evicted.
+
+All methods block on git and the filesystem; async callers run them in a
+worker thread. Locking is per process, so the cache directory should not be
+shared by several worker processes.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+import git
+from loguru import logger
+
+from app.config import settings
+
+MIRROR_SUFFIX = ".git"
+
+
+def mirror_key(repo_url: str) -> str:
+    """
+    Derive the cache key of a repository URL.
+
+    URLs differing only in a trailing slash or ``.git`` suffix share a mirror.
+
+    Args:
+        repo_url: Repository URL
+
+    Returns:
+        Hex digest identifying the mirror
+    """
+    normalized = repo_url.strip().rstrip('/')
+    if normalized.endswith('.git'):
+        normalized = normalized[:-4]
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:24]
+
+
+def _directory_size(path: str) -> int:
+    """Total size in bytes of the files below a directory."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class RepositoryMirrorCache:
+    """
+    Size-bounded LRU cache of bare repository mirrors.
+
+    ``checkout`` returns a worktree of the requested branch, which must be
+    handed back to ``release`` when the analysis is done.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Initialize the mirror cache.
+
+        Args:
+            cache_dir: Directory holding the mirrors
+            max_bytes: Disk space the mirrors may use before eviction
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._mirror_locks: Dict[str, threading.Lock] = {}
+        self._in_use: Dict[str, int] = {}
+        self._checkouts: Dict[str, str] = {}  # worktree path -> mirror path
+        self._stats = {"hits": 0, "misses": 0, "fetch_failures": 0, "evictions": 0}
+
+    def mirror_path(self, repo_url: str) -> str:
+        """Path of a repository's mirror in the cache."""
+        return os.path.join(self.cache_dir, mirror_key(repo_url) + MIRROR_SUFFIX)
+
+    def _mirror_lock(self, mirror_path: str) -> threading.Lock:
+        with self._lock:
+            return self._mirror_locks.setdefault(mirror_path, threading.Lock())
+
+    def _count(self, stat: str) -> None:
+        """Increment a statistics counter (checkouts run in worker threads)."""
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _update_mirror(self, repo_url: str, mirror_path: str) -> git.Repo:
+        """Fetch into an existing mirror, or create it."""
+        if os.path.isdir(mirror_path):
+            try:
+                mirror = git.Repo(mirror_path)
+                mirror.git.fetch("--prune", "origin")
+                self._count("hits")
+                logger.debug(f"Fetched {repo_url} into mirror {mirror_path}")
+                return mirror
+            except (git.exc.GitError, OSError) as e:
+                # The mirror may be broken; clone it again unless worktrees still use it
+                self._count("fetch_failures")
+                if self._in_use.get(mirror_path):
+                    raise
+                logger.warning(f"Fetching mirror of {repo_url} failed, cloning it again: {e}")
+
+        self._count("misses")
+        partial_path = f"{mirror_path}.partial"
+        shutil.rmtree(partial_path, ignore_errors=True)
+        try:
+            git.Repo.clone_from(repo_url, partial_path, mirror=True)
+            # The old mirror is only dropped once the new clone succeeded
+            shutil.rmtree(mirror_path, ignore_errors=True)
+            os.replace(partial_path, mirror_path)
+        except BaseException:
+            shutil.rmtree(partial_path, ignore_errors=True)
+            raise
+        logger.debug(f"Created mirror of {repo_url} at {mirror_path}")
+        return git.Repo(mirror_path)
+
+    def checkout(self, repo_url: str, branch: str) -> str:
+        """
+        Check a branch of a repository out from its mirror.
+
+        Args:
+            repo_url: Repository URL (any URL git can fetch, including file://)
+            branch: Branch, tag or commit to check out
+
+        Returns:
+            Path of a detached worktree, to be passed to ``release``
+
+        Raises:
+            git.exc.GitCommandError: If the repository cannot be fetched or the
+                branch does not exist
+        """
+        mirror_path = self.mirror_path(repo_url)
+        with self._mirror_lock(mirror_path):
+            mirror = self._update_mirror(repo_url, mirror_path)
+            worktree_path = tempfile.mkdtemp(prefix="archmesh_github_")
+            try:
+                mirror.git.worktree("add", "--detach", worktree_path, branch)
+            except BaseException:
+                shutil.rmtree(worktree_path, ignore_errors=True)
+                self._prune_worktrees(mirror_path)
+                raise
+            with self._lock:
+                self._in_use[mirror_path] = self._in_use.get(mirror_path, 0) + 1
+                self._checkouts[worktree_path] = mirror_path
+            os.utime(mirror_path)
+
+        self._evict()
+        return worktree_path
+
+    def owns(self, worktree_path: str) -> bool:
+        """Whether a path is a worktree checked out by this cache."""
+        return worktree_path in self._checkouts
+
+    def release(self, worktree_path: str) -> None:
+        """
+        Remove a worktree returned by ``checkout``.
+
+        Args:
+            worktree_path: Worktree path
+        """
+        with self._lock:
+            mirror_path = self._checkouts.pop(worktree_path, None)
+        if mirror_path is None:
+            shutil.rmtree(worktree_path, ignore_errors=True)
+            return
+
+        with self._mirror_lock(mirror_path):
+            shutil.rmtree(worktree_path, ignore_errors=True)
+            self._prune_worktrees(mirror_path)
+            with self._lock:
+                self._in_use[mirror_path] -= 1
+                if not self._in_use[mirror_path]:
+                    del self._in_use[mirror_path]
+            if os.path.isdir(mirror_path):
+                os.utime(mirror_path)
+
+        self._evict()
+
+    def _prune_worktrees(self, mirror_path: str) -> None:
+        try:
+            git.Repo(mirror_path).git.worktree("prune")
+        except (git.exc.GitError, OSError) as e:
+            logger.warning(f"Failed to prune worktrees of mirror {mirror_path}: {e}")
+
+    def _mirrors(self) -> List[str]:
+        return [
+            os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+            if name.endswith(MIRROR_SUFFIX)
+        ]
+
+    def _evict(self) -> None:
+        """Remove least recently used mirrors until the cache fits its size limit."""
+        mirrors = []
+        for path in self._mirrors():
+            try:
+                mirrors.append((os.stat(path).st_mtime, path, _directory_size(path)))
+            except OSError:
+                continue
+        total = sum(size for _, _, size in mirrors)
+
+        for _, path, size in sorted(mirrors):
+            if total <= self.max_bytes:
+                break
+            with self._mirror_lock(path):
+                if self._in_use.get(path):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self._count("evictions")
+            logger.info(f"Evicted repository mirror {path} ({size} bytes)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        mirrors = self._mirrors()
+        with self._lock:
+            stats = dict(self._stats)
+            checkouts = len(self._checkouts)
+        return {
+            **stats,
+            "mirrors": len(mirrors),
+            "size_bytes": sum(_directory_size(path) for path in mirrors),
+            "max_bytes": self.max_bytes,
+            "checkouts": checkouts,
+        }
+
+
+_mirror_cache: Optional[RepositoryMirrorCache] = None
+
+
+def get_repository_mirror_cache() -> Optional[RepositoryMirrorCache]:
+    """
+    Get the process-wide repository mirror cache.
+
+    Returns:
+        Shared cache, or None when no cache directory is configured
+    """
+    global _mirror_cache
+    if not settings.repository_mirror_cache_dir:
+        return None
+    if _mirror_cache is None:
+        _mirror_cache = RepositoryMirrorCache(
+            cache_dir=settings.repository_mirror_cache_dir,
+            max_bytes=settings.repository_mirror_cache_max_bytes,
+        )
+    return _mirror_cache
@@ -0,0 +1,19 @@
+"""
+Vector storage for ArchMesh knowledge bases
+
+This module provides in-process vector storage used by the knowledge
+base services for semantic similarity search.
+"""
+
+from .ann_index import ExactIndex, IVFFlatIndex, VectorIndex, create_index
+from .matrix_store import MatrixVectorStore
+from .segment_store import MmapVectorStore
+
+__all__ = [
+    "ExactIndex",
+    "IVFFlatIndex",
+    "MatrixVectorStore",
+    "MmapVectorStore",
+    "VectorIndex",
+    "create_index"
+]
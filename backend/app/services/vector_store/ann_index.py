@@ -0,0 +1,342 @@
+"""
+Vector index backends for the matrix vector store.
+
+An index narrows a similarity query down to a candidate subset of store rows
+before exact scoring. ``ExactIndex`` keeps the brute-force behaviour and is the
+fallback used for recall comparisons; ``IVFFlatIndex`` is an inverted-file
+approximate nearest-neighbour index built on NumPy spherical k-means.
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from loguru import logger
+
+
+class VectorIndex(ABC):
+    """
+    Base class for vector index backends.
+
+    Indexes reference rows of a ``MatrixVectorStore`` by row number. The store
+    notifies its index of inserts, in-place updates and compactions so the row
+    numbers stay consistent.
+    """
+
+    name: str = "base"
+
+    @abstractmethod
+    def add(self, vectors: np.ndarray, rows: np.ndarray, all_vectors: np.ndarray) -> None:
+        """
+        Register newly inserted rows.
+
+        Args:
+            vectors: Normalised vectors of the new rows
+            rows: Row numbers of the new rows
+            all_vectors: Normalised vectors of every row in the store
+        """
+
+    @abstractmethod
+    def update(self, vector: np.ndarray, row: int) -> None:
+        """Re-register a row whose vector was replaced in place."""
+
+    @abstractmethod
+    def compact(self, keep: np.ndarray) -> None:
+        """
+        Drop deleted rows and renumber the rest.
+
+        Args:
+            keep: Boolean mask over the old rows, True for rows that survive
+        """
+
+    @abstractmethod
+    def candidates(self, query: np.ndarray, n_probe: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        Get candidate rows for a normalised query vector.
+
+        Returns:
+            Sorted array of row numbers, or None to scan every row
+        """
+
+    def reset(self) -> None:
+        """Forget every registered row."""
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Persist the index to ``path``."""
+
+    def load(self, path: Union[str, Path], row_count: int) -> bool:
+        """
+        Load a persisted index.
+
+        Args:
+            path: Index file path
+            row_count: Number of rows in the store the index must cover
+
+        Returns:
+            True if the index was loaded and matches the store
+        """
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        return {"type": self.name}
+
+
+class ExactIndex(VectorIndex):
+    """Brute-force index: every query scans all rows."""
+
+    name = "exact"
+
+    def add(self, vectors: np.ndarray, rows: np.ndarray, all_vectors: np.ndarray) -> None:
+        pass
+
+    def update(self, vector: np.ndarray, row: int) -> None:
+        pass
+
+    def compact(self, keep: np.ndarray) -> None:
+        pass
+
+    def candidates(self, query: np.ndarray, n_probe: Optional[int] = None) -> Optional[np.ndarray]:
+        return None
+
+
+class IVFFlatIndex(VectorIndex):
+    """
+    Inverted-file index with flat (exact) scoring inside probed lists.
+
+    Vectors are partitioned by spherical k-means into ``n_lists`` clusters. A
+    query scores only the rows in the ``n_probe`` clusters whose centroids are
+    closest, so ``n_probe`` is the recall/latency knob: ``n_probe == n_lists``
+    is equivalent to exact search.
+
+    Until the store reaches ``min_train_size`` rows the index is untrained and
+    every query falls back to a full scan. The index retrains once the store
+    has grown by ``retrain_growth`` since the last training.
+    """
+
+    name = "ivf_flat"
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        min_train_size: int = 1024,
+        retrain_growth: float = 4.0,
+        max_train_samples: int = 100_000,
+        kmeans_iterations: int = 10,
+        seed: int = 0
+    ):
+        """
+        Initialize the IVF index.
+
+        Args:
+            n_lists: Number of clusters, defaults to sqrt of the store size
+            n_probe: Number of clusters scored per query
+            min_train_size: Store size at which the index is first trained
+            retrain_growth: Store growth factor that triggers retraining
+            max_train_samples: Maximum rows sampled for k-means training
+            kmeans_iterations: Number of k-means iterations
+            seed: Random seed for centroid initialisation
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self.max_train_samples = max_train_samples
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        self._trained_size = 0
+        self._row_count = 0
+
+    @property
+    def is_trained(self) -> bool:
+        """Whether centroids have been trained."""
+        return self.centroids is not None
+
+    def _assign(self, vectors: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+        """Assign normalised vectors to their closest centroid."""
+        assignments = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], batch_size):
+            batch = vectors[start:start + batch_size]
+            assignments[start:start + batch_size] = np.argmax(batch @ self.centroids.T, axis=1)
+        return assignments
+
+    def _kmeans(self, samples: np.ndarray, n_lists: int) -> np.ndarray:
+        """Run spherical k-means and return normalised centroids."""
+        n_lists = max(1, min(n_lists, samples.shape[0]))
+        rng = np.random.default_rng(self.seed)
+        centroids = samples[rng.choice(samples.shape[0], n_lists, replace=False)].copy()
+        self.centroids = centroids
+
+        for _ in range(self.kmeans_iterations):
+            assignments = self._assign(samples)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, samples)
+            counts = np.bincount(assignments, minlength=n_lists)
+
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = samples[rng.choice(samples.shape[0], int(empty.sum()))]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+            self.centroids = centroids
+
+        return centroids
+
+    def train(self, all_vectors: np.ndarray) -> None:
+        """
+        Train centroids on the store and rebuild every inverted list.
+
+        Args:
+            all_vectors: Normalised vectors of every row in the store
+        """
+        row_count = all_vectors.shape[0]
+        n_lists = self.n_lists or int(np.sqrt(row_count))
+        n_lists = max(1, min(n_lists, row_count))
+
+        samples = all_vectors
+        if row_count > self.max_train_samples:
+            rng = np.random.default_rng(self.seed)
+            samples = all_vectors[rng.choice(row_count, self.max_train_samples, replace=False)]
+
+        n_lists = self._kmeans(np.ascontiguousarray(samples), n_lists).shape[0]
+
+        assignments = self._assign(all_vectors)
+        order = np.argsort(assignments, kind="stable")
+        boundaries = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        self.lists = [order[boundaries[i]:boundaries[i + 1]] for i in range(n_lists)]
+
+        self._trained_size = row_count
+        self._row_count = row_count
+        logger.info(f"IVF index trained with {n_lists} lists over {row_count} vectors")
+
+    def add(self, vectors: np.ndarray, rows: np.ndarray, all_vectors: np.ndarray) -> None:
+        self._row_count = all_vectors.shape[0]
+
+        if not self.is_trained:
+            if self._row_count >= self.min_train_size:
+                self.train(all_vectors)
+            return
+
+        if self._row_count >= self._trained_size * self.retrain_growth:
+            self.train(all_vectors)
+            return
+
+        assignments = self._assign(vectors)
+        for cluster in np.unique(assignments):
+            self.lists[cluster] = np.concatenate([self.lists[cluster], rows[assignments == cluster]])
+
+    def update(self, vector: np.ndarray, row: int) -> None:
+        if not self.is_trained:
+            return
+
+        for cluster, members in enumerate(self.lists):
+            if np.any(members == row):
+                self.lists[cluster] = members[members != row]
+                break
+
+        cluster = int(self._assign(vector.reshape(1, -1))[0])
+        self.lists[cluster] = np.append(self.lists[cluster], row)
+
+    def reset(self) -> None:
+        self.centroids = None
+        self.lists = []
+        self._trained_size = 0
+        self._row_count = 0
+
+    def compact(self, keep: np.ndarray) -> None:
+        self._row_count = int(keep.sum())
+        if not self.is_trained:
+            return
+
+        remap = np.cumsum(keep) - 1
+        self.lists = [remap[members[keep[members]]] for members in self.lists]
+
+    def candidates(self, query: np.ndarray, n_probe: Optional[int] = None) -> Optional[np.ndarray]:
+        if not self.is_trained:
+            return None
+
+        n_probe = min(n_probe or self.n_probe, len(self.lists))
+        if n_probe >= len(self.lists):
+            return None
+
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        return np.sort(np.concatenate([self.lists[cluster] for cluster in probe]))
+
+    def save(self, path: Union[str, Path]) -> None:
+        if not self.is_trained:
+            Path(path).unlink(missing_ok=True)
+            return
+
+        sizes = np.array([members.shape[0] for members in self.lists], dtype=np.int64)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                list_sizes=sizes,
+                list_rows=np.concatenate(self.lists) if self.lists else np.empty(0, dtype=np.int64),
+                state=np.array([self._trained_size, self._row_count], dtype=np.int64)
+            )
+
+    def load(self, path: Union[str, Path], row_count: int) -> bool:
+        path = Path(path)
+        if not path.exists():
+            return False
+
+        with np.load(path) as data:
+            trained_size, saved_row_count = (int(v) for v in data["state"])
+            if saved_row_count != row_count:
+                logger.warning("Persisted IVF index does not match the vector store, rebuilding")
+                return False
+
+            self.centroids = data["centroids"].astype(np.float32)
+            boundaries = np.concatenate([[0], np.cumsum(data["list_sizes"])])
+            list_rows = data["list_rows"]
+            self.lists = [list_rows[boundaries[i]:boundaries[i + 1]] for i in range(len(boundaries) - 1)]
+
+        self._trained_size = trained_size
+        self._row_count = row_count
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        sizes = [members.shape[0] for members in self.lists]
+        return {
+            "type": self.name,
+            "trained": self.is_trained,
+            "n_lists": len(self.lists),
+            "n_probe": self.n_probe,
+            "indexed_vectors": int(sum(sizes)),
+            "largest_list": max(sizes) if sizes else 0
+        }
+
+
+def create_index(index_type: str = "exact", **kwargs: Any) -> VectorIndex:
+    """
+    Create a vector index backend by name.
+
+    Args:
+        index_type: ``exact`` or ``ivf_flat``
+        **kwargs: Backend-specific options
+
+    Returns:
+        Vector index instance
+
+    Raises:
+        ValueError: If the index type is unknown
+    """
+    backends = {
+        ExactIndex.name: ExactIndex,
+        IVFFlatIndex.name: IVFFlatIndex,
+    }
+    if index_type not in backends:
+        raise ValueError(f"Unknown vector index type: {index_type}. Supported types: {list(backends)}")
+    if index_type == ExactIndex.name:
+        return ExactIndex()
+    return backends[index_type](**kwargs)
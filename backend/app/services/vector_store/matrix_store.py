@@ -0,0 +1,400 @@
+"""
+Matrix-backed vector store for ArchMesh knowledge bases.
+
+Vectors are kept in a single contiguous, L2-normalised float32 matrix so a
+similarity query is one matrix-vector product followed by an ``argpartition``
+top-k selection. Metadata is held row-aligned in a column store, which lets
+metadata filters be evaluated as boolean masks instead of per-row Python loops.
+An optional ``VectorIndex`` narrows queries to a candidate subset of rows.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .ann_index import ExactIndex, VectorIndex
+
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalise each row of a 2-D array.
+
+    Zero rows are left as zeros so their cosine similarity is 0, matching
+    sklearn's ``cosine_similarity`` behaviour.
+
+    Args:
+        vectors: Array of shape (n, dimension)
+
+    Returns:
+        float32 array of the same shape with unit-length rows
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class MatrixVectorStore:
+    """
+    Dense in-memory vector store with a parallel metadata column store.
+
+    Features:
+    - Contiguous, pre-normalised float32 matrix with amortised growth
+    - Row-aligned metadata dictionaries plus per-key metadata columns
+    - Vectorised cosine similarity and top-k selection
+    - Boolean-mask metadata filtering
+    - Pluggable approximate nearest-neighbour index with exact fallback
+    - Deletion by metadata filter with in-place compaction
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        initial_capacity: int = 1024,
+        index: Optional[VectorIndex] = None
+    ):
+        """
+        Initialize the vector store.
+
+        Args:
+            dimension: Embedding dimension
+            initial_capacity: Number of rows to pre-allocate
+            index: Optional index backend, defaults to exact search
+        """
+        self.dimension = dimension
+        self.index = index or ExactIndex()
+        self._matrix = np.zeros((max(initial_capacity, 1), dimension), dtype=np.float32)
+        self._size = 0
+        self.metadata: List[Dict[str, Any]] = []
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        """Number of rows currently allocated."""
+        return self._matrix.shape[0]
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Read-only view of the normalised vectors currently stored."""
+        view = self._matrix[:self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def live_metadata(self) -> List[Dict[str, Any]]:
+        """Metadata of rows that have not been deleted."""
+        return self.metadata
+
+    @property
+    def live_rows(self) -> np.ndarray:
+        """Row ids that have not been deleted."""
+        return np.arange(self._size)
+
+    def _ensure_capacity(self, required: int) -> None:
+        """Grow the matrix and metadata columns geometrically to fit ``required`` rows."""
+        if required <= self.capacity:
+            return
+
+        new_capacity = self.capacity
+        while new_capacity < required:
+            new_capacity *= 2
+
+        matrix = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+        self._grow_columns(new_capacity)
+
+    def _grow_columns(self, new_capacity: int) -> None:
+        """Reallocate every metadata column to ``new_capacity`` rows."""
+        for key, column in self._columns.items():
+            grown = np.empty(new_capacity, dtype=object)
+            grown[:self._size] = column[:self._size]
+            self._columns[key] = grown
+
+    def _set_metadata_row(self, row: int, metadata: Dict[str, Any]) -> None:
+        """Write one metadata row into the column store."""
+        for key, value in metadata.items():
+            column = self._columns.get(key)
+            if column is None:
+                column = np.empty(self.capacity, dtype=object)
+                self._columns[key] = column
+            column[row] = value
+
+    def _prepare_batch(
+        self,
+        vectors: Iterable[Sequence[float]],
+        metadata: Iterable[Dict[str, Any]]
+    ) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        """Validate a batch and return its normalised vectors and metadata list."""
+        metadata = list(metadata)
+        batch = np.asarray(list(vectors), dtype=np.float32)
+        if batch.size == 0:
+            batch = batch.reshape(0, self.dimension)
+        if batch.ndim != 2 or batch.shape[1] != self.dimension:
+            raise ValueError(
+                f"Expected vectors of dimension {self.dimension}, got shape {batch.shape}"
+            )
+        if batch.shape[0] != len(metadata):
+            raise ValueError("Number of vectors and metadata entries must match")
+        return normalize_rows(batch), metadata
+
+    def add(self, vector: Sequence[float], metadata: Dict[str, Any]) -> int:
+        """
+        Add a single vector with its metadata.
+
+        Args:
+            vector: Embedding vector
+            metadata: Metadata dictionary for the vector
+
+        Returns:
+            Row index of the stored vector
+        """
+        return self.add_many([vector], [metadata])[0]
+
+    def add_many(
+        self,
+        vectors: Iterable[Sequence[float]],
+        metadata: Iterable[Dict[str, Any]]
+    ) -> List[int]:
+        """
+        Add a batch of vectors with row-aligned metadata.
+
+        Args:
+            vectors: Embedding vectors
+            metadata: Metadata dictionaries, one per vector
+
+        Returns:
+            Row indices of the stored vectors
+
+        Raises:
+            ValueError: If vector and metadata counts or dimensions do not match
+        """
+        batch, metadata = self._prepare_batch(vectors, metadata)
+
+        start = self._size
+        end = start + batch.shape[0]
+        self._ensure_capacity(end)
+
+        self._matrix[start:end] = batch
+        for offset, entry in enumerate(metadata):
+            self._set_metadata_row(start + offset, entry)
+            self.metadata.append(entry)
+        self._size = end
+
+        if end > start:
+            self.index.add(self._matrix[start:end], np.arange(start, end), self._matrix[:end])
+
+        return list(range(start, end))
+
+    def update(self, row: int, vector: Sequence[float], metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Replace the vector, and optionally the metadata, of an existing row.
+
+        Args:
+            row: Row index to update
+            vector: New embedding vector
+            metadata: Optional replacement metadata
+
+        Raises:
+            IndexError: If the row does not exist
+        """
+        if not 0 <= row < self._size:
+            raise IndexError(f"Row {row} out of range for store of size {self._size}")
+
+        self._matrix[row] = normalize_rows(np.asarray(vector, dtype=np.float32).reshape(1, -1))[0]
+        if metadata is not None:
+            for column in self._columns.values():
+                column[row] = None
+            self._set_metadata_row(row, metadata)
+            self.metadata[row] = metadata
+
+        self.index.update(self._matrix[row], row)
+
+    def delete(self, mask: np.ndarray) -> int:
+        """
+        Delete rows selected by a boolean mask and compact the store.
+
+        Surviving rows keep their relative order but are renumbered.
+
+        Args:
+            mask: Boolean array of length ``len(self)``, True for rows to delete
+
+        Returns:
+            Number of rows deleted
+        """
+        mask = np.asarray(mask, dtype=bool)
+        deleted = int(mask.sum())
+        if deleted == 0:
+            return 0
+
+        keep = ~mask
+        remaining = self._size - deleted
+
+        self._matrix[:remaining] = self._matrix[:self._size][keep]
+        self._matrix[remaining:self._size] = 0
+        for key, column in self._columns.items():
+            column[:remaining] = column[:self._size][keep]
+            column[remaining:self._size] = None
+        self.metadata = [entry for entry, kept in zip(self.metadata, keep) if kept]
+        self._size = remaining
+
+        self.index.compact(keep)
+        return deleted
+
+    def delete_where(self, filters: Dict[str, Any]) -> int:
+        """
+        Delete every row whose metadata matches all filters.
+
+        Args:
+            filters: Mapping of metadata key to required value
+
+        Returns:
+            Number of rows deleted
+        """
+        return self.delete(self.build_mask(filters))
+
+    def rebuild_index(self) -> None:
+        """Rebuild the index from every stored row."""
+        self.index.reset()
+        if self._size:
+            self.index.add(self._matrix[:self._size], np.arange(self._size), self._matrix[:self._size])
+
+    def bulk_load(
+        self,
+        vectors: Iterable[Sequence[float]],
+        metadata: Iterable[Dict[str, Any]],
+        index_path: Optional[Union[str, Path]] = None
+    ) -> None:
+        """
+        Replace the store contents with persisted rows.
+
+        The index is restored from ``index_path`` when it matches the loaded
+        rows, otherwise it is rebuilt once after all rows are inserted.
+
+        Args:
+            vectors: Embedding vectors
+            metadata: Metadata dictionaries, one per vector
+            index_path: Optional path of a persisted index
+        """
+        index = self.index
+        self.clear()
+        self.index = ExactIndex()
+        try:
+            self.add_many(vectors, metadata)
+        finally:
+            self.index = index
+
+        if index_path is None or not index.load(index_path, self._size):
+            self.rebuild_index()
+
+    def clear(self) -> None:
+        """Remove all vectors and metadata."""
+        self.delete(np.ones(self._size, dtype=bool))
+        self._columns = {}
+
+    def column(self, key: str) -> np.ndarray:
+        """
+        Get the metadata column for a key.
+
+        Rows that have no value for ``key`` contain ``None``.
+
+        Args:
+            key: Metadata key
+
+        Returns:
+            Object array of length ``len(self)``
+        """
+        column = self._columns.get(key)
+        if column is None:
+            return np.full(self._size, None, dtype=object)
+        return column[:self._size]
+
+    def build_mask(self, filters: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """
+        Build a boolean row mask where every metadata filter matches exactly.
+
+        Args:
+            filters: Mapping of metadata key to required value
+
+        Returns:
+            Boolean array of length ``len(self)``
+        """
+        mask = np.ones(self._size, dtype=bool)
+        for key, value in (filters or {}).items():
+            column = self.column(key)
+            if isinstance(value, _SCALAR_TYPES):
+                matches = column == value
+            else:
+                matches = np.frompyfunc(lambda item: item == value, 1, 1)(column)
+            mask &= np.asarray(matches, dtype=bool)
+        return mask
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        mask: Optional[np.ndarray] = None,
+        exact: bool = False,
+        n_probe: Optional[int] = None,
+        rows: Optional[Sequence[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the rows most similar to a query vector by cosine similarity.
+
+        Args:
+            query_vector: Query embedding
+            top_k: Maximum number of results
+            filters: Optional exact-match metadata filters
+            mask: Optional precomputed boolean row mask, combined with ``filters``
+            exact: Bypass the index and scan every row
+            n_probe: Optional per-query override of the index recall knob
+            rows: Optional candidate row ids from a caller-side index; only these
+                are scored, exactly and without probing the index
+
+        Returns:
+            List of (row index, cosine similarity) tuples, best match first
+        """
+        if self._size == 0 or top_k <= 0:
+            return []
+
+        query = normalize_rows(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+
+        if rows is not None:
+            # An explicit scope is scored exactly; intersecting it with the
+            # probed lists could drop its true matches
+            candidates = np.unique(np.asarray(rows, dtype=np.int64))
+        else:
+            candidates = None if exact else self.index.candidates(query, n_probe=n_probe)
+
+        if filters or mask is not None:
+            row_mask = self.build_mask(filters)
+            if mask is not None:
+                row_mask &= mask
+            if candidates is None:
+                candidates = np.flatnonzero(row_mask)
+            else:
+                candidates = candidates[row_mask[candidates]]
+
+        if candidates is None:
+            scores = self._matrix[:self._size] @ query
+        else:
+            if candidates.size == 0:
+                return []
+            scores = self._matrix[candidates] @ query
+
+        k = min(top_k, scores.shape[0])
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        rows = candidates[top] if candidates is not None else top
+        return [(int(row), float(scores[i])) for row, i in zip(rows, top)]
@@ -0,0 +1,498 @@
+"""
+Memory-mapped, append-only on-disk vector store.
+
+Each generation of the store is one segment: a raw float32 vector file holding
+normalised rows and a compact JSON-lines metadata log. Inserts only append to
+both files, and the vector file is re-mapped with ``np.memmap`` so searches read
+it zero-copy. Deletes are appended to the log as tombstones and reclaimed by
+compaction, which writes the live rows into the next generation and atomically
+switches the manifest over to it.
+
+Layout::
+
+    manifest.json            current generation and dimension
+    vectors.<gen>.f32        row-major float32 vectors, append-only
+    metadata.<gen>.log       one JSON record per line, append-only
+"""
+
+import asyncio
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+from .ann_index import VectorIndex
+from .matrix_store import MatrixVectorStore, normalize_rows
+
+FORMAT_VERSION = 1
+
+_COMPACT_JSON = {"separators": (",", ":"), "default": str}
+
+
+class MmapVectorStore(MatrixVectorStore):
+    """
+    Disk-backed vector store with append-only segments.
+
+    Features:
+    - Append-only float32 vector file opened with ``np.memmap``
+    - Compact metadata log replayed at startup
+    - Tombstone deletes with background compaction into a new generation
+    - Crash recovery that drops partially written rows
+
+    Call ``open`` before use.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        dimension: int,
+        index: Optional[VectorIndex] = None,
+        compaction_threshold: float = 0.25
+    ):
+        """
+        Initialize the on-disk vector store.
+
+        Args:
+            directory: Directory holding the manifest and segment files
+            dimension: Embedding dimension
+            index: Optional index backend, defaults to exact search
+            compaction_threshold: Fraction of deleted rows that makes compaction worthwhile
+        """
+        super().__init__(dimension, initial_capacity=1, index=index)
+        self.directory = Path(directory)
+        self.compaction_threshold = compaction_threshold
+
+        self._matrix = np.zeros((0, dimension), dtype=np.float32)
+        self._column_capacity = 1
+        self._live = np.ones(0, dtype=bool)
+        self._deleted_count = 0
+        self._generation = 0
+
+        self._lock = threading.RLock()
+        self._compacting = False
+        self._dirty_rows: Set[int] = set()
+
+    @property
+    def manifest_path(self) -> Path:
+        """Path of the manifest file."""
+        return self.directory / "manifest.json"
+
+    def _vectors_path(self, generation: int) -> Path:
+        return self.directory / f"vectors.{generation:06d}.f32"
+
+    def _log_path(self, generation: int) -> Path:
+        return self.directory / f"metadata.{generation:06d}.log"
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dimension * np.dtype(np.float32).itemsize
+
+    def __len__(self) -> int:
+        return self._size - self._deleted_count
+
+    @property
+    def capacity(self) -> int:
+        """Number of metadata column rows currently allocated."""
+        return self._column_capacity
+
+    @property
+    def deleted_count(self) -> int:
+        """Number of tombstoned rows awaiting compaction."""
+        return self._deleted_count
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Whether enough rows are tombstoned to make compaction worthwhile."""
+        return self._size > 0 and self._deleted_count / self._size >= self.compaction_threshold
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Read-only normalised vectors of live rows."""
+        if self._deleted_count == 0:
+            return super().vectors
+        return self._matrix[:self._size][self._live]
+
+    @property
+    def live_metadata(self) -> List[Dict[str, Any]]:
+        """Metadata of rows that have not been deleted."""
+        if self._deleted_count == 0:
+            return self.metadata
+        return [entry for entry, live in zip(self.metadata, self._live) if live]
+
+    @property
+    def live_rows(self) -> np.ndarray:
+        """Row ids that have not been tombstoned."""
+        with self._lock:
+            return np.flatnonzero(self._live[:self._size])
+
+    def _ensure_capacity(self, required: int) -> None:
+        """Grow the metadata columns; vectors live on disk and are re-mapped instead."""
+        if required <= self._column_capacity:
+            return
+        new_capacity = max(required, self._column_capacity * 2)
+        self._grow_columns(new_capacity)
+        self._column_capacity = new_capacity
+
+    def _remap(self) -> None:
+        """Memory-map the current vector file."""
+        if self._size == 0:
+            self._matrix = np.zeros((0, self.dimension), dtype=np.float32)
+            return
+        self._matrix = np.memmap(
+            self._vectors_path(self._generation),
+            dtype=np.float32,
+            mode="r",
+            shape=(self._size, self.dimension)
+        )
+
+    def _write_manifest(self, generation: int) -> None:
+        """Atomically point the manifest at a generation."""
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "format_version": FORMAT_VERSION,
+                "dimension": self.dimension,
+                "generation": generation
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    @staticmethod
+    def _encode_records(records: Iterable[Dict[str, Any]]) -> str:
+        return "".join(json.dumps(record, **_COMPACT_JSON) + "\n" for record in records)
+
+    def _replay_log(self, path: Path) -> Tuple[List[Dict[str, Any]], Set[int]]:
+        """
+        Replay a metadata log.
+
+        Record types are ``{"m": metadata}`` for an appended row,
+        ``{"u": row, "m": metadata}`` for a metadata replacement and
+        ``{"d": [rows]}`` for tombstones. A truncated trailing line from an
+        interrupted write is ignored.
+        """
+        metadata: List[Dict[str, Any]] = []
+        deleted: Set[int] = set()
+        if not path.exists():
+            return metadata, deleted
+
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring truncated metadata log record in {path.name}")
+                    break
+                if "d" in record:
+                    deleted.update(record["d"])
+                elif "u" in record:
+                    metadata[record["u"]] = record["m"]
+                else:
+                    metadata.append(record["m"])
+        return metadata, deleted
+
+    def open(self, index_path: Optional[Union[str, Path]] = None) -> None:
+        """
+        Open the store, creating an empty generation if none exists.
+
+        Vectors are memory-mapped rather than read, so startup cost is the
+        metadata log replay only.
+
+        Args:
+            index_path: Optional path of a persisted index to restore
+
+        Raises:
+            ValueError: If the stored dimension does not match
+        """
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+            if self.manifest_path.exists():
+                with open(self.manifest_path, "r") as f:
+                    manifest = json.load(f)
+                if manifest["dimension"] != self.dimension:
+                    raise ValueError(
+                        f"Stored vectors have dimension {manifest['dimension']}, expected {self.dimension}"
+                    )
+                self._generation = manifest["generation"]
+            else:
+                self._generation = 1
+                self._vectors_path(1).touch()
+                self._log_path(1).touch()
+                self._write_manifest(1)
+
+            vectors_path = self._vectors_path(self._generation)
+            metadata, deleted = self._replay_log(self._log_path(self._generation))
+            disk_rows = vectors_path.stat().st_size // self._row_bytes
+            size = min(disk_rows, len(metadata))
+
+            # Recover from an interrupted append by dropping unmatched rows
+            if disk_rows != size or vectors_path.stat().st_size != size * self._row_bytes:
+                os.truncate(vectors_path, size * self._row_bytes)
+            if len(metadata) != size:
+                deleted = {row for row in deleted if row < size}
+                self._rewrite_log(self._log_path(self._generation), metadata[:size], deleted)
+            if disk_rows != size or len(metadata) != size:
+                logger.warning(f"Recovered vector store at {size} rows after an interrupted write")
+
+            self._size = size
+            self.metadata = metadata[:size]
+            self._columns = {}
+            self._column_capacity = max(size, 1)
+            for row, entry in enumerate(self.metadata):
+                self._set_metadata_row(row, entry)
+
+            self._live = np.ones(size, dtype=bool)
+            self._live[list(deleted)] = False
+            self._deleted_count = len(deleted)
+            self._remap()
+
+            if index_path is None or not self.index.load(index_path, self._size):
+                self.rebuild_index()
+
+    def _rewrite_log(self, path: Path, metadata: List[Dict[str, Any]], deleted: Iterable[int]) -> None:
+        """Write a complete metadata log for a generation."""
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            f.write(self._encode_records({"m": entry} for entry in metadata))
+            deleted = sorted(deleted)
+            if deleted:
+                f.write(self._encode_records([{"d": deleted}]))
+        os.replace(tmp_path, path)
+
+    def add_many(
+        self,
+        vectors: Iterable[Sequence[float]],
+        metadata: Iterable[Dict[str, Any]]
+    ) -> List[int]:
+        """
+        Append a batch of vectors and metadata to the current segment.
+
+        Vectors are written before metadata so an interrupted append leaves at
+        most an unmatched vector tail, which ``open`` truncates.
+
+        Args:
+            vectors: Embedding vectors
+            metadata: Metadata dictionaries, one per vector
+
+        Returns:
+            Row indices of the stored vectors
+        """
+        batch, metadata = self._prepare_batch(vectors, metadata)
+        if batch.shape[0] == 0:
+            return []
+
+        with self._lock:
+            start = self._size
+            end = start + batch.shape[0]
+
+            with open(self._vectors_path(self._generation), "ab") as f:
+                f.write(batch.tobytes())
+            with open(self._log_path(self._generation), "a") as f:
+                f.write(self._encode_records({"m": entry} for entry in metadata))
+
+            self._ensure_capacity(end)
+            for offset, entry in enumerate(metadata):
+                self._set_metadata_row(start + offset, entry)
+                self.metadata.append(entry)
+            self._size = end
+            self._live = np.concatenate([self._live, np.ones(batch.shape[0], dtype=bool)])
+            self._remap()
+
+            self.index.add(self._matrix[start:end], np.arange(start, end), self._matrix[:end])
+            return list(range(start, end))
+
+    def update(self, row: int, vector: Sequence[float], metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Overwrite a row's fixed-size vector record in place.
+
+        Args:
+            row: Row index to update
+            vector: New embedding vector
+            metadata: Optional replacement metadata
+
+        Raises:
+            IndexError: If the row does not exist
+        """
+        with self._lock:
+            if not 0 <= row < self._size:
+                raise IndexError(f"Row {row} out of range for store of size {self._size}")
+
+            normalized = normalize_rows(np.asarray(vector, dtype=np.float32).reshape(1, -1))
+            with open(self._vectors_path(self._generation), "r+b") as f:
+                f.seek(row * self._row_bytes)
+                f.write(normalized.tobytes())
+
+            if metadata is not None:
+                with open(self._log_path(self._generation), "a") as f:
+                    f.write(self._encode_records([{"u": row, "m": metadata}]))
+                for column in self._columns.values():
+                    column[row] = None
+                self._set_metadata_row(row, metadata)
+                self.metadata[row] = metadata
+
+            if self._compacting:
+                self._dirty_rows.add(row)
+            self.index.update(self._matrix[row], row)
+
+    def delete(self, mask: np.ndarray) -> int:
+        """
+        Tombstone rows selected by a boolean mask.
+
+        Row numbers are unchanged until the next compaction.
+
+        Args:
+            mask: Boolean array of length ``self._size``, True for rows to delete
+
+        Returns:
+            Number of live rows deleted
+        """
+        with self._lock:
+            rows = np.flatnonzero(np.asarray(mask, dtype=bool) & self._live)
+            if rows.size == 0:
+                return 0
+
+            with open(self._log_path(self._generation), "a") as f:
+                f.write(self._encode_records([{"d": rows.tolist()}]))
+
+            self._live[rows] = False
+            self._deleted_count += int(rows.size)
+            return int(rows.size)
+
+    def clear(self) -> None:
+        """Remove all vectors and metadata."""
+        with self._lock:
+            self.delete(np.ones(self._size, dtype=bool))
+            self.compact()
+            self._columns = {}
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        mask: Optional[np.ndarray] = None,
+        exact: bool = False,
+        n_probe: Optional[int] = None,
+        rows: Optional[Sequence[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """Search live rows; see ``MatrixVectorStore.search``."""
+        with self._lock:
+            if self._deleted_count:
+                mask = self._live if mask is None else mask & self._live
+            return super().search(
+                query_vector, top_k=top_k, filters=filters, mask=mask, exact=exact,
+                n_probe=n_probe, rows=rows
+            )
+
+    def compact(self) -> int:
+        """
+        Rewrite live rows into a new generation and drop tombstoned rows.
+
+        The bulk copy runs without holding the store lock, so concurrent
+        appends, updates and deletes continue; anything that happened during
+        the copy is replayed into the new generation before switching over.
+
+        Returns:
+            Number of rows reclaimed
+        """
+        with self._lock:
+            if self._compacting or self._deleted_count == 0:
+                return 0
+            self._compacting = True
+            self._dirty_rows = set()
+            snapshot_size = self._size
+            keep_snapshot = self._live[:snapshot_size].copy()
+            metadata_snapshot = self.metadata[:snapshot_size]
+            matrix = self._matrix
+            old_generation = self._generation
+            generation = old_generation + 1
+
+        vectors_path = self._vectors_path(generation)
+        log_path = self._log_path(generation)
+
+        try:
+            # Copy live rows of the snapshot without blocking writers
+            with open(vectors_path, "wb") as f:
+                for start in range(0, snapshot_size, 65536):
+                    block = matrix[start:start + 65536]
+                    f.write(np.ascontiguousarray(block[keep_snapshot[start:start + 65536]]).tobytes())
+            with open(log_path, "w") as f:
+                f.write(self._encode_records(
+                    {"m": entry} for entry, kept in zip(metadata_snapshot, keep_snapshot) if kept
+                ))
+
+            with self._lock:
+                keep = np.concatenate([keep_snapshot, np.ones(self._size - snapshot_size, dtype=bool)])
+                remap = np.cumsum(keep) - 1
+                new_size = int(keep.sum())
+                new_live = self._live[keep]
+
+                with open(vectors_path, "r+b") as f:
+                    # Rows updated in place while copying
+                    for row in sorted(self._dirty_rows):
+                        if row < snapshot_size and keep[row]:
+                            f.seek(int(remap[row]) * self._row_bytes)
+                            f.write(np.ascontiguousarray(self._matrix[row]).tobytes())
+                    # Rows appended while copying
+                    f.seek(0, os.SEEK_END)
+                    f.write(np.ascontiguousarray(self._matrix[snapshot_size:self._size]).tobytes())
+
+                with open(log_path, "a") as f:
+                    f.write(self._encode_records(
+                        [{"u": int(remap[row]), "m": self.metadata[row]}
+                         for row in sorted(self._dirty_rows) if row < snapshot_size and keep[row]]
+                    ))
+                    f.write(self._encode_records({"m": entry} for entry in self.metadata[snapshot_size:]))
+                    dead = np.flatnonzero(~new_live)
+                    if dead.size:
+                        f.write(self._encode_records([{"d": dead.tolist()}]))
+
+                self._write_manifest(generation)
+
+                reclaimed = self._size - new_size
+                for key, column in self._columns.items():
+                    column[:new_size] = column[:self._size][keep]
+                    column[new_size:self._size] = None
+                self.metadata = [entry for entry, kept in zip(self.metadata, keep) if kept]
+                self._size = new_size
+                self._live = new_live
+                self._deleted_count = int(dead.size)
+                self._generation = generation
+                self._remap()
+                self.index.compact(keep)
+
+            self._vectors_path(old_generation).unlink(missing_ok=True)
+            self._log_path(old_generation).unlink(missing_ok=True)
+
+            logger.info(f"Compacted vector store to generation {generation}, reclaimed {reclaimed} rows")
+            return reclaimed
+
+        except Exception:
+            vectors_path.unlink(missing_ok=True)
+            log_path.unlink(missing_ok=True)
+            raise
+
+        finally:
+            with self._lock:
+                self._compacting = False
+                self._dirty_rows = set()
+
+    async def compact_in_background(self) -> int:
+        """Run ``compact`` in a worker thread."""
+        return await asyncio.to_thread(self.compact)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get on-disk storage statistics."""
+        return {
+            "directory": str(self.directory),
+            "generation": self._generation,
+            "rows": self._size,
+            "live_rows": len(self),
+            "deleted_rows": self._deleted_count,
+            "vector_bytes": self._size * self._row_bytes
+        }
@@ -6,8 +6,10 @@ communication including workflow updates and notifications.
 """
 
 from .websocket_service import WebSocketService
+from .llm_stream import LLMStreamForwarder
 
 __all__ = [
-    "WebSocketService"
+    "WebSocketService",
+    "LLMStreamForwarder"
 ]
 
@@ -0,0 +1,147 @@
+"""
+Forward streamed LLM output to WebSocket clients
+
+This module bridges LLM streaming (``SimpleLLMService.call_llm(on_chunk=...)``,
+``stream_llm`` and ``ChatDeepSeek.astream``) and the WebSocket layer. Partial
+output is sent as ``llm_stream`` messages so chat and workflow clients can
+render text as soon as the first token arrives.
+"""
+
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.core.logging_config import get_logger
+from app.schemas.websocket import LLMStreamChunk
+
+logger = get_logger(__name__)
+
+# Sends one JSON-serializable message to a client or session
+MessageSender = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class LLMStreamForwarder:
+    """
+    Forwards LLM text chunks to a WebSocket sender.
+
+    The first chunk is sent immediately to minimise time to first token.
+    Later chunks are coalesced until ``flush_interval_ms`` has passed or
+    ``max_buffer_chars`` are buffered, so single-token deltas do not each
+    become a WebSocket frame. An instance can be passed directly as an
+    ``on_chunk`` callback.
+    """
+
+    def __init__(
+        self,
+        send: MessageSender,
+        session_id: str,
+        stage: str = "chat",
+        *,
+        stream_id: Optional[str] = None,
+        flush_interval_ms: float = 50.0,
+        max_buffer_chars: int = 256,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize forwarder
+
+        Args:
+            send: Coroutine sending a message dict to the client(s)
+            session_id: Chat or workflow session ID
+            stage: Chat or workflow stage producing the output
+            stream_id: ID shared by all chunks (generated if omitted)
+            flush_interval_ms: Minimum time between coalesced messages
+            max_buffer_chars: Buffered text size that forces a send
+            metadata: Extra metadata attached to every message
+        """
+        self.send = send
+        self.session_id = session_id
+        self.stage = stage
+        self.stream_id = stream_id or str(uuid.uuid4())
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_buffer_chars = max_buffer_chars
+        self.metadata = metadata or {}
+
+        self._parts: List[str] = []
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        self._index = 0
+        self._last_sent: Optional[float] = None
+        self._send_failed = False
+        self._closed = False
+
+    @property
+    def text(self) -> str:
+        """Complete text received so far"""
+        return "".join(self._parts)
+
+    async def __call__(self, chunk: str) -> None:
+        """Receive a text chunk (``on_chunk`` callback)"""
+        if not chunk or self._closed:
+            return
+        self._parts.append(chunk)
+        self._buffer.append(chunk)
+        self._buffered_chars += len(chunk)
+
+        now = time.monotonic()
+        if (
+            self._last_sent is None
+            or now - self._last_sent >= self.flush_interval
+            or self._buffered_chars >= self.max_buffer_chars
+        ):
+            await self._flush(done=False)
+
+    async def close(self, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Send any buffered text and mark the stream as done
+
+        Args:
+            metadata: Extra metadata for the final message
+        """
+        if self._closed:
+            return
+        self._closed = True
+        await self._flush(done=True, metadata=metadata)
+
+    async def forward(self, chunks: AsyncIterator[str]) -> str:
+        """
+        Forward every chunk of an async iterator, then close the stream
+
+        Args:
+            chunks: Async iterator of text chunks
+
+        Returns:
+            str: Complete text
+        """
+        try:
+            async for chunk in chunks:
+                await self(chunk)
+        finally:
+            await self.close()
+        return self.text
+
+    async def _flush(self, done: bool, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Send buffered text as one message"""
+        content = "".join(self._buffer)
+        self._buffer = []
+        self._buffered_chars = 0
+        self._last_sent = time.monotonic()
+        if self._send_failed or (not content and not done):
+            return
+
+        message = LLMStreamChunk(
+            session_id=self.session_id,
+            stream_id=self.stream_id,
+            stage=self.stage,
+            index=self._index,
+            content=content,
+            done=done,
+            metadata={**self.metadata, **(metadata or {})},
+        ).model_dump(mode="json")
+        self._index += 1
+        try:
+            await self.send(message)
+        except Exception as e:
+            # Keep collecting text for the caller; stop sending to a dead client
+            self._send_failed = True
+            logger.warning(f"Stopped forwarding LLM stream {self.stream_id}: {e}")
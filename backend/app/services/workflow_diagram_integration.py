@@ -10,7 +10,7 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 
 from app.services.diagram_generation_service import DiagramGenerationService, DiagramType, OutputFormat
-from app.services.enhanced_knowledge_base_service import EnhancedKnowledgeBaseService
+from app.services.enhanced_knowledge_base_service import get_enhanced_knowledge_base_service
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +27,7 @@ class WorkflowDiagramIntegration:
     
     def __init__(self):
         self.diagram_service = DiagramGenerationService()
-        self.kb_service = EnhancedKnowledgeBaseService()
+        self.kb_service = get_enhanced_knowledge_base_service()
         logger.info("WorkflowDiagramIntegration initialized")
     
     async def generate_workflow_diagrams(
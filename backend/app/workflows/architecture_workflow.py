@@ -8,9 +8,8 @@ with human review gates at key decision points.
 
 import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional, TypedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypedDict
 
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, StateGraph
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -18,6 +17,9 @@ from sqlalchemy import select
 
 from app.agents.architecture_agent import ArchitectureAgent
 from app.agents.requirements_agent import RequirementsAgent
+from app.config import settings
+from app.core.workflow_checkpointer import flush_workflow_checkpoints, get_workflow_checkpointer
+from app.core.workflow_jobs import cancel_workflow_jobs
 from app.models import WorkflowSession, WorkflowStageEnum
 
 
@@ -44,6 +46,10 @@ def safe_enum_convert(value):
     return WorkflowStageEnum.STARTING
 
 
+# Called with the workflow state after every graph step
+StepCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
 class ArchitectureWorkflowState(TypedDict):
     """
     State for the architecture generation workflow.
@@ -105,15 +111,13 @@ class ArchitectureWorkflow:
         Initialize the Architecture Workflow.
         
         Args:
-            db_connection_string: Optional database connection string (not used in current version)
+            db_connection_string: Unused; checkpoints use the application database
         """
         self.requirements_agent = RequirementsAgent()
         self.architecture_agent = ArchitectureAgent()
         
-        # Initialize in-memory checkpointer for workflow state persistence
-        # Note: PostgreSQL checkpointing not available in current LangGraph version
-        self.checkpointer = MemorySaver()
-        logger.info("In-memory checkpointer initialized successfully")
+        # Shared checkpointer, so any instance (or worker) can resume a session
+        self.checkpointer = get_workflow_checkpointer()
         
         # Build the workflow graph
         self.graph = self._build_graph()
@@ -768,7 +772,9 @@ class ArchitectureWorkflow:
         project_context: Optional[str] = None,
         max_retries: int = 3,
         db: Optional[AsyncSession] = None,
-        llm_provider: Optional[str] = None
+        llm_provider: Optional[str] = None,
+        session_id: Optional[str] = None,
+        on_step: Optional[StepCallback] = None
     ) -> tuple[str, Dict[str, Any]]:
         """
         Start a new architecture workflow.
@@ -781,11 +787,13 @@ class ArchitectureWorkflow:
             max_retries: Maximum number of retries for failed stages
             db: Database session for persistence
             llm_provider: LLM provider to use (deepseek, openai, anthropic)
+            session_id: Session ID to use (generated if omitted)
+            on_step: Coroutine called with the state after every step
             
         Returns:
             Tuple of (session_id, initial_result)
         """
-        session_id = str(uuid.uuid4())
+        session_id = session_id or str(uuid.uuid4())
         
         # Update agents with specified LLM provider if provided
         if llm_provider:
@@ -870,10 +878,12 @@ class ArchitectureWorkflow:
         config = {"configurable": {"thread_id": session_id}}
         
         try:
-            result = await self.graph.ainvoke(initial_state, config)
+            result = await self._run_graph(initial_state, config, on_step)
+            await self._flush_checkpoints(session_id)
             logger.info(f"Workflow started successfully for session {str(session_id)}")
             return session_id, result
         except Exception as e:
+            await self._flush_checkpoints(session_id)
             logger.error(f"Failed to start workflow for session {str(session_id)}: {str(e)}")
             
             # Update database with error status if db is provided
@@ -912,7 +922,8 @@ class ArchitectureWorkflow:
     async def continue_workflow(
         self,
         session_id: str,
-        human_feedback: Dict[str, Any]
+        human_feedback: Dict[str, Any],
+        on_step: Optional[StepCallback] = None
     ) -> Dict[str, Any]:
         """
         Continue workflow after human review.
@@ -920,6 +931,7 @@ class ArchitectureWorkflow:
         Args:
             session_id: Workflow session ID
             human_feedback: Human feedback and decision
+            on_step: Coroutine called with the state after every step
             
         Returns:
             Updated workflow result
@@ -955,7 +967,10 @@ class ArchitectureWorkflow:
                     updated_state["review_history"] = review_history
             
             # Continue execution
-            result = await self.graph.ainvoke(updated_state, config)
+            try:
+                result = await self._run_graph(updated_state, config, on_step)
+            finally:
+                await self._flush_checkpoints(session_id)
             
             logger.info(f"Workflow continued successfully for session {session_id}")
             return result
@@ -964,6 +979,64 @@ class ArchitectureWorkflow:
             logger.error(f"Failed to continue workflow for session {session_id}: {str(e)}")
             raise
 
+    async def resume(self, session_id: str, on_step: Optional[StepCallback] = None) -> Dict[str, Any]:
+        """
+        Resume a session from its latest checkpoint.
+        
+        Used to retry a run that was interrupted (for example on another
+        worker) without repeating the steps it had completed.
+        
+        Args:
+            session_id: Workflow session ID
+            on_step: Coroutine called with the state after every step
+            
+        Returns:
+            Updated workflow result
+        """
+        logger.info(f"Resuming workflow for session {session_id} from its latest checkpoint")
+        config = {"configurable": {"thread_id": session_id}}
+        try:
+            return await self._run_graph(None, config, on_step)
+        finally:
+            await self._flush_checkpoints(session_id)
+
+    async def _run_graph(
+        self,
+        graph_input: Optional[Dict[str, Any]],
+        config: Dict[str, Any],
+        on_step: Optional[StepCallback]
+    ) -> Dict[str, Any]:
+        """
+        Run the graph until it finishes or reaches a review gate.
+        
+        Args:
+            graph_input: Input state (None resumes from the checkpoint)
+            config: Graph config with the session thread
+            on_step: Coroutine called with the state after every step
+            
+        Returns:
+            Workflow state at the end of the run
+        """
+        if on_step is None:
+            return await self.graph.ainvoke(graph_input, config)
+        result = None
+        async for values in self.graph.astream(graph_input, config, stream_mode="values"):
+            result = values
+            await on_step(values)
+        return result
+
+    async def _flush_checkpoints(self, session_id: str) -> None:
+        """
+        Write buffered checkpoints without masking the caller's error.
+        
+        Args:
+            session_id: Workflow session ID (for logging)
+        """
+        try:
+            await flush_workflow_checkpoints()
+        except Exception as e:
+            logger.error(f"Failed to write checkpoints for session {session_id}: {str(e)}")
+
     async def get_status(self, session_id: str) -> Dict[str, Any]:
         """
         Get current workflow status.
@@ -987,6 +1060,9 @@ class ArchitectureWorkflow:
         """
         Cancel a running workflow.
         
+        Queued and running background jobs of the session are cancelled
+        before its state is marked cancelled.
+        
         Args:
             session_id: Workflow session ID
             
@@ -994,9 +1070,14 @@ class ArchitectureWorkflow:
             True if cancelled successfully
         """
         try:
+            cancelled_jobs = await cancel_workflow_jobs(session_id)
+            
             # Update state to cancelled
             config = {"configurable": {"thread_id": session_id}}
             current_state = await self.graph.aget_state(config)
+            if not current_state.values:
+                # Cancelled before its first job ran
+                return cancelled_jobs > 0
             
             updated_state = {
                 **current_state.values,
@@ -1005,6 +1086,7 @@ class ArchitectureWorkflow:
             }
             
             await self.graph.aupdate_state(config, updated_state)
+            await flush_workflow_checkpoints()
             
             logger.info(f"Workflow cancelled for session {session_id}")
             return True
@@ -1037,5 +1119,5 @@ class ArchitectureWorkflow:
             "human_review_points": 2,
             "supports_interruption": True,
             "supports_resumption": True,
-            "checkpointing": "In-Memory"
+            "checkpointing": "Database" if settings.workflow_checkpointer == "database" else "In-Memory"
         }
@@ -7,32 +7,35 @@ seamlessly with existing systems.
 """
 
 import asyncio
-from typing import TypedDict, Optional, Dict, Any, List, Literal
+import operator
+from typing import Annotated, TypedDict, Optional, Dict, Any, List, Literal
 from datetime import datetime
 import json
 
-from langgraph.graph import StateGraph, END
-
-# Try to import PostgresSaver, fallback to None if not available
-try:
-    from langgraph.checkpoint.postgres import PostgresSaver
-except ImportError:
-    try:
-        from langgraph_checkpoint.postgres import PostgresSaver
-    except ImportError:
-        PostgresSaver = None
+from langgraph.graph import StateGraph, START, END
 
 from loguru import logger
 
 from app.agents.github_analyzer_agent import GitHubAnalyzerAgent
 from app.agents.requirements_agent import RequirementsAgent
 from app.agents.architecture_agent import ArchitectureAgent
-from app.services.local_knowledge_base_service import LocalKnowledgeBaseService
-from app.config import settings
+from app.core.llm_scheduler import Priority, llm_priority
+from app.core.workflow_checkpointer import flush_workflow_checkpoints, get_workflow_checkpointer
+from app.services.local_knowledge_base_service import get_local_knowledge_base_service
+
+
+def _keep_latest(current: Any, update: Any) -> Any:
+    """Reducer letting parallel nodes write the same key; the last write wins."""
+    return update
 
 
 class BrownfieldWorkflowState(TypedDict):
-    """State for brownfield workflow."""
+    """
+    State for brownfield workflow.
+    
+    Keys written by the parallel analysis and parsing nodes have reducers, so
+    both can update them in the same step. Nodes return only new errors.
+    """
     # Session and project identification
     session_id: str
     project_id: str
@@ -58,14 +61,14 @@ class BrownfieldWorkflowState(TypedDict):
     feedback_history: List[Dict[str, Any]]
     
     # Workflow control
-    current_stage: str
-    previous_stage: Optional[str]
-    errors: List[str]
+    current_stage: Annotated[str, _keep_latest]
+    previous_stage: Annotated[Optional[str], _keep_latest]
+    errors: Annotated[List[str], operator.add]
     warnings: List[str]
     
     # Metadata
     created_at: Optional[str]
-    updated_at: Optional[str]
+    updated_at: Annotated[Optional[str], _keep_latest]
     completed_at: Optional[str]
 
 
@@ -79,6 +82,7 @@ class BrownfieldWorkflow:
     Steps:
     1. analyze_existing → Extract current architecture from GitHub
     2. parse_requirements → Parse new requirements from documents
+       (runs concurrently with analyze_existing)
     3. human_review_requirements → Human review of requirements
     4. design_integration → Design architecture with brownfield context
     5. human_review_integration → Human review of integration design
@@ -91,28 +95,20 @@ class BrownfieldWorkflow:
         Initialize the brownfield workflow.
         
         Args:
-            db_connection_string: Optional database connection string for checkpointing
+            db_connection_string: Unused; checkpoints use the application database
         """
         # Initialize agents
         self.github_analyzer = GitHubAnalyzerAgent()
         self.requirements_agent = RequirementsAgent()
         self.architecture_agent = ArchitectureAgent(
-            knowledge_base_service=LocalKnowledgeBaseService()
+            knowledge_base_service=get_local_knowledge_base_service()
         )
         
-        # Initialize local knowledge base service
-        self.kb_service = LocalKnowledgeBaseService()
+        # Shared local knowledge base service
+        self.kb_service = get_local_knowledge_base_service()
         
-        # Initialize checkpointing
-        if PostgresSaver is not None:
-            if db_connection_string:
-                self.checkpointer = PostgresSaver.from_conn_string(db_connection_string)
-            else:
-                # Use default connection string
-                self.checkpointer = PostgresSaver.from_conn_string(settings.database_url)
-        else:
-            logger.warning("PostgresSaver not available, checkpointing disabled")
-            self.checkpointer = None
+        # Shared checkpointer, so any instance (or worker) can resume a session
+        self.checkpointer = get_workflow_checkpointer()
         
         # Build the workflow graph
         self.graph = self._build_graph()
@@ -132,11 +128,11 @@ class BrownfieldWorkflow:
         workflow.add_node("generate_implementation_plan", self._generate_implementation_plan_node)
         workflow.add_node("finalize_workflow", self._finalize_workflow_node)
         
-        # Set entry point
-        workflow.set_entry_point("analyze_existing")
-        
-        # Add edges
-        workflow.add_edge("analyze_existing", "parse_requirements")
+        # Repository analysis and requirements parsing are independent, so
+        # both start at once; the review runs after both have finished
+        workflow.add_edge(START, "analyze_existing")
+        workflow.add_edge(START, "parse_requirements")
+        workflow.add_edge("analyze_existing", "human_review_requirements")
         workflow.add_edge("parse_requirements", "human_review_requirements")
         
         # Conditional edges for human review
@@ -165,10 +161,7 @@ class BrownfieldWorkflow:
         workflow.add_edge("generate_implementation_plan", "finalize_workflow")
         workflow.add_edge("finalize_workflow", END)
         
-        if self.checkpointer is not None:
-            return workflow.compile(checkpointer=self.checkpointer)
-        else:
-            return workflow.compile()
+        return workflow.compile(checkpointer=self.checkpointer)
     
     async def _analyze_existing_node(self, state: BrownfieldWorkflowState) -> Dict[str, Any]:
         """
@@ -192,7 +185,7 @@ class BrownfieldWorkflow:
             
             # Prepare input for GitHub analyzer
             github_input = {
-                "repository_url": state["repository_url"],
+                "repo_url": state["repository_url"],
                 "branch": state.get("branch", "main"),
                 "github_token": state.get("github_token"),
                 "project_id": state["project_id"]
@@ -244,7 +237,7 @@ class BrownfieldWorkflow:
             )
             
             return {
-                "errors": state.get("errors", []) + [error_msg],
+                "errors": [error_msg],
                 "current_stage": "failed",
                 "previous_stage": "analyze_existing",
                 "updated_at": datetime.utcnow().isoformat()
@@ -270,7 +263,8 @@ class BrownfieldWorkflow:
             if not state.get("document_path"):
                 raise ValueError("Document path is required for requirements parsing")
             
-            # Prepare input for requirements agent
+            # Prepare input for requirements agent; the existing architecture is
+            # only known on revision passes, the first one runs alongside the analysis
             requirements_input = {
                 "document_path": state["document_path"],
                 "project_context": {
@@ -302,7 +296,7 @@ class BrownfieldWorkflow:
             )
             
             return {
-                "errors": state.get("errors", []) + [error_msg],
+                "errors": [error_msg],
                 "current_stage": "failed",
                 "previous_stage": "parse_requirements",
                 "updated_at": datetime.utcnow().isoformat()
@@ -372,7 +366,7 @@ class BrownfieldWorkflow:
             )
             
             return {
-                "errors": state.get("errors", []) + [error_msg],
+                "errors": [error_msg],
                 "current_stage": "failed",
                 "previous_stage": "human_review_requirements",
                 "updated_at": datetime.utcnow().isoformat()
@@ -436,7 +430,7 @@ class BrownfieldWorkflow:
             )
             
             return {
-                "errors": state.get("errors", []) + [error_msg],
+                "errors": [error_msg],
                 "current_stage": "failed",
                 "previous_stage": "design_integration",
                 "updated_at": datetime.utcnow().isoformat()
@@ -508,7 +502,7 @@ class BrownfieldWorkflow:
             )
             
             return {
-                "errors": state.get("errors", []) + [error_msg],
+                "errors": [error_msg],
                 "current_stage": "failed",
                 "previous_stage": "human_review_integration",
                 "updated_at": datetime.utcnow().isoformat()
@@ -572,7 +566,7 @@ class BrownfieldWorkflow:
             )
             
             return {
-                "errors": state.get("errors", []) + [error_msg],
+                "errors": [error_msg],
                 "current_stage": "failed",
                 "previous_stage": "generate_implementation_plan",
                 "updated_at": datetime.utcnow().isoformat()
@@ -645,7 +639,7 @@ class BrownfieldWorkflow:
             )
             
             return {
-                "errors": state.get("errors", []) + [error_msg],
+                "errors": [error_msg],
                 "current_stage": "failed",
                 "previous_stage": "finalize_workflow",
                 "updated_at": datetime.utcnow().isoformat()
@@ -849,11 +843,15 @@ class BrownfieldWorkflow:
                 updated_at=datetime.utcnow().isoformat()
             )
             
-            # Run the workflow
-            result = await self.graph.ainvoke(
-                initial_state,
-                config={"configurable": {"thread_id": session_id}}
-            )
+            # Run the workflow; its LLM calls are batch work and yield to chat
+            with llm_priority(Priority.BATCH):
+                try:
+                    result = await self.graph.ainvoke(
+                        initial_state,
+                        config={"configurable": {"thread_id": session_id}}
+                    )
+                finally:
+                    await flush_workflow_checkpoints()
             
             logger.info(
                 f"Brownfield workflow completed",
@@ -0,0 +1,203 @@
+"""
+Background jobs running the architecture workflow.
+
+The workflow API submits start and continue jobs to the shared workflow job
+queue instead of running the graph inside the request. The handlers report
+every graph step as job progress (which also renews the job lease) and
+stream the agents' LLM output as ``llm_stream`` job events.
+``job_event_message`` turns job events into ``workflow_update`` WebSocket
+messages.
+"""
+
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from app.core.database import AsyncSessionLocal
+from app.core.file_storage import file_storage
+from app.core.llm_streaming import StreamOpener, stream_llm_output
+from app.core.workflow_checkpointer import get_workflow_checkpointer
+from app.core.workflow_jobs import WorkflowJob, WorkflowJobQueue, get_workflow_job_queue
+from app.schemas.websocket import WorkflowStatus, WorkflowUpdate
+from app.services.websocket.llm_stream import LLMStreamForwarder
+from app.workflows.architecture_workflow import ArchitectureWorkflow, StepCallback
+
+START_ARCHITECTURE_JOB = "architecture.start"
+CONTINUE_ARCHITECTURE_JOB = "architecture.continue"
+
+REVIEW_STAGES = {"requirements_review", "architecture_review"}
+
+# Share of the workflow completed when a stage is reached
+STAGE_PROGRESS = {
+    "starting": 0.0,
+    "requirements_review": 0.4,
+    "architecture_review": 0.8,
+    "completed": 1.0,
+    "failed": 1.0,
+    "cancelled": 1.0,
+}
+
+
+def get_architecture_job_queue() -> WorkflowJobQueue:
+    """
+    Get the shared job queue with the architecture workflow handlers registered.
+
+    Returns:
+        Shared job queue
+    """
+    queue = get_workflow_job_queue()
+    queue.register_handler(START_ARCHITECTURE_JOB, run_start_job)
+    queue.register_handler(CONTINUE_ARCHITECTURE_JOB, run_continue_job)
+    return queue
+
+
+async def get_session_stage(session_id: str) -> Optional[str]:
+    """
+    Get a session's stage from its latest checkpoint.
+
+    Args:
+        session_id: Workflow session ID
+
+    Returns:
+        Current stage, or None if the session has no checkpoint yet
+    """
+    checkpoint = await get_workflow_checkpointer().aget_tuple({"configurable": {"thread_id": session_id}})
+    if checkpoint is None:
+        return None
+    return checkpoint.checkpoint["channel_values"].get("current_stage")
+
+
+def _report_steps(job: WorkflowJob, queue: WorkflowJobQueue) -> StepCallback:
+    async def report(state: Dict[str, Any]) -> None:
+        queue.progress(job, stage=state.get("current_stage"))
+    return report
+
+
+def _stream_to_job(job: WorkflowJob, queue: WorkflowJobQueue) -> StreamOpener:
+    def open_stream(stage: str, **metadata: Any) -> LLMStreamForwarder:
+        async def send(message: Dict[str, Any]) -> None:
+            # Long generations keep the lease alive while tokens arrive
+            queue.heartbeat(job)
+            queue.publish(job, "llm_stream", message=message)
+        return LLMStreamForwarder(send, job.session_id, stage, metadata=metadata)
+    return open_stream
+
+
+def _summarize_result(result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    result = result or {}
+    return {
+        "current_stage": result.get("current_stage", "unknown"),
+        "errors": result.get("errors", []),
+    }
+
+
+async def run_start_job(job: WorkflowJob, queue: WorkflowJobQueue) -> Dict[str, Any]:
+    """
+    Run a new workflow session until its first review gate.
+
+    A retry resumes from the session's latest checkpoint if the failed
+    attempt got as far as writing one.
+
+    Args:
+        job: Job whose payload holds the ``ArchitectureWorkflow.start`` arguments
+            and the uploaded ``file_id``
+        queue: Queue running the job
+
+    Returns:
+        Stage reached and errors
+    """
+    payload = job.payload
+    workflow = ArchitectureWorkflow()
+    on_step = _report_steps(job, queue)
+
+    with stream_llm_output(_stream_to_job(job, queue)):
+        if job.attempts > 1 and await workflow.get_status(job.session_id):
+            result = await workflow.resume(job.session_id, on_step=on_step)
+        else:
+            async with AsyncSessionLocal() as db:
+                _, result = await workflow.start(
+                    project_id=payload["project_id"],
+                    document_path=payload["document_path"],
+                    domain=payload["domain"],
+                    project_context=payload.get("project_context"),
+                    db=db,
+                    llm_provider=payload.get("llm_provider"),
+                    session_id=job.session_id,
+                    on_step=on_step
+                )
+
+    if payload.get("file_id"):
+        try:
+            file_storage.move_to_processed(payload["file_id"])
+        except Exception as e:
+            logger.warning(f"Failed to move processed file {payload['file_id']}: {e}")
+    return _summarize_result(result)
+
+
+async def run_continue_job(job: WorkflowJob, queue: WorkflowJobQueue) -> Dict[str, Any]:
+    """
+    Apply human review feedback and run the workflow to its next gate.
+
+    A retry resumes from the latest checkpoint if the failed attempt had
+    already applied the feedback.
+
+    Args:
+        job: Job whose payload holds the ``human_feedback``
+        queue: Queue running the job
+
+    Returns:
+        Stage reached and errors
+    """
+    human_feedback = job.payload["human_feedback"]
+    workflow = ArchitectureWorkflow()
+    on_step = _report_steps(job, queue)
+
+    with stream_llm_output(_stream_to_job(job, queue)):
+        if job.attempts > 1:
+            state = await workflow.get_status(job.session_id)
+            if state.get("human_feedback") == human_feedback:
+                return _summarize_result(await workflow.resume(job.session_id, on_step=on_step))
+        return _summarize_result(await workflow.continue_workflow(job.session_id, human_feedback, on_step=on_step))
+
+
+def job_event_message(event: Dict[str, Any], stage: str) -> Dict[str, Any]:
+    """
+    Build the ``workflow_update`` WebSocket message for a job event.
+
+    Args:
+        event: Event published by the job queue
+        stage: Latest known workflow stage of the session
+
+    Returns:
+        JSON-serializable message
+    """
+    job = event["job"]
+    job_status = job["status"]
+    if job_status == "queued":
+        status = WorkflowStatus.QUEUED
+        message = "Waiting for a worker" if job["attempts"] == 0 else f"Retrying after error: {job['error']}"
+    elif job_status == "running":
+        status = WorkflowStatus.RUNNING
+        message = f"Running ({stage})"
+    elif job_status == "succeeded":
+        if stage in REVIEW_STAGES:
+            status, message = WorkflowStatus.REVIEW_REQUIRED, f"Waiting for review ({stage})"
+        elif stage == "failed":
+            status, message = WorkflowStatus.FAILED, "Workflow failed"
+        else:
+            status, message = WorkflowStatus.COMPLETED, "Workflow completed"
+    elif job_status == "cancelled":
+        status, message = WorkflowStatus.CANCELLED, "Workflow cancelled"
+    else:
+        status, message = WorkflowStatus.FAILED, f"Workflow job failed: {job['error']}"
+
+    metadata = {key: value for key, value in event.items() if key not in ("job", "timestamp")}
+    return WorkflowUpdate(
+        session_id=job["session_id"],
+        workflow_id=job["job_id"],
+        stage=stage,
+        progress=STAGE_PROGRESS.get(stage, 0.0),
+        status=status,
+        message=message,
+        metadata={**metadata, "job": job},
+    ).model_dump(mode="json")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+JSON Extraction Benchmark
+
+This script compares the single-pass JSON extractor against the previous
+multi-pass regex parser on the captured ``debug_*_response`` samples and on
+variants of them with prose, reasoning blocks and typical LLM defects
+(trailing commas, raw newlines in strings, truncated output), reporting
+success and per-call latency for each.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.json_extraction import find_json
+
+
+def legacy_parse(response: str) -> Any:
+    """Previous BaseAgent._parse_json_response passes, without logging."""
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        pass
+    for pattern in (r'```json\s*\n(.*?)\n```', r'```\s*\n(.*?)\n```', r'`([^`]+)`'):
+        for match in re.findall(pattern, response, re.DOTALL | re.IGNORECASE):
+            try:
+                return json.loads(match.strip())
+            except json.JSONDecodeError:
+                continue
+    json_match = re.search(r'\{.*\}', response, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group())
+        except json.JSONDecodeError:
+            pass
+    lines = response.strip().split('\n')
+    start = next((i for i, line in enumerate(lines) if line.strip().startswith('{')), -1)
+    if start >= 0:
+        depth, end = 0, -1
+        for i in range(start, len(lines)):
+            for char in lines[i].strip():
+                depth += (char == '{') - (char == '}')
+                if char == '}' and depth == 0:
+                    end = i
+                    break
+            if end >= 0:
+                break
+        if end >= 0:
+            try:
+                return json.loads('\n'.join(lines[start:end + 1]))
+            except json.JSONDecodeError:
+                pass
+    cleaned = response.strip()
+    depth = 0
+    for i, char in enumerate(cleaned):
+        depth += (char == '{') - (char == '}')
+        if char == '}' and depth == 0:
+            try:
+                return json.loads(cleaned[:i + 1])
+            except json.JSONDecodeError:
+                break
+    if cleaned.count('{') > cleaned.count('}'):
+        try:
+            return json.loads(cleaned + '}' * (cleaned.count('{') - cleaned.count('}')))
+        except json.JSONDecodeError:
+            pass
+    raise ValueError("Could not parse JSON from response")
+
+
+def single_pass_parse(response: str) -> Any:
+    """Current extractor."""
+    extracted = find_json(response, openers="{")
+    if extracted is None:
+        raise ValueError("Could not parse JSON from response")
+    return extracted.value
+
+
+def load_samples(directory: Path) -> Dict[str, str]:
+    """Captured responses (``debug_*_response.*``, excluding scripts)."""
+    return {
+        path.name: path.read_text(encoding="utf-8")
+        for path in sorted(directory.glob("debug_*_response.*"))
+        if path.suffix != ".py"
+    }
+
+
+def make_variants(name: str, text: str) -> Dict[str, str]:
+    """Wrap a sample in prose and reasoning and inject typical defects."""
+    body = text.strip().strip("`")
+    body = body[4:] if body.startswith("json") else body
+    body = body.strip()
+    return {
+        f"{name}": text,
+        f"{name} +prose": f"Here is the design you asked for:\n\n```json\n{body}\n```\n\nLet me know if {{anything}} should change.",
+        f"{name} +think": f"<think>\nThe user wants JSON like {{\"a\": 1}}. Let me design it.\n</think>\n{body}",
+        f"{name} +trailing commas": re.sub(r'("|\]|\})(\s*\n\s*)(\]|\})', r'\1,\2\3', body),
+        f"{name} +raw newlines": body.replace('"description": "', '"description": "Line one\nline two: ', 3),
+        f"{name} +truncated": body[: int(len(body) * 0.8)],
+    }
+
+
+def time_parser(parse: Callable[[str], Any], text: str, repeat: int) -> Dict[str, Any]:
+    """Run a parser repeatedly and collect success and latency percentiles."""
+    try:
+        value = parse(text)
+        ok = isinstance(value, dict) and bool(value)
+    except ValueError:
+        ok = False
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            parse(text)
+        except ValueError:
+            pass
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return {"ok": ok, "p50_us": float(np.percentile(latencies, 50)), "p95_us": float(np.percentile(latencies, 95))}
+
+
+def run_benchmark(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Compare both parsers on every sample variant."""
+    samples = load_samples(Path(args.samples))
+    if not samples:
+        raise SystemExit(f"No debug_*_response samples found in {args.samples}")
+    rows = []
+    for name, text in samples.items():
+        for variant, variant_text in make_variants(name, text).items():
+            legacy = time_parser(legacy_parse, variant_text, args.repeat)
+            current = time_parser(single_pass_parse, variant_text, args.repeat)
+            rows.append({
+                "sample": variant,
+                "bytes": len(variant_text),
+                "legacy_ok": legacy["ok"],
+                "legacy_p50_us": legacy["p50_us"],
+                "legacy_p95_us": legacy["p95_us"],
+                "single_pass_ok": current["ok"],
+                "single_pass_p50_us": current["p50_us"],
+                "single_pass_p95_us": current["p95_us"],
+            })
+    return rows
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark JSON extraction from LLM responses")
+    parser.add_argument("--samples", type=str, default=str(Path(__file__).parent.parent),
+                        help="Directory containing debug_*_response samples")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed runs per sample")
+    parser.add_argument("--output", type=str, help="Optional JSON output file")
+    args = parser.parse_args()
+
+    rows = run_benchmark(args)
+
+    print(f"\n{'sample':<52} {'bytes':>6} {'legacy':>7} {'p50 us':>8} {'single':>7} {'p50 us':>8}")
+    for row in rows:
+        print(f"{row['sample']:<52} {row['bytes']:>6} {str(row['legacy_ok']):>7} {row['legacy_p50_us']:>8.1f} "
+              f"{str(row['single_pass_ok']):>7} {row['single_pass_p50_us']:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Vector Index Benchmark
+
+This script compares exact knowledge base search against the IVF approximate
+index on synthetic clustered embeddings, reporting recall@k and query latency
+for a range of n_probe settings.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.vector_store import IVFFlatIndex, MatrixVectorStore
+
+
+def generate_vectors(count: int, dimension: int, clusters: int, seed: int) -> np.ndarray:
+    """Generate clustered vectors resembling sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    labels = rng.integers(0, clusters, size=count)
+    return (centers[labels] + 0.5 * rng.normal(size=(count, dimension))).astype(np.float32)
+
+
+def time_queries(store: MatrixVectorStore, queries: np.ndarray, top_k: int, **kwargs: Any) -> Dict[str, Any]:
+    """Run every query and collect results and latency percentiles."""
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append([row for row, _ in store.search(query, top_k=top_k, **kwargs)])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "results": results,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Build the store, then compare exact search to each n_probe setting."""
+    vectors = generate_vectors(args.vectors, args.dimension, args.clusters, args.seed)
+    queries = generate_vectors(args.queries, args.dimension, args.clusters, args.seed + 1)
+
+    index = IVFFlatIndex(n_lists=args.n_lists, min_train_size=1)
+    store = MatrixVectorStore(dimension=args.dimension, initial_capacity=args.vectors, index=index)
+
+    start = time.perf_counter()
+    store.bulk_load(vectors, [{"project_id": f"p{i % 10}"} for i in range(args.vectors)])
+    build_seconds = time.perf_counter() - start
+    print(f"Loaded {args.vectors} vectors and trained index in {build_seconds:.2f}s")
+
+    exact = time_queries(store, queries, args.top_k, exact=True)
+    rows = [{"mode": "exact", "n_probe": None, "recall": 1.0,
+             "p50_ms": exact["p50_ms"], "p95_ms": exact["p95_ms"]}]
+
+    for n_probe in args.n_probe:
+        approx = time_queries(store, queries, args.top_k, n_probe=n_probe)
+        hits = sum(
+            len(set(found) & set(expected))
+            for found, expected in zip(approx["results"], exact["results"])
+        )
+        rows.append({
+            "mode": "ivf_flat",
+            "n_probe": n_probe,
+            "recall": hits / (len(queries) * args.top_k),
+            "p50_ms": approx["p50_ms"],
+            "p95_ms": approx["p95_ms"],
+        })
+
+    return rows
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark knowledge base vector indexes")
+    parser.add_argument("--vectors", type=int, default=100_000, help="Number of stored vectors")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--clusters", type=int, default=200, help="Synthetic data clusters")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query")
+    parser.add_argument("--n-lists", type=int, default=None, help="IVF cluster count")
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[1, 4, 8, 16, 32],
+                        help="n_probe settings to compare")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", type=str, help="Optional JSON output file")
+    args = parser.parse_args()
+
+    rows = run_benchmark(args)
+
+    print(f"\n{'mode':<10} {'n_probe':>8} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in rows:
+        n_probe = "-" if row["n_probe"] is None else row["n_probe"]
+        print(f"{row['mode']:<10} {n_probe:>8} {row['recall']:>8.3f} "
+              f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,11 @@ os.environ['DEFAULT_LLM_PROVIDER'] = 'deepseek'
 os.environ['DEFAULT_LLM_MODEL'] = 'deepseek-r1'
 os.environ['DEEPSEEK_BASE_URL'] = 'http://localhost:11434'
 os.environ['DEEPSEEK_MODEL'] = 'deepseek-r1'
+os.environ['LLM_CACHE_ENABLED'] = 'false'
+os.environ['LLM_CIRCUIT_BREAKER_ENABLED'] = 'false'
+os.environ['OLLAMA_WARMUP_ON_STARTUP'] = 'false'
+os.environ['OLLAMA_ROUTE_TO_RESIDENT'] = 'false'
+os.environ['WORKFLOW_CHECKPOINTER'] = 'memory'
 
 import pytest
 import asyncio
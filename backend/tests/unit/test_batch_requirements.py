@@ -0,0 +1,174 @@
+"""
+Unit tests for batch requirements extraction.
+
+These tests replace the LLM call with a fake that answers from the
+documents in the prompt. They verify that small documents are packed into
+shared calls and large ones extracted alone, that results stream back as
+calls complete, that documents a packed call leaves out are extracted
+again, and that unreadable documents are reported without stopping the
+batch.
+"""
+
+import asyncio
+import json
+import re
+from unittest.mock import patch
+
+import pytest
+
+from app.agents.requirements_agent import RequirementsAgent
+
+EXTRACTION = {
+    "structured_requirements": {
+        "business_goals": ["Onboard customers faster"],
+        "functional_requirements": ["Users can upload specifications"],
+        "non_functional_requirements": {"performance": ["p95 under 200ms"]},
+        "constraints": [],
+        "stakeholders": [],
+    },
+    "clarification_questions": [],
+    "identified_gaps": [],
+    "confidence_score": 0.8,
+}
+
+
+class FakeLLM:
+    """Answers extraction prompts, packed or not, and records each call."""
+
+    def __init__(self, drop_keys=(), hold=None):
+        self.prompts = []
+        self.drop_keys = set(drop_keys)
+        self.hold = hold or {}
+
+    async def __call__(self, messages, **kwargs):
+        prompt = messages[-1].content
+        self.prompts.append(prompt)
+        for marker, event in self.hold.items():
+            if marker in prompt:
+                await event.wait()
+        keys = re.findall(r"^DOCUMENT (doc\d+) \(", prompt, re.MULTILINE)
+        if not keys:
+            return "```json\n" + json.dumps(EXTRACTION) + "\n```"
+        packed = {key: EXTRACTION for key in keys if key not in self.drop_keys}
+        return "```json\n" + json.dumps(packed) + "\n```"
+
+
+@pytest.fixture
+def agent():
+    agent = RequirementsAgent()
+    agent.llm_model = "test-model"
+    return agent
+
+
+def write_documents(tmp_path, sizes):
+    paths = []
+    for i, words in enumerate(sizes):
+        path = tmp_path / f"spec_{i}.md"
+        path.write_text(f"Specification {i}. " + "The system shall scale. " * words)
+        paths.append(str(path))
+    return paths
+
+
+async def collect(agent, paths):
+    return [item async for item in agent.extract_batch(paths, domain="cloud-native")]
+
+
+class TestBatchExtraction:
+    """Test packing, streaming and fallbacks of extract_batch."""
+
+    @pytest.mark.asyncio
+    async def test_small_documents_packed(self, agent, tmp_path):
+        """Test that small documents share calls up to the per-call limit."""
+        paths = write_documents(tmp_path, [10, 10, 10, 10])
+        llm = FakeLLM()
+        agent._call_llm = llm
+
+        with patch("app.agents.requirements_agent.settings.requirements_batch_pack_max_documents", 3):
+            items = await collect(agent, paths)
+
+        documents, summary = items[:-1], items[-1]
+        assert sorted(item["index"] for item in documents) == [0, 1, 2, 3]
+        assert all(item["status"] == "completed" for item in documents)
+        assert sorted(item["packed_with"] for item in documents) == [1, 3, 3, 3]
+        assert documents[0]["result"]["metadata"]["document_path"] in paths
+        assert len(llm.prompts) == 2
+        assert summary["type"] == "summary"
+        assert summary["succeeded"] == 4
+        assert summary["packed_calls"] == 1
+        assert summary["packed_documents"] == 3
+        assert summary["documents_per_second"] > 0
+
+    @pytest.mark.asyncio
+    async def test_large_documents_extracted_alone(self, agent, tmp_path):
+        """Test that documents above the packing threshold get their own call."""
+        paths = write_documents(tmp_path, [10, 40, 10])
+        llm = FakeLLM()
+        agent._call_llm = llm
+
+        with patch("app.agents.requirements_agent.settings.requirements_batch_pack_document_tokens", 200):
+            items = await collect(agent, paths)
+
+        packed_with = {item["index"]: item["packed_with"] for item in items[:-1]}
+        assert packed_with == {0: 2, 1: 1, 2: 2}
+        assert sum("DOCUMENT doc" in prompt for prompt in llm.prompts) == 1
+
+    @pytest.mark.asyncio
+    async def test_packs_respect_prompt_budget(self, agent, tmp_path):
+        """Test that packing stops when the model's prompt budget is full."""
+        paths = write_documents(tmp_path, [60, 60, 60])
+        agent._call_llm = FakeLLM()
+
+        with patch("app.agents.requirements_agent.prompt_token_budget", return_value=1900):
+            items = await collect(agent, paths)
+
+        assert sorted(item["packed_with"] for item in items[:-1]) == [1, 2, 2]
+
+    @pytest.mark.asyncio
+    async def test_results_stream_as_completed(self, agent, tmp_path):
+        """Test that a slow call does not hold back finished documents."""
+        paths = write_documents(tmp_path, [10, 10])
+        release = asyncio.Event()
+        agent._call_llm = FakeLLM(hold={"Specification 0.": release})
+
+        with patch("app.agents.requirements_agent.settings.requirements_batch_pack_max_documents", 1):
+            stream = agent.extract_batch(paths)
+            first = await stream.__anext__()
+            release.set()
+            rest = [item async for item in stream]
+
+        assert first["index"] == 1
+        assert rest[0]["index"] == 0
+        assert rest[-1]["type"] == "summary"
+
+    @pytest.mark.asyncio
+    async def test_missing_packed_documents_retried(self, agent, tmp_path):
+        """Test that documents left out of a packed response are extracted alone."""
+        paths = write_documents(tmp_path, [10, 10, 10])
+        llm = FakeLLM(drop_keys={"doc2"})
+        agent._call_llm = llm
+
+        items = await collect(agent, paths)
+
+        results = {item["index"]: item for item in items[:-1]}
+        assert all(item["status"] == "completed" for item in results.values())
+        assert results[1]["packed_with"] == 1
+        assert items[-1]["retried_documents"] == 1
+        assert items[-1]["extraction_calls"] == 2
+
+    @pytest.mark.asyncio
+    async def test_unreadable_documents_reported(self, agent, tmp_path):
+        """Test that missing, unsupported and empty documents fail individually."""
+        paths = write_documents(tmp_path, [10])
+        empty = tmp_path / "empty.txt"
+        empty.write_text("   ")
+        unsupported = tmp_path / "spec.pdf"
+        unsupported.write_text("binary")
+        paths += [str(tmp_path / "missing.md"), str(unsupported), str(empty)]
+        agent._call_llm = FakeLLM()
+
+        items = await collect(agent, paths)
+
+        status = {item["index"]: item["status"] for item in items[:-1]}
+        assert status == {0: "completed", 1: "failed", 2: "failed", 3: "failed"}
+        assert items[-1]["succeeded"] == 1
+        assert items[-1]["failed"] == 3
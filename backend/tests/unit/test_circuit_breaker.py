@@ -0,0 +1,263 @@
+"""
+Unit tests for LLM provider circuit breakers.
+
+These tests verify that breakers open after consecutive failures, probe
+once when half-open, back off after failed probes, and that
+retry_with_fallback, the LLM service and LLMStrategy route around open
+circuits.
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+from unittest.mock import AsyncMock, patch
+
+from app.agents.base_agent import BaseAgent
+from app.core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    CircuitState,
+    circuit_breakers,
+)
+from app.core.error_handling import FallbackConfig, RetryConfig, call_with_circuit_breaker, retry_with_fallback
+from app.core.hedging import HedgePolicy
+from app.core.llm_strategy import LLMStrategy
+from app.modules.llm_service import SimpleLLMService
+
+
+class EchoAgent(BaseAgent):
+    """Agent that sends its input to the LLM."""
+
+    async def execute(self, input_data):
+        return {"answer": await self._call_llm([HumanMessage(content=input_data["question"])])}
+
+    def get_system_prompt(self):
+        return "You answer questions."
+
+
+@pytest.fixture
+def breakers_enabled():
+    """Enable circuit breakers with a clean shared registry."""
+    circuit_breakers.reset()
+    with patch("app.core.circuit_breaker.settings.llm_circuit_breaker_enabled", True):
+        yield circuit_breakers
+    circuit_breakers.reset()
+
+
+def _trip(registry, provider, model=None):
+    for _ in range(registry.breaker(provider, model).failure_threshold):
+        registry.record_failure(provider, model, ConnectionError("connection refused"))
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions."""
+
+    def test_opens_after_threshold(self):
+        """Test that consecutive failures open the circuit."""
+        breaker = CircuitBreaker("test", failure_threshold=3)
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.allow_request()
+
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+        assert not breaker.allow_request()
+        assert breaker.get_stats()["rejected"] == 1
+
+    def test_success_resets_failure_count(self):
+        """Test that only consecutive failures count."""
+        breaker = CircuitBreaker("test", failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.CLOSED
+
+    def test_half_open_allows_single_probe(self):
+        """Test that one probe is let through after the recovery timeout."""
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=10)
+        with patch("app.core.circuit_breaker.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+        with patch("app.core.circuit_breaker.time.monotonic", return_value=111.0):
+            assert breaker.allow_request()
+            assert breaker.state == CircuitState.HALF_OPEN
+            assert not breaker.allow_request()
+
+        breaker.record_success()
+
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.allow_request()
+
+    def test_failed_probe_doubles_recovery_timeout(self):
+        """Test that a failed probe re-opens with a longer timeout, up to the maximum."""
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=10, max_recovery_timeout=15)
+        breaker.record_failure()
+        breaker.opened_at -= 10
+        assert breaker.allow_request()
+
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.recovery_timeout == 15
+        breaker.record_success()
+        assert breaker.recovery_timeout == 10
+
+
+class TestCircuitBreakerRegistry:
+    """Test provider and model breakers."""
+
+    def test_provider_outage_blocks_all_models(self, breakers_enabled):
+        """Test that an open provider circuit rejects each of its models."""
+        _trip(breakers_enabled, "ollama")
+
+        assert not breakers_enabled.is_available("ollama", "llama3.2:3b")
+        assert breakers_enabled.is_available("openai", "gpt-4o")
+
+    def test_model_outage_keeps_provider_available(self, breakers_enabled):
+        """Test that a broken model does not block its provider's other models."""
+        registry = CircuitBreakerRegistry()
+        with patch("app.core.circuit_breaker.settings.llm_circuit_failure_threshold", 2):
+            for _ in range(2):
+                registry.record_failure("deepseek", "deepseek-r1")
+                registry.record_success("deepseek", "deepseek-coder")
+
+        assert not registry.is_available("deepseek", "deepseek-r1")
+        assert registry.is_available("deepseek", "deepseek-coder")
+        assert registry.is_available("deepseek")
+
+    def test_model_timeouts_leave_other_models_available(self, breakers_enabled):
+        """Test that model-specific failures open only that model's circuit."""
+        for _ in range(breakers_enabled.breaker("ollama", "qwen2.5:14b").failure_threshold):
+            breakers_enabled.record_failure("ollama", "qwen2.5:14b", asyncio.TimeoutError())
+
+        assert not breakers_enabled.is_available("ollama", "qwen2.5:14b")
+        assert breakers_enabled.is_available("ollama", "llama3.2:3b")
+        assert breakers_enabled.breaker("ollama").get_stats()["failures"] == 0
+
+    def test_provider_wide_failures_trip_provider(self, breakers_enabled):
+        """Test that connection errors and failures across models count against the provider."""
+        breakers_enabled.record_failure("ollama", "qwen2.5:14b", ConnectionError("connection refused"))
+        assert breakers_enabled.breaker("ollama").get_stats()["failures"] == 1
+
+        breakers_enabled.record_failure("ollama", "llama3.2:3b", asyncio.TimeoutError())
+        assert breakers_enabled.breaker("ollama").get_stats()["failures"] == 2
+
+    def test_disabled_always_allows(self):
+        """Test that disabled breakers never reject calls."""
+        registry = CircuitBreakerRegistry()
+        _trip(registry, "openai")
+
+        with patch("app.core.circuit_breaker.settings.llm_circuit_breaker_enabled", False):
+            assert registry.allow_request("openai")
+
+
+class TestCircuitBreakerRouting:
+    """Test that callers skip open circuits."""
+
+    @pytest.mark.asyncio
+    async def test_call_records_outcomes(self, breakers_enabled):
+        """Test that only provider errors count as failures."""
+        async def bad_request():
+            raise ValueError("invalid prompt")
+
+        with pytest.raises(ValueError):
+            await call_with_circuit_breaker("openai", "gpt-4o", bad_request)
+
+        assert breakers_enabled.breaker("openai").get_stats()["failures"] == 0
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_rejects_without_calling(self, breakers_enabled):
+        """Test that a call to an open circuit fails fast."""
+        _trip(breakers_enabled, "openai")
+        calls = []
+
+        async def call():
+            calls.append(1)
+
+        with pytest.raises(CircuitOpenError):
+            await call_with_circuit_breaker("openai", "gpt-4o", call)
+        assert calls == []
+
+    @pytest.mark.asyncio
+    async def test_retry_with_fallback_skips_open_provider(self, breakers_enabled):
+        """Test that an open provider goes straight to the fallback provider without backoff."""
+        _trip(breakers_enabled, "deepseek")
+        calls = []
+
+        async def llm_call(llm_provider=None, llm_model=None):
+            calls.append(llm_provider)
+            return llm_provider
+
+        with patch("app.core.error_handling.asyncio.sleep") as sleep:
+            result = await retry_with_fallback(
+                llm_call,
+                retry_config=RetryConfig(max_retries=3),
+                fallback_config=FallbackConfig(
+                    enable_model_fallback=False,
+                    fallback_providers=["openai"],
+                    fallback_models={"openai": ["gpt-4o-mini"]},
+                ),
+                llm_provider="deepseek",
+                llm_model="deepseek-r1",
+            )
+
+        assert result == "openai"
+        assert calls == ["openai"]
+        sleep.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_retries_stop_once_circuit_opens(self, breakers_enabled):
+        """Test that retries end as soon as failures trip the breaker."""
+        calls = []
+
+        async def llm_call(llm_provider=None, llm_model=None):
+            calls.append(llm_model)
+            raise ConnectionError("connection refused")
+
+        with patch("app.core.circuit_breaker.settings.llm_circuit_failure_threshold", 2), \
+                patch("app.core.error_handling.asyncio.sleep"):
+            with pytest.raises(ConnectionError):
+                await retry_with_fallback(
+                    llm_call,
+                    retry_config=RetryConfig(max_retries=5),
+                    fallback_config=FallbackConfig(enable_model_fallback=False, enable_provider_fallback=False),
+                    llm_provider="deepseek",
+                    llm_model="deepseek-r1",
+                )
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_agent_failures_count_against_agent_provider(self, breakers_enabled):
+        """Test that a non-default agent's failures trip its own breaker, not the default provider's."""
+        agent = EchoAgent(agent_type="echo", llm_provider="ollama", llm_model="llama3.2:3b")
+        agent.llm.ainvoke = AsyncMock(side_effect=ConnectionError("connection refused"))
+
+        with patch.object(agent, "_initialize_llm", return_value=agent.llm), \
+                patch("app.core.error_handling.get_hedge_policy", return_value=HedgePolicy(enabled=False)), \
+                patch("app.core.error_handling.asyncio.sleep"):
+            with pytest.raises(Exception):
+                await agent._call_llm([HumanMessage(content="question")])
+
+        assert breakers_enabled.breaker("ollama").get_stats()["failures"] >= 4
+        assert breakers_enabled.breaker("deepseek").get_stats()["failures"] == 0
+        assert breakers_enabled.is_available("deepseek")
+
+    def test_llm_service_skips_open_provider(self, breakers_enabled):
+        """Test that provider selection falls through an open circuit."""
+        service = SimpleLLMService()
+        service.deepseek_base_url = "http://localhost:11434"
+        service.openai_api_key = "sk-test"
+        _trip(breakers_enabled, "deepseek")
+
+        assert service._select_provider("gpt-4o-mini", None) == ("openai", "gpt-4o-mini")
+
+    def test_strategy_treats_open_provider_as_unavailable(self, breakers_enabled):
+        """Test that LLMStrategy does not route to an open provider."""
+        with patch("app.core.llm_strategy.settings.openai_api_key", "sk-test"):
+            assert LLMStrategy._is_provider_available("openai")
+            _trip(breakers_enabled, "openai")
+            assert not LLMStrategy._is_provider_available("openai")
@@ -0,0 +1,134 @@
+"""
+Unit tests for the shared Embedding Service.
+
+This module tests the EmbeddingService functionality including:
+- Micro-batching of concurrent requests
+- Content-hash deduplication
+- LRU eviction and the SQLite disk tier
+- The synchronous encode API
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+from unittest.mock import Mock, patch
+
+from app.services.embedding_service import EmbeddingService, get_embedding_service
+
+
+def _fake_encode(texts, **kwargs):
+    """Deterministic embedding: text length and character sum."""
+    return np.array([[len(text), sum(map(ord, text))] for text in texts], dtype=np.float32)
+
+
+class TestEmbeddingService:
+    """Test cases for EmbeddingService."""
+
+    @pytest.fixture
+    def mock_model(self):
+        """Mock sentence transformer model."""
+        model = Mock()
+        model.encode = Mock(side_effect=_fake_encode)
+        return model
+
+    @pytest.fixture
+    def make_service(self, mock_model):
+        """Factory for services backed by the mock model."""
+        def _make(**kwargs):
+            service = EmbeddingService(**{"max_wait_ms": 5, **kwargs})
+            service._model = mock_model
+            return service
+        return _make
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_a_batch(self, make_service, mock_model):
+        """Test that concurrent embed calls are encoded in one model call."""
+        service = make_service()
+
+        results = await asyncio.gather(*(service.embed(f"text {i}") for i in range(10)))
+
+        assert mock_model.encode.call_count == 1
+        assert len(mock_model.encode.call_args[0][0]) == 10
+        assert np.allclose(results[3], _fake_encode(["text 3"])[0])
+
+    @pytest.mark.asyncio
+    async def test_batches_split_at_max_size(self, make_service, mock_model):
+        """Test that a full batch is flushed without waiting."""
+        service = make_service(max_batch_size=4, max_wait_ms=10_000)
+
+        vectors = await asyncio.wait_for(
+            service.embed_many([f"text {i}" for i in range(8)]), timeout=5
+        )
+
+        assert vectors.shape == (8, 2)
+        assert mock_model.encode.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_identical_texts_are_encoded_once(self, make_service, mock_model):
+        """Test deduplication within and across in-flight requests."""
+        service = make_service()
+
+        first, second = await asyncio.gather(
+            service.embed_many(["a", "b", "a"]), service.embed("b")
+        )
+
+        assert mock_model.encode.call_args[0][0] == ["a", "b"]
+        assert np.allclose(first[0], first[2])
+        assert np.allclose(first[1], second)
+        assert service.get_stats()["deduplicated"] == 2
+
+        await service.embed("a")
+        assert mock_model.encode.call_count == 1
+        assert service.get_stats()["memory_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, make_service, mock_model):
+        """Test that the least recently used embedding is evicted."""
+        service = make_service(cache_size=2)
+        await service.embed_many(["a", "b"])
+        await service.embed("a")
+        await service.embed("c")
+
+        await service.embed("a")
+        assert mock_model.encode.call_count == 2
+
+        await service.embed("b")
+        assert mock_model.encode.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_disk_cache_survives_restart(self, make_service, mock_model, tmp_path):
+        """Test that embeddings are reloaded from the disk tier."""
+        await make_service(cache_dir=tmp_path).embed_many(["a", "b"])
+
+        service = make_service(cache_dir=tmp_path)
+        vectors = await service.embed_many(["a", "b"])
+
+        assert mock_model.encode.call_count == 1
+        assert service.get_stats()["disk_hits"] == 2
+        assert np.allclose(vectors, _fake_encode(["a", "b"]))
+
+    @pytest.mark.asyncio
+    async def test_encode_errors_propagate(self, make_service, mock_model):
+        """Test that model failures reach every waiting caller."""
+        mock_model.encode.side_effect = RuntimeError("model failed")
+        service = make_service()
+
+        results = await asyncio.gather(service.embed("a"), service.embed("b"), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_sync_encode(self, make_service, mock_model):
+        """Test the drop-in synchronous encode API."""
+        service = make_service()
+
+        assert service.encode("a").shape == (2,)
+        assert service.encode(["a", "b", "b"]).shape == (3, 2)
+        assert mock_model.encode.call_count == 2
+        assert mock_model.encode.call_args[0][0] == ["b"]
+
+    def test_shared_instance_per_model(self):
+        """Test that services share one instance per model name."""
+        with patch.dict("app.services.embedding_service._embedding_services", clear=True):
+            assert get_embedding_service("model-a") is get_embedding_service("model-a")
+            assert get_embedding_service("model-a") is not get_embedding_service("model-b")
@@ -0,0 +1,163 @@
+"""
+Unit tests for the Enhanced Knowledge Base Service.
+
+These tests verify durable entity and relationship storage, indexed
+candidate lookup and semantic search using a mocked embedding model.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+from unittest.mock import Mock, patch
+
+from app.services.embedding_service import EmbeddingService
+from app.services.enhanced_knowledge_base_service import (
+    EnhancedKnowledgeBaseService,
+    KnowledgeContext,
+    KnowledgeSource,
+    KnowledgeType,
+)
+
+
+def _fake_encode(texts, **kwargs):
+    """Deterministic bag-of-characters embedding for tests."""
+    vectors = np.zeros((len(texts), 384), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for char in text:
+            vectors[row, ord(char) % 384] += 1.0
+    return vectors
+
+
+class TestEnhancedKnowledgeBaseService:
+    """Test the Enhanced Knowledge Base Service functionality."""
+
+    @pytest.fixture
+    def embedding_service(self):
+        """Embedding service backed by a mock model."""
+        model = Mock()
+        model.encode = Mock(side_effect=_fake_encode)
+        service = EmbeddingService(max_wait_ms=1)
+        service._model = model
+        return service
+
+    @pytest.fixture
+    def make_service(self, tmp_path, embedding_service):
+        """Factory for services sharing one storage directory."""
+        services = []
+
+        def _make():
+            with patch(
+                'app.services.enhanced_knowledge_base_service.get_embedding_service',
+                return_value=embedding_service
+            ):
+                service = EnhancedKnowledgeBaseService(storage_path=str(tmp_path))
+            services.append(service)
+            return service
+
+        yield _make
+        for service in services:
+            service.entity_store.close()
+
+    async def _add(self, service, content, project_id="p1", knowledge_type=KnowledgeType.REQUIREMENT,
+                   workflow_id=None):
+        return await service.add_knowledge(
+            knowledge_type, content, {}, KnowledgeSource.WORKFLOW, project_id, workflow_id
+        )
+
+    def _context(self, query, project_id="p1", types=None, workflow_id=None):
+        return KnowledgeContext(
+            project_id=project_id,
+            workflow_id=workflow_id,
+            query=query,
+            knowledge_types=types or [KnowledgeType.REQUIREMENT],
+            similarity_threshold=0.0
+        )
+
+    @pytest.mark.asyncio
+    async def test_search_only_scores_indexed_candidates(self, make_service):
+        """Test that project, type and workflow filters restrict results."""
+        service = make_service()
+        await self._add(service, "user login", workflow_id="w1")
+        await self._add(service, "user logout", workflow_id="w2")
+        await self._add(service, "user login", project_id="p2")
+        await self._add(service, "user login", knowledge_type=KnowledgeType.CONSTRAINT)
+
+        results = await service.search_knowledge(self._context("user login"))
+        assert [entity.content for entity, _ in results] == ["user login", "user logout"]
+
+        results = await service.search_knowledge(self._context("user login", workflow_id="w2"))
+        assert [entity.workflow_id for entity, _ in results] == ["w2"]
+
+        assert await service.search_knowledge(self._context("login", project_id="missing")) == []
+
+    @pytest.mark.asyncio
+    async def test_knowledge_persists_across_instances(self, make_service):
+        """Test that entities, relationships and embeddings survive a restart."""
+        service = make_service()
+        first = await self._add(service, "orders are stored in postgres")
+        second = await self._add(service, "billing reads orders")
+        relationship_id = await service.add_relationship(first, second, "depends_on", 0.8, "reads")
+        await service.refine_knowledge(first, "orders are stored in mysql", {"revised": True})
+
+        reloaded = make_service()
+
+        assert reloaded.entities[first].content == "orders are stored in mysql"
+        assert reloaded.entities[first].metadata == {"revised": True}
+        assert reloaded.entities[first].type == KnowledgeType.REQUIREMENT
+        assert reloaded.entities[second].relationships == [relationship_id]
+        assert reloaded.relationships[relationship_id].strength == 0.8
+        results = await reloaded.search_knowledge(self._context("orders are stored in mysql"))
+        assert results[0][0].id == first
+        assert results[0][1] == pytest.approx(1.0)
+
+    @pytest.mark.asyncio
+    async def test_metadata_datetimes_are_persisted(self, make_service):
+        """Test that metadata JSON cannot represent natively is still saved."""
+        service = make_service()
+        reviewed_at = datetime(2024, 1, 2, 3, 4, 5)
+        entity_id = await service.add_knowledge(
+            KnowledgeType.REQUIREMENT, "orders", {"reviewed_at": reviewed_at},
+            KnowledgeSource.WORKFLOW, "p1"
+        )
+
+        reloaded = make_service()
+        assert reloaded.entities[entity_id].metadata == {"reviewed_at": str(reviewed_at)}
+
+    @pytest.mark.asyncio
+    async def test_delete_project_knowledge(self, make_service):
+        """Test that deleting a project removes it from memory, indexes and disk."""
+        service = make_service()
+        kept = await self._add(service, "gateway", project_id="p2")
+        removed = [await self._add(service, f"service {i}") for i in range(3)]
+        await service.add_relationship(removed[0], kept, "calls", 0.5, "")
+
+        assert await service.delete_project_knowledge("p1") == 3
+
+        assert set(service.entities) == {kept}
+        assert service.relationships == {}
+        assert await service.search_knowledge(self._context("service 1")) == []
+        assert service.store.deleted_count == 0
+
+        assert service.entities[kept].relationships == []
+
+        reloaded = make_service()
+        assert set(reloaded.entities) == {kept}
+        assert reloaded.relationships == {}
+        assert reloaded.entities[kept].relationships == []
+        results = await reloaded.search_knowledge(self._context("gateway", project_id="p2"))
+        assert [entity.id for entity, _ in results] == [kept]
+
+    @pytest.mark.asyncio
+    async def test_project_knowledge_graph(self, make_service):
+        """Test building a project's graph from the project index."""
+        service = make_service()
+        first = await self._add(service, "api")
+        second = await self._add(service, "db")
+        await self._add(service, "other", project_id="p2")
+        await service.add_relationship(first, second, "uses", 1.0, "")
+
+        graph = await service.get_project_knowledge_graph("p1")
+
+        assert set(graph["entities"]) == {first, second}
+        assert graph["metadata"]["relationship_count"] == 1
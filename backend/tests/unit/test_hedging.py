@@ -0,0 +1,285 @@
+"""
+Unit tests for hedged LLM requests.
+
+These tests verify that slow candidates are hedged after the latency
+percentile, that the first acceptable result wins and losers are
+cancelled, per-stage policies and the hedged attempt in
+retry_with_fallback.
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.agents.base_agent import BaseAgent
+from app.core.error_handling import FallbackConfig, RetryConfig, retry_with_fallback
+from app.core.hedging import (
+    HedgeExhaustedError,
+    HedgePolicy,
+    LatencyTracker,
+    get_hedge_policy,
+    hedged_call,
+)
+
+
+class EchoAgent(BaseAgent):
+    """Agent that sends its input to the LLM."""
+
+    async def execute(self, input_data):
+        return {"answer": await self._call_llm([HumanMessage(content=input_data["question"])])}
+
+    def get_system_prompt(self):
+        return "You answer questions."
+
+
+def _candidate(result=None, delay=0.0, error=None, log=None, label=""):
+    async def run():
+        if log is not None:
+            log.append(f"start:{label}")
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if log is not None:
+                log.append(f"cancelled:{label}")
+            raise
+        if error:
+            raise error
+        return result
+    return run
+
+
+class TestLatencyTracker:
+    """Test latency percentiles."""
+
+    def test_percentile_needs_samples(self):
+        """Test that no percentile is reported before min_samples."""
+        tracker = LatencyTracker(min_samples=3)
+        tracker.record("m", 1.0)
+
+        assert tracker.percentile("m", 0.9) is None
+
+    def test_percentile(self):
+        """Test the percentile of recorded latencies."""
+        tracker = LatencyTracker(min_samples=1)
+        for latency in range(1, 11):
+            tracker.record("m", float(latency))
+
+        assert tracker.percentile("m", 0.9) == 10.0
+        assert tracker.percentile("m", 0.5) == 6.0
+
+    def test_policy_delay_clamped(self):
+        """Test that the hedge delay is clamped and defaults without samples."""
+        tracker = LatencyTracker(min_samples=1)
+        tracker.record("fast", 0.1)
+        policy = HedgePolicy(default_delay=30.0, min_delay=2.0, max_delay=60.0)
+
+        assert policy.delay_for("fast", tracker) == 2.0
+        assert policy.delay_for("unknown", tracker) == 30.0
+
+
+class TestHedgedCall:
+    """Test hedged candidate racing."""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_never_hedged(self):
+        """Test that a primary finishing within the delay runs alone."""
+        log = []
+        policy = HedgePolicy(default_delay=1.0)
+
+        result, details = await hedged_call(
+            [("a", _candidate("A", 0.01, log=log, label="a")), ("b", _candidate("B", log=log, label="b"))],
+            policy, stage="test-fast", tracker=LatencyTracker(),
+        )
+
+        assert result == "A"
+        assert details == {"winner": "a", "candidates_started": 1}
+        assert log == ["start:a"]
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_hedged_and_cancelled(self):
+        """Test that a slow primary is hedged and the loser cancelled."""
+        log = []
+        policy = HedgePolicy(default_delay=0.02, min_delay=0.0)
+
+        result, details = await hedged_call(
+            [("slow", _candidate("S", 5, log=log, label="slow")), ("fast", _candidate("F", 0.01, log=log, label="fast"))],
+            policy, stage="test-slow", tracker=LatencyTracker(),
+        )
+
+        # Losers are cancelled and awaited before hedged_call returns
+        assert result == "F"
+        assert details["winner"] == "fast"
+        assert log == ["start:slow", "start:fast", "cancelled:slow"]
+
+    @pytest.mark.asyncio
+    async def test_hedge_deferred_without_capacity(self):
+        """Test that no hedge starts while the caller reports no spare capacity."""
+        log = []
+        policy = HedgePolicy(default_delay=0.01, min_delay=0.0)
+
+        result, details = await hedged_call(
+            [("slow", _candidate("S", 0.1, log=log, label="slow")), ("fast", _candidate("F", log=log, label="fast"))],
+            policy, stage="test-deferred", tracker=LatencyTracker(), can_hedge=lambda: False,
+        )
+
+        assert result == "S"
+        assert details == {"winner": "slow", "candidates_started": 1}
+        assert log == ["start:slow"]
+
+    @pytest.mark.asyncio
+    async def test_failure_starts_next_immediately(self):
+        """Test that a failed candidate does not wait for the hedge delay."""
+        policy = HedgePolicy(default_delay=60.0)
+
+        result, details = await asyncio.wait_for(hedged_call(
+            [("a", _candidate(error=RuntimeError("down"))), ("b", _candidate("B"))],
+            policy, stage="test-fail", tracker=LatencyTracker(),
+        ), timeout=1)
+
+        assert result == "B"
+        assert details["winner"] == "b"
+
+    @pytest.mark.asyncio
+    async def test_unacceptable_result_skipped(self):
+        """Test that results rejected by accept do not win."""
+        result, _ = await hedged_call(
+            [("a", _candidate("")), ("b", _candidate("ok"))],
+            HedgePolicy(), stage="test-accept", accept=bool, tracker=LatencyTracker(),
+        )
+
+        assert result == "ok"
+
+    @pytest.mark.asyncio
+    async def test_all_fail(self):
+        """Test that every candidate's error is reported."""
+        with pytest.raises(HedgeExhaustedError) as exc_info:
+            await hedged_call(
+                [("a", _candidate(error=RuntimeError("a down"))), ("b", _candidate(error=RuntimeError("b down")))],
+                HedgePolicy(), stage="test-all-fail", tracker=LatencyTracker(),
+            )
+
+        assert set(exc_info.value.errors) == {"0:a", "1:b"}
+
+    @pytest.mark.asyncio
+    async def test_all_fail_keeps_errors_of_repeated_labels(self):
+        """Test that candidates sharing a label each keep their error."""
+        first, second = RuntimeError("first down"), RuntimeError("second down")
+        with pytest.raises(HedgeExhaustedError) as exc_info:
+            await hedged_call(
+                [("m", _candidate(error=first)), ("m", _candidate(error=second))],
+                HedgePolicy(), stage="test-repeated", tracker=LatencyTracker(),
+            )
+
+        assert exc_info.value.errors == {"0:m": first, "1:m": second}
+
+    @pytest.mark.asyncio
+    async def test_disabled_policy_is_sequential(self):
+        """Test that a disabled policy never runs candidates in parallel."""
+        log = []
+        policy = HedgePolicy(enabled=False, default_delay=0.0, min_delay=0.0)
+
+        result, _ = await hedged_call(
+            [("a", _candidate("A", 0.05, log=log, label="a")), ("b", _candidate("B", log=log, label="b"))],
+            policy, stage="test-disabled", tracker=LatencyTracker(),
+        )
+
+        assert result == "A"
+        assert log == ["start:a"]
+
+    @pytest.mark.asyncio
+    async def test_observed_latency_sets_delay(self):
+        """Test that winners' latencies feed the tracker."""
+        tracker = LatencyTracker(min_samples=1)
+
+        await hedged_call([("m", _candidate("x", 0.01))], HedgePolicy(), stage="test-track", tracker=tracker)
+
+        assert tracker.percentile("m", 0.9) >= 0.01
+
+
+class TestHedgePolicySettings:
+    """Test per-stage policy configuration."""
+
+    def test_stage_override(self):
+        """Test that stage overrides replace global settings."""
+        overrides = {"github_analyzer": {"enabled": False}, "chat": {"percentile": 0.75}}
+        with patch("app.core.hedging.settings.llm_hedge_stage_overrides", overrides):
+            assert get_hedge_policy("github_analyzer").enabled is False
+            assert get_hedge_policy("chat").percentile == 0.75
+            assert get_hedge_policy("other").percentile == 0.9
+
+
+class TestRetryWithFallbackHedging:
+    """Test hedged attempts in retry_with_fallback."""
+
+    @pytest.mark.asyncio
+    async def test_slow_attempt_hedged_with_fallback_model(self):
+        """Test that the fallback model answers when the primary is slow."""
+        calls = []
+
+        async def llm_call(llm_provider=None, llm_model=None):
+            calls.append(llm_model)
+            await asyncio.sleep(5 if llm_model == "deepseek-r1" else 0.01)
+            return llm_model
+
+        overrides = {"test-stage": {"default_delay": 0.02, "min_delay": 0.0}}
+        with patch("app.core.hedging.settings.llm_hedge_stage_overrides", overrides):
+            result = await retry_with_fallback(
+                llm_call,
+                retry_config=RetryConfig(max_retries=0),
+                fallback_config=FallbackConfig(enable_provider_fallback=False),
+                hedge_stage="test-stage",
+                llm_provider="deepseek",
+                llm_model="deepseek-r1",
+            )
+
+        assert result == "deepseek-coder"
+        assert calls == ["deepseek-r1", "deepseek-coder"]
+
+    @pytest.mark.asyncio
+    async def test_primary_failure_is_retried_not_hedged(self):
+        """Test that a failing primary keeps the sequential retry behaviour."""
+        calls = []
+
+        async def llm_call(llm_provider=None, llm_model=None):
+            calls.append(llm_model)
+            if len(calls) == 1:
+                raise ConnectionError("connection reset")
+            return llm_model
+
+        with patch("app.core.error_handling.asyncio.sleep"):
+            result = await retry_with_fallback(
+                llm_call,
+                retry_config=RetryConfig(max_retries=1),
+                hedge_stage="test-retry",
+                llm_provider="deepseek",
+                llm_model="deepseek-r1",
+            )
+
+        assert result == "deepseek-r1"
+        assert calls == ["deepseek-r1", "deepseek-r1"]
+
+    @pytest.mark.asyncio
+    async def test_agent_hedge_reaches_fallback_model(self):
+        """Test that a hedged agent call is sent to the fallback model's client."""
+        agent = EchoAgent(agent_type="test-agent-hedge", llm_provider="ollama", llm_model="llama3.2:3b")
+
+        async def slow_answer(messages, **kwargs):
+            await asyncio.sleep(5)
+            return AIMessage(content="slow answer")
+
+        agent.llm.ainvoke = AsyncMock(side_effect=slow_answer)
+        hedge_llm = Mock()
+        hedge_llm.ainvoke = AsyncMock(return_value=AIMessage(content="hedged answer"))
+
+        overrides = {"test-agent-hedge": {"default_delay": 0.02, "min_delay": 0.0}}
+        with patch("app.core.hedging.settings.llm_hedge_stage_overrides", overrides), \
+                patch("app.core.llm_scheduler.settings.llm_scheduler_enabled", False), \
+                patch.object(agent, "_initialize_llm", return_value=hedge_llm) as initialize_llm:
+            result = await agent._call_llm([HumanMessage(content="question")])
+
+        assert result == "hedged answer"
+        initialize_llm.assert_called_once_with("ollama", "llama3.2:1b")
+        assert agent.llm.ainvoke.await_count == 1
+        assert "llm_model" not in hedge_llm.ainvoke.await_args.kwargs
@@ -0,0 +1,105 @@
+"""
+Unit tests for the pooled LLM provider HTTP clients.
+
+These tests verify client reuse, per-provider limits, request accounting
+and shutdown without making network calls.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.core.http_clients import ProviderClientRegistry
+
+
+class TestProviderClientRegistry:
+    """Test the provider client registry."""
+
+    @pytest.fixture
+    def registry(self):
+        """Fresh registry per test."""
+        return ProviderClientRegistry()
+
+    @pytest.mark.asyncio
+    async def test_clients_are_reused_per_provider(self, registry):
+        """Test that each provider gets one long-lived client."""
+        openai = registry.get_client("openai")
+
+        assert registry.get_client("OpenAI") is openai
+        assert registry.get_client("ollama") is not openai
+        await registry.close()
+
+    @pytest.mark.asyncio
+    async def test_local_providers_use_smaller_pool(self, registry):
+        """Test per-provider connection limits."""
+        registry.get_client("ollama")
+        registry.get_client("anthropic")
+
+        providers = registry.get_stats()["providers"]
+
+        assert providers["ollama"]["max_connections"] == settings.llm_local_http_max_connections
+        assert providers["ollama"]["http2"] is False
+        assert providers["anthropic"]["max_connections"] == settings.llm_http_max_connections
+        assert providers["anthropic"]["keepalive_expiry"] == settings.llm_http_keepalive_expiry
+        assert providers["anthropic"]["connections"] == 0
+        await registry.close()
+
+    @pytest.mark.asyncio
+    async def test_requests_are_counted(self, registry):
+        """Test that requests through a pooled client are reported."""
+        client = registry.get_client("openai")
+        client._transport = httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+
+        for _ in range(3):
+            response = await client.post("https://api.openai.com/v1/chat/completions", json={}, timeout=5)
+            assert response.status_code == 200
+
+        assert registry.get_stats()["providers"]["openai"]["requests"] == 3
+        await registry.close()
+
+    @pytest.mark.asyncio
+    async def test_close_releases_clients(self, registry):
+        """Test that closing shuts down clients and later calls get new ones."""
+        client = registry.get_client("deepseek")
+
+        await registry.close()
+
+        assert client.is_closed
+        assert registry.get_stats()["providers"] == {}
+        assert registry.get_client("deepseek") is not client
+        await registry.close()
+
+    def test_client_is_replaced_on_new_event_loop(self, registry):
+        """Test that clients are not shared across event loops."""
+        async def get():
+            return registry.get_client("openai")
+
+        clients = []
+        for _ in range(2):
+            loop = asyncio.new_event_loop()
+            try:
+                clients.append(loop.run_until_complete(get()))
+            finally:
+                loop.close()
+
+        assert clients[0] is not clients[1]
+
+    def test_replaced_client_is_closed_on_its_loop(self, registry):
+        """Test that a client replaced for another event loop is closed, not leaked."""
+        async def get():
+            return registry.get_client("openai")
+
+        first_loop = asyncio.new_event_loop()
+        second_loop = asyncio.new_event_loop()
+        try:
+            stale = first_loop.run_until_complete(get())
+            second_loop.run_until_complete(get())
+            first_loop.run_until_complete(asyncio.sleep(0.01))
+
+            assert stale.is_closed
+        finally:
+            second_loop.run_until_complete(registry.close())
+            first_loop.close()
+            second_loop.close()
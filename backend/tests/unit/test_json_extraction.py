@@ -0,0 +1,131 @@
+"""
+Unit tests for single-pass JSON extraction.
+
+These tests verify that JSON is found behind fences, prose and reasoning
+blocks, that braces inside strings do not confuse the scanner, that
+common LLM defects and truncated output are repaired, and that
+BaseAgent and LLMResponseParser use the extractor.
+"""
+
+import pytest
+
+from app.agents.base_agent import BaseAgent
+from app.core.json_extraction import find_json, parse_json
+from app.modules.llm_response_parser import LLMResponseParser
+
+
+class JsonAgent(BaseAgent):
+    """Minimal agent for parsing tests."""
+
+    async def execute(self, input_data):
+        return {}
+
+    def get_system_prompt(self):
+        return ""
+
+
+class TestFindJson:
+    """Test locating JSON values."""
+
+    def test_plain_json_unchanged(self):
+        """Test that valid JSON is parsed without repairs."""
+        extracted = find_json('{"a": [1, 2], "b": {"c": null}}')
+
+        assert extracted.value == {"a": [1, 2], "b": {"c": None}}
+        assert extracted.repairs == ()
+
+    def test_fenced_json_with_prose(self):
+        """Test that prose with stray braces before the fence is skipped."""
+        text = 'Use {placeholders} like this:\n```json\n{"style": "microservices"}\n```\nThanks!'
+
+        assert find_json(text).value == {"style": "microservices"}
+
+    def test_braces_and_quotes_inside_strings(self):
+        """Test that brackets and escaped quotes inside strings are not structure."""
+        text = 'Result: {"code": "if (x) { return \\"}\\"; }", "list": "[1, 2"} trailing }'
+
+        assert find_json(text).value == {"code": 'if (x) { return "}"; }', "list": "[1, 2"}
+
+    def test_reasoning_blocks_skipped(self):
+        """Test that JSON inside reasoning blocks is ignored."""
+        text = '<think>Maybe {"draft": true}?</think>\n{"final": true}'
+
+        assert find_json(text).value == {"final": True}
+
+    def test_reasoning_without_opening_tag(self):
+        """Test reasoning whose opening tag was stripped upstream."""
+        text = 'I will answer {"draft": true}\n</think>\n\n{"final": true}'
+
+        assert find_json(text).value == {"final": True}
+
+    def test_openers_restrict_value_type(self):
+        """Test that arrays are skipped when only objects are wanted."""
+        text = 'Scores [1, 2, 3] and {"ok": 1}'
+
+        assert find_json(text).value == [1, 2, 3]
+        assert find_json(text, openers="{").value == {"ok": 1}
+
+    def test_no_json(self):
+        """Test responses without JSON."""
+        assert find_json("no structured output") is None
+        with pytest.raises(ValueError):
+            parse_json("still nothing {here")
+
+
+class TestRepairs:
+    """Test repairs applied while scanning."""
+
+    @pytest.mark.parametrize("text,expected,repair", [
+        ('{"a": [1, 2,],}', {"a": [1, 2]}, "trailing comma"),
+        ('{"a": 1\n"b": 2}', {"a": 1, "b": 2}, "missing comma"),
+        ('{"a": "line one\nline two"}', {"a": "line one\nline two"}, "unescaped control character"),
+        ('{name: "x", max-size: 2}', {"name": "x", "max-size": 2}, "unquoted key"),
+        ('{"a": 1,, "b": 2}', {"a": 1, "b": 2}, "duplicate comma"),
+    ])
+    def test_defects_repaired(self, text, expected, repair):
+        """Test common LLM JSON defects."""
+        extracted = find_json(text)
+
+        assert extracted.value == expected
+        assert repair in extracted.repairs
+
+    @pytest.mark.parametrize("text,expected", [
+        ('{"a": {"b": [1, 2', {"a": {"b": [1, 2]}}),
+        ('{"a": "cut off mid', {"a": "cut off mid"}),
+        ('{"a": 1, "b":', {"a": 1, "b": None}),
+        ('{"a": [1, 2,', {"a": [1, 2]}),
+    ])
+    def test_truncated_output_closed(self, text, expected):
+        """Test that output cut off by the token limit is closed from the bracket stack."""
+        extracted = find_json(text)
+
+        assert extracted.value == expected
+        assert "truncated" in extracted.repairs
+
+
+class TestCallers:
+    """Test that agents and the response parser use the extractor."""
+
+    def test_agent_parses_repaired_response(self):
+        """Test BaseAgent._parse_json_response on a fenced, defective response."""
+        agent = JsonAgent(agent_type="json_test", llm_provider="ollama", llm_model="llama3.2:3b")
+
+        result = agent._parse_json_response('<think>hmm</think>\n```json\n{"components": [{"name": "api"},]}\n```')
+
+        assert result == {"components": [{"name": "api"}]}
+
+    def test_agent_raises_without_json(self):
+        """Test that BaseAgent still raises ValueError when nothing parses."""
+        agent = JsonAgent(agent_type="json_test", llm_provider="ollama", llm_model="llama3.2:3b")
+
+        with pytest.raises(ValueError):
+            agent._parse_json_response("I cannot help with that.")
+
+    def test_response_parser_extract_and_parse(self):
+        """Test LLMResponseParser.extract_json and parse_json_response."""
+        text = 'Sure:\n```json\n{"a": "x\ny",}\n```'
+
+        assert LLMResponseParser.extract_json(text) == '{"a": "x\\ny"}'
+        assert LLMResponseParser.parse_json_response(text) == {"a": "x\ny"}
+        assert LLMResponseParser.extract_json("[1, 2]") == "[1, 2]"
+        assert LLMResponseParser.parse_json_response("nothing", fallback={"f": 1}) == {"f": 1}
@@ -66,12 +66,12 @@ class TestKnowledgeBaseService:
         
         with patch('app.services.knowledge_base_service.pinecone') as mock_pinecone_module, \
              patch('app.services.knowledge_base_service.Graph') as mock_graph_class, \
-             patch('app.services.knowledge_base_service.SentenceTransformer') as mock_sentence_transformer:
+             patch('app.services.knowledge_base_service.get_embedding_service') as mock_get_embedding_service:
             
             mock_pinecone_module.init = Mock()
             mock_pinecone_module.Index.return_value = mock_index
             mock_graph_class.return_value = mock_neo4j
-            mock_sentence_transformer.return_value = mock_embedding_model
+            mock_get_embedding_service.return_value = mock_embedding_model
             
             service = KnowledgeBaseService(
                 pinecone_api_key='test-key',
@@ -140,12 +140,12 @@ class TestKnowledgeBaseService:
         
         with patch('app.services.knowledge_base_service.pinecone') as mock_pinecone_module, \
              patch('app.services.knowledge_base_service.Graph') as mock_graph_class, \
-             patch('app.services.knowledge_base_service.SentenceTransformer') as mock_sentence_transformer:
+             patch('app.services.knowledge_base_service.get_embedding_service') as mock_get_embedding_service:
             
             mock_pinecone_module.init = Mock()
             mock_pinecone_module.Index.return_value = mock_index
             mock_graph_class.return_value = mock_neo4j
-            mock_sentence_transformer.return_value = mock_embedding_model
+            mock_get_embedding_service.return_value = mock_embedding_model
             
             service = KnowledgeBaseService(
                 pinecone_api_key='test-key',
@@ -175,6 +175,92 @@ class TestKnowledgeBaseService:
         assert 'created_nodes' in result
         assert 'created_relationships' in result
 
+    @pytest.fixture
+    def pinecone_vectors(self, kb_service):
+        """Back the service with an in-memory Pinecone index keyed by vector ID."""
+        store = {}
+
+        def upsert(vectors):
+            for vector in vectors:
+                store[vector["id"]] = vector
+
+        def delete(ids):
+            for vector_id in ids:
+                store.pop(vector_id, None)
+
+        index = Mock()
+        index.list = Mock(side_effect=lambda prefix: iter([[k for k in store if k.startswith(prefix)]]))
+        index.fetch = Mock(side_effect=lambda ids: {
+            "vectors": {i: {"metadata": store[i]["metadata"]} for i in ids if i in store}
+        })
+        index.upsert = Mock(side_effect=upsert)
+        index.delete = Mock(side_effect=delete)
+        kb_service.index = index
+
+        embedder = Mock()
+        embedder.embed_many = AsyncMock(
+            side_effect=lambda texts: Mock(tolist=Mock(return_value=[[0.1] * 5 for _ in texts]))
+        )
+        kb_service.embedder = embedder
+        return store
+
+    @staticmethod
+    def _upserted_ids(index):
+        """IDs passed to upsert across all calls."""
+        return [v["id"] for call in index.upsert.call_args_list for v in call.kwargs["vectors"]]
+
+    @pytest.mark.asyncio
+    async def test_reindex_skips_unchanged_chunks(self, kb_service, pinecone_vectors, sample_repository_analysis):
+        """Test that re-indexing an unchanged analysis embeds and upserts nothing."""
+        chunks = kb_service._create_searchable_chunks('test-project', sample_repository_analysis)
+        first = await kb_service._index_vectors('test-project', 'repo', chunks)
+        assert first["inserted"] == len(chunks)
+
+        kb_service.index.upsert.reset_mock()
+        chunks = kb_service._create_searchable_chunks('test-project', sample_repository_analysis)
+        second = await kb_service._index_vectors('test-project', 'repo', chunks)
+
+        assert second["skipped"] == len(chunks)
+        assert second["inserted"] == second["updated"] == second["deleted"] == 0
+        kb_service.index.upsert.assert_not_called()
+        kb_service.index.delete.assert_not_called()
+        assert kb_service.embedder.embed_many.call_args.args[0] == []
+
+    @pytest.mark.asyncio
+    async def test_reindex_upserts_changed_chunks(self, kb_service, pinecone_vectors, sample_repository_analysis):
+        """Test that only chunks whose content changed are upserted."""
+        chunks = kb_service._create_searchable_chunks('test-project', sample_repository_analysis)
+        await kb_service._index_vectors('test-project', 'repo', chunks)
+        kb_service.index.upsert.reset_mock()
+
+        changed = json.loads(json.dumps(sample_repository_analysis))
+        changed['services'][1]['technology'] = 'PostgreSQL 16'
+        chunks = kb_service._create_searchable_chunks('test-project', changed)
+        result = await kb_service._index_vectors('test-project', 'repo', chunks)
+
+        assert result["updated"] == 1
+        assert result["skipped"] == len(chunks) - 1
+        assert self._upserted_ids(kb_service.index) == ['test-project_service_user-database']
+        assert 'PostgreSQL 16' in pinecone_vectors['test-project_service_user-database']["metadata"]["content"]
+
+    @pytest.mark.asyncio
+    async def test_reindex_deletes_removed_chunks_by_id(self, kb_service, pinecone_vectors, sample_repository_analysis):
+        """Test that vectors of vanished chunks are deleted by ID, leaving other projects alone."""
+        other = kb_service._create_searchable_chunks('test-project_2', sample_repository_analysis)
+        await kb_service._index_vectors('test-project_2', 'repo', other)
+        chunks = kb_service._create_searchable_chunks('test-project', sample_repository_analysis)
+        await kb_service._index_vectors('test-project', 'repo', chunks)
+
+        reduced = json.loads(json.dumps(sample_repository_analysis))
+        reduced['services'] = reduced['services'][:1]
+        chunks = kb_service._create_searchable_chunks('test-project', reduced)
+        result = await kb_service._index_vectors('test-project', 'repo', chunks)
+
+        assert result["deleted"] == 1
+        kb_service.index.delete.assert_called_once_with(ids=['test-project_service_user-database'])
+        assert 'test-project_service_user-database' not in pinecone_vectors
+        assert all(chunk["id"] in pinecone_vectors for chunk in other)
+
     def test_create_searchable_chunks(self, kb_service, sample_repository_analysis):
         """Test creating searchable chunks from repository analysis."""
         project_id = 'test-project'
@@ -260,16 +346,17 @@ class TestKnowledgeBaseService:
         assert 'integration_patterns' in result
         assert 'recommendations' in result
 
-    def test_embedding_generation(self, kb_service):
-        """Test embedding generation for text."""
+    @pytest.mark.asyncio
+    async def test_embedding_generation(self, kb_service):
+        """Test embedding generation for text through the async embedding service."""
         text = 'microservices architecture with Node.js and PostgreSQL'
+        kb_service.embedder.embed = AsyncMock(return_value=Mock(tolist=Mock(return_value=[0.1, 0.2, 0.3])))
         
-        embedding = kb_service._generate_embedding(text)
+        embedding = await kb_service._generate_embedding(text)
         
-        assert isinstance(embedding, list)
-        # Allow empty list for mocked embedding
-        if len(embedding) > 0:
-            assert all(isinstance(x, float) for x in embedding)
+        assert embedding == [0.1, 0.2, 0.3]
+        kb_service.embedder.embed.assert_awaited_once_with(text)
+        kb_service.embedder.encode.assert_not_called()
 
     def test_chunk_metadata_creation(self, kb_service, sample_repository_analysis):
         """Test creating metadata for chunks."""
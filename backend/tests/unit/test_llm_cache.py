@@ -0,0 +1,300 @@
+"""
+Unit tests for the LLM response cache.
+
+These tests verify content-addressed keys, TTL expiry, LRU eviction,
+the Redis and semantic tiers, cost-saved accounting and that
+SimpleLLMService and agents answer repeated calls from cache.
+"""
+
+import json
+
+import httpx
+import numpy as np
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.agents.base_agent import BaseAgent
+from app.core.hedging import HedgePolicy
+from app.core.llm_cache import LLMResponseCache, make_cache_key
+from app.modules.llm_service import SimpleLLMService
+
+
+class FakeRedisCache:
+    """In-memory stand-in for RedisCache."""
+
+    def __init__(self, store):
+        self.store = store
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, expire=None):
+        self.store[key] = value
+        return True
+
+
+class FakeEmbeddingService:
+    """Embeds text by word counts over a fixed vocabulary."""
+
+    VOCAB = ["design", "a", "payment", "service", "chat", "app"]
+
+    async def embed(self, text):
+        words = text.lower().replace("?", "").split()
+        return np.array([words.count(w) for w in self.VOCAB], dtype=np.float32)
+
+
+class JsonAgent(BaseAgent):
+    """Agent that asks the LLM for a JSON answer."""
+
+    async def execute(self, input_data):
+        messages = [HumanMessage(content=input_data["question"])]
+        return self._parse_json_response(await self._call_llm(messages, validate=self._parse_json_response))
+
+    def get_system_prompt(self):
+        return "You answer in JSON."
+
+
+class TestCacheKey:
+    """Test content-addressed cache keys."""
+
+    def test_key_is_deterministic(self):
+        """Test that identical requests share a key."""
+        key = make_cache_key("openai", "gpt-4o", "sys", "prompt", 0.3)
+
+        assert key == make_cache_key("openai", "gpt-4o", "sys", "prompt", 0.3)
+
+    def test_every_field_changes_key(self):
+        """Test that each field is part of the key."""
+        base = ("openai", "gpt-4o", "sys", "prompt", 0.3)
+        keys = {make_cache_key(*base)}
+        for i, value in enumerate(["anthropic", "gpt-4o-mini", "sys2", "prompt2", 0.7]):
+            fields = list(base)
+            fields[i] = value
+            keys.add(make_cache_key(*fields))
+
+        assert len(keys) == 6
+
+
+class TestLLMResponseCache:
+    """Test LLMResponseCache tiers and counters."""
+
+    @pytest.mark.asyncio
+    async def test_hit_counts_cost_saved(self):
+        """Test that hits are counted and their cost is recorded as saved."""
+        cache = LLMResponseCache(use_redis=False)
+        await cache.set("openai", "gpt-4o", "sys", "hello", 0.3, "world", cost=0.02)
+
+        assert await cache.get("openai", "gpt-4o", "sys", "hello", 0.3) == "world"
+        assert await cache.get("openai", "gpt-4o", "sys", "hello", 0.3) == "world"
+        assert await cache.get("openai", "gpt-4o", "sys", "other", 0.3) is None
+
+        stats = cache.get_stats()
+        assert stats["memory_hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
+        assert stats["cost_saved"] == pytest.approx(0.04)
+        assert stats["cost_saved_by_model"] == {"gpt-4o": pytest.approx(0.04)}
+
+    @pytest.mark.asyncio
+    async def test_entries_expire(self):
+        """Test that entries past their TTL are not served."""
+        cache = LLMResponseCache(ttl_seconds=60, use_redis=False)
+        with patch("app.core.llm_cache.time.time", return_value=1000.0):
+            await cache.set("openai", "gpt-4o", "", "p", 0.3, "r")
+        with patch("app.core.llm_cache.time.time", return_value=1061.0):
+            assert await cache.get("openai", "gpt-4o", "", "p", 0.3) is None
+
+        assert cache.get_stats()["expirations"] == 1
+        assert cache.get_stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = LLMResponseCache(max_entries=2, use_redis=False)
+        await cache.set("p", "m", "", "a", 0.3, "A")
+        await cache.set("p", "m", "", "b", 0.3, "B")
+        await cache.get("p", "m", "", "a", 0.3)
+        await cache.set("p", "m", "", "c", 0.3, "C")
+
+        assert await cache.get("p", "m", "", "a", 0.3) == "A"
+        assert await cache.get("p", "m", "", "b", 0.3) is None
+        assert cache.get_stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_tier_shared_between_processes(self):
+        """Test that a response stored by one cache is served to another via Redis."""
+        store = {}
+        with patch("app.core.llm_cache.get_redis", AsyncMock(return_value=None)), \
+                patch("app.core.llm_cache.RedisCache", side_effect=lambda client: FakeRedisCache(store)):
+            await LLMResponseCache().set("openai", "gpt-4o", "", "p", 0.3, "shared", cost=0.01)
+            other = LLMResponseCache()
+
+            assert await other.get("openai", "gpt-4o", "", "p", 0.3) == "shared"
+            assert other.get_stats()["redis_hits"] == 1
+            assert other.get_stats()["cost_saved"] == pytest.approx(0.01)
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_backs_off(self):
+        """Test that a failing Redis tier is skipped after the first error."""
+        get_redis = AsyncMock(side_effect=ConnectionError("down"))
+        with patch("app.core.llm_cache.get_redis", get_redis):
+            cache = LLMResponseCache()
+            assert await cache.get("p", "m", "", "x", 0.3) is None
+            assert await cache.get("p", "m", "", "x", 0.3) is None
+
+        assert get_redis.await_count == 1
+        assert cache.get_stats()["redis_errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_not_initialized_uses_memory(self):
+        """Test that an uninitialized Redis client is not an error."""
+        with patch("app.core.llm_cache.get_redis", AsyncMock(side_effect=RuntimeError("not initialized"))):
+            cache = LLMResponseCache()
+            await cache.set("p", "m", "", "x", 0.3, "memory")
+
+            assert await cache.get("p", "m", "", "x", 0.3) == "memory"
+            assert cache.get_stats()["redis_errors"] == 0
+
+    @pytest.mark.asyncio
+    async def test_semantic_hit(self):
+        """Test that a near-identical prompt is served by embedding similarity."""
+        cache = LLMResponseCache(
+            use_redis=False,
+            semantic_enabled=True,
+            semantic_threshold=0.95,
+            embedding_service=FakeEmbeddingService(),
+        )
+        await cache.set("openai", "gpt-4o", "sys", "Design a payment service", 0.3, "payments")
+
+        assert await cache.get("openai", "gpt-4o", "sys", "design a payment service?", 0.3) == "payments"
+        assert await cache.get("openai", "gpt-4o", "sys", "Design a chat app", 0.3) is None
+        # A different system prompt is a different namespace
+        assert await cache.get("openai", "gpt-4o", "other", "design a payment service?", 0.3) is None
+        assert cache.get_stats()["semantic_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_semantic_skips_long_prompts(self):
+        """Test that prompts over the length limit are never matched semantically."""
+        embeddings = FakeEmbeddingService()
+        embeddings.embed = AsyncMock(wraps=embeddings.embed)
+        cache = LLMResponseCache(
+            use_redis=False, semantic_enabled=True, semantic_max_chars=10, embedding_service=embeddings
+        )
+        await cache.set("p", "m", "", "design a payment service", 0.3, "r")
+
+        assert await cache.get("p", "m", "", "design a payment service!", 0.3) is None
+        embeddings.embed.assert_not_called()
+
+
+class TestSimpleLLMServiceCaching:
+    """Test that SimpleLLMService answers repeated calls from cache."""
+
+    @pytest.fixture
+    def cache(self):
+        """Isolated memory-only cache."""
+        cache = LLMResponseCache(use_redis=False)
+        with patch("app.modules.llm_service.get_llm_cache", return_value=cache):
+            yield cache
+
+    @pytest.fixture
+    def service(self):
+        """Service configured for OpenAI only."""
+        with patch("app.modules.llm_service.log_interaction") as log:
+            service = SimpleLLMService()
+            service.deepseek_base_url = None
+            service.openai_api_key = "test"
+            service.log = log
+            yield service
+
+    @staticmethod
+    def _client(calls):
+        def handler(request):
+            calls.append(json.loads(request.content))
+            return httpx.Response(200, json={"choices": [{"message": {"content": "answer"}}]})
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    @pytest.mark.asyncio
+    async def test_repeated_call_served_from_cache(self, service, cache):
+        """Test that the provider is called once for identical requests."""
+        calls = []
+        with patch("app.modules.llm_service.get_http_client", return_value=self._client(calls)):
+            first = await service.call_llm("hi", "sys", model="gpt-4o")
+            second = await service.call_llm("hi", "sys", model="gpt-4o")
+
+        assert first == second == "answer"
+        assert len(calls) == 1
+        assert service.log.call_args[0][0]["cache_hit"] is True
+        assert cache.get_stats()["cost_saved"] > 0
+
+    @pytest.mark.asyncio
+    async def test_use_cache_false_bypasses_cache(self, service, cache):
+        """Test that use_cache=False always calls the provider."""
+        calls = []
+        with patch("app.modules.llm_service.get_http_client", return_value=self._client(calls)):
+            await service.call_llm("hi", model="gpt-4o", use_cache=False)
+            await service.call_llm("hi", model="gpt-4o", use_cache=False)
+
+        assert len(calls) == 2
+        assert cache.get_stats()["lookups"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failure_not_cached(self, service, cache):
+        """Test that fallback responses are never stored."""
+        handler = lambda request: httpx.Response(500, text="down")
+        with patch("app.modules.llm_service.get_http_client",
+                   return_value=httpx.AsyncClient(transport=httpx.MockTransport(handler))):
+            result = await service.call_llm("hi", model="gpt-4o")
+
+        assert result.startswith("LLM service unavailable")
+        assert cache.get_stats()["stores"] == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_served_from_cache(self, service, cache):
+        """Test that a cached response is streamed as a single chunk."""
+        await cache.set("openai", "gpt-4o", "", "hi", 0.3, "cached answer")
+
+        chunks = [c async for c in service.stream_llm("hi", model="gpt-4o")]
+
+        assert chunks == ["cached answer"]
+
+
+class TestAgentCaching:
+    """Test that agents cache only responses their parser accepts."""
+
+    @pytest.fixture
+    def cache(self):
+        """Isolated memory-only cache."""
+        cache = LLMResponseCache(use_redis=False)
+        with patch("app.agents.base_agent.get_llm_cache", return_value=cache), \
+                patch("app.core.error_handling.get_hedge_policy", return_value=HedgePolicy(enabled=False)):
+            yield cache
+
+    @staticmethod
+    def _agent(content):
+        agent = JsonAgent(agent_type="json", llm_provider="ollama", llm_model="llama3.2:3b")
+        agent.llm = Mock(ainvoke=AsyncMock(return_value=AIMessage(content=content)))
+        return agent
+
+    @pytest.mark.asyncio
+    async def test_parsed_response_served_from_cache(self, cache):
+        """Test that a response that parses is cached."""
+        agent = self._agent('{"answer": 42}')
+
+        assert await agent.execute({"question": "q"}) == {"answer": 42}
+        assert await agent.execute({"question": "q"}) == {"answer": 42}
+
+        assert agent.llm.ainvoke.await_count == 1
+        assert cache.get_stats()["stores"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unparseable_response_not_cached(self, cache):
+        """Test that a response the parser rejects is not replayed from cache."""
+        agent = self._agent("no json here")
+
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await agent.execute({"question": "q"})
+
+        assert agent.llm.ainvoke.await_count == 2
+        assert cache.get_stats()["stores"] == 0
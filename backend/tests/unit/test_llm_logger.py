@@ -0,0 +1,106 @@
+"""
+Unit tests for the LLM interaction log.
+
+These tests verify buffered writing, filtered newest-first queries through
+the sidecar index, rotation into compressed segments with retention,
+dropping entries while the buffer is full and indexing of logs written
+before the index existed.
+"""
+
+import gzip
+import json
+import os
+
+import pytest
+
+from app.modules.admin.llm_logger import InteractionLog
+
+
+@pytest.fixture
+def interaction_log(tmp_path):
+    """Interaction log in a temporary directory."""
+    log = InteractionLog(directory=str(tmp_path), flush_interval=0.05)
+    yield log
+    log.close()
+
+
+def _entry(i, stage="requirements", provider="ollama", model="llama3.2:3b"):
+    return {"stage": stage, "provider": provider, "model": model, "prompt": f"prompt {i}", "response": f"response {i}"}
+
+
+class TestInteractionLog:
+    """Test writing and querying interactions."""
+
+    def test_entries_written_with_index(self, interaction_log):
+        """Test that flushed entries are on disk with one index record each."""
+        for i in range(3):
+            interaction_log.log(_entry(i))
+
+        assert interaction_log.flush()
+
+        with open(interaction_log.path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        with open(interaction_log.index_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert [line["prompt"] for line in lines] == ["prompt 0", "prompt 1", "prompt 2"]
+        assert all("timestamp" in line for line in lines)
+        assert records[1]["offset"] == records[0]["length"]
+        assert records[2]["stage"] == "requirements"
+        assert "prompt" not in records[0]
+
+    def test_read_newest_matching_first(self, interaction_log):
+        """Test filtering by index fields and newest-first limits."""
+        for i in range(10):
+            interaction_log.log(_entry(i, provider="openai" if i % 2 else "ollama"))
+
+        items = interaction_log.read(provider="openai", limit=3)
+
+        assert [item["prompt"] for item in items] == ["prompt 9", "prompt 7", "prompt 5"]
+
+    def test_read_empty_log(self, interaction_log):
+        """Test querying before anything was logged."""
+        assert interaction_log.read() == []
+
+    def test_rotation_compresses_and_reads_across_segments(self, tmp_path):
+        """Test that rotated segments are gzipped, pruned and still queried."""
+        log = InteractionLog(directory=str(tmp_path), batch_size=1, flush_interval=0.01, max_bytes=1, backups=2)
+        try:
+            for i in range(5):
+                log.log(_entry(i))
+                log.flush()
+
+            segments = log._segments()
+            items = log.read(limit=10)
+        finally:
+            log.close()
+
+        assert len(segments) == 2
+        with gzip.open(segments[0], "rt", encoding="utf-8") as f:
+            assert json.loads(f.readline())["prompt"] == "prompt 3"
+        assert os.path.exists(segments[0][:-len(".jsonl.gz")] + ".idx")
+        assert [item["prompt"] for item in items] == ["prompt 4", "prompt 3", "prompt 2"]
+
+    def test_full_buffer_drops_entries(self, tmp_path):
+        """Test that logging never blocks when the buffer is full."""
+        log = InteractionLog(directory=str(tmp_path), queue_size=1)
+        log._ensure_writer = lambda: None
+
+        log.log(_entry(0))
+        log.log(_entry(1))
+
+        assert log.get_stats()["dropped"] == 1
+        assert log.get_stats()["queued"] == 1
+
+    def test_existing_log_without_index_is_indexed(self, tmp_path):
+        """Test that logs written before the index are queryable."""
+        path = tmp_path / "llm_interactions.jsonl"
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(3):
+                f.write(json.dumps({**_entry(i, stage=f"stage{i}"), "timestamp": f"2026-01-0{i + 1}T00:00:00+00:00"}) + "\n")
+            f.write("not json\n")
+        log = InteractionLog(directory=str(tmp_path))
+
+        items = log.read(stage="stage1")
+
+        assert [item["prompt"] for item in items] == ["prompt 1"]
+        assert len(log.read()) == 3
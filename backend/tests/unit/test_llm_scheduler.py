@@ -0,0 +1,271 @@
+"""
+Unit tests for the LLM call scheduler.
+
+These tests verify concurrency caps, priority ordering and the batch
+share, AIMD adaptation on latency and rate limits, token-per-minute
+budgets and the scheduler statistics.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+from app.core.hedging import HedgePolicy
+from app.core.llm_scheduler import (
+    AdaptiveLimiter,
+    LLMScheduler,
+    Priority,
+    TokenBucket,
+    is_rate_limit_error,
+    llm_priority,
+)
+from app.modules.llm_service import SimpleLLMService
+
+
+def _rate_limit_error():
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, request=request)
+    return httpx.HTTPStatusError("Too Many Requests", request=request, response=response)
+
+
+class TestAdaptiveLimiter:
+    """Test slot granting and adaptation."""
+
+    @pytest.mark.asyncio
+    async def test_cap_bounds_concurrency(self):
+        """Test that no more than the cap run at once."""
+        limiter = AdaptiveLimiter("test", initial_limit=2, max_limit=2)
+        running = peak = 0
+
+        async def call():
+            nonlocal running, peak
+            await limiter.acquire()
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            limiter.release(latency=0.01)
+
+        await asyncio.gather(*[call() for _ in range(6)])
+
+        assert peak == 2
+        assert limiter.in_flight == 0
+        assert limiter.get_stats()["queued"] == 4
+
+    @pytest.mark.asyncio
+    async def test_interactive_served_before_batch(self):
+        """Test that queued calls are granted in priority order."""
+        limiter = AdaptiveLimiter("test", initial_limit=1, max_limit=1, batch_fraction=1.0)
+        order = []
+        await limiter.acquire(Priority.WORKFLOW)
+
+        async def call(name, priority):
+            await limiter.acquire(priority)
+            order.append(name)
+            limiter.release(priority)
+
+        tasks = [
+            asyncio.ensure_future(call("batch", Priority.BATCH)),
+            asyncio.ensure_future(call("workflow", Priority.WORKFLOW)),
+            asyncio.ensure_future(call("chat", Priority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        assert limiter.get_stats()["queue_depth_by_priority"] == {
+            "interactive": 1, "workflow": 1, "batch": 1
+        }
+        limiter.release(Priority.WORKFLOW)
+        await asyncio.gather(*tasks)
+
+        assert order == ["chat", "workflow", "batch"]
+
+    @pytest.mark.asyncio
+    async def test_batch_keeps_slots_free_for_interactive(self):
+        """Test that batch calls cannot occupy the whole cap."""
+        limiter = AdaptiveLimiter("test", initial_limit=4, max_limit=4, batch_fraction=0.5)
+        await limiter.acquire(Priority.BATCH)
+        await limiter.acquire(Priority.BATCH)
+
+        third_batch = asyncio.ensure_future(limiter.acquire(Priority.BATCH))
+        await asyncio.sleep(0)
+        assert not third_batch.done()
+
+        assert await limiter.acquire(Priority.INTERACTIVE) == 0.0
+        assert limiter.in_flight == 3
+
+        limiter.release(Priority.BATCH)
+        await third_batch
+        assert limiter.batch_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Test that a cancelled waiter does not hold a slot."""
+        limiter = AdaptiveLimiter("test", initial_limit=1, max_limit=1)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        limiter.release()
+
+        assert limiter.in_flight == 0
+        assert limiter.get_stats()["queue_depth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_additive_increase_when_saturated(self):
+        """Test that the cap grows while fast calls keep it full."""
+        limiter = AdaptiveLimiter("test", initial_limit=2, max_limit=8, latency_target=10)
+        for _ in range(10):
+            await limiter.acquire()
+            await limiter.acquire()
+            limiter.release(latency=0.1)
+            limiter.release(latency=0.1)
+
+        assert limiter.capacity > 2
+
+    @pytest.mark.asyncio
+    async def test_multiplicative_decrease_on_rate_limit(self):
+        """Test that a 429 halves the cap once per cooldown."""
+        limiter = AdaptiveLimiter("test", initial_limit=8, max_limit=8, decrease_cooldown=60)
+        for _ in range(3):
+            await limiter.acquire()
+        for _ in range(3):
+            limiter.release(latency=0.1, error=_rate_limit_error())
+
+        stats = limiter.get_stats()
+        assert stats["limit"] == 4
+        assert stats["rate_limited"] == 3
+        assert stats["decreases"] == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_calls_decrease_down_to_minimum(self):
+        """Test that latency above target shrinks the cap but not below the minimum."""
+        limiter = AdaptiveLimiter("test", initial_limit=4, latency_target=1.0, decrease_cooldown=0)
+        for _ in range(5):
+            await limiter.acquire()
+            limiter.release(latency=5.0)
+
+        assert limiter.capacity == 1
+        assert limiter.get_stats()["slow_calls"] == 5
+
+
+class TestTokenBucket:
+    """Test tokens-per-minute budgets."""
+
+    def test_reserve_within_budget_does_not_wait(self):
+        """Test that calls within the budget are not delayed."""
+        bucket = TokenBucket(6000)
+
+        assert bucket.reserve(1000) == 0.0
+
+    def test_reserve_over_budget_waits_for_refill(self):
+        """Test that an exhausted bucket returns the refill delay."""
+        bucket = TokenBucket(6000)
+        bucket.reserve(6000)
+
+        assert bucket.reserve(100) == pytest.approx(1.0, abs=0.05)
+
+    def test_oversized_request_charged_capacity(self):
+        """Test that a request above capacity waits at most one full refill."""
+        bucket = TokenBucket(600)
+        bucket.reserve(600)
+
+        assert bucket.reserve(10**6) == pytest.approx(60.0, abs=0.5)
+
+
+class TestLLMScheduler:
+    """Test the scheduler slot context."""
+
+    def test_local_providers_share_limiter(self):
+        """Test that Ollama and DeepSeek compete for one local limiter."""
+        scheduler = LLMScheduler()
+
+        assert scheduler.limiter("ollama", "llama3.2:3b") is scheduler.limiter("deepseek", "deepseek-r1")
+        assert scheduler.limiter("openai", "gpt-4o") is not scheduler.limiter("openai", "gpt-4o-mini")
+        assert scheduler.bucket("ollama", "llama3.2:3b") is None
+        assert scheduler.bucket("openai", "gpt-4o") is not None
+
+    @pytest.mark.asyncio
+    async def test_slot_uses_context_priority(self):
+        """Test that llm_priority sets the priority of queued calls."""
+        scheduler = LLMScheduler()
+        limiter = scheduler.limiter("ollama", "m")
+        limiter.limit = 1.0
+        await limiter.acquire()
+
+        async def call():
+            with llm_priority(Priority.INTERACTIVE):
+                async with scheduler.slot("ollama", "m"):
+                    pass
+
+        task = asyncio.ensure_future(call())
+        await asyncio.sleep(0)
+        assert limiter.get_stats()["queue_depth_by_priority"]["interactive"] == 1
+        limiter.release()
+        await task
+
+    @pytest.mark.asyncio
+    async def test_slot_releases_and_records_errors(self):
+        """Test that failing calls release their slot and adapt the cap."""
+        scheduler = LLMScheduler()
+
+        with pytest.raises(httpx.HTTPStatusError):
+            async with scheduler.slot("openai", "gpt-4o"):
+                raise _rate_limit_error()
+
+        stats = scheduler.get_stats()["openai:gpt-4o"]
+        assert stats["in_flight"] == 0
+        assert stats["rate_limited"] == 1
+
+    @pytest.mark.asyncio
+    async def test_slot_waits_for_token_budget(self):
+        """Test that an exhausted token budget delays the call."""
+        scheduler = LLMScheduler()
+        bucket = scheduler.bucket("openai", "gpt-4o")
+        bucket.tokens = 0
+
+        with patch("app.core.llm_scheduler.asyncio.sleep") as sleep:
+            async with scheduler.slot("openai", "gpt-4o", tokens=100):
+                pass
+
+        assert sleep.await_count == 1
+        assert sleep.await_args[0][0] > 0
+
+    @pytest.mark.asyncio
+    async def test_hedged_local_chain_stays_within_local_limit(self):
+        """Test that a hedge against a slow local model is deferred while no local slot is free."""
+        scheduler = LLMScheduler()
+        scheduler.limiter("ollama", "llama3.2:3b").limit = 1.0
+        running = peak = calls = 0
+
+        async def handler(request):
+            nonlocal running, peak, calls
+            calls += 1
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            return httpx.Response(200, json={"message": {"content": '{"ok": true}'}})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        service = SimpleLLMService()
+        service.deepseek_base_url = "http://localhost:11434"
+        with patch("app.core.llm_scheduler.llm_scheduler", scheduler), \
+                patch("app.core.llm_scheduler.settings.llm_scheduler_enabled", True), \
+                patch("app.core.hedging.get_hedge_policy", return_value=HedgePolicy(default_delay=0.01, min_delay=0.0)), \
+                patch("app.modules.llm_service.get_http_client", return_value=client):
+            result = await service._call_deepseek("prompt", "system")
+
+        assert result == '{"ok": true}'
+        assert peak == 1
+        assert calls == 1
+
+
+def test_rate_limit_detection():
+    """Test detection of provider rate-limit errors."""
+    assert is_rate_limit_error(_rate_limit_error())
+    assert is_rate_limit_error(Exception("Error code: 429 - rate limit exceeded"))
+    assert not is_rate_limit_error(ValueError("bad json"))
@@ -0,0 +1,257 @@
+"""
+Unit tests for streaming LLM responses.
+
+These tests verify provider stream parsing, reasoning-block filtering,
+model fallback before the first token and forwarding of partial output
+from the LLM service and agents to WebSocket senders, using mocked HTTP
+transports.
+"""
+
+import json
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from unittest.mock import Mock, patch
+
+from app.agents.base_agent import BaseAgent
+from app.core.deepseek_client import ChatDeepSeek
+from app.core.hedging import HedgePolicy
+from app.core.llm_streaming import stream_llm_output
+from app.modules.llm_response_parser import ReasoningFilter
+from app.modules.llm_service import SimpleLLMService
+from app.services.websocket.llm_stream import LLMStreamForwarder
+
+
+def _ndjson(*texts):
+    """Ollama chat stream body."""
+    lines = [json.dumps({"message": {"content": t}, "done": False}) for t in texts]
+    lines.append(json.dumps({"message": {"content": ""}, "done": True}))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _sse(*texts):
+    """OpenAI-compatible server-sent event stream body."""
+    events = [f"data: {json.dumps({'choices': [{'delta': {'content': t}}]})}\n\n" for t in texts]
+    return ("".join(events) + "data: [DONE]\n\n").encode()
+
+
+def _client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class EchoAgent(BaseAgent):
+    """Agent that sends its input to the LLM."""
+
+    async def execute(self, input_data):
+        return await self._call_llm([HumanMessage(content=input_data["question"])])
+
+    def get_system_prompt(self):
+        return "You answer questions."
+
+
+class TestReasoningFilter:
+    """Test streamed removal of reasoning blocks."""
+
+    def test_tags_split_across_chunks(self):
+        """Test that think blocks are removed even when tags are split."""
+        stream = ReasoningFilter()
+        chunks = ["<thi", "nk>plan", " steps</th", "ink>\n{\"a\":", " 1} <b>", "ok"]
+
+        text = "".join(stream.feed(c) for c in chunks) + stream.flush()
+
+        assert text == "\n{\"a\": 1} <b>ok"
+
+    def test_unclosed_block_is_dropped(self):
+        """Test that an unterminated reasoning block never leaks."""
+        stream = ReasoningFilter()
+
+        assert stream.feed("answer <reasoning>secret") == "answer "
+        assert stream.flush() == ""
+
+
+class TestSimpleLLMServiceStreaming:
+    """Test SimpleLLMService streaming."""
+
+    @pytest.fixture
+    def service(self):
+        """Service configured for local Ollama only."""
+        with patch("app.modules.llm_service.log_interaction") as log:
+            service = SimpleLLMService()
+            service.log = log
+            yield service
+
+    @pytest.mark.asyncio
+    async def test_stream_ollama_chunks(self, service):
+        """Test that Ollama chunks are yielded without reasoning blocks."""
+        def handler(request):
+            assert json.loads(request.content)["stream"] is True
+            return httpx.Response(200, content=_ndjson("<think>hmm</think>", " Hello", ", world"))
+
+        with patch("app.modules.llm_service.get_http_client", return_value=_client(handler)):
+            chunks = [c async for c in service.stream_llm("hi", provider_hint="ollama", stage="chat")]
+
+        assert chunks == ["Hello", ", world"]
+        entry = service.log.call_args[0][0]
+        assert entry["response"] == "Hello, world"
+        assert entry["streamed"] is True
+        assert entry["time_to_first_token_ms"] is not None
+
+    @pytest.mark.asyncio
+    async def test_stream_falls_back_before_first_token(self, service):
+        """Test that a model failing before any output is skipped."""
+        models = []
+
+        def handler(request):
+            model = json.loads(request.content)["model"]
+            models.append(model)
+            if model == service.fast_local_model:
+                return httpx.Response(404, text="model not found")
+            return httpx.Response(200, content=_ndjson("from deepseek"))
+
+        with patch("app.modules.llm_service.get_http_client", return_value=_client(handler)):
+            text = "".join([c async for c in service.stream_llm("hi", provider_hint="deepseek")])
+
+        assert text == "from deepseek"
+        assert models == [service.fast_local_model, service.deepseek_model]
+
+    @pytest.mark.asyncio
+    async def test_call_llm_forwards_chunks(self, service):
+        """Test that call_llm streams to on_chunk and returns the full text."""
+        received = []
+
+        async def on_chunk(chunk):
+            received.append(chunk)
+
+        handler = lambda request: httpx.Response(200, content=_ndjson("{\"a\"", ": 1}"))
+        with patch("app.modules.llm_service.get_http_client", return_value=_client(handler)):
+            result = await service.call_llm("hi", provider_hint="ollama", on_chunk=on_chunk)
+
+        assert result == "{\"a\": 1}"
+        assert received == ["{\"a\"", ": 1}"]
+
+    @pytest.mark.asyncio
+    async def test_stream_openai(self, service):
+        """Test OpenAI server-sent event parsing."""
+        service.deepseek_base_url = None
+        service.openai_api_key = "test"
+
+        handler = lambda request: httpx.Response(200, content=_sse("Hel", "lo"))
+        with patch("app.modules.llm_service.get_http_client", return_value=_client(handler)):
+            chunks = [c async for c in service.stream_llm("hi", model="gpt-4o-mini")]
+
+        assert chunks == ["Hel", "lo"]
+
+    @pytest.mark.asyncio
+    async def test_stream_failure_yields_fallback(self, service):
+        """Test that a provider failing before output yields the fallback text."""
+        handler = lambda request: httpx.Response(500, text="down")
+        with patch("app.modules.llm_service.get_http_client", return_value=_client(handler)):
+            chunks = [c async for c in service.stream_llm("hi", provider_hint="ollama")]
+
+        assert len(chunks) == 1
+        assert chunks[0].startswith("LLM service unavailable")
+        assert "error" in service.log.call_args[0][0]
+
+
+class TestChatDeepSeekStreaming:
+    """Test ChatDeepSeek.astream."""
+
+    @pytest.mark.asyncio
+    async def test_astream_ollama(self):
+        """Test that the generate API stream becomes message chunks."""
+        body = "\n".join(
+            json.dumps(c) for c in [{"response": "a", "done": False}, {"response": "b", "done": True}]
+        ).encode()
+        handler = lambda request: httpx.Response(200, content=body)
+        llm = ChatDeepSeek(base_url="http://localhost:11434")
+
+        with patch("app.core.deepseek_client.get_http_client", return_value=_client(handler)):
+            chunks = [chunk async for chunk in llm.astream("hi")]
+
+        assert [chunk.content for chunk in chunks] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_astream_openai_compatible(self):
+        """Test that OpenAI-compatible servers are streamed via SSE."""
+        handler = lambda request: httpx.Response(200, content=_sse("x", "y"))
+        llm = ChatDeepSeek(base_url="http://localhost:8000")
+
+        with patch("app.core.deepseek_client.get_http_client", return_value=_client(handler)):
+            chunks = [chunk async for chunk in llm.astream("hi")]
+
+        assert "".join(chunk.content for chunk in chunks) == "xy"
+
+
+class TestLLMStreamForwarder:
+    """Test forwarding partial output to WebSocket senders."""
+
+    @pytest.mark.asyncio
+    async def test_first_chunk_sent_immediately_then_coalesced(self):
+        """Test time-to-first-token delivery and chunk coalescing."""
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        forwarder = LLMStreamForwarder(send, "s1", stage="requirements", flush_interval_ms=60000)
+
+        async def chunks():
+            for chunk in ["Hel", "lo", ", ", "world"]:
+                yield chunk
+
+        text = await forwarder.forward(chunks())
+
+        assert text == "Hello, world"
+        assert [m["content"] for m in sent] == ["Hel", "lo, world"]
+        assert [m["index"] for m in sent] == [0, 1]
+        assert sent[-1]["done"] is True
+        assert {m["type"] for m in sent} == {"llm_stream"}
+        assert {m["stream_id"] for m in sent} == {forwarder.stream_id}
+
+    @pytest.mark.asyncio
+    async def test_send_failure_keeps_collecting(self):
+        """Test that a disconnected client does not break generation."""
+        async def send(message):
+            raise ConnectionError("gone")
+
+        forwarder = LLMStreamForwarder(send, "s1", flush_interval_ms=0)
+        await forwarder("a")
+        await forwarder("b")
+        await forwarder.close()
+
+        assert forwarder.text == "ab"
+
+
+class TestAgentStreaming:
+    """Test that agent calls stream inside a stream_llm_output context."""
+
+    @pytest.mark.asyncio
+    async def test_agent_output_forwarded(self):
+        """Test that each chunk reaches the opened stream and the full text is returned."""
+        agent = EchoAgent(agent_type="echo", llm_provider="ollama", llm_model="llama3.2:3b")
+
+        async def astream(messages, **kwargs):
+            for text in ["Hel", "lo"]:
+                yield AIMessageChunk(content=text)
+
+        agent.llm = Mock(astream=astream)
+        sent = []
+        opened = []
+
+        async def send(message):
+            sent.append(message)
+
+        def open_stream(stage, **metadata):
+            opened.append((stage, metadata))
+            return LLMStreamForwarder(send, "s1", stage, flush_interval_ms=0, metadata=metadata)
+
+        with patch("app.core.error_handling.get_hedge_policy", return_value=HedgePolicy(enabled=False)), \
+                stream_llm_output(open_stream):
+            result = await agent.execute({"question": "hi"})
+
+        assert result == "Hello"
+        assert opened == [("echo", {"provider": "ollama", "model": "llama3.2:3b"})]
+        assert "".join(m["content"] for m in sent) == "Hello"
+        assert sent[-1]["done"] is True
+        assert sent[0]["metadata"]["model"] == "llama3.2:3b"
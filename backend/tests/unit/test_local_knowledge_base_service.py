@@ -0,0 +1,176 @@
+"""
+Unit tests for the Local Knowledge Base Service.
+
+These tests verify indexing, filtered semantic search and persistence
+using a mocked embedding model and no Neo4j connection.
+"""
+
+import json
+import pickle
+
+import numpy as np
+import pytest
+from unittest.mock import Mock, patch
+
+from app.services.embedding_service import EmbeddingService
+from app.services.local_knowledge_base_service import LocalKnowledgeBaseService
+
+
+def _fake_encode(texts, **kwargs):
+    """Deterministic bag-of-characters embedding for tests."""
+    vectors = np.zeros((len(texts), 384), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for char in text:
+            vectors[row, ord(char) % 384] += 1.0
+    return vectors
+
+
+class TestLocalKnowledgeBaseService:
+    """Test the Local Knowledge Base Service functionality."""
+
+    @pytest.fixture
+    def mock_embedding_model(self):
+        """Mock sentence transformer model."""
+        mock_model = Mock()
+        mock_model.encode = Mock(side_effect=_fake_encode)
+        return mock_model
+
+    @pytest.fixture
+    def embedding_service(self, mock_embedding_model):
+        """Embedding service backed by the mock model."""
+        service = EmbeddingService(max_wait_ms=1)
+        service._model = mock_embedding_model
+        return service
+
+    @pytest.fixture
+    def make_service(self, tmp_path, embedding_service):
+        """Factory for services sharing one storage directory."""
+        def _make():
+            with patch(
+                'app.services.local_knowledge_base_service.get_embedding_service',
+                return_value=embedding_service
+            ), patch('py2neo.Graph', side_effect=Exception("Neo4j unavailable")):
+                return LocalKnowledgeBaseService(storage_path=str(tmp_path))
+        return _make
+
+    @pytest.fixture
+    def sample_analysis(self):
+        """Sample repository analysis."""
+        return {
+            "architecture": {"architecture_style": "microservices"},
+            "services": [
+                {"name": "User Service", "type": "api", "technology": "FastAPI"},
+                {"name": "Billing Service", "type": "worker", "technology": "Celery"},
+            ],
+            "tech_stack": {"languages": {"Python": 100}, "frameworks": ["FastAPI"]},
+        }
+
+    @pytest.mark.asyncio
+    async def test_index_repository_analysis(self, make_service, sample_analysis, mock_embedding_model):
+        """Test that indexing stores one row per chunk."""
+        service = make_service()
+
+        result = await service.index_repository_analysis("p1", "https://x/repo", sample_analysis)
+
+        assert result["indexed_chunks"] == 4
+        assert result["total_vectors"] == 4
+        assert service.vectors.shape == (4, 384)
+        assert mock_embedding_model.encode.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_reindexing_is_incremental(self, make_service, sample_analysis, mock_embedding_model):
+        """Test that re-indexing skips, replaces and removes chunks by content hash."""
+        service = make_service()
+        await service.index_repository_analysis("p1", "https://x/repo", sample_analysis)
+
+        result = await service.index_repository_analysis("p1", "https://x/repo", sample_analysis)
+        assert (result["inserted"], result["updated"], result["skipped"], result["deleted"]) == (0, 0, 4, 0)
+        assert len(service.store) == 4
+
+        sample_analysis["services"][0]["technology"] = "Django"
+        sample_analysis["services"][1] = {"name": "Search Service", "type": "api"}
+        encoded_before = mock_embedding_model.encode.call_count
+        result = await service.index_repository_analysis("p1", "https://x/repo", sample_analysis)
+
+        assert (result["inserted"], result["updated"], result["skipped"], result["deleted"]) == (1, 1, 2, 1)
+        assert len(mock_embedding_model.encode.call_args[0][0]) == 2
+        assert mock_embedding_model.encode.call_count == encoded_before + 1
+        names = sorted(m.get("service_name") or "" for m in service.metadata)
+        assert names == ["", "", "Search Service", "User Service"]
+        results = await service.search_similar_architectures("Django", filters={"chunk_type": "service"})
+        assert {r["metadata"]["technology"] for r in results} == {"Django", None}
+
+        if service._compaction_task:
+            await service._compaction_task
+        reloaded = make_service()
+        result = await reloaded.index_repository_analysis("p1", "https://x/repo", sample_analysis)
+        assert result["skipped"] == 4 and len(reloaded.store) == 4
+
+    @pytest.mark.asyncio
+    async def test_search_applies_project_and_filters(self, make_service, sample_analysis):
+        """Test that project and metadata filters restrict results."""
+        service = make_service()
+        await service.index_repository_analysis("p1", "https://x/repo", sample_analysis)
+        await service.index_repository_analysis("p2", "https://x/other", sample_analysis)
+
+        results = await service.search_similar_architectures(
+            "Billing Service worker", project_id="p2", filters={"chunk_type": "service"}
+        )
+
+        assert len(results) == 2
+        assert all(r["metadata"]["project_id"] == "p2" for r in results)
+        assert all(r["metadata"]["chunk_type"] == "service" for r in results)
+        assert results[0]["metadata"]["service_name"] == "Billing Service"
+        assert results[0]["score"] >= results[1]["score"]
+
+    @pytest.mark.asyncio
+    async def test_search_empty_store(self, make_service):
+        """Test searching an empty knowledge base."""
+        service = make_service()
+
+        assert await service.search_similar_architectures("anything") == []
+
+    @pytest.mark.asyncio
+    async def test_data_persists_across_instances(self, make_service, sample_analysis):
+        """Test that indexed data is reloaded by a new service instance."""
+        service = make_service()
+        await service.index_repository_analysis("p1", "https://x/repo", sample_analysis)
+
+        reloaded = make_service()
+
+        assert len(reloaded.store) == 4
+        assert reloaded.metadata[0]["project_id"] == "p1"
+        results = await reloaded.search_similar_architectures("microservices", top_k=1)
+        assert len(results) == 1
+
+    @pytest.mark.asyncio
+    async def test_delete_project(self, make_service, sample_analysis):
+        """Test removing every chunk of a project."""
+        service = make_service()
+        await service.index_repository_analysis("p1", "https://x/repo", sample_analysis)
+        await service.index_repository_analysis("p2", "https://x/other", sample_analysis)
+
+        deleted = await service.delete_project("p1")
+
+        assert deleted == 4
+        assert len(service.store) == 4
+        assert await service.search_similar_architectures("service", project_id="p1") == []
+        assert len(make_service().store) == 4
+
+        await service._compaction_task
+        assert service.store.deleted_count == 0
+        assert len(make_service().store) == 4
+
+    @pytest.mark.asyncio
+    async def test_migrates_legacy_storage(self, make_service, tmp_path):
+        """Test that embeddings.pkl/metadata.json are imported into segments."""
+        with open(tmp_path / "embeddings.pkl", "wb") as f:
+            pickle.dump([[1.0] * 384, [0.5] * 384], f)
+        with open(tmp_path / "metadata.json", "w") as f:
+            json.dump([{"project_id": "p1"}, {"project_id": "p2"}], f)
+
+        service = make_service()
+
+        assert len(service.store) == 2
+        assert (tmp_path / "segments" / "manifest.json").exists()
+        assert len(make_service().store) == 2
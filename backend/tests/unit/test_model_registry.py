@@ -0,0 +1,125 @@
+"""
+Unit tests for the process-wide model registry.
+
+This module tests the ModelRegistry functionality including:
+- Lazy, load-once semantics under concurrency
+- Load time and memory footprint statistics
+- Startup warm-up
+"""
+
+import threading
+import time
+
+import pytest
+from unittest.mock import Mock, patch
+
+from app.core.model_registry import ModelRegistry, init_models
+
+
+class FakeTensor:
+    """Tensor stand-in exposing the size attributes the registry reads."""
+
+    def __init__(self, count: int, size: int = 4):
+        self._count = count
+        self._size = size
+
+    def numel(self) -> int:
+        return self._count
+
+    def element_size(self) -> int:
+        return self._size
+
+
+class TestModelRegistry:
+    """Test cases for ModelRegistry."""
+
+    @pytest.fixture
+    def registry(self):
+        """Create an empty registry."""
+        return ModelRegistry()
+
+    def test_loads_once(self, registry):
+        """Test that a model is loaded on first use and then reused."""
+        loader = Mock(return_value=object())
+
+        first = registry.get("model", loader)
+        second = registry.get("model", loader)
+
+        assert first is second
+        assert loader.call_count == 1
+        assert registry.is_loaded("model")
+
+    def test_concurrent_requests_load_once(self, registry):
+        """Test that threads racing for the same model share one load."""
+        def slow_loader():
+            time.sleep(0.05)
+            return object()
+
+        loader = Mock(side_effect=slow_loader)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.get("model", loader)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert loader.call_count == 1
+        assert len({id(model) for model in results}) == 1
+
+    def test_stats_report_load_time_and_memory(self, registry):
+        """Test that load time and parameter memory are recorded."""
+        model = Mock()
+        model.parameters.return_value = [FakeTensor(100), FakeTensor(50)]
+        model.buffers.return_value = [FakeTensor(10, size=8)]
+
+        registry.get("model", lambda: model)
+        stats = registry.get_stats()
+
+        assert stats["loaded_models"] == 1
+        assert stats["models"]["model"]["memory_bytes"] == 150 * 4 + 10 * 8
+        assert stats["models"]["model"]["load_seconds"] >= 0
+
+    def test_non_torch_models_have_no_memory_estimate(self, registry):
+        """Test that models without parameters report no footprint."""
+        registry.get("model", lambda: object())
+
+        assert registry.get_stats()["models"]["model"]["memory_bytes"] is None
+
+    def test_get_sentence_transformer(self, registry):
+        """Test that sentence transformers are loaded through the registry."""
+        with patch("sentence_transformers.SentenceTransformer") as mock_class:
+            model = registry.get_sentence_transformer("all-MiniLM-L6-v2")
+
+            assert registry.get_sentence_transformer("all-MiniLM-L6-v2") is model
+            mock_class.assert_called_once_with("all-MiniLM-L6-v2")
+            assert registry.is_loaded("sentence-transformers/all-MiniLM-L6-v2")
+
+    @pytest.mark.asyncio
+    async def test_warm_up_logs_failures(self, registry):
+        """Test that a failed warm-up does not raise."""
+        with patch.object(registry, "get_sentence_transformer", side_effect=OSError("no model")):
+            await registry.warm_up(["missing-model"])
+
+        assert registry.get_stats()["loaded_models"] == 0
+
+    @pytest.mark.asyncio
+    async def test_init_models_respects_setting(self):
+        """Test that startup warm-up only runs when enabled."""
+        with patch("app.core.model_registry.model_registry") as mock_registry, \
+             patch("app.core.model_registry.settings") as mock_settings:
+            mock_registry.warm_up = Mock(side_effect=lambda names: _done())
+            mock_settings.embedding_model_warmup = False
+            await init_models()
+            mock_registry.warm_up.assert_not_called()
+
+            mock_settings.embedding_model_warmup = True
+            mock_settings.knowledge_base_embedding_model = "all-MiniLM-L6-v2"
+            await init_models()
+            mock_registry.warm_up.assert_called_once_with(["all-MiniLM-L6-v2"])
+
+
+async def _done() -> None:
+    """Completed coroutine used as a mocked async result."""
@@ -0,0 +1,202 @@
+"""
+Unit tests for Ollama model residency.
+
+These tests run against a fake Ollama server that loads models on demand,
+evicts the least recently used one when full and reports loaded models on
+/api/ps. They verify warm-up with keep_alive, residency tracking, routing
+toward loaded models within quality tiers and that SimpleLLMService sends
+keep_alive and prefers a loaded model.
+"""
+
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.core import ollama_residency
+from app.core.ollama_residency import (
+    OllamaResidencyManager,
+    init_ollama_models,
+    keep_alive_seconds,
+    quality_tier,
+)
+from app.modules.llm_service import SimpleLLMService
+
+BASE_URL = "http://ollama.test:11434"
+
+
+class FakeOllama:
+    """In-process Ollama server keeping at most ``max_loaded`` models."""
+
+    def __init__(self, max_loaded: int = 1):
+        self.max_loaded = max_loaded
+        self.loaded = []
+        self.requests = []
+
+    def _load(self, model):
+        model = model if ":" in model else f"{model}:latest"
+        if model in self.loaded:
+            self.loaded.remove(model)
+        self.loaded.append(model)
+        del self.loaded[:-self.max_loaded]
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/ps":
+            return httpx.Response(200, json={"models": [{"name": name, "model": name} for name in self.loaded]})
+        body = json.loads(request.content)
+        self.requests.append((request.url.path, body))
+        self._load(body["model"])
+        if request.url.path == "/api/generate":
+            return httpx.Response(200, json={"model": body["model"], "response": "", "done": True})
+        return httpx.Response(200, json={
+            "model": body["model"],
+            "message": {"role": "assistant", "content": f'{{"model": "{body["model"]}"}}'},
+            "done": True,
+        })
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+@pytest.fixture
+def route_to_resident():
+    """Enable routing toward loaded models (disabled for the test suite)."""
+    with patch("app.core.ollama_residency.settings.ollama_route_to_resident", True):
+        yield
+
+
+class TestKeepAlive:
+    """Test keep_alive and tier configuration."""
+
+    @pytest.mark.parametrize("value,seconds", [("30m", 1800.0), ("1h", 3600.0), ("45", 45.0), ("0", 0.0), ("-1", None)])
+    def test_keep_alive_seconds(self, value, seconds):
+        """Test Ollama duration parsing."""
+        assert keep_alive_seconds(value) == seconds
+
+    def test_per_model_override(self):
+        """Test that overrides match model names with or without tags."""
+        manager = OllamaResidencyManager(BASE_URL)
+        with patch("app.core.ollama_residency.settings.ollama_keep_alive_overrides", {"deepseek-r1": "10m"}), \
+                patch("app.core.ollama_residency.settings.ollama_keep_alive", "1h"):
+            assert manager.keep_alive_for("deepseek-r1:latest") == "10m"
+            assert manager.keep_alive_for("llama3.2:3b") == "1h"
+
+    def test_quality_tiers(self):
+        """Test tier lookup by prefix."""
+        assert quality_tier("deepseek-r1:latest") > quality_tier("llama3.2:3b")
+        assert quality_tier("mystery") == ollama_residency.UNKNOWN_QUALITY_TIER
+
+
+class TestResidency:
+    """Test warm-up and residency tracking against the fake server."""
+
+    @pytest.mark.asyncio
+    async def test_warm_up_loads_with_keep_alive(self):
+        """Test that warm-up sends empty generate requests with keep_alive."""
+        server = FakeOllama(max_loaded=2)
+        manager = OllamaResidencyManager(BASE_URL, client=server.client())
+
+        results = await manager.warm_up(["llama3.2:3b", "deepseek-r1", "llama3.2:3b"])
+
+        assert results == {"llama3.2:3b": True, "deepseek-r1": True}
+        assert [body.get("keep_alive") for _, body in server.requests] == ["30m", "30m"]
+        assert "prompt" not in server.requests[0][1]
+        assert manager.is_resident("deepseek-r1:latest")
+
+    @pytest.mark.asyncio
+    async def test_refresh_detects_eviction(self):
+        """Test that /api/ps corrects residency after the server evicts a model."""
+        server = FakeOllama(max_loaded=1)
+        manager = OllamaResidencyManager(BASE_URL, client=server.client())
+        await manager.warm_up(["llama3.2:3b"])
+        server._load("deepseek-r1")
+
+        await manager.refresh(force=True)
+
+        assert not manager.is_resident("llama3.2:3b")
+        assert manager.is_resident("deepseek-r1")
+
+    @pytest.mark.asyncio
+    async def test_warm_up_failure_is_reported(self):
+        """Test that an unreachable server does not raise."""
+        def refuse(request):
+            raise httpx.ConnectError("connection refused")
+        manager = OllamaResidencyManager(BASE_URL, client=httpx.AsyncClient(transport=httpx.MockTransport(refuse)))
+
+        assert await manager.warm_up(["llama3.2:3b"]) == {"llama3.2:3b": False}
+        assert manager.get_stats()["warmup_failures"] == 1
+
+
+class TestRouting:
+    """Test routing toward loaded models."""
+
+    @pytest.mark.asyncio
+    async def test_loaded_higher_tier_model_goes_first(self, route_to_resident):
+        """Test that a loaded model of higher tier replaces a cold preferred model."""
+        server = FakeOllama()
+        manager = OllamaResidencyManager(BASE_URL, client=server.client())
+        await manager.warm_up(["deepseek-r1"])
+
+        chain = await manager.prefer_resident(["llama3.2:3b", "deepseek-r1", "deepseek-r1"])
+
+        assert chain == ["deepseek-r1", "deepseek-r1", "llama3.2:3b"]
+
+    @pytest.mark.asyncio
+    async def test_lower_tier_model_does_not_replace_preferred(self, route_to_resident):
+        """Test that quality tiers block routing to a weaker loaded model."""
+        server = FakeOllama()
+        manager = OllamaResidencyManager(BASE_URL, client=server.client())
+        await manager.warm_up(["llama3.2:3b"])
+
+        chain = await manager.prefer_resident(["deepseek-r1", "llama3.2:3b"])
+
+        assert chain == ["deepseek-r1", "llama3.2:3b"]
+
+    @pytest.mark.asyncio
+    async def test_routing_disabled(self):
+        """Test that chains are unchanged when routing is off."""
+        manager = OllamaResidencyManager(BASE_URL, client=FakeOllama().client())
+        manager.mark_used("deepseek-r1")
+
+        with patch("app.core.ollama_residency.settings.ollama_route_to_resident", False):
+            assert await manager.prefer_resident(["llama3.2:3b", "deepseek-r1"]) == ["llama3.2:3b", "deepseek-r1"]
+
+    @pytest.mark.asyncio
+    async def test_llm_service_uses_loaded_model_with_keep_alive(self, route_to_resident):
+        """Test that the local chain starts with the loaded model and sends keep_alive."""
+        server = FakeOllama()
+        client = server.client()
+        service = SimpleLLMService()
+        service.deepseek_base_url = BASE_URL
+        service.deepseek_model = "deepseek-r1:latest"
+        service.fast_local_model = "llama3.2:3b"
+        manager = OllamaResidencyManager(BASE_URL, client=client)
+        await manager.warm_up(["deepseek-r1"])
+
+        with patch("app.modules.llm_service.get_http_client", return_value=client), \
+                patch("app.modules.llm_service.get_ollama_residency", return_value=manager):
+            result = await service._call_deepseek("prompt", "system")
+
+        assert json.loads(result) == {"model": "deepseek-r1:latest"}
+        path, body = server.requests[-1]
+        assert path == "/api/chat"
+        assert body["keep_alive"] == "30m"
+
+
+class TestStartup:
+    """Test startup warm-up."""
+
+    @pytest.mark.asyncio
+    async def test_init_warms_configured_local_models(self):
+        """Test that startup loads the local models configured in ModelManager."""
+        server = FakeOllama(max_loaded=5)
+        manager = OllamaResidencyManager(BASE_URL, client=server.client())
+
+        with patch("app.core.ollama_residency.settings.ollama_warmup_on_startup", True), \
+                patch("app.core.ollama_residency.get_ollama_residency", return_value=manager):
+            await init_ollama_models()
+            await ollama_residency._warmup_task
+
+        assert {body["model"] for _, body in server.requests} == {"deepseek-r1", "llama3.2:3b"}
+        assert manager.is_resident("llama3.2:3b")
@@ -0,0 +1,161 @@
+"""
+Unit tests for the parallel repository analysis.
+
+Covers the GitHub analyzer running its filesystem stages concurrently and
+reporting per-stage timings, and the brownfield workflow parsing
+requirements while the repository is analyzed.
+"""
+
+import asyncio
+import shutil
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.agents.github_analyzer_agent import GitHubAnalyzerAgent
+from app.workflows.brownfield_workflow import BrownfieldWorkflow, BrownfieldWorkflowState
+
+
+@pytest.fixture
+def sample_repo(tmp_path):
+    """Create a small repository checkout."""
+    repo = tmp_path / "source"
+    (repo / "src").mkdir(parents=True)
+    (repo / "src" / "main.py").write_text("from fastapi import FastAPI\n\napp = FastAPI()\n")
+    (repo / "requirements.txt").write_text("fastapi==0.104.1\npytest==7.4.3\n")
+    (repo / "Dockerfile").write_text("FROM python:3.11\n")
+    (repo / "README.md").write_text("# Sample\n")
+    return repo
+
+
+@pytest.fixture
+def agent(sample_repo, tmp_path):
+    """Create an analyzer whose clone copies the sample repository."""
+    agent = GitHubAnalyzerAgent()
+
+    async def clone(repo_url, branch, clone_depth):
+        checkout = tmp_path / "checkout"
+        shutil.copytree(sample_repo, checkout)
+        return str(checkout)
+
+    agent._clone_repository = clone
+    agent._analyze_architecture_with_llm = AsyncMock(return_value={"architecture_style": "monolith"})
+    return agent
+
+
+class TestParallelRepositoryAnalysis:
+    """Test the GitHub analyzer's concurrent stages."""
+
+    @pytest.mark.asyncio
+    async def test_filesystem_stages_run_concurrently(self, agent, tmp_path):
+        """Test that filesystem stages overlap instead of running one after another."""
+        # Each stage waits for the other, which only succeeds if both run at once
+        barrier = threading.Barrier(2, timeout=5)
+        analyze_file_structure = agent._analyze_file_structure
+        analyze_code_quality = agent._analyze_code_quality
+
+        async def file_structure(repo_path, index):
+            await asyncio.to_thread(barrier.wait)
+            return await analyze_file_structure(repo_path, index)
+
+        async def code_quality(repo_path, index):
+            await asyncio.to_thread(barrier.wait)
+            return await analyze_code_quality(repo_path, index)
+
+        agent._analyze_file_structure = file_structure
+        agent._analyze_code_quality = code_quality
+
+        result = await agent.execute({"repo_url": "https://github.com/example/sample"})
+
+        assert "Python" in result["tech_stack"]["languages"]
+        assert result["file_structure"]["file_counts"]["total_files"] == 4
+        assert result["code_quality"]["documentation"]["has_readme"] is True
+        assert not (tmp_path / "checkout").exists()
+
+    @pytest.mark.asyncio
+    async def test_stage_timings_reported(self, agent):
+        """Test that every stage's duration is reported in the metadata."""
+        result = await agent.execute({"repo_url": "https://github.com/example/sample"})
+
+        timings = result["metadata"]["stage_timings"]
+        assert set(timings) == {
+            "clone", "scan", "file_structure", "tech_stack", "configurations", "dependencies",
+            "api_contracts", "code_quality", "architecture_analysis", "recommendations",
+        }
+        assert all(seconds >= 0 for seconds in timings.values())
+
+    @pytest.mark.asyncio
+    async def test_stage_error_waits_for_other_stages(self, agent, tmp_path):
+        """Test that a failing stage is raised only after the other stages finished reading."""
+        finished = []
+        analyze_dependencies = agent._analyze_dependencies
+
+        async def dependencies(repo_path, index):
+            await asyncio.sleep(0.05)
+            result = await analyze_dependencies(repo_path, index)
+            finished.append("dependencies")
+            return result
+
+        async def api_contracts(repo_path, index):
+            raise OSError("unreadable file")
+
+        agent._analyze_dependencies = dependencies
+        agent._extract_api_contracts = api_contracts
+
+        with pytest.raises(Exception, match="unreadable file"):
+            await agent.execute({"repo_url": "https://github.com/example/sample"})
+
+        assert finished == ["dependencies"]
+        assert not (tmp_path / "checkout").exists()
+
+
+class TestParallelBrownfieldWorkflow:
+    """Test that the brownfield workflow analyzes and parses in parallel."""
+
+    @pytest.mark.asyncio
+    async def test_requirements_parsed_during_analysis(self):
+        """Test that requirements parsing runs concurrently with repository analysis."""
+        both_running = asyncio.Barrier(2)
+
+        async def analyze(input_data):
+            await asyncio.wait_for(both_running.wait(), 5)
+            return {"services": [], "technology_stack": {"Python": "3.11"}}
+
+        async def parse(input_data):
+            await asyncio.wait_for(both_running.wait(), 5)
+            return {"confidence_score": 0.9}
+
+        with patch("app.workflows.brownfield_workflow.GitHubAnalyzerAgent") as analyzer_class, \
+                patch("app.workflows.brownfield_workflow.RequirementsAgent") as requirements_class, \
+                patch("app.workflows.brownfield_workflow.ArchitectureAgent"), \
+                patch("app.workflows.brownfield_workflow.get_local_knowledge_base_service",
+                      return_value=MagicMock(index_repository_analysis=AsyncMock())):
+            analyzer_class.return_value.execute = AsyncMock(side_effect=analyze)
+            requirements_class.return_value.execute = AsyncMock(side_effect=parse)
+            workflow = BrownfieldWorkflow()
+
+            state = BrownfieldWorkflowState(
+                session_id="brownfield-parallel",
+                project_id="project-1",
+                repository_url="https://github.com/example/sample",
+                branch="main",
+                document_path="requirements.md",
+                current_stage="starting",
+                errors=[],
+                warnings=[],
+                feedback_history=[],
+            )
+            steps = []
+            async for update in workflow.graph.astream(
+                state, config={"configurable": {"thread_id": "brownfield-parallel"}}, stream_mode="updates"
+            ):
+                steps.append(set(update))
+                if "human_review_requirements" in update:
+                    break
+
+        # Both branches finish in one step, and the review runs once after them
+        assert set.union(*steps[:2]) == {"analyze_existing", "parse_requirements"}
+        assert steps[2:] == [{"human_review_requirements"}]
+        github_input = analyzer_class.return_value.execute.call_args.args[0]
+        assert github_input["repo_url"] == "https://github.com/example/sample"
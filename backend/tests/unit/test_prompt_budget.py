@@ -0,0 +1,175 @@
+"""
+Unit tests for token-budgeted prompt assembly.
+
+These tests verify model context window lookup, the prompt budget, that
+prompts which fit are sent unchanged, that oversized context is compressed
+to its most relevant parts (or dropped) while required sections are always
+kept, and that agents fit their prompts to the model's context window.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.agents.architecture_agent import ArchitectureAgent
+from app.agents.requirements_agent import RequirementsAgent
+from app.core.prompt_budget import PromptBuilder, get_context_window, prompt_token_budget
+from app.core.token_usage import count_tokens
+
+
+@pytest.fixture(autouse=True)
+def word_overlap_relevance():
+    """Rank by word overlap so tests do not load the embedding model."""
+    with patch("app.core.prompt_budget.settings.prompt_budget_use_embeddings", False):
+        yield
+
+
+FILLER = [
+    f"The office kitchen schedule for week {i} lists coffee, tea and snacks for the team."
+    for i in range(40)
+]
+
+
+class TestContextWindow:
+    """Test context window lookup and budgets."""
+
+    def test_exact_and_prefix_match(self):
+        """Test that model tags match configured names by prefix, longest first."""
+        with patch("app.core.prompt_budget.settings.llm_context_windows", {"gpt-4": 8192, "gpt-4o": 128000}):
+            assert get_context_window("gpt-4") == 8192
+            assert get_context_window("gpt-4o-2024-08-06") == 128000
+
+    def test_unknown_model_uses_default(self):
+        """Test the default window for unknown models."""
+        with patch("app.core.prompt_budget.settings.llm_default_context_window", 4096):
+            assert get_context_window("mystery-model") == 4096
+            assert get_context_window(None) == 4096
+
+    def test_budget_reserves_system_prompt_completion_and_margin(self):
+        """Test that the budget leaves room for the system prompt and the completion."""
+        system_prompt = "You are an architect."
+        with patch("app.core.prompt_budget.settings.llm_context_windows", {"tiny": 3000}), \
+                patch("app.core.prompt_budget.settings.prompt_budget_margin_ratio", 0.1):
+            budget = prompt_token_budget("tiny", system_prompt, 1000)
+
+        assert budget == int((3000 - count_tokens(system_prompt) - 1000) * 0.9)
+
+
+class TestPromptBuilder:
+    """Test fitting sections to a budget."""
+
+    @pytest.mark.asyncio
+    async def test_prompt_that_fits_is_unchanged(self):
+        """Test the fast path when everything fits."""
+        builder = PromptBuilder().add("header", "Extract requirements:", required=True).add("document", "Users log in.")
+
+        prompt = await builder.build("requirements", budget_tokens=1000)
+
+        assert prompt.text == "Extract requirements:\n\nUsers log in."
+        assert not prompt.truncated
+        assert prompt.report["sections"]["document"]["status"] == "kept"
+
+    @pytest.mark.asyncio
+    async def test_compression_keeps_relevant_chunks_in_order(self):
+        """Test that the most relevant lines survive, in document order, with an omission note."""
+        lines = FILLER[:10] + ["Payment processing must support refunds."] + FILLER[10:20] + [
+            "Payment processing must encrypt card data."
+        ]
+        builder = PromptBuilder()
+        builder.add("header", "Extract payment requirements:", required=True)
+        builder.add("document", "\n".join(lines))
+        budget = count_tokens(builder.render()) // 3
+
+        prompt = await builder.build("payment processing refunds card data", budget)
+
+        assert count_tokens(prompt.text) <= budget
+        assert prompt.text.index("support refunds") < prompt.text.index("encrypt card data")
+        assert "omitted to fit the context window" in prompt.text
+        assert prompt.report["sections"]["document"]["status"] == "compressed"
+        assert prompt.report["dropped_tokens"] > 0
+        assert prompt.report["fits"]
+
+    @pytest.mark.asyncio
+    async def test_irrelevant_section_dropped_with_title(self):
+        """Test that a section without relevant content is dropped entirely."""
+        builder = PromptBuilder()
+        builder.add("header", "Design the checkout service.", required=True)
+        builder.add("goals", "- Checkout service handles payment and order confirmation", title="GOALS:")
+        builder.add("notes", "\n".join(FILLER), title="NOTES:")
+        budget = count_tokens(
+            "Design the checkout service.\n\nGOALS:\n- Checkout service handles payment and order confirmation"
+        ) + 5
+
+        prompt = await builder.build("checkout service payment order", budget)
+
+        assert "GOALS:" in prompt.text
+        assert "NOTES:" not in prompt.text
+        assert prompt.report["sections"]["notes"]["status"] == "dropped"
+
+    @pytest.mark.asyncio
+    async def test_required_sections_always_kept(self):
+        """Test that required sections are sent in full even over budget."""
+        schema = "Output JSON: " + " ".join(f'"field_{i}": string' for i in range(50))
+        builder = PromptBuilder().add("schema", schema, required=True).add("document", "\n".join(FILLER))
+
+        prompt = await builder.build("anything", budget_tokens=10)
+
+        assert prompt.text == schema
+        assert not prompt.report["fits"]
+        assert prompt.report["sections"]["document"]["status"] == "dropped"
+
+
+class TestAgentPromptFitting:
+    """Test that agents fit prompts to their model's context window."""
+
+    @pytest.mark.asyncio
+    async def test_requirements_prompt_fits_small_window(self):
+        """Test that a long document is compressed around the fixed instructions."""
+        agent = RequirementsAgent()
+        agent.llm_model = "small-model"
+        content = "\n".join(FILLER * 5 + ["The system must process payments within 2 seconds."])
+        system_prompt = agent.get_system_prompt()
+
+        with patch("app.core.prompt_budget.settings.llm_context_windows", {"small-model": 6000}):
+            prompt = await agent._fit_prompt(
+                agent._extraction_prompt_sections(content, "", "fintech"),
+                agent._extraction_query("", "fintech"),
+                system_prompt
+            )
+            budget = prompt_token_budget("small-model", system_prompt, agent.max_tokens)
+
+        assert count_tokens(prompt) <= budget
+        assert "Output ONLY the JSON" in prompt
+        assert "process payments within 2 seconds" in prompt
+        assert agent.last_prompt_report["sections"]["document"]["status"] == "compressed"
+
+    def test_full_render_keeps_whole_document(self):
+        """Test that rendering without a budget no longer truncates documents."""
+        agent = RequirementsAgent()
+        content = "x" * 9000 + " END"
+
+        prompt = agent._build_extraction_prompt(content, "", "general")
+
+        assert "END" in prompt
+
+    @pytest.mark.asyncio
+    async def test_architecture_prompt_keeps_output_format(self):
+        """Test that long requirement lists are compressed but the JSON schema is kept."""
+        agent = ArchitectureAgent()
+        agent.llm_model = "small-model"
+        requirements = {"structured_requirements": {
+            "business_goals": ["Sell products online"],
+            "functional_requirements": [f"Report {i} exports office kitchen statistics" for i in range(1000)],
+        }}
+        system_prompt = agent.get_system_prompt()
+
+        with patch("app.core.prompt_budget.settings.llm_context_windows", {"small-model": 12000}):
+            prompt = await agent._fit_prompt(
+                agent._architecture_prompt_sections(requirements, {}, [], "ecommerce"),
+                agent._architecture_query(requirements, "ecommerce"),
+                system_prompt
+            )
+
+        assert "Output ONLY the JSON" in prompt
+        assert "Sell products online" in prompt
+        assert agent.last_prompt_report["sections"]["functional_requirements"]["status"] == "compressed"
@@ -0,0 +1,148 @@
+"""
+Unit tests for the repository file index.
+"""
+
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.agents.github_analyzer_agent import GitHubAnalyzerAgent
+from app.services.repository_index import RepositoryIndex, classify_file, parse_gitignore
+
+
+def write(root, path, content=""):
+    """Write a file below root, creating its directories."""
+    full_path = root / path
+    full_path.parent.mkdir(parents=True, exist_ok=True)
+    full_path.write_text(content)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Create a repository checkout with ignored and gitignored paths."""
+    write(tmp_path, ".gitignore", "*.log\n/generated/\nsecrets/\n!keep.log\n")
+    write(tmp_path, "README.md", "# Sample\n")
+    write(tmp_path, "package.json", '{"dependencies": {"express": "^4.18.0"}}')
+    write(tmp_path, "src/app.py", "print('hello')\n")
+    write(tmp_path, "src/app.log", "noise")
+    write(tmp_path, "src/keep.log", "kept")
+    write(tmp_path, "src/secrets/key.pem", "secret")
+    write(tmp_path, "generated/client.py", "")
+    write(tmp_path, "lib/generated/model.py", "")
+    write(tmp_path, "web/.gitignore", "*.js\n")
+    write(tmp_path, "web/index.js", "")
+    write(tmp_path, "web/index.ts", "")
+    write(tmp_path, "k8s/deployment.yaml", "kind: Deployment\n")
+    write(tmp_path, "node_modules/express/index.js", "")
+    write(tmp_path, ".git/HEAD", "ref: refs/heads/main\n")
+    write(tmp_path, ".cache/data.bin", "")
+    return tmp_path
+
+
+class TestRepositoryIndex:
+    """Test scanning, ignore rules and lazy reads."""
+
+    def test_scan_applies_ignore_rules(self, repo):
+        """Test that ignored directories, hidden directories and gitignored paths are skipped."""
+        index = RepositoryIndex.scan(str(repo), languages={".py": "Python", ".ts": "TypeScript"})
+
+        assert [f.path for f in index.files] == [
+            ".gitignore",
+            "README.md",
+            "k8s/deployment.yaml",
+            "lib/generated/model.py",
+            "package.json",
+            "src/app.py",
+            "src/keep.log",
+            "web/.gitignore",
+            "web/index.ts",
+        ]
+
+    def test_scan_records_file_details(self, repo):
+        """Test that files carry size, extension, language and category."""
+        index = RepositoryIndex.scan(str(repo), languages={".py": "Python"})
+
+        app = index.get("src/app.py")
+        assert app.size == os.path.getsize(repo / "src" / "app.py")
+        assert (app.name, app.directory, app.extension, app.language) == ("app.py", "src", ".py", "Python")
+        assert index.get("k8s/deployment.yaml").category == "kubernetes"
+        assert index.get("package.json").category == "package_managers"
+        assert index.root_files == [".gitignore", "README.md", "package.json"]
+        assert index.language_counts() == {"Python": 2}
+
+    def test_scan_without_gitignore(self, repo):
+        """Test that gitignore support can be turned off."""
+        index = RepositoryIndex.scan(str(repo), use_gitignore=False)
+
+        assert index.exists("src/app.log")
+        assert index.exists("generated/client.py")
+        assert not index.exists("node_modules/express/index.js")
+
+    def test_missing_root_gives_empty_index(self, tmp_path):
+        """Test that an unreadable checkout is indexed as empty, like os.walk."""
+        assert RepositoryIndex.scan(str(tmp_path / "missing")).files == []
+
+    def test_read_text_is_lazy_and_cached(self, repo):
+        """Test that contents are read on first use only."""
+        index = RepositoryIndex.scan(str(repo))
+
+        with patch("builtins.open", wraps=open) as opened:
+            assert index.read_text("README.md") == "# Sample\n"
+            assert index.read_text("README.md") == "# Sample\n"
+
+        assert opened.call_count == 1
+        with pytest.raises(FileNotFoundError):
+            index.read_text("src/app.log")
+
+    def test_gitignore_patterns(self):
+        """Test anchoring, directory-only and double-star patterns."""
+        def ignored(text, path, is_dir=False, base=""):
+            result = False
+            for rule in parse_gitignore(text, base):
+                if rule.matches(path, path.rsplit("/", 1)[-1], is_dir):
+                    result = not rule.negated
+            return result
+
+        assert ignored("*.pyc", "a/b/c.pyc")
+        assert ignored("/build", "build", is_dir=True)
+        assert not ignored("/build", "src/build", is_dir=True)
+        assert ignored("docs/**/*.png", "docs/img/logo.png")
+        assert ignored("cache/", "a/cache", is_dir=True)
+        assert not ignored("cache/", "a/cache")
+        assert ignored("*.js", "web/app.js", base="web")
+        assert not ignored("*.js", "app.js", base="web")
+        assert not ignored("# comment\n\n", "comment")
+
+    def test_classify_file(self):
+        """Test file classification."""
+        assert classify_file("docs/README.rst") == "readme"
+        assert classify_file("docker-compose.prod.yml") == "docker_compose"
+        assert classify_file("api/openapi.json") == "openapi"
+        assert classify_file("tests/test_app.py") == "test_files"
+        assert classify_file("docs/guide.md") == "documentation"
+        assert classify_file("src/main.go") is None
+
+
+class TestAnalyzerUsesIndex:
+    """Test that the GitHub analyzer walks the checkout once."""
+
+    @pytest.mark.asyncio
+    async def test_execute_scans_checkout_once(self, repo):
+        """Test that all stages query one index instead of walking the tree."""
+        agent = GitHubAnalyzerAgent()
+        agent._clone_repository = AsyncMock(return_value=str(repo))
+        agent._cleanup_repository = AsyncMock()
+        agent._analyze_architecture_with_llm = AsyncMock(return_value={})
+
+        with patch("app.services.repository_index.os.scandir", wraps=os.scandir) as scandir, \
+                patch("os.walk", side_effect=AssertionError("os.walk used")):
+            result = await agent.execute({"repo_url": "https://github.com/example/sample"})
+
+        scanned = {call.args[0] for call in scandir.call_args_list}
+        assert scandir.call_count == len(scanned)  # Every directory listed once
+        assert result["tech_stack"]["frameworks"] == ["Express.js"]
+        assert "Kubernetes" in result["tech_stack"]["infrastructure"]
+        assert result["configurations"]["kubernetes"][0]["kind"] == "Deployment"
+        assert result["file_structure"]["file_counts"]["total_files"] == 9
+        assert result["code_quality"]["documentation"]["readme_files"] == ["README.md"]
@@ -0,0 +1,174 @@
+"""
+Unit tests for the repository mirror cache.
+
+Repositories are local git repositories cloned through file:// URLs.
+"""
+
+import os
+from unittest.mock import AsyncMock, patch
+
+import git
+import pytest
+
+from app.agents.github_analyzer_agent import GitHubAnalyzerAgent
+from app.services.repository_mirror_cache import RepositoryMirrorCache, mirror_key
+
+
+def make_repo(path, files):
+    """Create a git repository with one commit on main."""
+    repo = git.Repo.init(path, initial_branch="main")
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "Test")
+        config.set_value("user", "email", "test@example.com")
+    commit(repo, files, "Initial commit")
+    return repo
+
+
+def commit(repo, files, message):
+    """Write files and commit them."""
+    for name, content in files.items():
+        full_path = os.path.join(repo.working_dir, name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(content)
+    repo.index.add(list(files))
+    repo.index.commit(message)
+
+
+@pytest.fixture
+def origin(tmp_path):
+    """Create a source repository."""
+    return make_repo(tmp_path / "origin", {"README.md": "# Sample\n", "src/app.py": "print('v1')\n"})
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create an empty mirror cache."""
+    return RepositoryMirrorCache(str(tmp_path / "mirrors"), max_bytes=100 * 1024 * 1024)
+
+
+def url(repo):
+    return f"file://{repo.working_dir}"
+
+
+class TestRepositoryMirrorCache:
+    """Test mirroring, incremental fetches, worktrees and eviction."""
+
+    def test_first_checkout_creates_mirror(self, cache, origin):
+        """Test that the first checkout clones a bare mirror and checks out the branch."""
+        worktree = cache.checkout(url(origin), "main")
+        try:
+            with open(os.path.join(worktree, "src", "app.py")) as f:
+                assert f.read() == "print('v1')\n"
+            mirror = git.Repo(cache.mirror_path(url(origin)))
+            assert mirror.bare
+            assert cache.get_stats()["misses"] == 1
+        finally:
+            cache.release(worktree)
+
+        assert not os.path.exists(worktree)
+        assert os.path.isdir(cache.mirror_path(url(origin)))
+        assert cache.get_stats()["checkouts"] == 0
+
+    def test_later_checkout_fetches_new_commits(self, cache, origin):
+        """Test that a cached mirror is fetched instead of cloned again."""
+        cache.release(cache.checkout(url(origin), "main"))
+        commit(origin, {"src/app.py": "print('v2')\n"}, "Second commit")
+
+        with patch("git.Repo.clone_from", side_effect=AssertionError("cloned again")):
+            worktree = cache.checkout(url(origin) + ".git", "main")
+        try:
+            with open(os.path.join(worktree, "src", "app.py")) as f:
+                assert f.read() == "print('v2')\n"
+            assert git.Repo(worktree).head.commit.hexsha == origin.head.commit.hexsha
+        finally:
+            cache.release(worktree)
+
+        assert cache.get_stats()["hits"] == 1
+        assert mirror_key(url(origin)) == mirror_key(url(origin) + "/")
+
+    def test_concurrent_checkouts_of_one_repository(self, cache, origin):
+        """Test that two analyses of one repository get separate worktrees."""
+        first = cache.checkout(url(origin), "main")
+        second = cache.checkout(url(origin), "main")
+
+        assert first != second
+        cache.release(first)
+        assert os.path.exists(os.path.join(second, "README.md"))
+        cache.release(second)
+
+    def test_missing_branch_raises(self, cache, origin):
+        """Test that checking out an unknown branch fails without leaking a worktree."""
+        with pytest.raises(git.exc.GitCommandError):
+            cache.checkout(url(origin), "does-not-exist")
+
+        assert cache.get_stats()["checkouts"] == 0
+        assert git.Repo(cache.mirror_path(url(origin))).git.worktree("list").count("\n") == 0
+
+    def test_broken_mirror_is_cloned_again(self, cache, origin):
+        """Test that a mirror that cannot be fetched is replaced."""
+        cache.release(cache.checkout(url(origin), "main"))
+        with open(os.path.join(cache.mirror_path(url(origin)), "HEAD"), "w") as f:
+            f.write("garbage")
+
+        worktree = cache.checkout(url(origin), "main")
+        try:
+            assert os.path.exists(os.path.join(worktree, "README.md"))
+        finally:
+            cache.release(worktree)
+
+        stats = cache.get_stats()
+        assert (stats["fetch_failures"], stats["misses"]) == (1, 2)
+
+    def test_least_recently_used_mirror_evicted(self, tmp_path):
+        """Test that the oldest idle mirror is evicted once the cache is over its limit."""
+        repos = [make_repo(tmp_path / f"repo-{n}", {"data.txt": f"{n}" * 20000}) for n in range(3)]
+        cache = RepositoryMirrorCache(str(tmp_path / "mirrors"), max_bytes=1)
+
+        in_use = cache.checkout(url(repos[0]), "main")
+        cache.release(cache.checkout(url(repos[1]), "main"))
+        cache.release(cache.checkout(url(repos[2]), "main"))
+
+        # The limit is tiny: only the mirror with a checkout in use survives
+        assert os.path.isdir(cache.mirror_path(url(repos[0])))
+        assert not os.path.isdir(cache.mirror_path(url(repos[1])))
+        assert not os.path.isdir(cache.mirror_path(url(repos[2])))
+        cache.release(in_use)
+        assert cache.get_stats()["mirrors"] == 0
+
+    def test_eviction_order(self, tmp_path):
+        """Test that eviction removes mirrors in least recently used order."""
+        repos = [make_repo(tmp_path / f"repo-{n}", {"data.txt": f"{n}"}) for n in range(3)]
+        cache = RepositoryMirrorCache(str(tmp_path / "mirrors"), max_bytes=10 ** 9)
+        for repo in repos:
+            cache.release(cache.checkout(url(repo), "main"))
+        for age, repo in zip((300, 100, 200), repos):
+            mtime = os.stat(cache.mirror_path(url(repo))).st_mtime - age
+            os.utime(cache.mirror_path(url(repo)), (mtime, mtime))
+
+        # One byte over the limit: evicting the oldest mirror is enough
+        cache.max_bytes = cache.get_stats()["size_bytes"] - 1
+        cache._evict()
+
+        assert not os.path.isdir(cache.mirror_path(url(repos[0])))
+        assert os.path.isdir(cache.mirror_path(url(repos[1])))
+        assert os.path.isdir(cache.mirror_path(url(repos[2])))
+
+
+class TestAnalyzerUsesMirrorCache:
+    """Test the GitHub analyzer cloning through the mirror cache."""
+
+    @pytest.mark.asyncio
+    async def test_clone_and_cleanup_use_cache(self, cache, origin):
+        """Test that analyses check out from the mirror and release the worktree."""
+        agent = GitHubAnalyzerAgent()
+        agent._analyze_architecture_with_llm = AsyncMock(return_value={})
+
+        with patch("app.agents.github_analyzer_agent.get_repository_mirror_cache", return_value=cache):
+            first = await agent.execute({"repo_url": url(origin), "branch": "main"})
+            second = await agent.execute({"repo_url": url(origin), "branch": "main"})
+
+        assert first["file_structure"]["file_counts"]["total_files"] == 2
+        assert second["tech_stack"]["languages"] == {"Python": 1}
+        stats = cache.get_stats()
+        assert (stats["misses"], stats["hits"], stats["checkouts"]) == (1, 1, 0)
@@ -0,0 +1,239 @@
+"""
+Unit tests for single-flight coalescing of LLM calls.
+
+These tests verify that concurrent identical calls share one upstream
+call, that errors and cancellation are handled per caller, that the
+Redis lease coordinates workers and that SimpleLLMService coalesces
+duplicate prompts.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.core.single_flight import LEASE_KEY_PREFIX, RESULT_KEY_PREFIX, SingleFlight
+from app.modules.llm_service import SimpleLLMService
+
+
+class FakeRedis:
+    """Minimal async Redis with SET NX support."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    async def delete(self, key):
+        return 1 if self.store.pop(key, None) is not None else 0
+
+    async def exists(self, key):
+        return int(key in self.store)
+
+
+class TestSingleFlight:
+    """Test in-process coalescing."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_upstream_call(self):
+        """Test that identical concurrent calls run the function once."""
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "result"
+
+        tasks = [asyncio.ensure_future(flight.do("k", upstream)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert calls == 1
+        assert [r for r, _ in results] == ["result"] * 5
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        stats = flight.get_stats()
+        assert stats["leaders"] == 1
+        assert stats["coalesced"] == 4
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_not_coalesced(self):
+        """Test that distinct requests each call upstream."""
+        flight = SingleFlight()
+        upstream = AsyncMock(side_effect=["a", "b"])
+
+        results = await asyncio.gather(flight.do("k1", upstream), flight.do("k2", upstream))
+
+        assert upstream.await_count == 2
+        assert {r for r, _ in results} == {"a", "b"}
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_not_coalesced(self):
+        """Test that a finished call is not reused."""
+        flight = SingleFlight()
+        upstream = AsyncMock(side_effect=["first", "second"])
+
+        assert (await flight.do("k", upstream))[0] == "first"
+        assert (await flight.do("k", upstream))[0] == "second"
+
+    @pytest.mark.asyncio
+    async def test_error_raised_to_all_callers(self):
+        """Test that an upstream failure reaches every waiting caller."""
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def upstream():
+            await release.wait()
+            raise ValueError("provider down")
+
+        tasks = [asyncio.ensure_future(flight.do("k", upstream)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert all(isinstance(r, ValueError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_leader_cancellation_does_not_cancel_followers(self):
+        """Test that followers still get the result if the first caller goes away."""
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def upstream():
+            await release.wait()
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+        leader.cancel()
+        release.set()
+
+        assert await follower == ("done", True)
+        assert leader.cancelled()
+
+
+class TestSingleFlightRedisLease:
+    """Test cross-worker coalescing with a Redis lease."""
+
+    @pytest.mark.asyncio
+    async def test_waits_for_result_from_lease_holder(self):
+        """Test that a worker finding the lease taken uses the published result."""
+        redis = FakeRedis()
+        redis.store[LEASE_KEY_PREFIX + "k"] = b"other-worker"
+        upstream = AsyncMock(return_value="local")
+
+        async def publish():
+            await asyncio.sleep(0.02)
+            redis.store[RESULT_KEY_PREFIX + "k"] = json.dumps({"response": "remote"}).encode()
+
+        with patch("app.core.single_flight.get_redis", AsyncMock(return_value=redis)):
+            flight = SingleFlight(use_redis=True, poll_interval=0.01)
+            result, _ = await asyncio.gather(flight.do("k", upstream), publish())
+
+        assert result == ("remote", True)
+        upstream.assert_not_awaited()
+        assert flight.get_stats()["remote_coalesced"] == 1
+
+    @pytest.mark.asyncio
+    async def test_leader_publishes_and_releases_lease(self):
+        """Test that the lease holder publishes its result and releases the lease."""
+        redis = FakeRedis()
+
+        with patch("app.core.single_flight.get_redis", AsyncMock(return_value=redis)):
+            flight = SingleFlight(use_redis=True)
+            assert await flight.do("k", AsyncMock(return_value="answer")) == ("answer", False)
+
+        assert LEASE_KEY_PREFIX + "k" not in redis.store
+        assert json.loads(redis.store[RESULT_KEY_PREFIX + "k"]) == {"response": "answer"}
+
+    @pytest.mark.asyncio
+    async def test_released_lease_without_result_takes_over(self):
+        """Test that a worker calls upstream itself if the lease holder failed."""
+        redis = FakeRedis()
+        redis.store[LEASE_KEY_PREFIX + "k"] = b"other-worker"
+
+        async def fail_other_worker():
+            await asyncio.sleep(0.02)
+            del redis.store[LEASE_KEY_PREFIX + "k"]
+
+        with patch("app.core.single_flight.get_redis", AsyncMock(return_value=redis)):
+            flight = SingleFlight(use_redis=True, poll_interval=0.01)
+            result, _ = await asyncio.gather(
+                flight.do("k", AsyncMock(return_value="mine")), fail_other_worker()
+            )
+
+        assert result == ("mine", False)
+
+    @pytest.mark.asyncio
+    async def test_redis_not_initialized_runs_locally(self):
+        """Test that coalescing falls back to in-process without Redis."""
+        with patch("app.core.single_flight.get_redis", AsyncMock(side_effect=RuntimeError("not initialized"))):
+            flight = SingleFlight(use_redis=True)
+            assert await flight.do("k", AsyncMock(return_value="x")) == ("x", False)
+
+        assert flight.get_stats()["redis_errors"] == 0
+
+
+class TestSimpleLLMServiceCoalescing:
+    """Test that SimpleLLMService coalesces duplicate prompts."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_prompts_call_provider_once(self):
+        """Test that duplicate concurrent prompts send one request upstream."""
+        calls = []
+
+        async def handler(request):
+            calls.append(json.loads(request.content))
+            await asyncio.sleep(0.02)
+            return httpx.Response(200, json={"choices": [{"message": {"content": "answer"}}]})
+
+        flight = SingleFlight()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch("app.modules.llm_service.log_interaction") as log, \
+                patch("app.modules.llm_service.get_single_flight", return_value=flight), \
+                patch("app.modules.llm_service.get_http_client", return_value=client):
+            service = SimpleLLMService()
+            service.deepseek_base_url = None
+            service.openai_api_key = "test"
+            results = await asyncio.gather(
+                *[service.call_llm("same prompt", model="gpt-4o", use_cache=False) for _ in range(3)]
+            )
+
+        assert results == ["answer"] * 3
+        assert len(calls) == 1
+        assert sorted(c[0][0]["coalesced"] for c in log.call_args_list) == [False, True, True]
+
+    @pytest.mark.asyncio
+    async def test_failure_logged_under_resolved_provider_and_model(self):
+        """Test that a failed call is logged with the provider and model actually used."""
+        async def handler(request):
+            return httpx.Response(500, text="upstream error")
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch("app.modules.llm_service.log_interaction") as log, \
+                patch("app.modules.llm_service.get_single_flight", return_value=None), \
+                patch("app.modules.llm_service.get_http_client", return_value=client):
+            service = SimpleLLMService()
+            service.deepseek_base_url = None
+            service.openai_api_key = "test"
+            await service.call_llm("failing prompt", model="gpt-4o", use_cache=False)
+
+        entry = log.call_args.args[0]
+        assert entry["error"]
+        assert entry["provider"] == "openai"
+        assert entry["model"] == "gpt-4o"
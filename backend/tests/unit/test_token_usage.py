@@ -0,0 +1,179 @@
+"""
+Unit tests for LLM token accounting.
+
+These tests verify extraction of provider-reported usage from OpenAI,
+Anthropic and Ollama responses, the local token estimate, per-execution
+usage collection and that BaseAgent logs provider counts and latency
+breakdowns instead of estimates.
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from app.agents.base_agent import BaseAgent
+from app.core.deepseek_client import DeepSeekClient
+from app.core.token_usage import (
+    CallTimer,
+    call_latency,
+    count_tokens,
+    record_llm_usage,
+    track_llm_usage,
+    usage_from_message,
+    usage_from_response,
+)
+
+
+class UsageAgent(BaseAgent):
+    """Agent making one LLM call per execution."""
+
+    async def execute(self, input_data):
+        return {"answer": await self._call_llm([AIMessage(content=input_data["question"])])}
+
+    def get_system_prompt(self):
+        return "You answer questions."
+
+
+class TestUsageExtraction:
+    """Test provider usage fields."""
+
+    def test_openai_usage(self):
+        """Test OpenAI usage fields."""
+        data = {"choices": [], "usage": {"prompt_tokens": 12, "completion_tokens": 30, "total_tokens": 42}}
+
+        assert usage_from_response(data) == {"prompt_tokens": 12, "completion_tokens": 30}
+
+    def test_anthropic_usage_includes_cached_input(self):
+        """Test Anthropic usage fields, counting cached prompt tokens as input."""
+        data = {"usage": {"input_tokens": 10, "cache_read_input_tokens": 5, "output_tokens": 7}}
+
+        assert usage_from_response(data) == {"prompt_tokens": 15, "completion_tokens": 7}
+
+    def test_ollama_usage_and_durations(self):
+        """Test Ollama eval counts and nanosecond durations."""
+        data = {
+            "response": "{}",
+            "prompt_eval_count": 26,
+            "eval_count": 290,
+            "load_duration": 5_000_000,
+            "prompt_eval_duration": 130_000_000,
+            "eval_duration": 4_200_000_000,
+        }
+
+        assert usage_from_response(data) == {
+            "prompt_tokens": 26,
+            "completion_tokens": 290,
+            "load_ms": 5.0,
+            "prompt_eval_ms": 130.0,
+            "generation_ms": 4200.0,
+        }
+
+    def test_no_usage(self):
+        """Test that responses without usage return None."""
+        assert usage_from_response({"choices": []}) is None
+        assert usage_from_message(AIMessage(content="x")) is None
+
+    def test_message_usage_metadata(self):
+        """Test LangChain usage metadata."""
+        message = AIMessage(
+            content="x",
+            usage_metadata={"input_tokens": 3, "output_tokens": 4, "total_tokens": 7},
+        )
+
+        assert usage_from_message(message) == {"prompt_tokens": 3, "completion_tokens": 4}
+
+    def test_deepseek_client_attaches_usage(self):
+        """Test that ChatDeepSeek responses carry the server's usage."""
+        client = DeepSeekClient()
+        message = client._to_message("hi", {"response": "hi", "prompt_eval_count": 5, "eval_count": 2})
+
+        assert message.usage_metadata["input_tokens"] == 5
+        assert usage_from_message(message)["completion_tokens"] == 2
+
+
+class TestCountTokens:
+    """Test the local token estimate."""
+
+    def test_empty(self):
+        """Test that empty text has no tokens."""
+        assert count_tokens("") == 0
+
+    def test_json_denser_than_prose_heuristic(self):
+        """Test that punctuation-heavy text counts more tokens than its length / 4."""
+        text = '{"a":1,"b":[1,2,3],"c":{"d":null}}'
+
+        assert count_tokens(text) > len(text) // 4
+
+    @pytest.mark.parametrize("text", ["hello world", "The quick brown fox jumps over the lazy dog."])
+    def test_prose_is_close_to_words(self, text):
+        """Test that short prose counts roughly one token per word."""
+        words = len(text.split())
+
+        assert words <= count_tokens(text) <= 2 * words + 1
+
+
+class TestUsageAccumulator:
+    """Test per-execution usage collection."""
+
+    def test_nested_contexts_roll_up(self):
+        """Test that calls in a nested context reach the enclosing one."""
+        with track_llm_usage() as outer:
+            record_llm_usage("openai", "gpt-4o", 10, 5)
+            with track_llm_usage() as inner:
+                record_llm_usage("ollama", "llama3.2:3b", 20, 8, estimated=True, generation_ms=500.0)
+
+        assert inner.tokens() == {"prompt_tokens": 20, "completion_tokens": 8}
+        assert outer.tokens() == {"prompt_tokens": 30, "completion_tokens": 13}
+        assert outer.estimated
+        assert outer.latency()["generation_seconds"] == 0.5
+
+    def test_record_without_context_is_ignored(self):
+        """Test that recording outside a tracked context is a no-op."""
+        record_llm_usage("openai", "gpt-4o", 1, 1)
+
+    def test_call_latency_from_ollama_timings(self):
+        """Test that Ollama load and prompt evaluation count as time to first token."""
+        timer = CallTimer()
+        timer.started()
+        timer.stopped()
+
+        latency = call_latency(timer, {"load_ms": 100.0, "prompt_eval_ms": 50.0, "generation_ms": 900.0})
+
+        assert latency["time_to_first_token_ms"] == 150.0
+        assert latency["generation_ms"] == 900.0
+
+
+class TestAgentExecutionAccounting:
+    """Test that agent executions log provider-reported usage."""
+
+    @pytest.mark.asyncio
+    async def test_execution_logs_provider_counts_and_latency(self):
+        """Test that log_execution receives the counts the provider reported."""
+        agent = UsageAgent(agent_type="usage_test", llm_provider="ollama", llm_model="llama3.2:3b")
+        response = AIMessage(
+            content="42",
+            usage_metadata={"input_tokens": 120, "output_tokens": 3, "total_tokens": 123},
+            response_metadata={"prompt_eval_count": 120, "eval_count": 3, "eval_duration": 250_000_000},
+        )
+        agent.llm.ainvoke = AsyncMock(return_value=response)
+
+        with patch.object(agent, "log_execution", new=AsyncMock()) as log_execution:
+            await agent._execute_with_tracking("session", {"question": "What is the answer?"})
+
+        kwargs = log_execution.await_args.kwargs
+        assert kwargs["tokens_used"] == {"prompt_tokens": 120, "completion_tokens": 3}
+        assert kwargs["latency"]["generation_seconds"] == 0.25
+        assert kwargs["latency"]["queue_seconds"] is not None
+
+    @pytest.mark.asyncio
+    async def test_execution_without_llm_calls_estimates(self):
+        """Test that executions without recorded calls fall back to estimates."""
+        agent = UsageAgent(agent_type="usage_test", llm_provider="ollama", llm_model="llama3.2:3b")
+        agent.execute = AsyncMock(return_value={"answer": "cached"})
+
+        with patch.object(agent, "log_execution", new=AsyncMock()) as log_execution:
+            await agent._execute_with_tracking("session", {"question": "q"})
+
+        tokens = log_execution.await_args.kwargs["tokens_used"]
+        assert tokens["prompt_tokens"] > 0 and tokens["completion_tokens"] > 0
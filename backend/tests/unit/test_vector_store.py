@@ -0,0 +1,318 @@
+"""
+Unit tests for the matrix-backed vector store.
+
+This module tests the MatrixVectorStore functionality including:
+- Row normalisation and matrix growth
+- Top-k cosine similarity search
+- Boolean-mask metadata filtering
+- Deletes, updates and the IVF approximate index
+- Memory-mapped append-only segments and compaction
+"""
+
+import numpy as np
+import pytest
+
+from app.services.vector_store import (
+    IVFFlatIndex, MatrixVectorStore, MmapVectorStore, create_index
+)
+from app.services.vector_store.matrix_store import normalize_rows
+
+
+class TestMatrixVectorStore:
+    """Test cases for MatrixVectorStore."""
+
+    @pytest.fixture
+    def store(self):
+        """Create a small populated vector store."""
+        store = MatrixVectorStore(dimension=3, initial_capacity=2)
+        store.add_many(
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [1.0, 1.0, 0.0], [0.0, 0.0, 2.0]],
+            [
+                {"project_id": "p1", "chunk_type": "architecture"},
+                {"project_id": "p1", "chunk_type": "service"},
+                {"project_id": "p2", "chunk_type": "service"},
+                {"project_id": "p2", "chunk_type": "technology", "frameworks": ["fastapi"]},
+            ]
+        )
+        return store
+
+    def test_normalize_rows_handles_zero_vectors(self):
+        """Test that zero rows stay zero instead of producing NaNs."""
+        normalized = normalize_rows(np.array([[3.0, 4.0], [0.0, 0.0]]))
+
+        assert normalized.dtype == np.float32
+        assert np.allclose(normalized, [[0.6, 0.8], [0.0, 0.0]])
+
+    def test_add_grows_capacity(self, store):
+        """Test that adding past the initial capacity grows the matrix."""
+        assert len(store) == 4
+        assert store.capacity >= 4
+        assert np.allclose(np.linalg.norm(store.vectors, axis=1), 1.0)
+        assert list(store.column("project_id")) == ["p1", "p1", "p2", "p2"]
+
+    def test_add_rejects_wrong_dimension(self, store):
+        """Test that vectors of the wrong dimension are rejected."""
+        with pytest.raises(ValueError):
+            store.add([1.0, 0.0], {"project_id": "p1"})
+
+    def test_search_returns_ranked_top_k(self, store):
+        """Test that search ranks rows by cosine similarity."""
+        results = store.search([1.0, 0.1, 0.0], top_k=2)
+
+        assert [row for row, _ in results] == [0, 2]
+        assert results[0][1] > results[1][1]
+
+    def test_search_with_filters(self, store):
+        """Test that filters exclude non-matching rows."""
+        results = store.search([1.0, 0.0, 0.0], top_k=5, filters={"project_id": "p2"})
+
+        assert [row for row, _ in results] == [2, 3]
+
+    def test_search_with_missing_key_filter(self, store):
+        """Test filtering on a key that only some rows have."""
+        results = store.search(
+            [0.0, 0.0, 1.0], top_k=5, filters={"frameworks": ["fastapi"]}
+        )
+
+        assert [row for row, _ in results] == [3]
+
+    def test_search_with_candidate_rows(self, store):
+        """Test that only the given candidate rows are scored."""
+        results = store.search([1.0, 0.0, 0.0], top_k=5, rows=[3, 1])
+
+        assert [row for row, _ in results] == [1, 3]
+        assert store.search([1.0, 0.0, 0.0], rows=[2, 3], filters={"project_id": "p1"}) == []
+
+    def test_search_no_matches(self, store):
+        """Test that a filter matching nothing returns no results."""
+        assert store.search([1.0, 0.0, 0.0], filters={"project_id": "missing"}) == []
+
+    def test_clear(self, store):
+        """Test clearing the store."""
+        store.clear()
+
+        assert len(store) == 0
+        assert store.metadata == []
+        assert store.search([1.0, 0.0, 0.0]) == []
+
+    def test_delete_where_compacts_rows(self, store):
+        """Test deleting rows by metadata filter."""
+        deleted = store.delete_where({"project_id": "p1"})
+
+        assert deleted == 2
+        assert len(store) == 2
+        assert list(store.column("project_id")) == ["p2", "p2"]
+        assert [row for row, _ in store.search([1.0, 1.0, 0.0], top_k=1)] == [0]
+
+    def test_update_replaces_vector(self, store):
+        """Test replacing a row vector in place."""
+        store.update(0, [0.0, 0.0, 1.0])
+
+        assert store.search([0.0, 0.0, 1.0], top_k=2)[0][1] == pytest.approx(1.0)
+        with pytest.raises(IndexError):
+            store.update(10, [0.0, 0.0, 1.0])
+
+
+class TestIVFFlatIndex:
+    """Test cases for the IVF approximate nearest-neighbour index."""
+
+    @pytest.fixture
+    def vectors(self):
+        """Clustered random vectors."""
+        rng = np.random.default_rng(42)
+        centers = rng.normal(size=(8, 16))
+        labels = rng.integers(0, 8, size=400)
+        return (centers[labels] + 0.1 * rng.normal(size=(400, 16))).astype(np.float32)
+
+    @pytest.fixture
+    def ivf_store(self, vectors):
+        """Store with a trained IVF index."""
+        store = MatrixVectorStore(
+            dimension=16, index=IVFFlatIndex(n_lists=8, n_probe=2, min_train_size=100)
+        )
+        store.add_many(vectors, [{"project_id": f"p{i % 2}"} for i in range(len(vectors))])
+        return store
+
+    def test_create_index(self):
+        """Test creating index backends by name."""
+        assert create_index("exact").name == "exact"
+        assert create_index("ivf_flat", n_probe=3).n_probe == 3
+        with pytest.raises(ValueError):
+            create_index("unknown")
+
+    def test_index_trains_after_min_size(self, ivf_store):
+        """Test that the index trains once enough rows exist."""
+        stats = ivf_store.index.get_stats()
+
+        assert stats["trained"] is True
+        assert stats["indexed_vectors"] == 400
+
+    def test_more_lists_than_vectors(self, vectors):
+        """Test that training on a small corpus clamps the number of lists."""
+        store = MatrixVectorStore(
+            dimension=16, index=IVFFlatIndex(n_lists=64, n_probe=2, min_train_size=10)
+        )
+        store.add_many(vectors[:10], [{"project_id": "p0"} for _ in range(10)])
+
+        stats = store.index.get_stats()
+        assert stats["trained"] is True
+        assert stats["n_lists"] == 10
+        assert store.search(vectors[3], top_k=1, n_probe=10)[0][0] == 3
+
+    def test_kmeans_clamps_to_sample_count(self, vectors):
+        """Test k-means with fewer samples than requested lists."""
+        index = IVFFlatIndex(n_lists=32)
+        samples = vectors[:5] / np.linalg.norm(vectors[:5], axis=1, keepdims=True)
+
+        centroids = index._kmeans(np.ascontiguousarray(samples), 32)
+
+        assert centroids.shape == (5, 16)
+
+    def test_full_probe_matches_exact(self, ivf_store, vectors):
+        """Test that probing every list reproduces exact search."""
+        query = vectors[5]
+
+        approx = ivf_store.search(query, top_k=10, n_probe=8)
+        exact = ivf_store.search(query, top_k=10, exact=True)
+
+        assert [row for row, _ in approx] == [row for row, _ in exact]
+
+    def test_explicit_rows_scored_exactly(self, ivf_store, vectors):
+        """Test that a row scope outside the probed lists still returns its best matches."""
+        query = vectors[0]
+        scope = [row for row, _ in ivf_store.search(-query, top_k=40, exact=True)]
+        mask = np.zeros(len(ivf_store), dtype=bool)
+        mask[scope] = True
+
+        scoped = ivf_store.search(query, top_k=5, n_probe=1, rows=scope)
+        exact = ivf_store.search(query, top_k=5, mask=mask, exact=True)
+
+        assert len(scoped) == 5
+        assert [row for row, _ in scoped] == [row for row, _ in exact]
+
+    def test_approximate_search_recall(self, ivf_store, vectors):
+        """Test that clustered data gets high recall with few probes."""
+        hits = 0
+        for query in vectors[:20]:
+            approx = {row for row, _ in ivf_store.search(query, top_k=5)}
+            exact = {row for row, _ in ivf_store.search(query, top_k=5, exact=True)}
+            hits += len(approx & exact)
+
+        assert hits / 100 >= 0.9
+
+    def test_incremental_insert_and_delete(self, ivf_store, vectors):
+        """Test that inserts are indexed and deletes renumber rows."""
+        row = ivf_store.add(vectors[0], {"project_id": "p9"})
+        assert ivf_store.search(vectors[0], top_k=1, filters={"project_id": "p9"})[0][0] == row
+
+        ivf_store.delete_where({"project_id": "p0"})
+
+        assert len(ivf_store) == 201
+        assert ivf_store.index.get_stats()["indexed_vectors"] == 201
+        results = ivf_store.search(vectors[0], top_k=1, filters={"project_id": "p9"})
+        assert results[0][0] == 200
+
+    def test_save_and_load(self, ivf_store, tmp_path):
+        """Test persisting and restoring a trained index."""
+        path = tmp_path / "ivf_flat_index.npz"
+        ivf_store.index.save(path)
+
+        restored = MatrixVectorStore(dimension=16, index=IVFFlatIndex(n_probe=2))
+        restored.bulk_load(ivf_store.vectors, ivf_store.metadata, index_path=path)
+
+        assert restored.index.is_trained
+        assert np.allclose(restored.index.centroids, ivf_store.index.centroids)
+        query = ivf_store.vectors[3]
+        assert [row for row, _ in restored.search(query, top_k=5)] == [
+            row for row, _ in ivf_store.search(query, top_k=5)
+        ]
+
+
+class TestMmapVectorStore:
+    """Test cases for the memory-mapped segment store."""
+
+    @pytest.fixture
+    def make_store(self, tmp_path):
+        """Factory for stores opened on the same directory."""
+        def _make(**kwargs):
+            store = MmapVectorStore(tmp_path / "segments", dimension=3, **kwargs)
+            store.open()
+            return store
+        return _make
+
+    def test_append_and_reopen(self, make_store):
+        """Test that appended rows are memory-mapped after reopening."""
+        store = make_store()
+        store.add_many([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], [{"project_id": "p1"}, {"project_id": "p2"}])
+
+        reopened = make_store()
+
+        assert isinstance(reopened._matrix, np.memmap)
+        assert len(reopened) == 2
+        assert reopened.metadata[1] == {"project_id": "p2"}
+        assert reopened.search([0.0, 1.0, 0.0], top_k=1)[0][0] == 1
+
+    def test_indexing_only_appends(self, make_store, tmp_path):
+        """Test that adding rows grows files without rewriting them."""
+        store = make_store()
+        store.add([1.0, 0.0, 0.0], {"project_id": "p1"})
+        vectors_file = next((tmp_path / "segments").glob("vectors.*.f32"))
+        first = vectors_file.read_bytes()
+
+        store.add([0.0, 1.0, 0.0], {"project_id": "p1"})
+
+        assert vectors_file.read_bytes()[:len(first)] == first
+        assert vectors_file.stat().st_size == 2 * 3 * 4
+
+    def test_delete_tombstones_until_compaction(self, make_store):
+        """Test that deletes are hidden immediately and reclaimed by compaction."""
+        store = make_store()
+        store.add_many(
+            [[1.0, 0.0, 0.0], [0.9, 0.1, 0.0], [0.0, 1.0, 0.0]],
+            [{"project_id": "p1"}, {"project_id": "p2"}, {"project_id": "p2"}]
+        )
+
+        assert store.delete_where({"project_id": "p1"}) == 1
+        assert len(store) == 2
+        assert store.needs_compaction
+        assert [row for row, _ in store.search([1.0, 0.0, 0.0], top_k=3)] == [1, 2]
+        assert len(make_store()) == 2
+
+        assert store.compact() == 1
+        assert store.get_stats()["generation"] == 2
+        assert [row for row, _ in store.search([1.0, 0.0, 0.0], top_k=3)] == [0, 1]
+
+        reopened = make_store()
+        assert reopened.get_stats() == store.get_stats()
+        assert [m["project_id"] for m in reopened.metadata] == ["p2", "p2"]
+
+    def test_update_in_place(self, make_store):
+        """Test that updates overwrite the vector record and persist."""
+        store = make_store()
+        store.add_many([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], [{"n": 0}, {"n": 1}])
+
+        store.update(0, [0.0, 0.0, 1.0], {"n": 2})
+
+        reopened = make_store()
+        assert reopened.search([0.0, 0.0, 1.0], top_k=1) == [(0, pytest.approx(1.0))]
+        assert reopened.metadata[0] == {"n": 2}
+
+    def test_recovers_from_interrupted_append(self, make_store, tmp_path):
+        """Test that a vector tail without metadata is truncated on open."""
+        store = make_store()
+        store.add([1.0, 0.0, 0.0], {"project_id": "p1"})
+        vectors_file = next((tmp_path / "segments").glob("vectors.*.f32"))
+        with open(vectors_file, "ab") as f:
+            f.write(np.ones(5, dtype=np.float32).tobytes())
+
+        reopened = make_store()
+
+        assert len(reopened) == 1
+        assert vectors_file.stat().st_size == 3 * 4
+
+    def test_dimension_mismatch(self, make_store, tmp_path):
+        """Test that opening with a different dimension fails."""
+        make_store()
+
+        with pytest.raises(ValueError):
+            MmapVectorStore(tmp_path / "segments", dimension=4).open()
@@ -0,0 +1,175 @@
+"""
+Unit tests for the database workflow checkpointer.
+
+These tests run small LangGraph graphs against a SQLite database file
+shared by separate checkpointer instances (standing in for workers). They
+verify resuming on another instance, that unchanged channels are not
+written again, compression, batched writes and pruning.
+"""
+
+import operator
+from typing import Annotated, TypedDict
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, StateGraph
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core import workflow_checkpointer
+from app.core.database import Base
+from app.core.workflow_checkpointer import DatabaseCheckpointSaver, get_workflow_checkpointer
+from app.models.workflow_checkpoint import WorkflowCheckpoint, WorkflowCheckpointBlob, WorkflowCheckpointWrite
+
+CONFIG = {"configurable": {"thread_id": "session-1"}}
+
+
+class State(TypedDict):
+    count: int
+    log: Annotated[list, operator.add]
+    document: str
+
+
+def build_graph(checkpointer, interrupt=True):
+    """Three counting steps, pausing before the last one like a review gate."""
+    graph = StateGraph(State)
+    graph.add_node("first", lambda state: {"count": state["count"] + 1, "log": ["first"]})
+    graph.add_node("second", lambda state: {"count": state["count"] + 1, "log": ["second"]})
+    graph.add_node("review", lambda state: {"count": state["count"] + 1, "log": ["review"]})
+    graph.set_entry_point("first")
+    graph.add_edge("first", "second")
+    graph.add_edge("second", "review")
+    graph.add_edge("review", END)
+    return graph.compile(checkpointer=checkpointer, interrupt_before=["review"] if interrupt else None)
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'checkpoints.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[model.__table__ for model in (WorkflowCheckpoint, WorkflowCheckpointBlob, WorkflowCheckpointWrite)]
+        )
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def count_rows(session_factory, model, **filters):
+    async with session_factory() as session:
+        query = select(func.count()).select_from(model.__table__).filter_by(**filters)
+        return (await session.execute(query)).scalar()
+
+
+class TestDatabaseCheckpointSaver:
+    """Test persistence, deltas, batching and pruning."""
+
+    @pytest.mark.asyncio
+    async def test_resume_on_another_instance(self, session_factory):
+        """Test that a session paused on one instance resumes on another."""
+        worker_a = DatabaseCheckpointSaver(session_factory)
+        await build_graph(worker_a).ainvoke({"count": 0, "log": [], "document": "spec"}, CONFIG)
+        await worker_a.aflush()
+
+        worker_b = DatabaseCheckpointSaver(session_factory)
+        graph_b = build_graph(worker_b)
+        paused = await graph_b.aget_state(CONFIG)
+        result = await graph_b.ainvoke(None, CONFIG)
+
+        assert paused.values["count"] == 2
+        assert paused.next == ("review",)
+        assert result["count"] == 3
+        assert result["log"] == ["first", "second", "review"]
+
+    @pytest.mark.asyncio
+    async def test_unchanged_channels_written_once(self, session_factory):
+        """Test that checkpoints only add the channels their step changed."""
+        saver = DatabaseCheckpointSaver(session_factory)
+        await build_graph(saver, interrupt=False).ainvoke({"count": 0, "log": [], "document": "x" * 5000}, CONFIG)
+        await saver.aflush()
+
+        assert await count_rows(session_factory, WorkflowCheckpoint) == 5
+        assert await count_rows(session_factory, WorkflowCheckpointBlob, channel="document") == 1
+        assert await count_rows(session_factory, WorkflowCheckpointBlob, channel="count") == 4
+        async with session_factory() as session:
+            document = (await session.execute(
+                select(WorkflowCheckpointBlob.__table__).filter_by(channel="document")
+            )).one()
+        assert document.value_type.endswith("+zlib")
+        assert len(document.value) < 200
+
+    @pytest.mark.asyncio
+    async def test_writes_batched_until_flush(self, session_factory):
+        """Test that a run's checkpoints are written in one transaction."""
+        saver = DatabaseCheckpointSaver(session_factory)
+
+        with patch("app.core.workflow_checkpointer.settings.workflow_checkpoint_flush_seconds", 60):
+            await build_graph(saver, interrupt=False).ainvoke({"count": 0, "log": [], "document": ""}, CONFIG)
+            assert await count_rows(session_factory, WorkflowCheckpoint) == 0
+            await saver.aflush()
+
+        assert await count_rows(session_factory, WorkflowCheckpoint) == 5
+        assert saver.get_stats()["flushes"] == 1
+        assert saver.get_stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_prune_keeps_latest_state(self, session_factory):
+        """Test that pruning deletes old checkpoints and unreferenced values only."""
+        saver = DatabaseCheckpointSaver(session_factory)
+        graph = build_graph(saver, interrupt=False)
+        await graph.ainvoke({"count": 0, "log": [], "document": "spec"}, CONFIG)
+        await saver.aflush()
+        blobs_before = await count_rows(session_factory, WorkflowCheckpointBlob)
+
+        deleted = await saver.aprune("session-1", keep_last=1)
+
+        assert deleted == 4
+        assert await count_rows(session_factory, WorkflowCheckpoint) == 1
+        assert await count_rows(session_factory, WorkflowCheckpointBlob) < blobs_before
+        state = await graph.aget_state(CONFIG)
+        assert state.values == {"count": 3, "log": ["first", "second", "review"], "document": "spec"}
+
+    @pytest.mark.asyncio
+    async def test_threads_pruned_automatically(self, session_factory):
+        """Test pruning after every workflow_checkpoint_prune_every checkpoints."""
+        saver = DatabaseCheckpointSaver(session_factory)
+
+        with patch("app.core.workflow_checkpointer.settings.workflow_checkpoint_keep_last", 2), \
+                patch("app.core.workflow_checkpointer.settings.workflow_checkpoint_prune_every", 3):
+            await build_graph(saver, interrupt=False).ainvoke({"count": 0, "log": [], "document": ""}, CONFIG)
+            await saver.aflush()
+
+        assert await count_rows(session_factory, WorkflowCheckpoint) == 2
+        assert saver.get_stats()["pruned"] == 3
+
+    @pytest.mark.asyncio
+    async def test_delete_thread(self, session_factory):
+        """Test that deleting a thread removes its rows only."""
+        saver = DatabaseCheckpointSaver(session_factory)
+        graph = build_graph(saver, interrupt=False)
+        await graph.ainvoke({"count": 0, "log": [], "document": ""}, CONFIG)
+        await graph.ainvoke({"count": 0, "log": [], "document": ""}, {"configurable": {"thread_id": "session-2"}})
+
+        await saver.adelete_thread("session-1")
+
+        assert await count_rows(session_factory, WorkflowCheckpoint, thread_id="session-1") == 0
+        assert await count_rows(session_factory, WorkflowCheckpointBlob, thread_id="session-1") == 0
+        assert await count_rows(session_factory, WorkflowCheckpoint, thread_id="session-2") == 5
+
+
+class TestSharedCheckpointer:
+    """Test the checkpointer shared by workflow graphs."""
+
+    def test_backend_selected_by_settings(self):
+        """Test that one checkpointer is shared and 'memory' selects MemorySaver."""
+        with patch.object(workflow_checkpointer, "_checkpointer", None), \
+                patch("app.core.workflow_checkpointer.settings.workflow_checkpointer", "memory"):
+            first = get_workflow_checkpointer()
+            assert isinstance(first, MemorySaver)
+            assert get_workflow_checkpointer() is first
+
+        with patch.object(workflow_checkpointer, "_checkpointer", None), \
+                patch("app.core.workflow_checkpointer.settings.workflow_checkpointer", "database"):
+            assert isinstance(get_workflow_checkpointer(), DatabaseCheckpointSaver)
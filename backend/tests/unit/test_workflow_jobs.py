@@ -0,0 +1,223 @@
+"""
+Unit tests for the workflow job queue.
+
+Handlers are small coroutines recording what ran, so the tests exercise
+scheduling (tenant fairness, per-session ordering), retries, leases,
+cancellation and progress events without running LLM workflows.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+
+from app.core.workflow_jobs import JobStatus, WorkflowJobQueue
+from app.workflows.jobs import job_event_message, run_continue_job
+
+
+async def wait_for_jobs(*jobs, timeout=5.0):
+    """Wait until all jobs are finished."""
+    async def finished():
+        while any(job.status in (JobStatus.QUEUED, JobStatus.RUNNING) for job in jobs):
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(finished(), timeout)
+
+
+@pytest_asyncio.fixture
+async def make_queue():
+    queues = []
+
+    def make(**kwargs):
+        kwargs = {"workers": 1, "tenant_concurrency": 1, "lease_seconds": 5.0, "retry_backoff_seconds": 0.0, **kwargs}
+        queue = WorkflowJobQueue(**kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        await queue.stop()
+
+
+class TestWorkflowJobQueue:
+    """Test scheduling, retries, leases and cancellation."""
+
+    @pytest.mark.asyncio
+    async def test_job_result_and_events(self, make_queue):
+        """Test that a job's result is stored and its events are published."""
+        queue = make_queue()
+
+        async def handler(job, queue):
+            queue.progress(job, stage="requirements_review")
+            return {"current_stage": "requirements_review"}
+
+        queue.register_handler("start", handler)
+        events = queue.subscribe("session-1")
+        job = queue.submit("start", "session-1", "tenant-a", {"document_path": "doc.md"})
+        await wait_for_jobs(job)
+
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.result == {"current_stage": "requirements_review"}
+        received = [events.get_nowait()["event"] for _ in range(events.qsize())]
+        assert received == ["job_queued", "job_started", "job_progress", "job_succeeded"]
+
+    @pytest.mark.asyncio
+    async def test_tenants_served_round_robin(self, make_queue):
+        """Test that a tenant's burst does not delay another tenant's job."""
+        queue = make_queue()
+        order = []
+
+        async def handler(job, queue):
+            order.append(job.session_id)
+
+        queue.register_handler("start", handler)
+        jobs = [queue.submit("start", f"a-{n}", "tenant-a") for n in range(4)]
+        jobs.append(queue.submit("start", "b-0", "tenant-b"))
+        await wait_for_jobs(*jobs)
+
+        assert order == ["a-0", "b-0", "a-1", "a-2", "a-3"]
+
+    @pytest.mark.asyncio
+    async def test_tenant_concurrency_limited(self, make_queue):
+        """Test that one tenant never holds more than its share of workers."""
+        queue = make_queue(workers=4, tenant_concurrency=2)
+        running = {"tenant-a": 0, "tenant-b": 0}
+        peak = {"tenant-a": 0, "tenant-b": 0}
+
+        async def handler(job, queue):
+            running[job.tenant] += 1
+            peak[job.tenant] = max(peak[job.tenant], running[job.tenant])
+            await asyncio.sleep(0.02)
+            running[job.tenant] -= 1
+
+        queue.register_handler("start", handler)
+        jobs = [queue.submit("start", f"a-{n}", "tenant-a") for n in range(6)]
+        jobs += [queue.submit("start", f"b-{n}", "tenant-b") for n in range(2)]
+        await wait_for_jobs(*jobs)
+
+        assert peak == {"tenant-a": 2, "tenant-b": 2}
+
+    @pytest.mark.asyncio
+    async def test_session_jobs_run_in_order(self, make_queue):
+        """Test that a session's jobs never overlap and keep submission order."""
+        queue = make_queue(workers=3, tenant_concurrency=3)
+        log = []
+
+        async def handler(job, queue):
+            log.append(("start", job.kind))
+            await asyncio.sleep(0.02)
+            log.append(("end", job.kind))
+
+        queue.register_handler("start", handler)
+        queue.register_handler("continue", handler)
+        jobs = [
+            queue.submit("start", "session-1", "tenant-a"),
+            queue.submit("continue", "session-1", "tenant-a"),
+        ]
+        await wait_for_jobs(*jobs)
+
+        assert log == [("start", "start"), ("end", "start"), ("start", "continue"), ("end", "continue")]
+
+    @pytest.mark.asyncio
+    async def test_failed_job_retried(self, make_queue):
+        """Test that failures are retried until the job succeeds or runs out of attempts."""
+        queue = make_queue(max_attempts=3)
+
+        async def flaky(job, queue):
+            if job.attempts < 2:
+                raise RuntimeError("provider unavailable")
+            return {"attempt": job.attempts}
+
+        async def broken(job, queue):
+            raise RuntimeError("document missing")
+
+        queue.register_handler("flaky", flaky)
+        queue.register_handler("broken", broken)
+        recovered = queue.submit("flaky", "session-1", "tenant-a")
+        failed = queue.submit("broken", "session-2", "tenant-b")
+        await wait_for_jobs(recovered, failed)
+
+        assert recovered.status == JobStatus.SUCCEEDED
+        assert recovered.result == {"attempt": 2}
+        assert failed.status == JobStatus.FAILED
+        assert failed.attempts == 3
+        assert failed.error == "document missing"
+        assert queue.get_stats()["retried"] == 3
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_retried(self, make_queue):
+        """Test that a job without heartbeats is retried while a heartbeating one runs on."""
+        queue = make_queue(workers=2, tenant_concurrency=2, lease_seconds=0.1, max_attempts=2)
+
+        async def stuck_once(job, queue):
+            if job.attempts == 1:
+                await asyncio.sleep(10)
+            return "done"
+
+        async def slow_but_alive(job, queue):
+            for _ in range(5):
+                await asyncio.sleep(0.05)
+                queue.heartbeat(job)
+            return "done"
+
+        queue.register_handler("stuck", stuck_once)
+        queue.register_handler("alive", slow_but_alive)
+        stuck = queue.submit("stuck", "session-1", "tenant-a")
+        alive = queue.submit("alive", "session-2", "tenant-a")
+        await wait_for_jobs(stuck, alive)
+
+        assert stuck.status == JobStatus.SUCCEEDED
+        assert stuck.attempts == 2
+        assert alive.attempts == 1
+        assert queue.get_stats()["leases_expired"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancel_session_jobs(self, make_queue):
+        """Test that cancelling a session stops its running job and drops queued ones."""
+        queue = make_queue()
+        started = asyncio.Event()
+
+        async def handler(job, queue):
+            started.set()
+            await asyncio.sleep(10)
+
+        queue.register_handler("start", handler)
+        queue.register_handler("continue", handler)
+        running = queue.submit("start", "session-1", "tenant-a")
+        queued = queue.submit("continue", "session-1", "tenant-a")
+        await asyncio.wait_for(started.wait(), 5)
+
+        cancelled = await queue.cancel("session-1")
+
+        assert cancelled == 2
+        assert running.status == JobStatus.CANCELLED
+        assert queued.status == JobStatus.CANCELLED
+        assert queue.get_active_job("session-1") is None
+        assert queue.get_stats()["running"] == 0
+
+
+class TestArchitectureJobs:
+    """Test the architecture workflow job handlers."""
+
+    @pytest.mark.asyncio
+    async def test_continue_retry_resumes_applied_feedback(self, make_queue):
+        """Test that a retried continue job resumes instead of re-applying feedback."""
+        feedback = {"decision": "approved", "comments": None}
+        workflow = AsyncMock()
+        workflow.get_status.return_value = {"human_feedback": feedback, "current_stage": "requirements_review"}
+        workflow.resume.return_value = {"current_stage": "architecture_review", "errors": []}
+        queue = make_queue()
+        queue.register_handler("architecture.continue", run_continue_job)
+
+        with patch("app.workflows.jobs.ArchitectureWorkflow", return_value=workflow):
+            job = queue.submit("architecture.continue", "session-1", "tenant-a", {"human_feedback": feedback})
+            job.attempts = 1  # As after a failed first attempt
+            await wait_for_jobs(job)
+
+        workflow.continue_workflow.assert_not_called()
+        workflow.resume.assert_awaited_once()
+        assert job.result == {"current_stage": "architecture_review", "errors": []}
+        message = job_event_message({"event": "job_succeeded", "job": job.to_dict()}, "architecture_review")
+        assert message["type"] == "workflow_update"
+        assert message["status"] == "review_required"
+        assert message["progress"] == 0.8